@@ -9,6 +9,7 @@ import socket
 import secrets
 import string
 import json
+import hashlib
 from enum import Enum
 from typing import List, Tuple, Dict, Any, Optional
 from pathlib import Path
@@ -25,6 +26,10 @@ from app.helper.downloader import DownloaderHelper
 from app.helper.directory import DirectoryHelper
 
 
+# 插件注册文件的合并写入窗口（秒），多个插件集中注册时只写入一次
+REGISTRY_WRITE_DEBOUNCE = 0.3
+
+
 def generate_token(length=32):
     """生成指定长度的随机安全token"""
     alphabet = string.ascii_letters + string.digits
@@ -52,11 +57,31 @@ class ProcessManager:
         self.plugin = plugin_instance
         self.state = ServerState.STOPPED
         self.process = None
+        # 多进程模式下的工作进程：序号 -> 进程
+        self.workers: Dict[int, subprocess.Popen] = {}
+        self._worker_failures: Dict[int, int] = {}
+        # 监控循环记录的工作进程健康检查结果：序号 -> {"health", "checked_at"}
+        self._worker_health: Dict[int, Dict[str, Any]] = {}
+        # 每次停止工作进程时递增，监控线程在锁外重启工作进程后据此判断期间是否发生过停止/重启
+        self._workers_generation = 0
         self.monitor_thread = None
         self.monitor_stop_event = None
         self._state_lock = threading.Lock()
         self._operation_lock = threading.Lock()
         self._restart_lock = threading.Lock()
+        # 后台资源采样，状态接口直接读取样本
+        from .process_metrics import ProcessMetricsSampler
+        self.metrics_sampler = ProcessMetricsSampler(self.get_process_pids)
+        # 最近一次启动的耗时统计
+        self.startup_report: Dict[str, Any] = {}
+        # 监控循环中获取的工具执行统计，状态接口直接读取
+        self.tool_stats: Optional[Dict[str, Any]] = None
+        # 插件调用通道，MCP服务器进程通过它直接调用插件注册的工具和提示
+        from .utils.plugin_channel import PluginChannelServer, socket_path_for
+        self.plugin_channel = PluginChannelServer(
+            socket_path_for(str(self.plugin._plugin_dir)),
+            lambda: self.plugin._config.get("auth_token", ""),
+        )
 
         # 在初始化时清理可能存在的其他MCP服务器进程
         self._cleanup_existing_servers()
@@ -118,6 +143,7 @@ class ProcessManager:
                             is_mcp_server = (
                                 "server.py" in cmd_line
                                 or "sse_server.py" in cmd_line
+                                or "worker_router.py" in cmd_line
                                 or "mcpserver" in cmd_line.lower()
                             )
 
@@ -239,17 +265,27 @@ class ProcessManager:
             self._set_state(ServerState.STARTING)
 
             try:
+                prerequisites_start = time.perf_counter()
                 if not self._check_prerequisites():
                     self._set_state(ServerState.ERROR)
                     return False
+                self.startup_report = {
+                    "started_at": time.time(),
+                    "prerequisites_ms": round((time.perf_counter() - prerequisites_start) * 1000, 1),
+                    "dependency_check": self.plugin._dependency_check,
+                }
 
                 self._cleanup_existing_process()
 
+                if self.plugin._config.get("plugin_channel", True):
+                    self.plugin_channel.start()
+
                 if self._start_process():
                     self._set_state(ServerState.RUNNING)
                     # 延迟5秒等待服务进程完全启动
                     time.sleep(5)
                     self._start_monitor()
+                    self.metrics_sampler.start()
                     logger.info("服务器启动成功")
 
                     # 处理暂存的工具注册请求
@@ -274,10 +310,15 @@ class ProcessManager:
         self._set_state(ServerState.STOPPING)
         try:
             self._stop_monitor()
+            self.metrics_sampler.stop()
             if self.get_state() == ServerState.STOPPED:
                 logger.info("服务器处于停止状态，跳过...")
+                self._stop_workers()
+                self.plugin_channel.stop()
                 return True
             self._stop_process()
+            self._stop_workers()
+            self.plugin_channel.stop()
             self._set_state(ServerState.STOPPED)
             return True
 
@@ -359,8 +400,17 @@ class ProcessManager:
     def _start_process(self) -> bool:
         """启动新进程并等待健康检查通过"""
         try:
-            cmd = self._build_start_command()
+            spawn_start = time.perf_counter()
+            if self.worker_count() > 1:
+                # 多进程模式：先启动工作进程，再启动对外监听的前置路由
+                if not self._start_workers():
+                    self._stop_workers()
+                    return False
+                cmd = self._build_router_command()
+            else:
+                cmd = self._build_start_command()
             if not cmd:
+                self._stop_workers()
                 return False
 
             logger.info(f"启动命令: {' '.join(cmd)}")
@@ -373,8 +423,10 @@ class ProcessManager:
             logger.info(f"服务器进程已启动，PID: {self.process.pid}")
 
             if self._wait_for_startup():
+                self.startup_report["time_to_healthy_ms"] = round((time.perf_counter() - spawn_start) * 1000, 1)
                 logger.info(
-                    f"MCP服务器已成功启动 - {self.plugin._config['host']}:{self.plugin._config['port']}"
+                    f"MCP服务器已成功启动 - {self.plugin._config['host']}:{self.plugin._config['port']}，"
+                    f"启动耗时: {self.startup_report}"
                 )
                 return True
             else:
@@ -391,13 +443,32 @@ class ProcessManager:
                 except:
                     pass
                 self.process = None
+            self._stop_workers()
             return False
 
-    def _build_start_command(self) -> Optional[List[str]]:
-        """构建MCP服务器启动命令，包含认证token和配置参数"""
+    def worker_count(self) -> int:
+        """配置的工作进程数，1表示单进程模式"""
+        try:
+            return max(1, int(self.plugin._config.get("workers", 1)))
+        except (TypeError, ValueError):
+            return 1
+
+    def worker_port(self, index: int) -> int:
+        """工作进程监听的端口，依次为对外端口+1、+2…"""
+        return int(self.plugin._config["port"]) + 1 + index
+
+    def _build_start_command(self, worker_index: Optional[int] = None) -> Optional[List[str]]:
+        """构建MCP服务器启动命令，包含认证token和配置参数
+
+        Args:
+            worker_index: 多进程模式下的工作进程序号，工作进程只监听本机地址
+        """
         try:
             server_type = self.plugin._config.get("server_type", "streamable")
-            if server_type == "sse":
+            if worker_index is not None:
+                # 工作进程统一使用server.py，SSE通过统一模式挂载
+                script_path = self.plugin._plugin_dir / "server.py"
+            elif server_type == "sse":
                 script_path = self.plugin._plugin_dir / "sse_server.py"
             else:
                 script_path = self.plugin._plugin_dir / "server.py"
@@ -427,13 +498,18 @@ class ProcessManager:
                 Path(settings.LOG_PATH) / "plugins" / "mcpserver.log"
             )
 
+            if worker_index is None:
+                host, port = self.plugin._config["host"], self.plugin._config["port"]
+            else:
+                host, port = "127.0.0.1", self.worker_port(worker_index)
+
             cmd = [
                 str(self.plugin._python_bin),
                 str(script_path),
                 "--host",
-                self.plugin._config["host"],
+                host,
                 "--port",
-                str(self.plugin._config["port"]),
+                str(port),
                 "--log-level",
                 self.plugin._config["log_level"],
                 "--log-file",
@@ -444,20 +520,255 @@ class ProcessManager:
                 auth_token,
                 "--access-token",
                 access_token,
+                "--tool-max-concurrency",
+                str(self.plugin._config.get("tool_max_concurrency", 4)),
+                "--tool-max-queue",
+                str(self.plugin._config.get("tool_max_queue", 16)),
             ]
 
+            # 插件调用通道不可用时MCP服务器只使用HTTP接口调用插件
+            if self.plugin_channel.running:
+                cmd.extend(["--plugin-channel", self.plugin_channel.path])
+
             # 根据配置决定是否启用认证
             if require_auth:
                 cmd.append("--require-auth")
             else:
                 cmd.append("--no-auth")
 
+            # 统一模式在同一进程中同时提供Streamable HTTP和SSE
+            if worker_index is None:
+                if server_type == "unified":
+                    cmd.append("--enable-sse")
+            else:
+                cmd.extend(["--worker-id", str(worker_index)])
+                if server_type in ("sse", "unified"):
+                    cmd.append("--enable-sse")
+
             return cmd
 
         except Exception as e:
             logger.error(f"构建启动命令失败: {str(e)}")
             return None
 
+    def _build_router_command(self) -> List[str]:
+        """构建多进程模式前置路由的启动命令"""
+        cmd = [
+            str(self.plugin._python_bin),
+            str(self.plugin._plugin_dir / "worker_router.py"),
+            "--host",
+            self.plugin._config["host"],
+            "--port",
+            str(self.plugin._config["port"]),
+            "--log-level",
+            self.plugin._config["log_level"],
+            "--log-file",
+            str(Path(settings.LOG_PATH) / "plugins" / "mcpserver.log"),
+        ]
+        auth_token = self.plugin._config.get("auth_token")
+        if auth_token:
+            cmd.extend(["--auth-token", auth_token])
+        for index in sorted(self.workers):
+            cmd.extend(["--upstream", f"http://127.0.0.1:{self.worker_port(index)}"])
+        return cmd
+
+    def _launch_worker(self, index: int) -> Optional[subprocess.Popen]:
+        """启动单个工作进程并返回进程对象，不写入 self.workers"""
+        cmd = self._build_start_command(worker_index=index)
+        if not cmd:
+            return None
+        # 清理占用该端口的残留MCP进程
+        self._find_and_terminate_mcp_processes(self.worker_port(index), "127.0.0.1")
+        process = subprocess.Popen(cmd, cwd=str(self.plugin._plugin_dir))
+        logger.info(f"工作进程 {index} 已启动，PID: {process.pid}，端口: {self.worker_port(index)}")
+        return process
+
+    def _spawn_worker(self, index: int) -> bool:
+        """启动单个工作进程（不等待健康检查）"""
+        process = self._launch_worker(index)
+        if process is None:
+            return False
+        self.workers[index] = process
+        self._worker_failures[index] = 0
+        return True
+
+    def _start_workers(self) -> bool:
+        """启动所有工作进程并等待全部通过健康检查"""
+        self._stop_workers()
+        count = self.worker_count()
+        logger.info(f"多进程模式：启动 {count} 个工作进程")
+        for index in range(count):
+            if not self._spawn_worker(index):
+                return False
+        pending = set(self.workers)
+        if not self._wait_for_workers(pending):
+            logger.error(f"工作进程启动超时: {sorted(pending)}")
+            return False
+        checked_at = time.time()
+        for index in self.workers:
+            self._worker_health[index] = {"health": True, "checked_at": checked_at}
+        return True
+
+    def _wait_for_workers(self, pending: set, processes: Optional[Dict[int, subprocess.Popen]] = None) -> bool:
+        """等待工作进程通过健康检查，pending中会移除已就绪的序号
+
+        Args:
+            pending: 待检查的工作进程序号
+            processes: 序号 -> 进程，默认使用 self.workers；重启时传入尚未替换进去的新进程
+        """
+        if processes is None:
+            processes = self.workers
+        deadline = time.time() + self.plugin._config["max_startup_time"]
+        interval = self.plugin._config["health_check_interval"]
+        while pending and time.time() < deadline:
+            for index in list(pending):
+                process = processes.get(index)
+                if process is None or process.poll() is not None:
+                    logger.error(f"工作进程 {index} 启动后退出")
+                    return False
+                if self._worker_health_check(index):
+                    pending.discard(index)
+            if pending:
+                time.sleep(interval)
+        return not pending
+
+    def _worker_health_check(self, index: int, timeout: float = 5) -> bool:
+        """直接向工作进程发送健康检查请求，绕过前置路由"""
+        try:
+            response = requests.get(f"http://127.0.0.1:{self.worker_port(index)}/health", timeout=timeout)
+            return response.status_code == 200
+        except Exception as e:
+            logger.debug(f"工作进程 {index} 健康检查失败: {e}")
+            return False
+
+    def _snapshot_workers(self) -> Tuple[int, Dict[int, subprocess.Popen]]:
+        """返回工作进程的快照，需持有 _operation_lock 调用"""
+        return self._workers_generation, dict(self.workers)
+
+    def _is_current_worker(self, generation: int, index: int, process: subprocess.Popen) -> bool:
+        """快照之后服务未被停止或重启、且该序号仍是同一个进程，需持有 _operation_lock 调用"""
+        return (
+            self._workers_generation == generation
+            and self.workers.get(index) is process
+            and self.get_state() == ServerState.RUNNING
+        )
+
+    def _check_workers(self, generation: int, snapshot: Dict[int, subprocess.Popen]):
+        """逐个检查工作进程快照，已退出或连续两次健康检查失败的工作进程单独重启
+
+        健康检查和重启都在 _operation_lock 之外进行，不阻塞服务的启停；
+        结果写回前在锁内确认工作进程未被停止或替换。
+        """
+        for index, process in sorted(snapshot.items()):
+            if self.monitor_stop_event.is_set():
+                return
+            alive = process.poll() is None
+            healthy = alive and self._worker_health_check(index)
+            with self._operation_lock:
+                if not self._is_current_worker(generation, index, process):
+                    continue
+                self._worker_health[index] = {"health": healthy, "checked_at": time.time()}
+                if healthy:
+                    self._worker_failures[index] = 0
+                    continue
+                failures = self._worker_failures.get(index, 0) + 1
+                self._worker_failures[index] = failures
+
+            if alive and failures < 2:
+                logger.warning(f"工作进程 {index} 健康检查失败 ({failures}/2)")
+                continue
+
+            logger.warning(
+                f"工作进程 {index} {'未响应' if alive else f'已退出，返回码: {process.poll()}'}，正在单独重启"
+            )
+            self._restart_worker(generation, index, process)
+
+    def _restart_worker(self, generation: int, index: int, old_process: subprocess.Popen) -> bool:
+        """重启单个工作进程，其它工作进程上的会话不受影响
+
+        只在启动新进程（清理端口并创建进程）时短暂持有 _operation_lock，等待新进程就绪不持锁；
+        替换前再次确认服务未被停止或重启，否则丢弃新进程。启动失败时保留旧进程，下一轮继续重试。
+        """
+        self._terminate_popen(old_process)
+        with self._operation_lock:
+            if not self._is_current_worker(generation, index, old_process):
+                return False
+            process = self._launch_worker(index)
+        if process is None:
+            return False
+
+        ready = self._wait_for_workers({index}, {index: process})
+
+        with self._operation_lock:
+            swapped = self._is_current_worker(generation, index, old_process)
+            if swapped:
+                self.workers[index] = process
+                self._worker_failures[index] = 0
+                self._worker_health[index] = {"health": ready, "checked_at": time.time()}
+        if not swapped:
+            logger.info(f"工作进程 {index} 重启期间服务已停止或重启，丢弃新进程")
+            self._terminate_popen(process)
+            return False
+        if ready:
+            logger.info(f"工作进程 {index} 重启成功")
+        else:
+            logger.error(f"工作进程 {index} 重启后健康检查未通过")
+        return ready
+
+    def _stop_workers(self):
+        """停止所有工作进程"""
+        self._workers_generation += 1
+        for index, process in list(self.workers.items()):
+            logger.info(f"正在停止工作进程 {index}，PID: {process.pid}")
+            self._terminate_popen(process)
+        self.workers.clear()
+        self._worker_failures.clear()
+        self._worker_health.clear()
+
+    @staticmethod
+    def _terminate_popen(process: subprocess.Popen, timeout: float = 5):
+        """先发送SIGTERM，超时后强制终止"""
+        if process.poll() is not None:
+            return
+        try:
+            process.send_signal(signal.SIGTERM)
+            process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            logger.info(f"进程 {process.pid} 未能优雅退出，强制终止")
+            process.kill()
+            process.wait(timeout=timeout)
+        except Exception as e:
+            logger.error(f"终止进程 {process.pid} 失败: {str(e)}")
+
+    def get_worker_status(self) -> List[Dict[str, Any]]:
+        """返回各工作进程的状态，健康状态取监控循环最近一次检查的结果，不在此发起请求"""
+        status = []
+        for index, process in sorted(self.workers.items()):
+            alive = process.poll() is None
+            checked = self._worker_health.get(index) or {}
+            status.append({
+                "worker": index,
+                "pid": process.pid,
+                "port": self.worker_port(index),
+                "alive": alive,
+                "health": alive and checked.get("health", False),
+                "checked_at": checked.get("checked_at"),
+                "failures": self._worker_failures.get(index, 0),
+            })
+        return status
+
+    def get_process_pids(self) -> List[int]:
+        """返回存活的服务器进程ID，对外监听的进程在前，其后是各工作进程"""
+        processes = [self.process] + [process for _, process in sorted(self.workers.items())]
+        return [process.pid for process in processes if process is not None and process.poll() is None]
+
+    def get_process_metrics(self) -> Optional[Dict[str, Any]]:
+        """返回最新的资源样本，样本缺失或过期时（如采样线程未运行）立即采样一次"""
+        sample = self.metrics_sampler.latest(max_age=self.metrics_sampler.interval * 3)
+        if sample is None:
+            sample = self.metrics_sampler.sample()
+        return sample
+
     def _wait_for_startup(self) -> bool:
         """等待服务器启动并进行健康检查"""
         start_time = time.time()
@@ -477,13 +788,42 @@ class ProcessManager:
 
     def _health_check(self) -> bool:
         """向服务器发送健康检查请求"""
+        return self.health_payload() is not None
+
+    def health_payload(self) -> Optional[Dict[str, Any]]:
+        """发送健康检查请求，健康时返回响应内容，否则返回None"""
         try:
             response = requests.get(self.plugin._health_check_url, timeout=5)
-            return response.status_code == 200
+            if response.status_code != 200:
+                return None
+            try:
+                return response.json()
+            except ValueError:
+                return {}
 
         except Exception as e:
             logger.debug(f"健康检查请求失败: {e}")
-            return False
+            return None
+
+    def refresh_tool_stats(self):
+        """从MCP Server获取工具并发限制与执行统计，供状态接口读取"""
+        try:
+            port = int(self.plugin._config["port"])
+            headers = {}
+            auth_token = self.plugin._config.get("auth_token")
+            if auth_token:
+                headers["Authorization"] = f"Bearer {auth_token}"
+            response = requests.get(
+                f"http://localhost:{port}/control/tools/stats",
+                headers=headers,
+                timeout=5
+            )
+            if response.status_code == 200:
+                self.tool_stats = {**response.json(), "updated_at": time.time()}
+                return
+            logger.debug(f"获取工具执行统计失败: HTTP {response.status_code}")
+        except Exception as e:
+            logger.debug(f"获取工具执行统计失败: {str(e)}")
 
     def _stop_process(self):
         """停止进程，先尝试优雅终止，失败后强制终止"""
@@ -602,6 +942,9 @@ class ProcessManager:
                         continue
                     process_running = self.is_running()
 
+                    # 多进程模式下只在锁内取工作进程快照，健康检查和重启在锁外进行
+                    worker_snapshot = self._snapshot_workers() if process_running and self.workers else None
+
                     if not process_running:
                         if self.monitor_stop_event.is_set():
                             break
@@ -620,6 +963,14 @@ class ProcessManager:
                         logger.info(f"将在{delay}秒后重启服务器")
 
                 # 在锁外等待和重启，避免长时间持有锁
+                if worker_snapshot:
+                    # 单个工作进程异常时只重启该进程
+                    self._check_workers(*worker_snapshot)
+                if process_running:
+                    self.refresh_tool_stats()
+                else:
+                    self.tool_stats = None
+
                 if restart_needed:
                     if self.monitor_stop_event.wait(delay):
                         logger.info("监控线程在等待期间收到停止信号，取消重启")
@@ -683,10 +1034,18 @@ class MCPServer(_PluginBase, metaclass=SingletonClass):
         "enable_plugin_tools": True,
         "plugin_tool_timeout": 30,
         "max_plugin_tools": 100,
+        "tool_max_concurrency": 4,  # 每个工具默认最大并发数
+        "tool_max_queue": 16,  # 每个工具默认最大排队数
+        "workers": 1,  # 工作进程数，大于1时启用多进程模式
+        "plugin_channel": True,  # 通过本地套接字调用插件工具，不可用时回退到HTTP接口
     }
 
     _venv_path = None
     _python_bin = None
+    # 虚拟环境内记录已安装依赖指纹的文件
+    _DEPENDENCY_STAMP_FILE = ".mcpserver-deps.json"
+    # 最近一次依赖检查结果：skipped/installed/failed
+    _dependency_check = None
     _health_check_url = None
     _server_script_path = None
     _downloader_helper = DownloaderHelper()
@@ -724,6 +1083,8 @@ class MCPServer(_PluginBase, metaclass=SingletonClass):
 
         previous_server_type = self._config.get("server_type", "streamable")
         previous_require_auth = self._config.get("require_auth", True)
+        previous_workers = str(self._config.get("workers", 1))
+        previous_plugin_channel = self._config.get("plugin_channel", True)
 
         # update _config from config
         self._config.update(config.get("config", {}))
@@ -731,7 +1092,10 @@ class MCPServer(_PluginBase, metaclass=SingletonClass):
         current_server_type = self._config.get("server_type", "streamable")
         current_require_auth = self._config.get("require_auth", True)
 
-        server_type_changed = previous_server_type != current_server_type
+        # 工作进程数、插件调用通道开关变化同样需要重启服务器
+        server_type_changed = (previous_server_type != current_server_type
+                               or previous_workers != str(self._config.get("workers", 1))
+                               or previous_plugin_channel != self._config.get("plugin_channel", True))
         auth_config_changed = previous_require_auth != current_require_auth
 
         if enable_changed or server_type_changed or auth_config_changed:
@@ -787,7 +1151,7 @@ class MCPServer(_PluginBase, metaclass=SingletonClass):
             return
 
     def _ensure_venv(self) -> bool:
-        """确保虚拟环境存在并安装了所需依赖"""
+        """确保虚拟环境存在并安装了所需依赖，依赖与解释器版本未变化时跳过安装"""
         try:
             if not self._python_bin.exists():
                 logger.info(f"创建虚拟环境: {self._venv_path}")
@@ -800,12 +1164,26 @@ class MCPServer(_PluginBase, metaclass=SingletonClass):
                     return False
 
                 logger.info("虚拟环境创建成功")
-
-                # 安装依赖
-                self._install_dependencies()
             else:
                 logger.info(f"虚拟环境已存在: {self._venv_path}")
 
+            stamp = self._dependency_stamp()
+            stamp_file = self._venv_path / self._DEPENDENCY_STAMP_FILE
+            try:
+                installed = json.loads(stamp_file.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                installed = None
+
+            if installed == stamp:
+                logger.info("依赖未变化，跳过安装")
+                self._dependency_check = "skipped"
+            elif self._install_dependencies():
+                stamp_file.write_text(json.dumps(stamp), encoding="utf-8")
+                self._dependency_check = "installed"
+            else:
+                # 安装失败不写入标记，下次启动重试
+                self._dependency_check = "failed"
+
             return True
 
         except Exception as e:
@@ -813,6 +1191,23 @@ class MCPServer(_PluginBase, metaclass=SingletonClass):
             logger.error(traceback.format_exc())
             return False
 
+    def _dependency_stamp(self) -> Dict[str, str]:
+        """依赖列表与虚拟环境解释器版本的指纹，版本从 pyvenv.cfg 读取，无需启动解释器"""
+        python_version = ""
+        try:
+            for line in (self._venv_path / "pyvenv.cfg").read_text(encoding="utf-8").splitlines():
+                key, _, value = line.partition("=")
+                if key.strip() in ("version", "version_info"):
+                    python_version = value.strip()
+                    break
+        except OSError:
+            pass
+        deps = json.dumps(sorted(self._config["dependencies"]))
+        return {
+            "dependencies": hashlib.sha256(deps.encode("utf-8")).hexdigest(),
+            "python": python_version,
+        }
+
     def _install_dependencies(self) -> bool:
         """安装依赖包"""
         try:
@@ -976,7 +1371,9 @@ class MCPServer(_PluginBase, metaclass=SingletonClass):
 
                             is_python = "python" in cmd_line.lower()
                             is_server = (
-                                "server.py" in cmd_line or "sse_server.py" in cmd_line
+                                "server.py" in cmd_line
+                                or "sse_server.py" in cmd_line
+                                or "worker_router.py" in cmd_line
                             )
 
                             if is_python and is_server:
@@ -1055,6 +1452,7 @@ class MCPServer(_PluginBase, metaclass=SingletonClass):
             "auth_token": self._mask_token(self._config.get("auth_token", "")),
             "requires_auth": True,
             "resource_usage": None,
+            "tool_stats": None,
             "state": "unknown",
         }
 
@@ -1065,6 +1463,8 @@ class MCPServer(_PluginBase, metaclass=SingletonClass):
             status["url"] = f"http://{host}:{port}/sse/"
         else:
             status["url"] = f"http://{host}:{port}/mcp/"
+        if server_type == "unified":
+            status["sse_url"] = f"http://{host}:{port}/sse/"
 
         if self._process_manager:
             status["state"] = self._process_manager.get_state().value
@@ -1072,15 +1472,25 @@ class MCPServer(_PluginBase, metaclass=SingletonClass):
 
             if status["running"] and self._process_manager.process:
                 status["pid"] = self._process_manager.process.pid
+                if self._process_manager.workers:
+                    status["workers"] = self._process_manager.get_worker_status()
+                plugin_channel = self._process_manager.plugin_channel
+                status["plugin_channel"] = {
+                    "enabled": plugin_channel.running,
+                    "path": plugin_channel.path,
+                    **plugin_channel.stats,
+                }
 
-                if self._process_manager._health_check():
+                health_payload = self._process_manager.health_payload()
+                if health_payload is not None:
                     status["health"] = True
+                    status["tool_stats"] = self._process_manager.tool_stats
+                    status["startup"] = self._get_startup_report(health_payload)
                 else:
                     logger.warning("健康检查失败")
 
                 try:
-                    resource_usage = self._get_process_resource_usage(status["pid"])
-                    status["resource_usage"] = resource_usage
+                    status["resource_usage"] = self._get_process_resource_usage()
                 except Exception as e:
                     logger.debug(f"获取进程资源占用信息失败: {str(e)}")
                     status["resource_usage"] = None
@@ -1095,56 +1505,26 @@ class MCPServer(_PluginBase, metaclass=SingletonClass):
         )
         return status
 
-    def _get_process_resource_usage(self, pid: int) -> Optional[Dict[str, Any]]:
-        """获取指定进程的资源占用信息"""
-        try:
-            proc = psutil.Process(pid)
-
-            # 获取进程信息
-            with proc.oneshot():
-                # CPU和内存信息
-                cpu_percent = proc.cpu_percent(interval=0.1)  # 0.1秒采样间隔
-                memory_info = proc.memory_info()
-                memory_percent = proc.memory_percent()
-
-                # 线程和文件描述符
-                num_threads = proc.num_threads()
-                try:
-                    num_fds = proc.num_fds() if hasattr(proc, "num_fds") else 0
-                except (psutil.AccessDenied, AttributeError):
-                    num_fds = 0
-
-                # 计算运行时长
-                runtime_seconds = time.time() - proc.create_time()
-                runtime_hours = runtime_seconds / 3600
-                if runtime_hours < 1:
-                    runtime = f"{runtime_seconds / 60:.1f} 分钟"
-                elif runtime_hours < 24:
-                    runtime = f"{runtime_hours:.1f} 小时"
-                else:
-                    runtime = f"{runtime_hours / 24:.1f} 天"
-
-                return {
-                    "cpu_percent": cpu_percent,
-                    "memory_mb": memory_info.rss / 1024 / 1024,  # 物理内存 MB
-                    "memory_percent": memory_percent,
-                    "runtime": runtime,
-                    "num_threads": num_threads,
-                    "num_fds": num_fds,
-                }
+    def _get_startup_report(self, health_payload: Dict[str, Any]) -> Dict[str, Any]:
+        """合并插件侧的启动耗时与服务器健康检查中返回的启动耗时"""
+        if "workers" in health_payload:
+            server_report = [worker.get("startup") for worker in health_payload["workers"]]
+        else:
+            server_report = health_payload.get("startup")
+        return {
+            "plugin": dict(self._process_manager.startup_report),
+            "server": server_report,
+        }
 
-        except ImportError:
-            logger.debug("psutil模块未安装，无法获取进程资源信息")
-            return None
-        except psutil.NoSuchProcess:
-            logger.debug(f"进程 {pid} 不存在")
-            return None
-        except psutil.AccessDenied:
-            logger.debug(f"无权限访问进程 {pid}")
-            return None
-        except Exception as e:
-            logger.debug(f"获取进程 {pid} 资源信息时出错: {str(e)}")
+    def _get_process_resource_usage(self) -> Optional[Dict[str, Any]]:
+        """获取服务器进程的资源占用信息，读取后台采样结果"""
+        sample = self._process_manager.get_process_metrics() if self._process_manager else None
+        if not sample:
             return None
+        return {
+            key: sample[key]
+            for key in ("cpu_percent", "memory_mb", "memory_percent", "runtime", "num_threads", "num_fds")
+        }
 
     def _mask_token(self, token: str) -> str:
         """掩盖token，只显示前4位和后4位"""
@@ -1533,104 +1913,25 @@ class MCPServer(_PluginBase, metaclass=SingletonClass):
 
             pid = status["pid"]
 
-            # 获取详细的进程资源统计
-            try:
-                proc = psutil.Process(pid)
-
-                # 获取进程信息
-                with proc.oneshot():
-                    # 基本信息
-                    name = proc.name()
-                    status_str = proc.status()
-                    create_time_timestamp = proc.create_time()  # 保持原始时间戳
-
-                    # CPU和内存信息
-                    cpu_percent = proc.cpu_percent(interval=0.5)  # 0.5秒采样间隔
-                    memory_info = proc.memory_info()
-                    memory_percent = proc.memory_percent()
-
-                    # 线程和文件描述符
-                    num_threads = proc.num_threads()
-                    try:
-                        num_fds = proc.num_fds() if hasattr(proc, "num_fds") else 0
-                    except (psutil.AccessDenied, AttributeError):
-                        num_fds = 0
-
-                    # 网络连接 - 兼容不同版本的psutil
-                    try:
-                        # 尝试使用新版本的方法
-                        try:
-                            connections = len(proc.net_connections())
-                        except AttributeError:
-                            # 如果不存在，使用旧版本的方法
-                            connections = len(proc.connections())
-                    except (psutil.AccessDenied, psutil.NoSuchProcess):
-                        connections = 0
-
-                    # 计算运行时长
-                    runtime_seconds = time.time() - create_time_timestamp
-                    runtime_hours = runtime_seconds / 3600
-                    if runtime_hours < 1:
-                        runtime = f"{runtime_seconds / 60:.1f} 分钟"
-                    elif runtime_hours < 24:
-                        runtime = f"{runtime_hours:.1f} 小时"
-                    else:
-                        runtime = f"{runtime_hours / 24:.1f} 天"
-
-                    process_stats = {
-                        "pid": pid,
-                        "name": name,
-                        "status": status_str,
-                        "cpu_percent": cpu_percent,
-                        "memory_mb": memory_info.rss / 1024 / 1024,  # 物理内存 MB
-                        "virtual_memory_mb": memory_info.vms
-                        / 1024
-                        / 1024,  # 虚拟内存 MB
-                        "memory_percent": memory_percent,
-                        "create_time": create_time_timestamp,  # 返回原始时间戳
-                        "runtime": runtime,
-                        "num_threads": num_threads,
-                        "num_fds": num_fds,
-                        "connections": connections,
-                    }
-
-                    return {
-                        "message": "获取进程统计信息成功",
-                        "process_stats": process_stats,
-                        "server_status": status,
-                        "enable": self._enable,
-                    }
-
-            except ImportError:
-                return {
-                    "message": "psutil模块未安装，无法获取进程统计信息",
-                    "error": True,
-                    "process_stats": None,
-                    "enable": self._enable,
-                }
-            except psutil.NoSuchProcess:
-                return {
-                    "message": f"进程 {pid} 不存在",
-                    "error": True,
-                    "process_stats": None,
-                    "enable": self._enable,
-                }
-            except psutil.AccessDenied:
+            # 读取后台采样结果，不在请求线程中阻塞采样
+            sample = self._process_manager.get_process_metrics()
+            if not sample:
                 return {
-                    "message": f"无权限访问进程 {pid}",
-                    "error": True,
-                    "process_stats": None,
-                    "enable": self._enable,
-                }
-            except Exception as e:
-                logger.error(f"获取进程统计信息时出错: {str(e)}")
-                return {
-                    "message": f"获取进程统计信息时出错: {str(e)}",
+                    "message": f"无法获取进程 {pid} 的资源信息",
                     "error": True,
                     "process_stats": None,
                     "enable": self._enable,
                 }
 
+            return {
+                "message": "获取进程统计信息成功",
+                "process_stats": sample,
+                "history": self._process_manager.metrics_sampler.series(),
+                "sample_interval": self._process_manager.metrics_sampler.interval,
+                "server_status": status,
+                "enable": self._enable,
+            }
+
         except Exception as e:
             logger.error(f"获取进程统计信息API失败: {str(e)}")
             logger.error(traceback.format_exc())
@@ -2107,6 +2408,10 @@ class MCPServer(_PluginBase, metaclass=SingletonClass):
             # 停止令牌重试机制
             self._stop_token_retry_mechanism()
 
+            # 写出尚在合并窗口内的插件注册更新
+            from .utils.file_operations import flush_pending_writes
+            flush_pending_writes()
+
             if self._process_manager:
                 self._process_manager.stop_server()
             logger.info("MCPServer服务已停止...")
@@ -2262,9 +2567,11 @@ class MCPServer(_PluginBase, metaclass=SingletonClass):
                 }
                 return existing_tools
 
-            # 使用原子操作更新文件
-            if atomic_update_json(tools_file, update_tools, default_value={}):
-                logger.info(f"已安全保存插件工具注册信息: {plugin_id}")
+            # 使用原子操作更新文件，窗口内的多次更新合并写入
+            if atomic_update_json(tools_file, update_tools, default_value={},
+                                  debounce=REGISTRY_WRITE_DEBOUNCE,
+                                  on_written=self._on_plugin_tools_written):
+                logger.info(f"已提交插件工具注册信息: {plugin_id}")
             else:
                 logger.error(f"保存插件工具注册信息失败: {plugin_id}")
 
@@ -2272,6 +2579,43 @@ class MCPServer(_PluginBase, metaclass=SingletonClass):
             logger.error(f"通知MCP Server注册工具失败: {str(e)}")
             logger.error(traceback.format_exc())
 
+    def _on_plugin_tools_written(self, success: bool):
+        """插件工具注册文件写入完成"""
+        if success:
+            logger.info("已安全保存插件工具注册信息")
+            self._notify_mcp_server_reload("tools")
+        else:
+            logger.error("保存插件工具注册信息失败")
+
+    def _on_plugin_prompts_written(self, success: bool):
+        """插件提示注册文件写入完成"""
+        if success:
+            logger.info("已安全保存插件提示注册信息")
+            self._notify_mcp_server_reload("prompts")
+        else:
+            logger.error("保存插件提示注册信息失败")
+
+    def _notify_mcp_server_reload(self, target: str):
+        """通知MCP Server进程重新加载插件注册文件，失败时由服务器的兜底检查处理"""
+        if not self._process_manager or self._process_manager.get_state() != ServerState.RUNNING:
+            return
+        try:
+            port = int(self._config["port"])
+            headers = {}
+            auth_token = self._config.get("auth_token")
+            if auth_token:
+                headers["Authorization"] = f"Bearer {auth_token}"
+            response = requests.post(
+                f"http://localhost:{port}/control/plugins/reload",
+                params={"target": target},
+                headers=headers,
+                timeout=5
+            )
+            if response.status_code != 200:
+                logger.warning(f"通知MCP Server重新加载插件{target}失败: HTTP {response.status_code}")
+        except Exception as e:
+            logger.debug(f"通知MCP Server重新加载插件{target}失败: {e}")
+
     def _process_pending_registrations(self):
         """处理暂存的工具注册请求"""
         if not self._pending_registrations:
@@ -2351,8 +2695,10 @@ class MCPServer(_PluginBase, metaclass=SingletonClass):
                     logger.debug(f"插件工具信息不存在: {plugin_id}")
                 return existing_tools
 
-            # 使用原子操作更新文件
-            if not atomic_update_json(tools_file, remove_plugin_tools, default_value={}):
+            # 使用原子操作更新文件，窗口内的多次更新合并写入
+            if not atomic_update_json(tools_file, remove_plugin_tools, default_value={},
+                                      debounce=REGISTRY_WRITE_DEBOUNCE,
+                                      on_written=self._on_plugin_tools_written):
                 logger.error(f"移除插件工具注册信息失败: {plugin_id}")
 
         except Exception as e:
@@ -2445,9 +2791,11 @@ class MCPServer(_PluginBase, metaclass=SingletonClass):
                 }
                 return existing_prompts
 
-            # 使用原子操作更新文件
-            if atomic_update_json(prompts_file, update_prompts, default_value={}):
-                logger.info(f"已安全保存插件提示注册信息: {plugin_id}")
+            # 使用原子操作更新文件，窗口内的多次更新合并写入
+            if atomic_update_json(prompts_file, update_prompts, default_value={},
+                                  debounce=REGISTRY_WRITE_DEBOUNCE,
+                                  on_written=self._on_plugin_prompts_written):
+                logger.info(f"已提交插件提示注册信息: {plugin_id}")
             else:
                 logger.error(f"保存插件提示注册信息失败: {plugin_id}")
 
@@ -2473,8 +2821,10 @@ class MCPServer(_PluginBase, metaclass=SingletonClass):
                     logger.debug(f"插件提示信息不存在: {plugin_id}")
                 return existing_prompts
 
-            # 使用原子操作更新文件
-            if not atomic_update_json(prompts_file, remove_plugin_prompts, default_value={}):
+            # 使用原子操作更新文件，窗口内的多次更新合并写入
+            if not atomic_update_json(prompts_file, remove_plugin_prompts, default_value={},
+                                      debounce=REGISTRY_WRITE_DEBOUNCE,
+                                      on_written=self._on_plugin_prompts_written):
                 logger.error(f"移除插件提示注册信息失败: {plugin_id}")
 
         except Exception as e:
@@ -3,12 +3,67 @@
 包含TokenManager和BearerAuthMiddleware，供两种服务器类型使用
 """
 
+import hmac
+import ipaddress
 import logging
-from starlette.middleware.base import BaseHTTPMiddleware
+from typing import Optional
 from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
 
 logger = logging.getLogger(__name__)
 
+# 控制端点前缀：无论是否启用认证，都需要Bearer Token
+CONTROL_PATH_PREFIX = "/control/"
+
+
+def bearer_header(token: Optional[str]) -> Optional[bytes]:
+    """预先编码完整的Authorization头，请求时直接比较原始字节"""
+    return b"Bearer " + token.encode("utf-8") if token else None
+
+
+def _is_loopback(scope: Scope) -> bool:
+    """请求是否来自本机"""
+    client = scope.get("client")
+    if not client:
+        return False
+    try:
+        return ipaddress.ip_address(client[0]).is_loopback
+    except ValueError:
+        return False
+
+
+def authorize_request(scope: Scope, expected: Optional[bytes], allow_loopback: bool = False) -> Optional[str]:
+    """
+    校验请求的Bearer Token
+
+    Args:
+        scope: ASGI请求
+        expected: 预先编码的期望Authorization头，None表示服务器未设置Token
+        allow_loopback: 服务器未设置Token时是否放行本机请求
+
+    Returns:
+        认证失败时返回错误信息，通过时返回None
+    """
+    # 无token时拒绝所有请求（确保安全性）
+    if expected is None:
+        if allow_loopback and _is_loopback(scope):
+            return None
+        return "服务器未设置认证Token，拒绝访问"
+
+    # 验证Authorization头
+    auth_header = b""
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            auth_header = value
+            break
+
+    if not auth_header.startswith(b"Bearer "):
+        return "认证失败，请提供Bearer Token"
+
+    if not hmac.compare_digest(auth_header, expected):
+        return "认证失败，提供的Token无效"
+    return None
+
 
 class TokenManager:
     """Token管理器，管理API认证token和MoviePilot access token"""
@@ -27,6 +82,16 @@ class TokenManager:
         else:
             logger.warning("未设置 MoviePilot access_token，访问 MoviePilot API 可能受限")
 
+    @property
+    def token(self) -> Optional[str]:
+        return self._token
+
+    @token.setter
+    def token(self, token: Optional[str]):
+        # 先算好期望的请求头再整体替换引用，认证中间件无需加锁即可读到一致的值
+        self.expected_header = bearer_header(token)
+        self._token = token
+
     def get_token(self) -> str:
         """获取当前API认证token"""
         return self.token
@@ -36,7 +101,7 @@ class TokenManager:
         return self.access_token
 
     def set_token(self, token: str):
-        """设置新的API认证token"""
+        """设置新的API认证token，立即对后续请求生效"""
         self.token = token
         logger.info("API认证token已更新")
 
@@ -46,52 +111,42 @@ class TokenManager:
         logger.info("MoviePilot access_token已更新")
 
 
-class BearerAuthMiddleware(BaseHTTPMiddleware):
-    """Bearer Token认证中间件"""
+class BearerAuthMiddleware:
+    """Bearer Token认证中间件
+
+    纯ASGI实现：认证通过后直接调用下游应用，不包装响应体，流式响应（SSE、streamable HTTP）原样透传。
+    Authorization头按原始字节与TokenManager预先编码的期望值做常量时间比较。
+    控制端点（/control/）始终需要认证；未设置Token且未启用认证时，控制端点只接受本机请求。
+    """
 
-    def __init__(self, app, token_manager: TokenManager, exclude_paths: list = None, require_auth: bool = True):
-        super().__init__(app)
+    def __init__(self, app: ASGIApp, token_manager: TokenManager, exclude_paths: list = None,
+                 require_auth: bool = True):
+        self.app = app
         self.token_manager = token_manager
-        self.exclude_paths = exclude_paths or ["/health"]
+        self.exclude_paths = frozenset(exclude_paths or ["/health"])
         self.require_auth = require_auth
 
-    async def dispatch(self, request, call_next):
-        # 检查是否是排除的路径（不需要认证）
-        if request.url.path in self.exclude_paths:
-            return await call_next(request)
-
-        # 如果不需要认证，直接通过
-        if not self.require_auth:
-            logger.debug("认证已禁用，跳过Token验证")
-            return await call_next(request)
-
-        # 获取当前token
-        current_token = self.token_manager.get_token()
-
-        # 无token时拒绝所有请求（确保安全性）
-        if not current_token:
-            return JSONResponse(
-                {"message": "服务器未设置认证Token，拒绝访问", "error": "unauthorized"},
-                status_code=401
-            )
-
-        # 验证Authorization头
-        auth_header = request.headers.get("Authorization", "")
-        if not auth_header.startswith("Bearer "):
-            return JSONResponse(
-                {"message": "认证失败，请提供Bearer Token", "error": "unauthorized"},
-                status_code=401
-            )
-
-        token = auth_header.replace("Bearer ", "")
-        if token != current_token:
-            return JSONResponse(
-                {"message": "认证失败，提供的Token无效", "error": "unauthorized"},
-                status_code=401
-            )
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        # 只认证HTTP请求；排除的路径和禁用认证时（控制端点除外）直接通过
+        if scope["type"] != "http" or scope["path"] in self.exclude_paths or (
+                not self.require_auth and not scope["path"].startswith(CONTROL_PATH_PREFIX)):
+            await self.app(scope, receive, send)
+            return
+
+        # 读取一次当前期望值，token轮换时后续请求立即使用新值
+        error = authorize_request(scope, self.token_manager.expected_header,
+                                  allow_loopback=not self.require_auth)
+        if error:
+            await self._reject(error, scope, receive, send)
+            return
 
         # 认证通过
-        return await call_next(request)
+        await self.app(scope, receive, send)
+
+    @staticmethod
+    async def _reject(message: str, scope: Scope, receive: Receive, send: Send) -> None:
+        response = JSONResponse({"message": message, "error": "unauthorized"}, status_code=401)
+        await response(scope, receive, send)
 
 
 def create_token_manager(auth_token: str = None, access_token: str = None) -> TokenManager:
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+BearerAuthMiddleware 吞吐量基准测试
+在进程内（httpx.ASGITransport）对 /health 与无状态 streamable HTTP 的 /mcp 端点发送请求，
+对比认证关闭、当前纯ASGI认证中间件、旧版基于 BaseHTTPMiddleware 的实现，输出每秒请求数。
+
+用法（在安装了 mcp 的虚拟环境中运行）:
+    python benchmarks/bench_auth.py --requests 3000 --concurrency 16
+"""
+
+import argparse
+import asyncio
+import contextlib
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx  # noqa: E402
+import mcp.types as types  # noqa: E402
+from mcp.server.lowlevel import Server  # noqa: E402
+from mcp.server.streamable_http_manager import StreamableHTTPSessionManager  # noqa: E402
+from starlette.applications import Starlette  # noqa: E402
+from starlette.middleware import Middleware  # noqa: E402
+from starlette.middleware.base import BaseHTTPMiddleware  # noqa: E402
+from starlette.responses import JSONResponse  # noqa: E402
+from starlette.routing import Mount, Route  # noqa: E402
+
+from auth import BearerAuthMiddleware, TokenManager  # noqa: E402
+
+TOKEN = "bench-token"
+
+LIST_TOOLS = {"jsonrpc": "2.0", "id": 1, "method": "tools/list", "params": {}}
+MCP_HEADERS = {
+    "Accept": "application/json, text/event-stream",
+    "Content-Type": "application/json",
+}
+
+
+class LegacyBearerAuthMiddleware(BaseHTTPMiddleware):
+    """复刻旧版认证中间件，作为基准对照"""
+
+    def __init__(self, app, token_manager: TokenManager, exclude_paths: list = None, require_auth: bool = True):
+        super().__init__(app)
+        self.token_manager = token_manager
+        self.exclude_paths = exclude_paths or ["/health"]
+        self.require_auth = require_auth
+
+    async def dispatch(self, request, call_next):
+        if request.url.path in self.exclude_paths:
+            return await call_next(request)
+        if not self.require_auth:
+            return await call_next(request)
+        current_token = self.token_manager.get_token()
+        if not current_token:
+            return JSONResponse({"error": "unauthorized"}, status_code=401)
+        auth_header = request.headers.get("Authorization", "")
+        if not auth_header.startswith("Bearer "):
+            return JSONResponse({"error": "unauthorized"}, status_code=401)
+        if auth_header.replace("Bearer ", "") != current_token:
+            return JSONResponse({"error": "unauthorized"}, status_code=401)
+        return await call_next(request)
+
+
+def build_app(middleware_class, require_auth: bool):
+    server = Server("bench")
+
+    @server.list_tools()
+    async def list_tools():
+        return [types.Tool(name="echo", description="echo", inputSchema={"type": "object", "properties": {}})]
+
+    session_manager = StreamableHTTPSessionManager(app=server, stateless=True, json_response=True)
+
+    async def handle_mcp(scope, receive, send):
+        await session_manager.handle_request(scope, receive, send)
+
+    async def health_check(request):
+        return JSONResponse({"status": "healthy", "server": "mcp-http"})
+
+    @contextlib.asynccontextmanager
+    async def lifespan(_):
+        async with session_manager.run():
+            yield
+
+    app = Starlette(
+        routes=[Mount("/mcp", app=handle_mcp), Route("/health", endpoint=health_check)],
+        middleware=[Middleware(middleware_class, token_manager=TokenManager(TOKEN, "x"), require_auth=require_auth)],
+        lifespan=lifespan,
+    )
+    return app, lifespan
+
+
+async def run_load(app, lifespan, path: str, requests: int, concurrency: int) -> float:
+    """返回每秒请求数"""
+    headers = {"Authorization": f"Bearer {TOKEN}"}
+    if path == "/mcp/":
+        headers.update(MCP_HEADERS)
+
+    async with lifespan(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+            async def send_one():
+                if path == "/mcp/":
+                    response = await client.post(path, json=LIST_TOOLS, headers=headers)
+                else:
+                    response = await client.get(path, headers=headers)
+                assert response.status_code == 200, response.text
+
+            # 预热
+            await asyncio.gather(*(send_one() for _ in range(concurrency)))
+
+            remaining = requests
+            start = time.perf_counter()
+            while remaining > 0:
+                batch = min(concurrency, remaining)
+                await asyncio.gather(*(send_one() for _ in range(batch)))
+                remaining -= batch
+            return requests / (time.perf_counter() - start)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="BearerAuthMiddleware benchmark")
+    parser.add_argument("--requests", type=int, default=3000, help="Requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent requests")
+    args = parser.parse_args()
+
+    variants = [
+        ("auth off      ", BearerAuthMiddleware, False),
+        ("auth on       ", BearerAuthMiddleware, True),
+        ("legacy auth on", LegacyBearerAuthMiddleware, True),
+    ]
+    print(f"requests={args.requests} concurrency={args.concurrency}")
+    for path in ("/health", "/mcp/"):
+        for label, middleware_class, require_auth in variants:
+            app, lifespan = build_app(middleware_class, require_auth)
+            rps = await run_load(app, lifespan, path, args.requests, args.concurrency)
+            print(f"{path:8s} {label}: {rps:,.0f} req/s")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    # 无状态模式下每个请求结束时mcp会记录流已关闭的错误，与认证无关
+    logging.getLogger("mcp").setLevel(logging.CRITICAL)
+    logging.getLogger("auth").setLevel(logging.ERROR)
+    asyncio.run(main())
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+SQLiteEventStore 写入基准测试
+对比旧版“每个事件一个连接 + COUNT(*) 裁剪 + 每次检查大小”的写入路径
+与当前持久连接、分组提交的写入路径，输出每秒事件数。
+
+用法（在安装了 mcp 的虚拟环境中运行）:
+    python benchmarks/bench_event_store.py --events 5000 --streams 8
+"""
+
+import argparse
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from uuid import uuid4
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mcp.types import JSONRPCMessage, JSONRPCNotification  # noqa: E402
+
+from event_store import SQLiteEventStore  # noqa: E402
+
+
+class LegacySQLiteEventStore(SQLiteEventStore):
+    """复刻旧版写入路径，作为基准对照"""
+
+    def _connect(self):
+        # 旧版使用默认的回滚日志模式
+        return sqlite3.connect(self.db_path)
+
+    def _init_db(self):
+        # 旧版表结构，没有seq列
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS events (
+                    event_id TEXT PRIMARY KEY,
+                    stream_id TEXT NOT NULL,
+                    message TEXT NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_stream_id ON events(stream_id)")
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_created_at ON events(created_at)")
+
+    async def store_event(self, stream_id, message):
+        event_id = str(uuid4())
+        message_str = self._serialize_message(message)
+
+        def db_store():
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute(
+                    "INSERT INTO events (event_id, stream_id, message) VALUES (?, ?, ?)",
+                    (event_id, stream_id, message_str)
+                )
+                cursor = conn.cursor()
+                cursor.execute(
+                    "SELECT COUNT(*) FROM events WHERE stream_id = ?",
+                    (stream_id,)
+                )
+                count = cursor.fetchone()[0]
+                if count > self.max_events_per_stream:
+                    cursor.execute(
+                        """DELETE FROM events WHERE event_id IN (
+                            SELECT event_id FROM events
+                            WHERE stream_id = ?
+                            ORDER BY created_at
+                            LIMIT ?
+                        )""",
+                        (stream_id, count - self.max_events_per_stream)
+                    )
+                conn.commit()
+
+        await asyncio.get_event_loop().run_in_executor(None, db_store)
+
+        def get_db_size():
+            return os.path.getsize(self.db_path) / (1024 * 1024)
+
+        await asyncio.get_event_loop().run_in_executor(None, get_db_size)
+        return event_id
+
+    async def flush(self):
+        pass
+
+
+def make_message(i: int) -> JSONRPCMessage:
+    return JSONRPCMessage(JSONRPCNotification(
+        jsonrpc="2.0",
+        method="notifications/progress",
+        params={"progressToken": i, "progress": i, "total": 100},
+    ))
+
+
+async def run(store, events: int, streams: int) -> float:
+    """并发地向多个流写入事件，返回每秒事件数"""
+    per_stream = events // streams
+
+    async def producer(stream_index: int):
+        stream_id = f"stream-{stream_index}"
+        for i in range(per_stream):
+            await store.store_event(stream_id, make_message(i))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(producer(s) for s in range(streams)))
+    await store.flush()
+    elapsed = time.perf_counter() - start
+    await store.close()
+    return per_stream * streams / elapsed
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="SQLiteEventStore write benchmark")
+    parser.add_argument("--events", type=int, default=5000, help="Total number of events")
+    parser.add_argument("--streams", type=int, default=8, help="Number of concurrent streams")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy = LegacySQLiteEventStore(db_path=os.path.join(tmp, "legacy.db"))
+        before = await run(legacy, args.events, args.streams)
+
+        current = SQLiteEventStore(db_path=os.path.join(tmp, "current.db"))
+        after = await run(current, args.events, args.streams)
+
+    print(f"events={args.events} streams={args.streams}")
+    print(f"before: {before:,.0f} events/s")
+    print(f"after:  {after:,.0f} events/s ({after / before:.1f}x)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
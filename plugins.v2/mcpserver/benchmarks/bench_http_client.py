@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+make_request 基准测试
+在本地启动一个模拟的 MoviePilot API，对比旧版“默认 AsyncClient + 每次请求十余条即时格式化的调试日志”
+与当前调优连接池、按需格式化日志的请求路径，输出每秒请求数与请求耗时直方图。
+
+模拟API使用极简的 asyncio HTTP/1.1 服务返回预先序列化的响应，避免服务端成为瓶颈；
+日志与运行时一致，INFO级别写入日志文件。两种请求路径交替运行多轮，各取最好成绩。
+
+用法（在安装了 mcp 的虚拟环境中运行）:
+    python benchmarks/bench_http_client.py --requests 3000 --concurrency 16
+"""
+
+import argparse
+import asyncio
+import functools
+import logging
+import multiprocessing
+import os
+import json
+import socket
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx  # noqa: E402
+
+from utils import http_utils  # noqa: E402
+from utils import close_http_client, get_request_stats, make_request, reset_request_stats, set_moviepilot_port  # noqa: E402
+
+logger = logging.getLogger("bench.legacy")
+
+SUBSCRIBE = {
+    "id": 1,
+    "name": "示例剧集",
+    "year": "2024",
+    "type": "电视剧",
+    "tmdbid": 100088,
+    "season": 1,
+    "total_episode": 12,
+    "lack_episode": 3,
+    "sites": list(range(20)),
+    "description": "模拟的订阅详情" * 20,
+}
+
+
+class StubProtocol(asyncio.Protocol):
+    """只返回固定订阅详情的 keep-alive HTTP/1.1 服务"""
+
+    body = json.dumps(SUBSCRIBE, ensure_ascii=False).encode()
+    response = (
+        b"HTTP/1.1 200 OK\r\ncontent-type: application/json\r\n"
+        b"content-length: " + str(len(body)).encode() + b"\r\n\r\n" + body
+    )
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.buffer = b""
+
+    def data_received(self, data):
+        self.buffer += data
+        while b"\r\n\r\n" in self.buffer:
+            _, self.buffer = self.buffer.split(b"\r\n\r\n", 1)
+            self.transport.write(self.response)
+
+
+def _serve(port: int):
+    async def serve():
+        server = await asyncio.get_running_loop().create_server(StubProtocol, "127.0.0.1", port)
+        await server.serve_forever()
+
+    asyncio.run(serve())
+
+
+def start_stub_api() -> multiprocessing.Process:
+    """在独立进程启动模拟API，避免与被测客户端争用GIL"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    process = multiprocessing.Process(target=_serve, args=(port,), daemon=True)
+    process.start()
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            break
+        except OSError:
+            time.sleep(0.05)
+    set_moviepilot_port(port)
+    return process
+
+
+_legacy_client = None
+
+
+async def legacy_make_request(method, endpoint, access_token=None, params=None, json_data=None):
+    """复刻旧版 make_request 的客户端配置与日志调用，作为基准对照"""
+    global _legacy_client
+    logger.debug(f"[make_request] 开始处理请求")
+    logger.debug(f"[make_request] 方法: {method}")
+    logger.debug(f"[make_request] 端点: {endpoint}")
+    logger.debug(f"[make_request] 查询参数: {params}")
+    logger.debug(f"[make_request] JSON数据: {json_data}")
+    headers = {"Authorization": f"Bearer {access_token}"}
+    logger.debug(f"[make_request] 设置Authorization头")
+    if _legacy_client is None:
+        _legacy_client = httpx.AsyncClient(timeout=600)
+    url = f"{http_utils.config.BASE_URL.rstrip('/')}{endpoint}"
+    logger.debug(f"[make_request] 完整URL: {url}")
+    logger.info(f"发送请求: {method} {url}")
+    logger.debug(f"[make_request] 请求头: {headers}")
+    response = await _legacy_client.request(method, url, params=params, json=json_data, headers=headers)
+    logger.debug(f"[make_request] 响应状态码: {response.status_code}")
+    logger.debug(f"[make_request] 响应头: {dict(response.headers)}")
+    logger.debug(f"[make_request] 响应内容长度: {len(response.content) if response.content else 0}")
+    response.raise_for_status()
+    content_type = response.headers.get("content-type", "")
+    logger.debug(f"[make_request] 响应内容类型: {content_type}")
+    json_result = response.json()
+    logger.debug(f"[make_request] JSON解析成功: {json_result}")
+    return json_result
+
+
+async def run(request_func, requests: int, concurrency: int) -> float:
+    """并发发送请求，返回每秒请求数"""
+    per_worker = requests // concurrency
+
+    async def worker(index: int):
+        for i in range(per_worker):
+            result = await request_func("GET", f"/api/v1/subscribe/{index * per_worker + i}", access_token="token")
+            assert "error" not in result, result
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(w) for w in range(concurrency)))
+    return per_worker * concurrency / (time.perf_counter() - start)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="make_request benchmark against a stub MoviePilot API")
+    parser.add_argument("--requests", type=int, default=3000, help="Total number of requests")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent workers")
+    parser.add_argument("--rounds", type=int, default=5, help="Alternating rounds, best result is reported")
+    args = parser.parse_args()
+
+    # 与MCP Server运行时一致：INFO级别写入日志文件，调试日志不输出
+    log_file = tempfile.NamedTemporaryFile(prefix="bench-http-", suffix=".log", delete=False)
+    log_file.close()
+    handler = logging.FileHandler(log_file.name, encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
+    logging.basicConfig(level=logging.INFO, handlers=[handler])
+    stub = start_stub_api()
+
+    # 预热连接
+    await legacy_make_request("GET", "/api/v1/subscribe/0", access_token="token")
+    await make_request("GET", "/api/v1/subscribe/0", access_token="token", use_cache=False)
+    reset_request_stats()
+
+    # 本基准测试连接池与请求路径，绕过响应缓存
+    current = functools.partial(make_request, use_cache=False)
+    before = after = 0.0
+    for _ in range(args.rounds):
+        before = max(before, await run(legacy_make_request, args.requests, args.concurrency))
+        after = max(after, await run(current, args.requests, args.concurrency))
+    await _legacy_client.aclose()
+    await close_http_client()
+    stub.terminate()
+    handler.close()
+    os.unlink(log_file.name)
+
+    print(f"requests={args.requests} concurrency={args.concurrency} rounds={args.rounds}")
+    print(f"before: {before:,.0f} req/s")
+    print(f"after:  {after:,.0f} req/s ({after / before:.2f}x)")
+    for endpoint, stats in get_request_stats().items():
+        print(f"{endpoint}: count={stats['count']} avg={stats['avg_ms']}ms "
+              f"p50<={stats['p50_ms']}ms p95<={stats['p95_ms']}ms p99<={stats['p99_ms']}ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+PromptManager 基准测试
+注册大量插件提示后，对比旧版“每次调用都实例化内置提示、重建插件提示定义、INFO日志和print输出全部提示名”
+的 list_prompts 与当前按注册表版本号缓存的实现；同时对比内置提示每次重新渲染与按参数缓存渲染结果的 get_prompt。
+
+用法（在安装了 mcp 的虚拟环境中运行）:
+    python benchmarks/bench_list_prompts.py --plugins 20 --prompts-per-plugin 4 --calls 2000
+"""
+
+import argparse
+import asyncio
+import contextlib
+import logging
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from prompts import PromptManager  # noqa: E402
+
+logger = logging.getLogger("bench.legacy")
+
+
+def legacy_list_prompts(manager: PromptManager):
+    """复刻旧版 list_prompts 实现，作为基准对照"""
+    prompts = []
+    for prompt_class in set(manager._prompts.values()):
+        prompt_infos = prompt_class().prompt_info
+        if isinstance(prompt_infos, list):
+            prompts.extend(prompt_infos)
+        else:
+            prompts.append(prompt_infos)
+
+    plugin_prompts = manager._plugin_prompt_registry.list_registered_prompts()
+    prompts.extend(plugin_prompts)
+
+    prompt_names = [prompt.name for prompt in prompts]
+    logger.info(f"Available prompts: {prompt_names} (内置: {len(prompts) - len(plugin_prompts)}, 插件: {len(plugin_prompts)})")
+    print(f"Available prompts: {prompt_names}")
+    return prompts
+
+
+async def legacy_get_prompt(manager: PromptManager, name: str, arguments: dict):
+    """复刻旧版 get_prompt 的内置提示路径：每次新建实例并重新渲染"""
+    return await manager._prompts[name]().get_prompt(name, arguments)
+
+
+def make_plugin_prompts(plugins: int, prompts_per_plugin: int):
+    return {
+        f"plugin{p}": [
+            {
+                "name": f"plugin{p}-prompt{i}",
+                "description": f"插件 {p} 的第 {i} 个提示",
+                "arguments": [
+                    {"name": "keyword", "description": "关键字", "required": True},
+                    {"name": "year", "description": "年份", "required": False},
+                ],
+            }
+            for i in range(prompts_per_plugin)
+        ]
+        for p in range(plugins)
+    }
+
+
+def measure(func, calls: int):
+    """返回每次调用耗时（微秒）列表"""
+    samples = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1e6)
+    return samples
+
+
+async def measure_async(func, calls: int):
+    """在同一个事件循环内逐次await，返回每次调用耗时（微秒）列表"""
+    samples = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        await func()
+        samples.append((time.perf_counter() - start) * 1e6)
+    return samples
+
+
+def report(label: str, samples):
+    samples = sorted(samples)
+    p99 = samples[int(len(samples) * 0.99) - 1]
+    print(f"{label}: mean {statistics.mean(samples):,.1f}us  p50 {samples[len(samples) // 2]:,.1f}us  p99 {p99:,.1f}us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PromptManager list_prompts/get_prompt benchmark")
+    parser.add_argument("--plugins", type=int, default=20, help="Number of plugins")
+    parser.add_argument("--prompts-per-plugin", type=int, default=4, help="Prompts registered by each plugin")
+    parser.add_argument("--calls", type=int, default=2000, help="Number of calls per measurement")
+    args = parser.parse_args()
+
+    manager = PromptManager()
+    manager.disable_state_sync()
+    total = args.plugins * args.prompts_per_plugin
+    # 默认上限为100个插件提示，基准需要更多
+    manager._plugin_prompt_registry.set_max_prompts(max(total, 100))
+    manager.sync_plugin_prompts({
+        plugin_id: {"prompts": prompts}
+        for plugin_id, prompts in make_plugin_prompts(args.plugins, args.prompts_per_plugin).items()
+    })
+
+    # 旧版的print输出到标准输出，这里丢弃，只计入格式化与写入的开销
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        count = len(legacy_list_prompts(manager))
+        assert count == len(manager.list_prompts())
+        before = measure(lambda: legacy_list_prompts(manager), args.calls)
+    after = measure(manager.list_prompts, args.calls)
+    print(f"prompts={count} (plugin prompts={total}) calls={args.calls}")
+    print("list_prompts")
+    report("  before", before)
+    report("  after ", after)
+    print(f"  speedup: {statistics.mean(before) / statistics.mean(after):.1f}x")
+
+    name, arguments = "search-movie-strategy", {"keyword": "流浪地球", "year": "2023"}
+
+    async def run_get_prompt():
+        assert await legacy_get_prompt(manager, name, arguments) == await manager.get_prompt(name, arguments)
+        return (await measure_async(lambda: legacy_get_prompt(manager, name, arguments), args.calls),
+                await measure_async(lambda: manager.get_prompt(name, arguments), args.calls))
+
+    before, after = asyncio.run(run_get_prompt())
+    print("get_prompt (built-in, repeated arguments)")
+    report("  before", before)
+    report("  after ", after)
+    print(f"  speedup: {statistics.mean(before) / statistics.mean(after):.1f}x")
+    print(f"cache: {manager.get_cache_stats()}")
+
+
+if __name__ == "__main__":
+    # 与MCP Server运行时一致：INFO级别
+    logging.basicConfig(level=logging.INFO, handlers=[logging.NullHandler()])
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+ToolManager.list_tools 基准测试
+注册大量插件工具后，对比旧版“每次调用都实例化内置工具、重建插件工具定义”的实现
+与当前按注册表版本号缓存的实现，输出单次调用耗时。
+
+用法（在安装了 mcp 的虚拟环境中运行）:
+    python benchmarks/bench_list_tools.py --plugins 20 --tools-per-plugin 12 --calls 2000
+"""
+
+import argparse
+import logging
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import mcp.types as types  # noqa: E402
+
+from tools import ToolManager  # noqa: E402
+
+
+def legacy_list_tools(manager: ToolManager):
+    """复刻旧版 list_tools 实现，作为基准对照"""
+    tools = []
+    for spec in set(manager._tool_specs.values()):
+        tool = manager._import_tool_class(*spec)(manager.token_manager)
+        tool_infos = tool.tool_info
+        if isinstance(tool_infos, list):
+            tools.extend(tool_infos)
+        else:
+            tools.append(tool_infos)
+
+    registry = manager._plugin_registry
+    with registry._lock:
+        tools.extend(
+            types.Tool(name=info.name, description=info.description, inputSchema=info.parameters)
+            for info in registry._registered_tools.values()
+        )
+    return tools
+
+
+def make_plugin_tools(plugins: int, tools_per_plugin: int):
+    return {
+        f"plugin{p}": [
+            {
+                "name": f"tool{t}",
+                "description": f"插件 {p} 的第 {t} 个工具",
+                "parameters": {
+                    "type": "object",
+                    "properties": {
+                        "keyword": {"type": "string", "description": "关键字"},
+                        "page": {"type": "integer", "description": "页码"},
+                    },
+                    "required": ["keyword"],
+                },
+            }
+            for t in range(tools_per_plugin)
+        ]
+        for p in range(plugins)
+    }
+
+
+def measure(func, calls: int):
+    """返回每次调用耗时（微秒）列表"""
+    samples = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1e6)
+    return samples
+
+
+def report(label: str, samples):
+    samples = sorted(samples)
+    p99 = samples[int(len(samples) * 0.99) - 1]
+    print(f"{label}: mean {statistics.mean(samples):,.1f}us  p50 {samples[len(samples) // 2]:,.1f}us  p99 {p99:,.1f}us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ToolManager.list_tools benchmark")
+    parser.add_argument("--plugins", type=int, default=20, help="Number of plugins")
+    parser.add_argument("--tools-per-plugin", type=int, default=12, help="Tools registered by each plugin")
+    parser.add_argument("--calls", type=int, default=2000, help="Number of list_tools calls")
+    args = parser.parse_args()
+
+    manager = ToolManager()
+    plugin_tools = make_plugin_tools(args.plugins, args.tools_per_plugin)
+    total = args.plugins * args.tools_per_plugin
+    # 默认上限为100个插件工具，基准需要更多
+    manager._plugin_registry.set_max_tools(max(total, 100))
+    manager.sync_plugin_tools(plugin_tools)
+
+    count = len(manager.list_tools())
+    assert count == len(legacy_list_tools(manager))
+    print(f"tools={count} (plugin tools={total}) calls={args.calls}")
+
+    before = measure(lambda: legacy_list_tools(manager), args.calls)
+    after = measure(manager.list_tools, args.calls)
+    report("before", before)
+    report("after ", after)
+    print(f"speedup: {statistics.mean(before) / statistics.mean(after):.1f}x")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+插件工具调用基准测试
+在独立进程中模拟MoviePilot：同一个插件处理函数既挂在HTTP接口 /api/v1/plugin/{id}/mcp_tool_execute 上
+（与FastAPI同步接口一样在线程池中执行），也接入插件调用通道。对比 make_request 与插件调用通道的
+每秒调用数和单次调用延迟。
+
+用法（在安装了 mcp 的虚拟环境中运行）:
+    python benchmarks/bench_plugin_channel.py --calls 3000 --concurrency 16
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import socket
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import uvicorn  # noqa: E402
+from starlette.applications import Starlette  # noqa: E402
+from starlette.concurrency import run_in_threadpool  # noqa: E402
+from starlette.responses import JSONResponse  # noqa: E402
+from starlette.routing import Route  # noqa: E402
+
+from utils import close_http_client, make_request, set_moviepilot_port  # noqa: E402
+from utils.plugin_channel import PluginChannelClient, PluginChannelServer, register_channel_handler  # noqa: E402
+
+PLUGIN_ID = "BenchPlugin"
+TOKEN = "bench-token"
+
+
+def execute_tool(request_data: dict) -> dict:
+    """模拟插件工具：返回一份中等大小的结果"""
+    arguments = request_data.get("arguments") or {}
+    return {
+        "success": True,
+        "message": "工具执行成功",
+        "data": {"echo": arguments, "items": [{"id": i, "title": f"条目{i}"} for i in range(20)]},
+    }
+
+
+def _serve(port: int, channel_path: str):
+    async def tool_endpoint(request):
+        return JSONResponse(await run_in_threadpool(execute_tool, await request.json()))
+
+    register_channel_handler(PLUGIN_ID, lambda kind, request_data: execute_tool(request_data))
+    PluginChannelServer(channel_path, lambda: TOKEN).start()
+
+    app = Starlette(routes=[Route(f"/api/v1/plugin/{PLUGIN_ID}/mcp_tool_execute", tool_endpoint, methods=["POST"])])
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def start_stub_moviepilot(channel_path: str) -> multiprocessing.Process:
+    """在独立进程启动模拟的MoviePilot，避免与被测客户端争用GIL"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    process = multiprocessing.Process(target=_serve, args=(port, channel_path), daemon=True)
+    process.start()
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            if os.path.exists(channel_path):
+                break
+        except OSError:
+            pass
+        time.sleep(0.05)
+    set_moviepilot_port(port)
+    return process
+
+
+async def run(call, calls: int, concurrency: int):
+    """并发调用，返回 (每秒调用数, 单次耗时列表毫秒)"""
+    per_worker = calls // concurrency
+    latencies = []
+
+    async def worker(index: int):
+        for i in range(per_worker):
+            start = time.perf_counter()
+            result = await call({"tool_name": "bench", "arguments": {"n": index * per_worker + i}})
+            latencies.append((time.perf_counter() - start) * 1000)
+            assert result.get("success"), result
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(w) for w in range(concurrency)))
+    return per_worker * concurrency / (time.perf_counter() - start), latencies
+
+
+def _summary(name: str, rate: float, latencies: list) -> str:
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    return f"{name}: {rate:,.0f} calls/s  p50={statistics.median(latencies):.2f}ms p95={p95:.2f}ms"
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Plugin tool call benchmark: HTTP vs plugin channel")
+    parser.add_argument("--calls", type=int, default=3000, help="Total number of calls")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent workers")
+    args = parser.parse_args()
+
+    channel_path = os.path.join(tempfile.mkdtemp(), "plugin_channel.sock")
+    stub = start_stub_moviepilot(channel_path)
+    endpoint = f"/api/v1/plugin/{PLUGIN_ID}/mcp_tool_execute"
+    client = PluginChannelClient(channel_path, TOKEN)
+
+    async def via_http(request_data):
+        return await make_request("POST", endpoint, access_token=TOKEN, json_data=request_data)
+
+    async def via_channel(request_data):
+        return await client.call("tool", PLUGIN_ID, request_data, timeout=30)
+
+    try:
+        # 预热连接
+        await via_http({"tool_name": "bench"})
+        await via_channel({"tool_name": "bench"})
+
+        print(f"calls={args.calls} concurrency={args.concurrency}")
+        for concurrency in sorted({1, args.concurrency}):
+            http_rate, http_latencies = await run(via_http, args.calls, concurrency)
+            channel_rate, channel_latencies = await run(via_channel, args.calls, concurrency)
+            print(f"-- concurrency={concurrency}")
+            print(_summary("http   ", http_rate, http_latencies))
+            print(_summary("channel", channel_rate, channel_latencies) + f" ({channel_rate / http_rate:.2f}x)")
+        print(f"channel stats: {client.stats}")
+    finally:
+        await client.close()
+        await close_http_client()
+        stub.terminate()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+插件注册文件写入基准测试
+模拟MoviePilot启动时大量插件依次注册工具：每个插件一次 atomic_update_json 更新 plugin_tools.json。
+对比旧版“每次更新都复制备份、写入、fsync、回读校验”的实现、当前实现的立即写入，以及合并写入
+（从第一次更新到所有更新落盘的总耗时与实际写入次数）。
+
+用法（建议把 --dir 指向真实磁盘而不是tmpfs，fsync的开销才有意义）:
+    python benchmarks/bench_registry_writes.py --plugins 100 --tools-per-plugin 5 --dir /path/on/disk
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.file_operations import SafeFileOperations  # noqa: E402
+
+
+class LegacyFileOperations:
+    """复刻旧版 SafeFileOperations 的读写流程，作为基准对照"""
+
+    def __init__(self):
+        self._file_locks = {}
+        self._locks_lock = threading.Lock()
+        self.writes = 0
+
+    def _get_file_lock(self, file_path: str) -> threading.RLock:
+        with self._locks_lock:
+            if file_path not in self._file_locks:
+                self._file_locks[file_path] = threading.RLock()
+            return self._file_locks[file_path]
+
+    def safe_read_json(self, file_path: Path, default_value=None):
+        with self._get_file_lock(str(file_path)):
+            if not file_path.exists() or file_path.stat().st_size == 0:
+                return default_value or {}
+            with open(file_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+
+    def safe_write_json(self, file_path: Path, data) -> bool:
+        with self._get_file_lock(str(file_path)):
+            if file_path.exists():
+                shutil.copy2(str(file_path), str(file_path.with_suffix(f'{file_path.suffix}.backup')))
+            temp_fd, temp_path = tempfile.mkstemp(suffix='.tmp', prefix=f'{file_path.name}.', dir=file_path.parent)
+            with os.fdopen(temp_fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            with open(temp_path, 'r', encoding='utf-8') as f:
+                json.load(f)
+            shutil.move(temp_path, str(file_path))
+            self.writes += 1
+            return True
+
+    def atomic_update_json(self, file_path: Path, update_func, default_value=None) -> bool:
+        with self._get_file_lock(str(file_path)):
+            current_data = self.safe_read_json(file_path, default_value)
+            return self.safe_write_json(file_path, update_func(current_data.copy()))
+
+
+def make_tools(plugin_index: int, tools_per_plugin: int) -> list:
+    return [
+        {
+            "name": f"plugin{plugin_index}-tool{i}",
+            "description": f"插件 {plugin_index} 的第 {i} 个工具，用于基准测试",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "keyword": {"type": "string", "description": "关键字"},
+                    "page": {"type": "integer", "minimum": 1, "default": 1},
+                },
+                "required": ["keyword"],
+            },
+            "api_endpoint": f"/api/v1/plugin/Plugin{plugin_index}/mcp_tool_execute",
+        }
+        for i in range(tools_per_plugin)
+    ]
+
+
+def register_all(update, plugins: int, tools_per_plugin: int):
+    """依次为每个插件提交一次注册更新"""
+    for p in range(plugins):
+        tools = make_tools(p, tools_per_plugin)
+
+        def update_tools(existing_tools, plugin_id=f"Plugin{p}", tools=tools):
+            existing_tools[plugin_id] = {"tools": tools, "registered_at": time.time()}
+            return existing_tools
+
+        assert update(update_tools)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="plugin_tools.json registration write benchmark")
+    parser.add_argument("--plugins", type=int, default=100, help="Number of plugins registering tools")
+    parser.add_argument("--tools-per-plugin", type=int, default=5, help="Tools registered by each plugin")
+    parser.add_argument("--debounce", type=float, default=0.05, help="Coalescing window in seconds")
+    parser.add_argument("--dir", default=None, help="Directory for the registry file (defaults to a temp dir)")
+    args = parser.parse_args()
+
+    work_dir = Path(tempfile.mkdtemp(dir=args.dir))
+    try:
+        print(f"plugins={args.plugins} tools/plugin={args.tools_per_plugin} dir={work_dir}")
+        results = {}
+
+        legacy = LegacyFileOperations()
+        tools_file = work_dir / "legacy_tools.json"
+        start = time.perf_counter()
+        register_all(lambda func: legacy.atomic_update_json(tools_file, func, default_value={}),
+                     args.plugins, args.tools_per_plugin)
+        results["before"] = (time.perf_counter() - start, legacy.writes, tools_file)
+
+        ops = SafeFileOperations()
+        tools_file = work_dir / "sync_tools.json"
+        start = time.perf_counter()
+        register_all(lambda func: ops.atomic_update_json(tools_file, func, default_value={}),
+                     args.plugins, args.tools_per_plugin)
+        results["after, immediate"] = (time.perf_counter() - start, ops.get_stats()["writes"], tools_file)
+
+        ops = SafeFileOperations()
+        tools_file = work_dir / "coalesced_tools.json"
+        written = threading.Event()
+        start = time.perf_counter()
+        register_all(lambda func: ops.atomic_update_json(tools_file, func, default_value={},
+                                                         debounce=args.debounce,
+                                                         on_written=lambda success: written.set()),
+                     args.plugins, args.tools_per_plugin)
+        submitted = time.perf_counter() - start
+        written.wait(30)
+        results["after, coalesced"] = (time.perf_counter() - start, ops.get_stats()["writes"], tools_file)
+
+        expected = None
+        for label, (elapsed, writes, path) in results.items():
+            data = json.loads(path.read_text(encoding="utf-8"))
+            assert len(data) == args.plugins, (label, len(data))
+            names = sorted(tool["name"] for entry in data.values() for tool in entry["tools"])
+            assert expected is None or names == expected, label
+            expected = names
+            print(f"{label:17}: {elapsed * 1000:9.1f}ms total  writes={writes:3d}  "
+                  f"per plugin {elapsed * 1e6 / args.plugins:8.1f}us")
+        print(f"coalesced updates submitted in {submitted * 1000:.1f}ms "
+              f"(debounce window {args.debounce * 1000:.0f}ms)")
+        print(f"speedup (immediate): {results['before'][0] / results['after, immediate'][0]:.1f}x")
+        print(f"speedup (coalesced, including debounce wait): "
+              f"{results['before'][0] / results['after, coalesced'][0]:.1f}x")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
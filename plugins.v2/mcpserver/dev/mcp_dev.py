@@ -7,6 +7,9 @@ from logging.handlers import RotatingFileHandler
 from app.core.event import eventmanager
 from app.schemas.types import EventType
 
+from ..utils.schema_validator import ArgumentValidationError, compile_validator, prompt_arguments_schema
+from ..utils.plugin_channel import materialize_result, register_channel_handler, unregister_channel_handler
+
 
 class MCPGlobalLogger:
     """
@@ -156,10 +159,11 @@ class MCPToolInfo:
         self.parameters = parameters
         self.handler = handler
         self.validate_params = validate_params
+        # 参数校验器在注册时编译，执行时直接使用
+        self.validate_arguments = compile_validator(self._json_schema()) if validate_params else None
 
-    def to_config(self, plugin_class_name: str) -> Dict[str, Any]:
-        """转换为工具配置格式"""
-        # 处理参数格式，统一转换为 JSON Schema 格式
+    def _json_schema(self) -> Dict[str, Any]:
+        """把参数定义统一转换为 JSON Schema 格式"""
         parameters = {"type": "object", "properties": {}, "required": []}
 
         if isinstance(self.parameters, list):
@@ -208,10 +212,14 @@ class MCPToolInfo:
             if "type" not in parameters:
                 parameters["type"] = "object"
 
+        return parameters
+
+    def to_config(self, plugin_class_name: str) -> Dict[str, Any]:
+        """转换为工具配置格式"""
         return {
             "name": self.name,
             "description": self.description,
-            "parameters": parameters,
+            "parameters": self._json_schema(),
             "api_endpoint": f"/api/v1/plugin/{plugin_class_name}/mcp_tool_execute"
         }
 
@@ -226,6 +234,13 @@ class MCPPromptInfo:
         self.parameters = parameters
         self.handler = handler
         self.validate_params = validate_params
+        # 参数校验器在注册时编译：JSON Schema 格式按 Schema 校验，简化格式只校验必需参数和枚举值
+        self.validate_arguments = None
+        if validate_params:
+            if isinstance(parameters, dict):
+                self.validate_arguments = compile_validator(parameters)
+            elif isinstance(parameters, list):
+                self.validate_arguments = compile_validator(prompt_arguments_schema(parameters))
 
     def to_config(self, plugin_class_name: str) -> Dict[str, Any]:
         """转换为提示配置格式"""
@@ -341,15 +356,16 @@ class MCPPluginRegistry:
             tool_info = self.tools[tool_name]
 
             # 参数验证
-            if tool_info.validate_params:
-                validated_args = self._validate_parameters(arguments, tool_info.parameters)
-                if validated_args is None:
+            if tool_info.validate_arguments:
+                try:
+                    arguments = tool_info.validate_arguments(arguments)
+                except ArgumentValidationError as e:
+                    logger.error(f"工具 {tool_name} 参数验证失败: {e}", self.target_plugin_name)
                     return {
                         "success": False,
-                        "message": "参数验证失败",
+                        "message": f"参数验证失败: {e}",
                         "data": None
                     }
-                arguments = validated_args
 
             # 执行工具处理函数
             result = tool_info.handler(self.plugin_instance, **arguments)
@@ -389,15 +405,16 @@ class MCPPluginRegistry:
             prompt_info = self.prompts[prompt_name]
 
             # 参数验证
-            if prompt_info.validate_params:
-                validated_args = self._validate_parameters(arguments, prompt_info.parameters)
-                if validated_args is None:
+            if prompt_info.validate_arguments:
+                try:
+                    arguments = prompt_info.validate_arguments(arguments)
+                except ArgumentValidationError as e:
+                    logger.error(f"提示 {prompt_name} 参数验证失败: {e}", self.target_plugin_name)
                     return {
                         "success": False,
-                        "message": "参数验证失败",
+                        "message": f"参数验证失败: {e}",
                         "data": None
                     }
-                arguments = validated_args
 
             # 执行提示处理函数
             result = prompt_info.handler(self.plugin_instance, **arguments)
@@ -424,81 +441,6 @@ class MCPPluginRegistry:
                 "message": default_message
             }
 
-    def _validate_parameters(self, arguments: Dict[str, Any],
-                           parameters) -> Optional[Dict[str, Any]]:
-        """验证参数"""
-        try:
-            if isinstance(parameters, list):
-                # 简化格式：参数列表格式
-                # 格式：[{"name": "param1", "description": "描述", "required": True}, ...]
-                validated = {}
-
-                # 检查必需参数
-                for param_def in parameters:
-                    param_name = param_def.get("name")
-                    is_required = param_def.get("required", False)
-
-                    if is_required and param_name not in arguments:
-                        logger.error(f"缺少必需参数: {param_name}", self.target_plugin_name)
-                        return None
-
-                # 简化格式下只做基本的必需参数检查，不做类型验证
-                for param_name, param_value in arguments.items():
-                    validated[param_name] = param_value
-
-                return validated
-
-            elif isinstance(parameters, dict):
-                # JSON Schema格式（向后兼容）
-                if "properties" not in parameters:
-                    return arguments
-
-                properties = parameters["properties"]
-                required = parameters.get("required", [])
-                validated = {}
-
-                # 检查必需参数
-                for req_param in required:
-                    if req_param not in arguments:
-                        logger.error(f"缺少必需参数: {req_param}", self.target_plugin_name)
-                        return None
-
-                # 验证参数类型
-                for param_name, param_value in arguments.items():
-                    if param_name in properties:
-                        param_schema = properties[param_name]
-                        param_type = param_schema.get("type")
-
-                        # 基本类型验证
-                        if param_type == "string" and not isinstance(param_value, str):
-                            logger.error(f"参数 {param_name} 应为字符串类型", self.target_plugin_name)
-                            return None
-                        elif param_type == "integer" and not isinstance(param_value, int):
-                            logger.error(f"参数 {param_name} 应为整数类型", self.target_plugin_name)
-                            return None
-                        elif param_type == "number" and not isinstance(param_value, (int, float)):
-                            logger.error(f"参数 {param_name} 应为数字类型", self.target_plugin_name)
-                            return None
-                        elif param_type == "boolean" and not isinstance(param_value, bool):
-                            logger.error(f"参数 {param_name} 应为布尔类型", self.target_plugin_name)
-                            return None
-
-                        # 枚举值验证
-                        if "enum" in param_schema and param_value not in param_schema["enum"]:
-                            logger.error(f"参数 {param_name} 值不在允许范围内", self.target_plugin_name)
-                            return None
-
-                    validated[param_name] = param_value
-
-                return validated
-            else:
-                # 其他格式，直接返回参数
-                return arguments
-
-        except Exception as e:
-            logger.error(f"参数验证异常: {str(e)}", self.target_plugin_name)
-            return None
-
     def initialize_with_helper(self, enable_tools: bool = True, enable_prompts: bool = True):
         """使用MCP助手初始化注册"""
         try:
@@ -575,6 +517,9 @@ class MCPPluginHelper:
                 "tools": tools
             }
 
+            # 接入插件调用通道，MCP服务器优先通过通道调用，HTTP接口作为回退
+            register_channel_handler(self.plugin_class_name, self._handle_channel_call)
+
             eventmanager.send_event(EventType.PluginAction, event_data)
             logger.info(f"已注册 {len(tools)} 个工具", self.target_plugin_name)
 
@@ -590,6 +535,8 @@ class MCPPluginHelper:
                 "prompts": prompts
             }
 
+            register_channel_handler(self.plugin_class_name, self._handle_channel_call)
+
             eventmanager.send_event(EventType.PluginAction, event_data)
             logger.info(f"已注册 {len(prompts)} 个提示", self.target_plugin_name)
 
@@ -599,6 +546,7 @@ class MCPPluginHelper:
     def handle_plugin_stop(self):
         """处理插件停止"""
         try:
+            unregister_channel_handler(self.plugin_class_name)
             # 直接注销所有工具和提示，MCPServer会处理不存在的情况
             self.unregister_tools()
             self.unregister_prompts()
@@ -633,16 +581,22 @@ class MCPPluginHelper:
         except Exception as e:
             logger.error(f"注销提示失败: {str(e)}", self.target_plugin_name)
 
+    def _handle_channel_call(self, kind: str, request_data: Dict[str, Any]) -> Dict[str, Any]:
+        """处理插件调用通道转发的调用，工具返回的迭代器由通道逐块推送"""
+        if kind == "tool":
+            return self.plugin_instance._execute_mcp_tool(request_data)
+        return self.plugin_instance._execute_mcp_prompt(request_data)
+
     def get_mcp_api_endpoints(self) -> List[Dict[str, Any]]:
         """获取MCP API端点"""
-        # 创建包装函数来处理FastAPI请求
+        # 创建包装函数来处理FastAPI请求，HTTP接口不支持流式返回，迭代器结果展开为列表
         def mcp_tool_wrapper(request_data: dict) -> dict:
             """MCP工具执行包装函数"""
-            return self.plugin_instance._execute_mcp_tool(request_data)
+            return materialize_result(self.plugin_instance._execute_mcp_tool(request_data))
 
         def mcp_prompt_wrapper(request_data: dict) -> dict:
             """MCP提示执行包装函数"""
-            return self.plugin_instance._execute_mcp_prompt(request_data)
+            return materialize_result(self.plugin_instance._execute_mcp_prompt(request_data))
 
         return [
             {
@@ -705,6 +659,9 @@ def mcp_tool(name: str, description: str, parameters = None,
             1. 简化格式（推荐）：[{"name": "param1", "description": "描述", "required": True, "type": "string", "enum": [...] }, ...]
             2. JSON Schema格式：{"type": "object", "properties": {...}, "required": [...]}
         validate_params: 是否验证参数
+
+    工具函数可以是生成器：通过插件调用通道调用时每个产出值作为一个数据块实时推送，
+    通过HTTP接口调用时汇总为列表返回。
     """
     if parameters is None:
         parameters = []
@@ -100,7 +100,8 @@ const refreshIntervalOptions = [
 // 服务器类型选项
 const serverTypeOptions = [
   { text: 'HTTP Streamable (默认)', value: 'streamable' },
-  { text: 'Server-Sent Events (SSE)', value: 'sse' }
+  { text: 'Server-Sent Events (SSE)', value: 'sse' },
+  { text: '统一模式 (HTTP Streamable + SSE)', value: 'unified' }
 ];
 
 // 配置数据，使用默认值和初始配置合并
@@ -108,6 +109,7 @@ const defaultConfig = {
   enable: true,
   server_type: 'streamable',      // 默认使用streamable
   port: '3111',
+  workers: 1,                     // 默认单进程
   auth_token: '',
   require_auth: true,             // 默认启用认证
   mp_username: 'admin',
@@ -119,6 +121,7 @@ const defaultConfig = {
   enable_plugin_tools: true,      // 默认启用插件工具
   plugin_tool_timeout: 30,        // 默认30秒超时
   max_plugin_tools: 100,          // 默认最大100个工具
+  plugin_channel: true,           // 默认启用插件调用通道
 };
 
 // 记录原始启用状态
@@ -201,6 +204,12 @@ onMounted(() => {
       if ('max_plugin_tools' in props.initialConfig.config) {
         config.max_plugin_tools = props.initialConfig.config.max_plugin_tools;
       }
+      if ('plugin_channel' in props.initialConfig.config) {
+        config.plugin_channel = props.initialConfig.config.plugin_channel;
+      }
+      if ('workers' in props.initialConfig.config) {
+        config.workers = props.initialConfig.config.workers;
+      }
     }
 
     console.log('处理后的配置:', config);
@@ -231,6 +240,7 @@ async function saveConfig() {
       config: {
         server_type: config.server_type,
         port: config.port,
+        workers: config.workers,
         auth_token: config.auth_token,
         require_auth: config.require_auth,
         mp_username: config.mp_username,
@@ -242,6 +252,7 @@ async function saveConfig() {
         enable_plugin_tools: config.enable_plugin_tools,
         plugin_tool_timeout: config.plugin_tool_timeout,
         max_plugin_tools: config.max_plugin_tools,
+        plugin_channel: config.plugin_channel,
       }
     };
     console.log('保存配置:', configToSave);
@@ -728,6 +739,31 @@ return (_ctx, _cache) => {
                   ]),
                   _: 1
                 }),
+                _createVNode(_component_v_row, null, {
+                  default: _withCtx(() => [
+                    _createVNode(_component_v_col, {
+                      cols: "12",
+                      md: "6"
+                    }, {
+                      default: _withCtx(() => [
+                        _createVNode(_component_v_text_field, {
+                          modelValue: config.workers,
+                          "onUpdate:modelValue": _cache[33] || (_cache[33] = $event => ((config.workers) = $event)),
+                          label: "工作进程数",
+                          variant: "outlined",
+                          type: "number",
+                          min: "1",
+                          max: "8",
+                          hint: "大于1时启用多进程模式，工作进程依次使用端口号+1、+2…",
+                          "persistent-hint": "",
+                          rules: [v => !!v || '工作进程数不能为空', v => (parseInt(v) >= 1 && parseInt(v) <= 8) || '工作进程数必须在1-8之间']
+                        }, null, 8, ["modelValue", "rules"])
+                      ]),
+                      _: 1
+                    })
+                  ]),
+                  _: 1
+                }),
                 _createVNode(_component_v_row, null, {
                   default: _withCtx(() => [
                     _createVNode(_component_v_col, {
@@ -1086,6 +1122,23 @@ return (_ctx, _cache) => {
                             }, null, 8, ["modelValue", "rules"])
                           ]),
                           _: 1
+                        }),
+                        _createVNode(_component_v_col, {
+                          cols: "12",
+                          md: "6"
+                        }, {
+                          default: _withCtx(() => [
+                            _createVNode(_component_v_switch, {
+                              modelValue: config.plugin_channel,
+                              "onUpdate:modelValue": _cache[34] || (_cache[34] = $event => ((config.plugin_channel) = $event)),
+                              label: "启用插件调用通道",
+                              color: "primary",
+                              inset: "",
+                              hint: "通过本地套接字调用插件工具，支持流式输出，不可用时回退到HTTP接口",
+                              "persistent-hint": ""
+                            }, null, 8, ["modelValue"])
+                          ]),
+                          _: 1
                         })
                       ]),
                       _: 1
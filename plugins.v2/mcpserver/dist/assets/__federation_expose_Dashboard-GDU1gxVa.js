@@ -160,6 +160,8 @@ const serverTypeText = computed(() => {
       return 'SSE'
     case 'streamable':
       return 'HTTP'
+    case 'unified':
+      return 'HTTP + SSE'
     default:
       return '未知'
   }
@@ -170,6 +172,7 @@ const serverTypeColor = computed(() => {
     case 'sse':
       return 'warning'
     case 'streamable':
+    case 'unified':
       return 'primary'
     default:
       return 'grey'
@@ -503,9 +506,9 @@ async function fetchDashboardData(isInitial = false) {
       if (serverStatus.server_type) {
         items.value.push({
           title: '连接类型',
-          subtitle: serverStatus.server_type === 'sse' ? 'Server-Sent Events' : 'HTTP Streamable',
+          subtitle: { sse: 'Server-Sent Events', unified: 'HTTP Streamable + SSE' }[serverStatus.server_type] || 'HTTP Streamable',
           status: 'info',
-          value: serverStatus.server_type === 'sse' ? 'SSE' : 'HTTP'
+          value: { sse: 'SSE', unified: 'HTTP + SSE' }[serverStatus.server_type] || 'HTTP'
         });
       }
 
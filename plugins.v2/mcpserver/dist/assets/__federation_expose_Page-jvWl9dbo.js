@@ -1,7 +1,7 @@
 import { importShared } from './__federation_fn_import-JrT3xvdd.js';
 import { _ as _export_sfc } from './_plugin-vue_export-helper-pcqpp-6-.js';
 
-const {resolveComponent:_resolveComponent,createVNode:_createVNode,createElementVNode:_createElementVNode,withCtx:_withCtx,toDisplayString:_toDisplayString,createTextVNode:_createTextVNode,openBlock:_openBlock,createBlock:_createBlock,createCommentVNode:_createCommentVNode,createElementBlock:_createElementBlock} = await importShared('vue');
+const {resolveComponent:_resolveComponent,createVNode:_createVNode,createElementVNode:_createElementVNode,withCtx:_withCtx,toDisplayString:_toDisplayString,createTextVNode:_createTextVNode,openBlock:_openBlock,createBlock:_createBlock,createCommentVNode:_createCommentVNode,createElementBlock:_createElementBlock,Fragment:_Fragment,renderList:_renderList} = await importShared('vue');
 
 
 const _hoisted_1 = { class: "plugin-page" };
@@ -24,6 +24,8 @@ const _hoisted_14 = {
   key: 1,
   class: "d-flex ga-2"
 };
+const _hoisted_15 = { class: "px-3 py-2" };
+const _hoisted_16 = { class: "text-caption text-medium-emphasis" };
 
 const {ref,reactive,onMounted,onUnmounted} = await importShared('vue');
 
@@ -71,6 +73,9 @@ const serverStatus = reactive({
 
 // 进程统计信息
 const processStats = ref(null);
+// 后台采样的资源走势
+const processHistory = ref({ cpu_percent: [], memory_mb: [] });
+const sampleInterval = ref(5);
 
 // 定时器 - 已移除自动刷新功能，用户可手动点击刷新按钮
 // let refreshTimer = null
@@ -113,8 +118,14 @@ async function fetchServerStatus() {
       // 更新进程统计信息
       if (statusData.process_stats && !statusData.error) {
         processStats.value = statusData.process_stats;
+        processHistory.value = {
+          cpu_percent: statusData.history?.cpu_percent || [],
+          memory_mb: statusData.history?.memory_mb || [],
+        };
+        sampleInterval.value = statusData.sample_interval || 5;
       } else {
         processStats.value = null;
+        processHistory.value = { cpu_percent: [], memory_mb: [] };
       }
 
       initialDataLoaded.value = true;
@@ -317,6 +328,8 @@ function getServerTypeText(serverType) {
       return 'SSE'
     case 'streamable':
       return 'HTTP'
+    case 'unified':
+      return 'HTTP + SSE'
     default:
       return '未知'
   }
@@ -368,6 +381,7 @@ return (_ctx, _cache) => {
   const _component_v_card_text = _resolveComponent("v-card-text");
   const _component_v_card = _resolveComponent("v-card");
   const _component_v_spacer = _resolveComponent("v-spacer");
+  const _component_v_sparkline = _resolveComponent("v-sparkline");
   const _component_v_btn = _resolveComponent("v-btn");
 
   return (_openBlock(), _createElementBlock("div", _hoisted_1, [
@@ -553,6 +567,41 @@ return (_ctx, _cache) => {
                                 ]),
                                 _: 1
                               }),
+                              (serverStatus.sse_url)
+                                ? (_openBlock(), _createBlock(_component_v_list_item, {
+                                    key: 0,
+                                    class: "px-3 py-1"
+                                  }, {
+                                    prepend: _withCtx(() => [
+                                      _createVNode(_component_v_icon, {
+                                        color: "info",
+                                        icon: "mdi-link-variant",
+                                        size: "small"
+                                      })
+                                    ]),
+                                    append: _withCtx(() => [
+                                      _createVNode(_component_v_chip, {
+                                        color: "info",
+                                        size: "x-small",
+                                        variant: "tonal"
+                                      }, {
+                                        default: _withCtx(() => [
+                                          _createTextVNode(_toDisplayString(serverStatus.sse_url), 1)
+                                        ]),
+                                        _: 1
+                                      })
+                                    ]),
+                                    default: _withCtx(() => [
+                                      _createVNode(_component_v_list_item_title, { class: "text-caption" }, {
+                                        default: _withCtx(() => _cache[21] || (_cache[21] = [
+                                          _createTextVNode("SSE地址")
+                                        ])),
+                                        _: 1
+                                      })
+                                    ]),
+                                    _: 1
+                                  }))
+                                : _createCommentVNode("", true),
                               _createVNode(_component_v_divider, { class: "my-1" }),
                               _createVNode(_component_v_list_item, { class: "px-3 py-1" }, {
                                 prepend: _withCtx(() => [
@@ -605,7 +654,47 @@ return (_ctx, _cache) => {
                                   })
                                 ]),
                                 _: 1
-                              })
+                              }),
+                              (serverStatus.workers && serverStatus.workers.length)
+                                ? (_openBlock(), _createElementBlock(_Fragment, { key: 1 }, [
+                                    _createVNode(_component_v_divider, { class: "my-1" }),
+                                    (_openBlock(true), _createElementBlock(_Fragment, null, _renderList(serverStatus.workers, (worker) => {
+                                      return (_openBlock(), _createBlock(_component_v_list_item, {
+                                        key: worker.worker,
+                                        class: "px-3 py-1"
+                                      }, {
+                                        prepend: _withCtx(() => [
+                                          _createVNode(_component_v_icon, {
+                                            color: worker.health ? 'success' : 'error',
+                                            icon: "mdi-server",
+                                            size: "small"
+                                          }, null, 8, ["color"])
+                                        ]),
+                                        append: _withCtx(() => [
+                                          _createVNode(_component_v_chip, {
+                                            color: worker.health ? 'success' : 'error',
+                                            size: "x-small",
+                                            variant: "tonal"
+                                          }, {
+                                            default: _withCtx(() => [
+                                              _createTextVNode(_toDisplayString(worker.health ? '正常' : (worker.alive ? '异常' : '已退出')), 1)
+                                            ]),
+                                            _: 2
+                                          }, 1032, ["color"])
+                                        ]),
+                                        default: _withCtx(() => [
+                                          _createVNode(_component_v_list_item_title, { class: "text-caption" }, {
+                                            default: _withCtx(() => [
+                                              _createTextVNode("工作进程 " + _toDisplayString(worker.worker) + "（端口 " + _toDisplayString(worker.port) + "）", 1)
+                                            ]),
+                                            _: 2
+                                          }, 1024)
+                                        ]),
+                                        _: 2
+                                      }, 1024))
+                                    }), 128))
+                                  ], 64))
+                                : _createCommentVNode("", true)
                             ]),
                             _: 1
                           })
@@ -756,7 +845,32 @@ return (_ctx, _cache) => {
                                       })
                                     ]),
                                     _: 1
-                                  })
+                                  }),
+                                  (processHistory.value.cpu_percent.length > 1)
+                                    ? (_openBlock(), _createElementBlock(_Fragment, { key: 0 }, [
+                                        _createVNode(_component_v_divider, { class: "my-1" }),
+                                        _createElementVNode("div", _hoisted_15, [
+                                          _createElementVNode("div", _hoisted_16, "CPU走势（每" + _toDisplayString(sampleInterval.value) + "秒采样）", 1),
+                                          _createVNode(_component_v_sparkline, {
+                                            "model-value": processHistory.value.cpu_percent,
+                                            color: getCpuColor(processStats.value.cpu_percent),
+                                            height: "40",
+                                            "line-width": "2",
+                                            smooth: "",
+                                            "auto-draw": ""
+                                          }, null, 8, ["model-value", "color"]),
+                                          _cache[22] || (_cache[22] = _createElementVNode("div", { class: "text-caption text-medium-emphasis mt-1" }, "内存走势（MB）", -1)),
+                                          _createVNode(_component_v_sparkline, {
+                                            "model-value": processHistory.value.memory_mb,
+                                            color: getMemoryColor(processStats.value.memory_percent),
+                                            height: "40",
+                                            "line-width": "2",
+                                            smooth: "",
+                                            "auto-draw": ""
+                                          }, null, 8, ["model-value", "color"])
+                                        ])
+                                      ], 64))
+                                    : _createCommentVNode("", true)
                                 ]),
                                 _: 1
                               })
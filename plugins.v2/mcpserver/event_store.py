@@ -5,8 +5,11 @@ Includes both in-memory and SQLite-based implementations.
 
 import logging
 import os
+import queue
 import sqlite3
-from collections import deque
+import threading
+from collections import OrderedDict
+from contextlib import closing
 from dataclasses import dataclass
 from uuid import uuid4
 import json
@@ -26,7 +29,7 @@ from mcp.types import JSONRPCMessage
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class EventEntry:
     """
     Represents an event entry in the event store.
@@ -35,6 +38,26 @@ class EventEntry:
     event_id: EventId
     stream_id: StreamId
     message: JSONRPCMessage
+    seq: int = 0
+    size: int = 0
+
+
+class _StreamBuffer:
+    """Fixed-capacity ring buffer holding the most recent events of one stream."""
+
+    __slots__ = ("stream_id", "slots", "count", "next_seq", "total_bytes")
+
+    def __init__(self, stream_id: StreamId, capacity: int):
+        self.stream_id = stream_id
+        self.slots: list[EventEntry | None] = [None] * capacity
+        self.count = 0
+        # 下一条事件的序号，槽位 = seq % capacity
+        self.next_seq = 0
+        self.total_bytes = 0
+
+    @property
+    def oldest_seq(self) -> int:
+        return self.next_seq - self.count
 
 
 class InMemoryEventStore(EventStore):
@@ -43,70 +66,123 @@ class InMemoryEventStore(EventStore):
     This is primarily intended for examples and testing, not for production use
     where a persistent storage solution would be more appropriate.
 
-    This implementation keeps only the last N events per stream for memory efficiency.
+    Each stream is a fixed-capacity ring buffer capped both in event count and
+    in serialized bytes, and a global ``event_id -> (stream, seq)`` index locates
+    any event in O(1). Evicting an entry drops its index entry at the same time,
+    so the index never holds stale ids, and replay jumps straight to the slot
+    after the last event instead of scanning. Streams themselves are kept in LRU
+    order and the least recently written one is dropped past ``max_streams``.
     """
 
-    def __init__(self, max_events_per_stream: int = 100):
+    def __init__(
+        self,
+        max_events_per_stream: int = 100,
+        max_bytes_per_stream: int = 1024 * 1024,
+        max_streams: int = 10000
+    ):
         """Initialize the event store.
 
         Args:
             max_events_per_stream: Maximum number of events to keep per stream
+            max_bytes_per_stream: Maximum serialized size of the events kept per stream
+            max_streams: Maximum number of streams kept before the least recently
+                written one is dropped
         """
-        self.max_events_per_stream = max_events_per_stream
-        # for maintaining last N events per stream
-        self.streams: dict[StreamId, deque[EventEntry]] = {}
-        # event_id -> EventEntry for quick lookup
-        self.event_index: dict[EventId, EventEntry] = {}
+        self.max_events_per_stream = max(1, max_events_per_stream)
+        self.max_bytes_per_stream = max_bytes_per_stream
+        self.max_streams = max_streams
+        # stream_id -> ring buffer，按最近写入排序
+        self.streams: OrderedDict[StreamId, _StreamBuffer] = OrderedDict()
+        # event_id -> (ring buffer, seq) for O(1) lookup
+        self.event_index: dict[EventId, tuple[_StreamBuffer, int]] = {}
 
     async def store_event(
         self, stream_id: StreamId, message: JSONRPCMessage
     ) -> EventId:
         """Stores an event with a generated event ID."""
         event_id = str(uuid4())
-        event_entry = EventEntry(
-            event_id=event_id, stream_id=stream_id, message=message
+        size = len(message.model_dump_json())
+
+        buffer = self.streams.get(stream_id)
+        if buffer is None:
+            buffer = self.streams[stream_id] = _StreamBuffer(
+                stream_id, self.max_events_per_stream)
+            if len(self.streams) > self.max_streams:
+                _, dropped = self.streams.popitem(last=False)
+                self._drop_stream(dropped)
+        else:
+            self.streams.move_to_end(stream_id)
+
+        # 按条数或字节数腾出空间，最旧的事件先被淘汰
+        capacity = len(buffer.slots)
+        while buffer.count and (
+            buffer.count >= capacity
+            or buffer.total_bytes + size > self.max_bytes_per_stream
+        ):
+            self._evict_oldest(buffer)
+
+        seq = buffer.next_seq
+        buffer.slots[seq % capacity] = EventEntry(
+            event_id=event_id, stream_id=stream_id, message=message, seq=seq, size=size
         )
-
-        # Get or create deque for this stream
-        if stream_id not in self.streams:
-            self.streams[stream_id] = deque(maxlen=self.max_events_per_stream)
-
-        # If deque is full, the oldest event will be automatically removed
-        # We need to remove it from the event_index as well
-        if len(self.streams[stream_id]) == self.max_events_per_stream:
-            oldest_event = self.streams[stream_id][0]
-            self.event_index.pop(oldest_event.event_id, None)
-
-        # Add new event
-        self.streams[stream_id].append(event_entry)
-        self.event_index[event_id] = event_entry
+        buffer.next_seq += 1
+        buffer.count += 1
+        buffer.total_bytes += size
+        self.event_index[event_id] = (buffer, seq)
 
         return event_id
 
+    def _evict_oldest(self, buffer: _StreamBuffer):
+        """Remove the oldest entry of a stream together with its index entry."""
+        slot = buffer.oldest_seq % len(buffer.slots)
+        entry = buffer.slots[slot]
+        buffer.slots[slot] = None
+        buffer.count -= 1
+        if entry is not None:
+            buffer.total_bytes -= entry.size
+            self.event_index.pop(entry.event_id, None)
+
+    def _drop_stream(self, buffer: _StreamBuffer):
+        """Remove every index entry belonging to a dropped stream."""
+        for entry in buffer.slots:
+            if entry is not None:
+                self.event_index.pop(entry.event_id, None)
+
     async def replay_events_after(
         self,
         last_event_id: EventId,
         send_callback: EventCallback,
     ) -> StreamId | None:
         """Replays events that occurred after the specified event ID."""
-        if last_event_id not in self.event_index:
+        location = self.event_index.get(last_event_id)
+        if location is None:
             logger.warning(f"Event ID {last_event_id} not found in store")
             return None
 
-        # Get the stream and find events after the last one
-        last_event = self.event_index[last_event_id]
-        stream_id = last_event.stream_id
-        stream_events = self.streams.get(last_event.stream_id, deque())
+        buffer, last_seq = location
+        capacity = len(buffer.slots)
+        seq = last_seq + 1
+        # 回放期间可能有新事件写入，每轮重新读取next_seq
+        while seq < buffer.next_seq:
+            if seq < buffer.oldest_seq:
+                # 回放过程中旧事件被淘汰，跳到仍然存在的最旧事件
+                seq = buffer.oldest_seq
+                continue
+            entry = buffer.slots[seq % capacity]
+            if entry is not None and entry.seq == seq:
+                await send_callback(EventMessage(entry.message, entry.event_id))
+            seq += 1
+
+        return buffer.stream_id
+
+    async def start_cleanup(self):
+        """内存存储由容量上限约束，无需清理任务"""
 
-        # Events in deque are already in chronological order
-        found_last = False
-        for event in stream_events:
-            if found_last:
-                await send_callback(EventMessage(event.message, event.event_id))
-            elif event.event_id == last_event_id:
-                found_last = True
+    async def stop_cleanup(self):
+        """内存存储由容量上限约束，无需清理任务"""
 
-        return stream_id
+    async def close(self):
+        """内存存储无需关闭"""
 
 
 class SQLiteEventStore(EventStore):
@@ -114,17 +190,39 @@ class SQLiteEventStore(EventStore):
     SQLite-based implementation of the EventStore interface for resumability.
     Provides persistent storage suitable for personal cloud environments with low concurrency.
 
-    This implementation maintains a SQLite database with events and provides the same
-    interface as the InMemoryEventStore but with persistence.
+    All writes go through a single long-lived WAL connection owned by a dedicated
+    writer thread. ``store_event`` enqueues the event and waits for the writer,
+    which drains the queue and commits everything it finds in one transaction
+    (group commit), so a burst of events costs one commit instead of one
+    connection + commit each. A failed commit is retried ``write_retries`` times;
+    if it still fails, ``store_event`` raises instead of handing out the id of an
+    event that was never stored.
+    Per-stream pruning is driven by an in-memory counter and only runs once a
+    stream overflows by ``prune_slack`` events, and the database size is checked
+    on a timer instead of after every insert.
+
+    Every event gets a monotonic integer ``seq`` within its stream, indexed
+    together with ``stream_id``. Replay walks that index with one cursor and
+    hands rows to the callback in chunks, so resuming a deep backlog needs
+    constant memory and never reorders events written within the same second.
     """
 
+    # 队列中的停止标记
+    _STOP = object()
+
     def __init__(
         self,
         db_path: str = "events.db",
         max_events_per_stream: int = 100,
         max_event_age_days: int = 30,
         auto_cleanup_interval_hours: int = 24,
-        max_db_size_mb: int = 100
+        max_db_size_mb: int = 100,
+        batch_size: int = 256,
+        max_queue_size: int = 10000,
+        prune_slack: int | None = None,
+        size_check_interval_seconds: int = 60,
+        replay_chunk_size: int = 100,
+        write_retries: int = 3
     ):
         """Initialize the SQLite event store.
 
@@ -134,33 +232,266 @@ class SQLiteEventStore(EventStore):
             max_event_age_days: Maximum age of events in days before cleanup
             auto_cleanup_interval_hours: How often to run automatic cleanup (in hours)
             max_db_size_mb: Maximum size of the database in MB
+            batch_size: Maximum number of queued writes committed in one transaction
+            max_queue_size: Maximum number of pending writes before store_event waits
+            prune_slack: How many events a stream may exceed the limit by before it
+                is pruned (defaults to 20% of max_events_per_stream)
+            size_check_interval_seconds: How often the writer checks the database size
+            replay_chunk_size: Number of rows fetched per round trip during replay
+            write_retries: How many times a failed batch commit is retried before
+                the pending store_event calls fail
         """
         self.db_path = db_path
         self.max_events_per_stream = max_events_per_stream
         self.max_event_age_days = max_event_age_days
         self.auto_cleanup_interval_hours = auto_cleanup_interval_hours
         self.max_db_size_mb = max_db_size_mb
+        self.batch_size = max(1, batch_size)
+        self.prune_slack = (
+            prune_slack if prune_slack is not None
+            else max(1, max_events_per_stream // 5)
+        )
+        self.size_check_interval_seconds = size_check_interval_seconds
+        self.replay_chunk_size = max(1, replay_chunk_size)
+        self.write_retries = max(0, write_retries)
+
+        # 写线程状态，只能在写线程中访问 _stream_state
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue_size)
+        self._writer_thread: threading.Thread | None = None
+        self._writer_lock = threading.Lock()
+        # stream_id -> [当前事件数, 最新seq]
+        self._stream_state: dict[StreamId, list[int]] = {}
+        self._last_size_check = 0.0
+
         self._init_db()
         self._cleanup_task = None
 
+    def _connect(self, check_same_thread: bool = True) -> sqlite3.Connection:
+        """Open a connection configured for WAL mode."""
+        conn = sqlite3.connect(
+            self.db_path, timeout=30, check_same_thread=check_same_thread)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=30000")
+        return conn
+
     def _init_db(self):
         """Initialize the database schema if it doesn't exist."""
-        with sqlite3.connect(self.db_path) as conn:
+        with closing(self._connect()) as conn:
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS events (
                     event_id TEXT PRIMARY KEY,
                     stream_id TEXT NOT NULL,
+                    seq INTEGER NOT NULL,
                     message TEXT NOT NULL,
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
             """)
+            # 旧版数据库没有seq列，按写入顺序(rowid)回填
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(events)")}
+            if "seq" not in columns:
+                logger.info("Migrating event store schema: adding seq column")
+                conn.execute("ALTER TABLE events ADD COLUMN seq INTEGER")
+                conn.execute("UPDATE events SET seq = rowid WHERE seq IS NULL")
             # Create index for faster queries
+            conn.execute("DROP INDEX IF EXISTS idx_stream_id")
             conn.execute(
-                "CREATE INDEX IF NOT EXISTS idx_stream_id ON events(stream_id)")
+                "CREATE UNIQUE INDEX IF NOT EXISTS idx_stream_seq ON events(stream_id, seq)")
             conn.execute(
                 "CREATE INDEX IF NOT EXISTS idx_created_at ON events(created_at)")
             conn.commit()
 
+    # ------------------------------------------------------------------
+    # 写线程
+    # ------------------------------------------------------------------
+
+    def _ensure_writer(self):
+        """Start the writer thread if it is not running."""
+        if self._writer_thread is not None and self._writer_thread.is_alive():
+            return
+        with self._writer_lock:
+            if self._writer_thread is not None and self._writer_thread.is_alive():
+                return
+            self._writer_thread = threading.Thread(
+                target=self._writer_loop,
+                name="SQLiteEventStoreWriter",
+                daemon=True
+            )
+            self._writer_thread.start()
+
+    def _writer_loop(self):
+        """Drain the write queue and commit events in batches."""
+        conn = self._connect()
+        # 写线程启动时重新统计各流的事件数
+        self._stream_state.clear()
+        logger.debug(f"Event store writer started: {self.db_path}")
+        try:
+            while True:
+                batch = [self._queue.get()]
+                # 尽可能多地取出已排队的写入，一次提交
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+
+                if self._process_batch(conn, batch):
+                    break
+
+                if time.monotonic() - self._last_size_check >= self.size_check_interval_seconds:
+                    self._last_size_check = time.monotonic()
+                    try:
+                        self._check_db_size_sync(conn)
+                    except Exception as e:
+                        logger.error(f"Error checking event store size: {e}")
+        finally:
+            conn.close()
+            logger.debug(f"Event store writer stopped: {self.db_path}")
+
+    def _process_batch(self, conn: sqlite3.Connection, batch: list) -> bool:
+        """Apply one batch from the queue. Returns True when a stop marker was seen."""
+        rows: list[tuple] = []
+        stop = False
+
+        for item in batch:
+            if item is self._STOP:
+                stop = True
+            elif item[0] == "event":
+                rows.append(item[1:])
+            else:
+                # 维护任务前先提交已排队的事件，保证先后顺序
+                if rows:
+                    self._commit_events(conn, rows)
+                    rows = []
+                _, func, loop, future = item
+                self._run_call(conn, func, loop, future)
+
+        if rows:
+            self._commit_events(conn, rows)
+        return stop
+
+    def _commit_events(self, conn: sqlite3.Connection, rows: list[tuple]):
+        """Write a batch, retrying failed commits, and resolve the waiting store_event calls."""
+        error = None
+        for attempt in range(self.write_retries + 1):
+            if attempt:
+                # 数据库忙或磁盘暂时不可写时退避后重试整批
+                time.sleep(0.05 * 2 ** (attempt - 1))
+            error = self._write_events(conn, rows)
+            if error is None:
+                break
+            logger.warning(
+                f"Failed to store {len(rows)} events (attempt {attempt + 1}/{self.write_retries + 1}): {error}")
+        if error is not None:
+            logger.error(f"Dropping {len(rows)} events after {self.write_retries + 1} attempts: {error}")
+
+        # 按事件循环分组，每个循环只调度一次回调
+        waiters: dict = {}
+        for event_id, _, _, loop, future in rows:
+            waiters.setdefault(loop, []).append((future, event_id))
+        for loop, futures in waiters.items():
+            try:
+                loop.call_soon_threadsafe(_resolve_store_futures, futures, error)
+            except RuntimeError:
+                # 事件循环已关闭，没有等待者
+                pass
+
+    def _write_events(self, conn: sqlite3.Connection, rows: list[tuple]) -> Exception | None:
+        """Insert a batch of events and prune overflowing streams in one transaction.
+
+        Returns the exception if the transaction was rolled back, otherwise None.
+        """
+        try:
+            records = []
+            touched: set[StreamId] = set()
+            for event_id, stream_id, message_str, _, _ in rows:
+                state = self._stream_state.get(stream_id)
+                if state is None:
+                    # 首次见到的流只统计一次，之后由计数器维护
+                    count, last_seq = conn.execute(
+                        "SELECT COUNT(*), COALESCE(MAX(seq), 0) FROM events WHERE stream_id = ?",
+                        (stream_id,)
+                    ).fetchone()
+                    state = self._stream_state[stream_id] = [count, last_seq]
+                state[0] += 1
+                state[1] += 1
+                touched.add(stream_id)
+                records.append((event_id, stream_id, state[1], message_str))
+
+            conn.executemany(
+                "INSERT INTO events (event_id, stream_id, seq, message) VALUES (?, ?, ?, ?)",
+                records
+            )
+
+            for stream_id in touched:
+                state = self._stream_state[stream_id]
+                if state[0] > self.max_events_per_stream + self.prune_slack:
+                    # Delete oldest events beyond the limit
+                    conn.execute(
+                        "DELETE FROM events WHERE stream_id = ? AND seq <= ?",
+                        (stream_id, state[1] - self.max_events_per_stream)
+                    )
+                    state[0] = self.max_events_per_stream
+
+            conn.commit()
+            return None
+        except Exception as e:
+            if conn.in_transaction:
+                conn.rollback()
+            # 计数器可能已失真，下次重新统计
+            self._stream_state.clear()
+            return e
+
+    @staticmethod
+    def _run_call(conn: sqlite3.Connection, func, loop, future):
+        """Run a maintenance callable on the writer connection and resolve its future."""
+        try:
+            result = func(conn)
+        except Exception as e:
+            if conn.in_transaction:
+                conn.rollback()
+            if future is not None:
+                loop.call_soon_threadsafe(_set_future_exception, future, e)
+            else:
+                logger.error(f"Event store task failed: {e}")
+            return
+        if future is not None:
+            loop.call_soon_threadsafe(_set_future_result, future, result)
+
+    async def _enqueue(self, item):
+        """Put an item on the write queue without blocking the event loop."""
+        self._ensure_writer()
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            # 队列已满时在线程池中等待，形成背压
+            await asyncio.get_running_loop().run_in_executor(None, self._queue.put, item)
+
+    async def _submit(self, func):
+        """Run ``func(conn)`` on the writer thread and wait for its result."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        await self._enqueue(("call", func, loop, future))
+        return await future
+
+    async def flush(self):
+        """Wait until every event queued so far has been committed."""
+        await self._submit(lambda conn: None)
+
+    async def close(self):
+        """Flush pending events and stop the writer thread."""
+        thread = self._writer_thread
+        if thread is None or not thread.is_alive():
+            return
+        await self._enqueue(self._STOP)
+        await asyncio.get_running_loop().run_in_executor(None, thread.join)
+        self._writer_thread = None
+        logger.info("Event store writer closed")
+
+    # ------------------------------------------------------------------
+    # 清理任务
+    # ------------------------------------------------------------------
+
     async def start_cleanup(self):
         """启动清理任务。必须在事件循环运行后调用。"""
         if self._cleanup_task is not None:
@@ -209,162 +540,106 @@ class SQLiteEventStore(EventStore):
         message_dict = json.loads(message_str)
         return JSONRPCMessage.model_validate(message_dict)
 
-    async def cleanup_old_events(self):
-        """删除超过最大保留时间的事件。"""
-        # 计算截止日期
+    def _get_db_size_mb(self) -> float:
+        """数据库文件大小（包含WAL文件），单位MB"""
+        size = 0
+        for path in (self.db_path, f"{self.db_path}-wal"):
+            if os.path.exists(path):
+                size += os.path.getsize(path)
+        return size / (1024 * 1024)
+
+    def _cleanup_old_events_sync(self, conn: sqlite3.Connection) -> int:
+        """在写连接上删除超过最大保留时间的事件"""
         cutoff_date = datetime.now() - timedelta(days=self.max_event_age_days)
         cutoff_str = cutoff_date.strftime('%Y-%m-%d %H:%M:%S')
 
         logger.info(f"Cleaning up events older than {cutoff_str}")
 
-        def db_cleanup():
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                # 获取要删除的事件数量
-                cursor.execute(
-                    "SELECT COUNT(*) FROM events WHERE created_at < ?",
-                    (cutoff_str,)
-                )
-                count = cursor.fetchone()[0]
-
-                # 删除旧事件
-                cursor.execute(
-                    "DELETE FROM events WHERE created_at < ?",
-                    (cutoff_str,)
-                )
-                conn.commit()
-                return count
-
-        # 在线程池中执行数据库操作
-        count = await asyncio.get_event_loop().run_in_executor(None, db_cleanup)
+        cursor = conn.execute(
+            "DELETE FROM events WHERE created_at < ?",
+            (cutoff_str,)
+        )
+        conn.commit()
+        count = cursor.rowcount
         if count > 0:
+            # 删除跨越多个流，计数器需要重新统计
+            self._stream_state.clear()
             logger.info(f"Cleaned up {count} old events")
         return count
 
-    async def vacuum_database(self):
-        """执行VACUUM操作以回收空间并优化数据库。"""
+    def _vacuum_sync(self, conn: sqlite3.Connection) -> tuple[float, float]:
+        """在写连接上执行VACUUM并截断WAL文件"""
         logger.info("Running database VACUUM operation")
+        before_mb = self._get_db_size_mb()
+        conn.execute("VACUUM")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        after_mb = self._get_db_size_mb()
+        logger.info(
+            f"Database size: {before_mb:.2f}MB → {after_mb:.2f}MB (saved {before_mb - after_mb:.2f}MB)")
+        return before_mb, after_mb
 
-        def db_vacuum():
-            with sqlite3.connect(self.db_path) as conn:
-                # 获取当前数据库大小
-                db_size_bytes = os.path.getsize(self.db_path)
-                db_size_mb = db_size_bytes / (1024 * 1024)
-
-                # 执行VACUUM操作
-                conn.execute("VACUUM")
+    def _check_db_size_sync(self, conn: sqlite3.Connection):
+        """检查数据库大小，如果超过限制则触发清理（在写线程中执行）"""
+        db_size_mb = self._get_db_size_mb()
+        if db_size_mb <= self.max_db_size_mb:
+            return
+
+        logger.warning(
+            f"Database size ({db_size_mb:.2f}MB) exceeds limit ({self.max_db_size_mb}MB), triggering cleanup")
+        # 先尝试基于时间的清理
+        cleaned = self._cleanup_old_events_sync(conn)
+        if cleaned == 0:
+            # 如果没有清理到旧事件，则删除最旧的一些事件，直到大小合适
+            target_percent = 0.8  # 目标是将数据库缩小到最大大小的80%
+            target_size = self.max_db_size_mb * target_percent
+            percent_to_delete = 1 - (target_size / db_size_mb)
+
+            total_events = conn.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+            events_to_delete = int(total_events * percent_to_delete)
+
+            if events_to_delete > 0:
+                # 删除最旧的事件
+                conn.execute(
+                    """DELETE FROM events WHERE rowid IN (
+                        SELECT rowid FROM events
+                        ORDER BY rowid
+                        LIMIT ?
+                    )""",
+                    (events_to_delete,)
+                )
                 conn.commit()
+                self._stream_state.clear()
+                logger.info(
+                    f"Emergency cleanup: deleted {events_to_delete} oldest events")
 
-                # 获取VACUUM后的大小
-                new_size_bytes = os.path.getsize(self.db_path)
-                new_size_mb = new_size_bytes / (1024 * 1024)
+        # 执行VACUUM操作回收空间
+        self._vacuum_sync(conn)
 
-                return db_size_mb, new_size_mb
+    async def cleanup_old_events(self):
+        """删除超过最大保留时间的事件。"""
+        return await self._submit(self._cleanup_old_events_sync)
 
-        # 在线程池中执行数据库操作
-        before_mb, after_mb = await asyncio.get_event_loop().run_in_executor(None, db_vacuum)
-        logger.info(
-            f"Database size: {before_mb:.2f}MB → {after_mb:.2f}MB (saved {before_mb - after_mb:.2f}MB)")
-        return before_mb, after_mb
+    async def vacuum_database(self):
+        """执行VACUUM操作以回收空间并优化数据库。"""
+        return await self._submit(self._vacuum_sync)
 
     async def check_db_size(self):
         """检查数据库大小，如果超过限制则触发清理。"""
-        def get_db_size():
-            if os.path.exists(self.db_path):
-                return os.path.getsize(self.db_path) / (1024 * 1024)
-            return 0
-
-        db_size_mb = await asyncio.get_event_loop().run_in_executor(None, get_db_size)
-
-        if db_size_mb > self.max_db_size_mb:
-            logger.warning(
-                f"Database size ({db_size_mb:.2f}MB) exceeds limit ({self.max_db_size_mb}MB), triggering cleanup")
-            # 先尝试基于时间的清理
-            cleaned = await self.cleanup_old_events()
-            if cleaned == 0:
-                # 如果没有清理到旧事件，则删除最旧的一些事件，直到大小合适
-                def emergency_cleanup():
-                    with sqlite3.connect(self.db_path) as conn:
-                        cursor = conn.cursor()
-                        # 计算需要删除的事件数量（估计值）
-                        target_percent = 0.8  # 目标是将数据库缩小到最大大小的80%
-                        target_size = self.max_db_size_mb * target_percent
-                        percent_to_delete = 1 - (target_size / db_size_mb)
-
-                        # 获取总事件数
-                        cursor.execute("SELECT COUNT(*) FROM events")
-                        total_events = cursor.fetchone()[0]
-
-                        # 计算要删除的事件数
-                        events_to_delete = int(
-                            total_events * percent_to_delete)
-
-                        if events_to_delete > 0:
-                            # 删除最旧的事件
-                            cursor.execute(
-                                """DELETE FROM events WHERE event_id IN (
-                                    SELECT event_id FROM events 
-                                    ORDER BY created_at 
-                                    LIMIT ?
-                                )""",
-                                (events_to_delete,)
-                            )
-                            conn.commit()
-                            return events_to_delete
-                        return 0
-
-                deleted = await asyncio.get_event_loop().run_in_executor(None, emergency_cleanup)
-                if deleted > 0:
-                    logger.info(
-                        f"Emergency cleanup: deleted {deleted} oldest events")
-
-            # 执行VACUUM操作回收空间
-            await self.vacuum_database()
+        await self._submit(self._check_db_size_sync)
 
     async def store_event(
         self, stream_id: StreamId, message: JSONRPCMessage
     ) -> EventId:
-        """Stores an event with a generated event ID in SQLite database."""
+        """Queues an event with a generated event ID and waits until the writer commits it.
+
+        Raises the database error if the batch could not be committed after retries.
+        """
         event_id = str(uuid4())
         message_str = self._serialize_message(message)
-
-        # Run database operations in a thread pool to avoid blocking
-        def db_store():
-            with sqlite3.connect(self.db_path) as conn:
-                # Insert the new event
-                conn.execute(
-                    "INSERT INTO events (event_id, stream_id, message) VALUES (?, ?, ?)",
-                    (event_id, stream_id, message_str)
-                )
-
-                # Check if we need to prune old events
-                cursor = conn.cursor()
-                cursor.execute(
-                    "SELECT COUNT(*) FROM events WHERE stream_id = ?",
-                    (stream_id,)
-                )
-                count = cursor.fetchone()[0]
-
-                if count > self.max_events_per_stream:
-                    # Delete oldest events beyond the limit
-                    cursor.execute(
-                        """DELETE FROM events WHERE event_id IN (
-                            SELECT event_id FROM events 
-                            WHERE stream_id = ? 
-                            ORDER BY created_at 
-                            LIMIT ?
-                        )""",
-                        (stream_id, count - self.max_events_per_stream)
-                    )
-                conn.commit()
-
-        # Run in thread pool
-        await asyncio.get_event_loop().run_in_executor(None, db_store)
-
-        # 每次存储事件时检查数据库大小
-        await self.check_db_size()
-
-        return event_id
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        await self._enqueue(("event", event_id, stream_id, message_str, loop, future))
+        return await future
 
     async def replay_events_after(
         self,
@@ -372,41 +647,63 @@ class SQLiteEventStore(EventStore):
         send_callback: EventCallback,
     ) -> StreamId | None:
         """Replays events that occurred after the specified event ID from SQLite database."""
-        # Run database query in a thread pool
-        def get_last_event():
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    "SELECT stream_id, created_at FROM events WHERE event_id = ?",
+        # 先等待排队中的事件落盘，保证回放能看到它们
+        await self.flush()
+
+        loop = asyncio.get_running_loop()
+        # 同一个连接和游标贯穿整个回放，游标会在线程池中分块推进
+        conn = await loop.run_in_executor(None, self._connect, False)
+        try:
+            def get_last_event():
+                return conn.execute(
+                    "SELECT stream_id, seq FROM events WHERE event_id = ?",
                     (last_event_id,)
-                )
-                result = cursor.fetchone()
-                return result
+                ).fetchone()
 
-        result = await asyncio.get_event_loop().run_in_executor(None, get_last_event)
-        if not result:
-            logger.warning(f"Event ID {last_event_id} not found in store")
-            return None
+            result = await loop.run_in_executor(None, get_last_event)
+            if not result:
+                logger.warning(f"Event ID {last_event_id} not found in store")
+                return None
 
-        stream_id, last_timestamp = result
-
-        # Get events after the last one
-        def get_newer_events():
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    """SELECT event_id, message FROM events 
-                       WHERE stream_id = ? AND created_at > ? 
-                       ORDER BY created_at""",
-                    (stream_id, last_timestamp)
+            stream_id, last_seq = result
+
+            def open_cursor():
+                return conn.execute(
+                    """SELECT event_id, message FROM events
+                       WHERE stream_id = ? AND seq > ?
+                       ORDER BY seq""",
+                    (stream_id, last_seq)
                 )
-                return cursor.fetchall()
 
-        events = await asyncio.get_event_loop().run_in_executor(None, get_newer_events)
+            cursor = await loop.run_in_executor(None, open_cursor)
+            while True:
+                rows = await loop.run_in_executor(
+                    None, cursor.fetchmany, self.replay_chunk_size)
+                if not rows:
+                    break
+                # Send each event through the callback
+                for event_id, message_str in rows:
+                    message = self._deserialize_message(message_str)
+                    await send_callback(EventMessage(message, event_id))
+
+            return stream_id
+        finally:
+            await loop.run_in_executor(None, conn.close)
+
+
+def _set_future_result(future: asyncio.Future, result):
+    if not future.done():
+        future.set_result(result)
+
+
+def _set_future_exception(future: asyncio.Future, exc: BaseException):
+    if not future.done():
+        future.set_exception(exc)
 
-        # Send each event through the callback
-        for event_id, message_str in events:
-            message = self._deserialize_message(message_str)
-            await send_callback(EventMessage(message, event_id))
 
-        return stream_id
+def _resolve_store_futures(futures: list, error: BaseException | None):
+    for future, event_id in futures:
+        if error is None:
+            _set_future_result(future, event_id)
+        else:
+            _set_future_exception(future, error)
@@ -0,0 +1,237 @@
+"""
+共享的插件注册文件监听模块
+监听 plugin_tools.json / plugin_prompts.json 的变化并按插件增量更新注册表，供两种服务器类型使用
+
+变化通知有三个来源：
+1. MoviePilot 侧写完文件后调用 /control/plugins/reload 端点（主要路径）
+2. 安装了 watchdog 时的文件系统事件（inotify 等）
+3. 没有 watchdog 时的低频兜底检查，防止通知丢失
+
+已在状态同步管理器中注册的文件交给它同步（比较文件签名与内容哈希，并维护代数），
+同时标记为由监听器负责，状态同步管理器不再定时轮询这些文件；安装了 watchdog 时空闲不产生文件I/O
+"""
+
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from utils.file_operations import safe_read_json
+from utils.state_sync import get_state_sync_manager
+
+# watchdog 为可选依赖
+WATCHDOG_AVAILABLE = False
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+    WATCHDOG_AVAILABLE = True
+except ImportError:
+    FileSystemEventHandler = object
+    Observer = None
+
+logger = logging.getLogger(__name__)
+
+TOOLS_TARGET = "tools"
+PROMPTS_TARGET = "prompts"
+
+
+class _RegistryFileHandler(FileSystemEventHandler):
+    """把文件系统事件转换为监听器通知"""
+
+    def __init__(self, watcher: "PluginRegistryWatcher"):
+        super().__init__()
+        self._watcher = watcher
+
+    def on_any_event(self, event):
+        for path in (getattr(event, "src_path", None), getattr(event, "dest_path", None)):
+            if path:
+                target = self._watcher.target_for_path(path)
+                if target:
+                    self._watcher.notify(target)
+
+
+class PluginRegistryWatcher:
+    """插件工具/提示注册文件监听器"""
+
+    def __init__(self, tool_manager, prompt_manager, base_dir: Path, fallback_interval: float = 60):
+        """
+        Args:
+            tool_manager: 工具管理器
+            prompt_manager: 提示管理器
+            base_dir: 注册文件所在目录
+            fallback_interval: 兜底检查间隔（秒）
+        """
+        base_dir = Path(os.path.abspath(base_dir))
+        self._targets = {
+            TOOLS_TARGET: {
+                "file": base_dir / "plugin_tools.json",
+                "apply": tool_manager.sync_plugin_tools,
+                "sync_target": "plugin_tools",
+                "signature": None,
+                "lock": threading.Lock(),
+            },
+            PROMPTS_TARGET: {
+                "file": base_dir / "plugin_prompts.json",
+                "apply": prompt_manager.sync_plugin_prompts,
+                "sync_target": "plugin_prompts",
+                "signature": None,
+                "lock": threading.Lock(),
+            },
+        }
+        self._base_dir = base_dir
+        self._fallback_interval = fallback_interval
+        self._pending: set = set()
+        self._pending_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._observer = None
+
+    def target_for_path(self, path: str) -> Optional[str]:
+        """根据文件路径返回对应的同步目标"""
+        name = os.path.basename(path)
+        for target, config in self._targets.items():
+            if config["file"].name == name:
+                return target
+        return None
+
+    def start(self):
+        """启动监听线程，并加载当前文件内容"""
+        if self._thread and self._thread.is_alive():
+            return
+
+        self._stop_event.clear()
+        sync_manager = get_state_sync_manager()
+        for config in self._targets.values():
+            if self._delegated(config):
+                sync_manager.set_watched(config["sync_target"], True)
+
+        if WATCHDOG_AVAILABLE:
+            try:
+                self._observer = Observer()
+                self._observer.schedule(_RegistryFileHandler(self), str(self._base_dir), recursive=False)
+                self._observer.start()
+                logger.info("插件注册文件监听已启动 (watchdog)")
+            except Exception as e:
+                self._observer = None
+                logger.warning(f"启动watchdog文件监听失败，仅使用通知端点和兜底检查: {e}")
+
+        self.notify()
+        self._thread = threading.Thread(
+            target=self._run, name="PluginRegistryWatcher", daemon=True
+        )
+        self._thread.start()
+        if self._observer is None:
+            logger.info(f"插件注册监听线程已启动，兜底检查间隔 {self._fallback_interval} 秒")
+        else:
+            logger.info("插件注册监听线程已启动")
+
+    def stop(self):
+        """停止监听"""
+        self._stop_event.set()
+        self._wakeup.set()
+        if self._observer is not None:
+            try:
+                self._observer.stop()
+                self._observer.join(timeout=5)
+            except Exception as e:
+                logger.debug(f"停止watchdog文件监听失败: {e}")
+            self._observer = None
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+        # 交还给状态同步管理器定时轮询
+        sync_manager = get_state_sync_manager()
+        for config in self._targets.values():
+            if self._delegated(config):
+                sync_manager.set_watched(config["sync_target"], False)
+
+    def notify(self, target: Optional[str] = None):
+        """通知指定目标（默认全部）需要重新加载"""
+        with self._pending_lock:
+            if target is None:
+                self._pending.update(self._targets.keys())
+            elif target in self._targets:
+                self._pending.add(target)
+            else:
+                logger.warning(f"未知的插件注册同步目标: {target}")
+                return
+        self._wakeup.set()
+
+    def reload(self, target: Optional[str] = None, force: bool = True) -> Dict[str, Any]:
+        """
+        立即重新加载指定目标（默认全部）
+
+        Args:
+            target: tools / prompts，None表示全部
+            force: 为False时文件签名（mtime、大小）未变化则跳过
+
+        Returns:
+            每个目标的同步结果
+        """
+        targets = [target] if target else list(self._targets.keys())
+        results = {}
+        for name in targets:
+            config = self._targets.get(name)
+            if config is None:
+                results[name] = {"success": False, "message": f"未知的同步目标: {name}"}
+                continue
+            try:
+                results[name] = self._reload_target(config, force)
+            except Exception as e:
+                logger.error(f"重新加载插件注册文件失败 {name}: {e}")
+                results[name] = {"success": False, "message": str(e)}
+        return results
+
+    @staticmethod
+    def _delegated(config: Dict[str, Any]) -> bool:
+        """该文件是否已注册到状态同步管理器"""
+        return get_state_sync_manager().get_target_file(config["sync_target"]) == config["file"]
+
+    def _reload_target(self, config: Dict[str, Any], force: bool) -> Dict[str, Any]:
+        if self._delegated(config):
+            # 收到通知时不信任文件签名，但内容哈希未变化时不重复应用
+            return get_state_sync_manager().sync_target(config["sync_target"], ignore_signature=force)
+
+        with config["lock"]:
+            return self._load_file(config, force)
+
+    @staticmethod
+    def _load_file(config: Dict[str, Any], force: bool) -> Dict[str, Any]:
+        """未注册到状态同步管理器时直接读取文件"""
+        file_path: Path = config["file"]
+        try:
+            stat = file_path.stat()
+            signature = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            signature = None
+
+        if not force and signature == config["signature"]:
+            return {"success": True, "changed": False}
+
+        data = safe_read_json(file_path, default_value={}) if signature else {}
+        result = config["apply"](data)
+        config["signature"] = signature
+        return result
+
+    def _run(self):
+        """监听循环：收到通知立即加载；没有watchdog时按兜底间隔检查文件签名"""
+        while not self._stop_event.is_set():
+            notified = self._wakeup.wait(self._fallback_interval if self._observer is None else None)
+            if self._stop_event.is_set():
+                break
+            self._wakeup.clear()
+
+            with self._pending_lock:
+                pending = self._pending
+                self._pending = set()
+
+            try:
+                if notified and pending:
+                    for target in pending:
+                        self.reload(target, force=True)
+                else:
+                    self.reload(force=False)
+            except Exception as e:
+                logger.error(f"插件注册监听循环异常: {e}")
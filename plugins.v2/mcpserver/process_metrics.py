@@ -0,0 +1,169 @@
+"""
+MCP服务器进程资源采样
+后台线程按固定间隔采样CPU、内存、线程、文件描述符和连接数，保存在环形缓冲区中，
+状态接口直接读取最新样本和近期序列，不再在API线程中阻塞采样。
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+import psutil
+
+# 采样间隔（秒）与保留的样本数（默认约10分钟）
+DEFAULT_SAMPLE_INTERVAL = 5.0
+DEFAULT_HISTORY_SIZE = 120
+
+# 返回给前端绘制走势图的字段
+SERIES_FIELDS = ("cpu_percent", "memory_mb", "num_threads", "connections")
+
+
+def format_runtime(runtime_seconds: float) -> str:
+    """把运行秒数格式化为分钟/小时/天"""
+    runtime_hours = runtime_seconds / 3600
+    if runtime_hours < 1:
+        return f"{runtime_seconds / 60:.1f} 分钟"
+    if runtime_hours < 24:
+        return f"{runtime_hours:.1f} 小时"
+    return f"{runtime_hours / 24:.1f} 天"
+
+
+class ProcessMetricsSampler:
+    """进程资源采样器
+
+    多进程模式下会同时采样前置路由和所有工作进程，样本中的数值为各进程之和，
+    PID、名称、启动时间等取自第一个进程（对外监听的进程）。
+    """
+
+    def __init__(self, pid_provider: Callable[[], List[int]],
+                 interval: float = DEFAULT_SAMPLE_INTERVAL, history_size: int = DEFAULT_HISTORY_SIZE):
+        """
+        Args:
+            pid_provider: 返回当前需要采样的进程ID列表，服务器未运行时返回空列表
+            interval: 采样间隔（秒）
+            history_size: 环形缓冲区保留的样本数
+        """
+        self._pid_provider = pid_provider
+        self.interval = interval
+        self._samples: Deque[Dict[str, Any]] = deque(maxlen=history_size)
+        # 复用Process对象，cpu_percent(interval=None) 依赖上一次调用的计时
+        self._processes: Dict[int, psutil.Process] = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """启动后台采样线程，已运行时忽略"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="mcp-process-metrics", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止采样并清空样本"""
+        self._stop_event.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=2)
+        self._thread = None
+        with self._lock:
+            self._samples.clear()
+            self._processes.clear()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            self.sample()
+            self._stop_event.wait(self.interval)
+
+    def _process(self, pid: int) -> psutil.Process:
+        proc = self._processes.get(pid)
+        if proc is None:
+            proc = psutil.Process(pid)
+            # 第一次调用只建立计时基准，返回值无意义
+            proc.cpu_percent(interval=None)
+            self._processes[pid] = proc
+        return proc
+
+    def sample(self) -> Optional[Dict[str, Any]]:
+        """立即采样一次并写入缓冲区，没有可采样的进程时返回None"""
+        try:
+            pids = [pid for pid in self._pid_provider() if pid]
+        except Exception:
+            pids = []
+        if not pids:
+            return None
+
+        totals = {"cpu_percent": 0.0, "memory_mb": 0.0, "virtual_memory_mb": 0.0,
+                  "memory_percent": 0.0, "num_threads": 0, "num_fds": 0, "connections": 0}
+        primary: Dict[str, Any] = {}
+        with self._lock:
+            for pid in pids:
+                try:
+                    proc = self._process(pid)
+                    with proc.oneshot():
+                        if not primary:
+                            primary = {"pid": pid, "name": proc.name(), "status": proc.status(),
+                                       "create_time": proc.create_time()}
+                        memory_info = proc.memory_info()
+                        totals["cpu_percent"] += proc.cpu_percent(interval=None)
+                        totals["memory_mb"] += memory_info.rss / 1024 / 1024
+                        totals["virtual_memory_mb"] += memory_info.vms / 1024 / 1024
+                        totals["memory_percent"] += proc.memory_percent()
+                        totals["num_threads"] += proc.num_threads()
+                        try:
+                            totals["num_fds"] += proc.num_fds() if hasattr(proc, "num_fds") else 0
+                        except psutil.AccessDenied:
+                            pass
+                        # 网络连接 - 兼容不同版本的psutil
+                        try:
+                            try:
+                                totals["connections"] += len(proc.net_connections())
+                            except AttributeError:
+                                totals["connections"] += len(proc.connections())
+                        except psutil.AccessDenied:
+                            pass
+                except (psutil.NoSuchProcess, psutil.ZombieProcess):
+                    self._processes.pop(pid, None)
+                except psutil.AccessDenied:
+                    continue
+
+            # 移除已不再采样的进程
+            for pid in list(self._processes):
+                if pid not in pids:
+                    del self._processes[pid]
+
+            if not primary:
+                return None
+
+            now = time.time()
+            sample = {
+                **primary,
+                **{key: round(value, 2) if isinstance(value, float) else value for key, value in totals.items()},
+                "process_count": len(pids),
+                "runtime": format_runtime(now - primary["create_time"]),
+                "timestamp": now,
+            }
+            self._samples.append(sample)
+            return sample
+
+    def latest(self, max_age: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """返回最新样本；超过max_age秒的样本视为过期"""
+        with self._lock:
+            if not self._samples:
+                return None
+            sample = self._samples[-1]
+        if max_age is not None and time.time() - sample["timestamp"] > max_age:
+            return None
+        return dict(sample)
+
+    def series(self, limit: Optional[int] = None) -> Dict[str, List[Any]]:
+        """返回近期样本的时间序列，用于走势图"""
+        with self._lock:
+            samples = list(self._samples)
+        if limit:
+            samples = samples[-limit:]
+        series = {"timestamp": [round(sample["timestamp"], 1) for sample in samples]}
+        for field in SERIES_FIELDS:
+            series[field] = [sample[field] for sample in samples]
+        return series
@@ -12,6 +12,9 @@ logger = logging.getLogger(__name__)
 class BasePrompt:
     """Base class for MCP prompts"""
 
+    # 渲染结果只取决于提示名和参数时设为True，PromptManager会缓存渲染结果
+    deterministic: bool = False
+
     def __init__(self):
         self._prompt_info_cache = None  # Cache prompt information
 
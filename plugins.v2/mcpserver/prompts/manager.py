@@ -1,11 +1,13 @@
 """
 Prompt manager for MCP Server.
 """
+import json
 import logging
 import os
 import sys
+from collections import OrderedDict
 from pathlib import Path
-from typing import Dict, Type, List, Any, Optional
+from typing import Dict, Type, List, Any, Optional, Tuple
 
 import mcp.types as types
 
@@ -21,6 +23,9 @@ sys.path.append(parent_dir)
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# 确定性提示渲染结果的最大缓存条目数
+RENDERED_CACHE_SIZE = 256
+
 
 class PromptManager:
     """Prompt manager, responsible for registering and managing all available prompts"""
@@ -28,6 +33,16 @@ class PromptManager:
     def __init__(self, token_manager=None):
         self.token_manager = token_manager
         self._prompts: Dict[str, Type[BasePrompt]] = {}
+        # 内置提示实例与定义在注册时生成一次
+        self._prompt_instances: Dict[Type[BasePrompt], BasePrompt] = {}
+        self._builtin_prompt_infos: List[types.Prompt] = []
+        # (插件提示注册表版本号, 提示列表)
+        self._catalog: Optional[Tuple[int, List[types.Prompt]]] = None
+        # (提示名, 参数) -> 渲染结果，只缓存确定性的内置提示
+        self._rendered: "OrderedDict[Tuple[str, Any], types.GetPromptResult]" = OrderedDict()
+        self._rendered_stats = {"hits": 0, "misses": 0}
+        # 插件提示代理按提示名复用，提示重新注册后重建
+        self._plugin_proxies: Dict[str, PluginPromptProxy] = {}
         self._plugin_prompt_registry = PluginPromptRegistry()
         self._state_sync_enabled = False
         self._register_prompts()
@@ -41,40 +56,70 @@ class PromptManager:
 
         for prompt_class in prompts:
             prompt = prompt_class()
+            self._prompt_instances[prompt_class] = prompt
             prompt_infos = prompt.prompt_info
-            if isinstance(prompt_infos, list):
-                # If it's a list of prompts, register all prompts
-                for prompt_info in prompt_infos:
-                    self._prompts[prompt_info.name] = prompt_class
-                    logger.info(f"Registered prompt: {prompt_info.name}")
-            else:
-                # Register a single prompt directly
-                self._prompts[prompt_infos.name] = prompt_class
-                logger.info(f"Registered prompt: {prompt_infos.name}")
+            if not isinstance(prompt_infos, list):
+                prompt_infos = [prompt_infos]
+            for prompt_info in prompt_infos:
+                self._prompts[prompt_info.name] = prompt_class
+                self._builtin_prompt_infos.append(prompt_info)
+                logger.info(f"Registered prompt: {prompt_info.name}")
 
     def list_prompts(self) -> List[types.Prompt]:
-        """List all available prompts"""
-        prompts = []
-
-        # 添加内置prompts
-        for prompt_class in set(self._prompts.values()):  # Use set to deduplicate
-            prompt = prompt_class()
-            prompt_infos = prompt.prompt_info
-
-            # Handle single prompt or list of prompts
-            if isinstance(prompt_infos, list):
-                prompts.extend(prompt_infos)
-            else:
-                prompts.append(prompt_infos)
-
-        # 添加插件prompts
-        plugin_prompts = self._plugin_prompt_registry.list_registered_prompts()
-        prompts.extend(plugin_prompts)
-
-        prompt_names = [prompt.name for prompt in prompts]
-        logger.info(f"Available prompts: {prompt_names} (内置: {len(prompts) - len(plugin_prompts)}, 插件: {len(plugin_prompts)})")
-        print(f"Available prompts: {prompt_names}")
-        return prompts
+        """列出所有可用的提示
+
+        内置提示的定义在注册时生成一次，插件提示按注册表版本号缓存，
+        只有插件提示变更后的第一次调用才会重建列表。
+        """
+        catalog = self._catalog
+        if catalog is None or catalog[0] != self._plugin_prompt_registry.version:
+            version, plugin_prompts = self._plugin_prompt_registry.snapshot()
+            catalog = (version, self._builtin_prompt_infos + plugin_prompts)
+            self._catalog = catalog
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"重建提示列表(版本{version}): {[prompt.name for prompt in catalog[1]]} "
+                             f"(内置: {len(self._builtin_prompt_infos)}, 插件: {len(plugin_prompts)})")
+
+        return list(catalog[1])
+
+    @property
+    def catalog_version(self) -> int:
+        """提示列表版本号，插件提示变更时递增"""
+        return self._plugin_prompt_registry.version
+
+    async def _render_builtin(self, name: str, arguments: Optional[Dict[str, Any]]) -> types.GetPromptResult:
+        """渲染内置提示，确定性提示按 (名称, 参数) 缓存渲染结果"""
+        prompt = self._prompt_instances[self._prompts[name]]
+        if not prompt.deterministic:
+            return await prompt.get_prompt(name, arguments)
+
+        # MCP提示参数都是字符串，直接用参数项集合作为键；含不可哈希的值时退回JSON序列化
+        try:
+            key = (name, frozenset(arguments.items()) if arguments else None)
+            result = self._rendered.get(key)
+        except TypeError:
+            key = (name, json.dumps(arguments, sort_keys=True, ensure_ascii=False, default=str))
+            result = self._rendered.get(key)
+        if result is not None:
+            self._rendered.move_to_end(key)
+            self._rendered_stats["hits"] += 1
+            return result
+
+        self._rendered_stats["misses"] += 1
+        result = await prompt.get_prompt(name, arguments)
+        self._rendered[key] = result
+        if len(self._rendered) > RENDERED_CACHE_SIZE:
+            self._rendered.popitem(last=False)
+        return result
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """提示列表与渲染结果缓存统计"""
+        return {
+            "catalog_version": self.catalog_version,
+            "state_generation": self.state_generation,
+            "rendered_entries": len(self._rendered),
+            **self._rendered_stats,
+        }
 
     async def get_prompt(
         self, name: str, arguments: Optional[Dict[str, Any]] = None
@@ -83,13 +128,15 @@ class PromptManager:
         try:
             # 首先检查是否是内置prompt
             if name in self._prompts:
-                prompt = self._prompts[name]()
-                return await prompt.get_prompt(name, arguments)
+                return await self._render_builtin(name, arguments)
 
             # 检查是否是插件prompt
             plugin_prompt_info = self._plugin_prompt_registry.get_prompt_info(name)
             if plugin_prompt_info:
-                prompt_proxy = PluginPromptProxy(plugin_prompt_info, self.token_manager)
+                prompt_proxy = self._plugin_proxies.get(name)
+                if prompt_proxy is None or prompt_proxy.prompt_info_data is not plugin_prompt_info:
+                    prompt_proxy = PluginPromptProxy(plugin_prompt_info, self.token_manager)
+                    self._plugin_proxies[name] = prompt_proxy
                 return await prompt_proxy.get_prompt(name, arguments)
 
             # 提示不存在
@@ -128,6 +175,18 @@ class PromptManager:
         """注销插件prompts"""
         return self._plugin_prompt_registry.unregister_plugin_prompts(plugin_id)
 
+    def sync_plugin_prompts(self, plugin_prompts: Dict[str, Any]) -> Dict[str, Any]:
+        """按插件提示文件内容同步注册表，只重新注册内容有变化的插件
+
+        Args:
+            plugin_prompts: 插件提示文件内容，插件ID -> {"prompts": [...], ...}
+        """
+        return self._plugin_prompt_registry.sync_plugins({
+            plugin_id: plugin_data.get("prompts", [])
+            for plugin_id, plugin_data in plugin_prompts.items()
+            if isinstance(plugin_data, dict)
+        })
+
     def get_plugin_prompt_registry(self):
         """获取插件prompt注册表"""
         return self._plugin_prompt_registry
@@ -200,35 +259,21 @@ class PromptManager:
         try:
             logger.info("开始从文件同步插件提示状态到内存")
 
-            # 获取当前内存中的插件列表
-            current_plugins = set(self._plugin_prompt_registry._plugin_prompts.keys())
-            file_plugins = set(file_state.keys())
-
-            # 移除不在文件中的插件提示
-            plugins_to_remove = current_plugins - file_plugins
-            for plugin_id in plugins_to_remove:
-                logger.info(f"移除不在文件中的插件提示: {plugin_id}")
-                self._plugin_prompt_registry.unregister_plugin_prompts(plugin_id)
-
-            # 添加或更新文件中的插件提示
-            for plugin_id, plugin_data in file_state.items():
-                prompts = plugin_data.get("prompts", [])
-                if prompts:
-                    # 先移除现有提示
-                    if plugin_id in current_plugins:
-                        self._plugin_prompt_registry.unregister_plugin_prompts(plugin_id)
-
-                    # 注册新提示
-                    result = self._plugin_prompt_registry.register_prompts(plugin_id, prompts)
-                    if result.get("success"):
-                        logger.debug(f"同步插件提示成功: {plugin_id}")
-                    else:
-                        logger.warning(f"同步插件提示失败: {plugin_id}, {result.get('message')}")
+            result = self.sync_plugin_prompts(file_state)
+            logger.debug(f"插件提示同步结果: {result}")
 
             logger.info("插件提示状态同步完成")
+            return result
 
         except Exception as e:
             logger.error(f"设置提示内存状态失败: {e}")
+            return {"success": False, "message": str(e)}
+
+    @property
+    def state_generation(self) -> int:
+        """插件提示文件同步代数，文件内容变化并应用到内存后加一；只读取内存计数器，可随时轮询"""
+        from utils.state_sync import get_generation
+        return get_generation("plugin_prompts")
 
     def enable_state_sync(self):
         """启用状态同步"""
@@ -15,6 +15,9 @@ logger = logging.getLogger(__name__)
 class MediaPrompt(BasePrompt):
     """Media-related prompts"""
 
+    # 提示内容只由参数拼接生成
+    deterministic = True
+
     @property
     def prompt_info(self) -> List[types.Prompt]:
         """Return prompt description information"""
@@ -13,7 +13,7 @@ from .plugin_registry import PluginPromptInfo
 
 parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(parent_dir)
-from utils import make_request
+from utils import make_request, ArgumentValidationError, get_plugin_channel, PluginChannelUnavailable
 
 logger = logging.getLogger(__name__)
 
@@ -60,7 +60,7 @@ class PluginPromptProxy:
                 )
 
             # 通过API端点调用
-            result = await self._execute_via_api(prompt_name, arguments or {})
+            result = await self._execute_via_api(prompt_name, validation_result["arguments"])
 
             # 格式化返回结果
             return self._format_result(result)
@@ -79,14 +79,27 @@ class PluginPromptProxy:
             )
 
     async def _execute_via_api(self, prompt_name: str, arguments: dict) -> dict:
-        """通过API端点执行提示"""
+        """执行提示：优先使用插件调用通道，通道不可用时通过API端点调用"""
+        # 构建请求数据，包含提示名称和参数
+        request_data = {"prompt_name": prompt_name, "arguments": arguments}
+
+        channel = get_plugin_channel()
+        if channel is not None:
+            try:
+                return await channel.call(
+                    "prompt", self.prompt_info_data.plugin_id, request_data, timeout=self._timeout
+                )
+            except PluginChannelUnavailable as e:
+                logger.debug(f"{e}，改用API端点")
+            except asyncio.TimeoutError:
+                return {"success": False, "message": f"API调用超时({self._timeout}秒)", "data": None}
+            except ConnectionError as e:
+                return {"success": False, "message": f"API调用异常: {str(e)}", "data": None}
+
         try:
             # 构建API请求
             endpoint = self.prompt_info_data.api_endpoint
 
-            # 构建请求数据，包含提示名称和参数
-            request_data = {"prompt_name": prompt_name, "arguments": arguments}
-
             # 获取访问令牌
             access_token = None
             if self.token_manager:
@@ -119,25 +132,18 @@ class PluginPromptProxy:
 
     def _validate_arguments(self, arguments: dict) -> Dict[str, Any]:
         """
-        验证提示参数
+        验证提示参数，使用注册时编译好的校验器
 
         Args:
             arguments: 提示参数
 
         Returns:
-            验证结果
+            验证结果，通过时 arguments 为补全默认值后的参数
         """
         try:
-            # 检查必需参数
-            for arg_def in self.prompt_info_data.arguments:
-                arg_name = arg_def["name"]
-                is_required = arg_def.get("required", False)
-
-                if is_required and arg_name not in arguments:
-                    return {"valid": False, "error": f"缺少必需参数: {arg_name}"}
-
-            return {"valid": True}
-
+            return {"valid": True, "arguments": self.prompt_info_data.validate_arguments(arguments)}
+        except ArgumentValidationError as e:
+            return {"valid": False, "error": str(e)}
         except Exception as e:
             return {"valid": False, "error": f"参数验证异常: {str(e)}"}
 
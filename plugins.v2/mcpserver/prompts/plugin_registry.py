@@ -2,12 +2,20 @@
 插件提示注册管理器
 负责管理动态注册的MCP提示
 """
+import hashlib
+import json
 import logging
+import os
+import sys
 import threading
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 import mcp.types as types
 from datetime import datetime
 
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(parent_dir)
+from utils import compile_validator, prompt_arguments_schema
+
 logger = logging.getLogger(__name__)
 
 
@@ -23,6 +31,8 @@ class PluginPromptInfo:
         self.auth_level = prompt_data.get("auth_level", 1)
         self.group = prompt_data.get("group")
         self.registered_at = datetime.now()
+        # 参数校验器在注册时编译，调用时直接使用
+        self.validate_arguments = compile_validator(prompt_arguments_schema(self.arguments))
         
     def to_mcp_prompt(self) -> types.Prompt:
         """转换为MCP提示定义"""
@@ -63,8 +73,10 @@ class PluginPromptRegistry:
     def __init__(self):
         self._registered_prompts: Dict[str, PluginPromptInfo] = {}  # 提示名 -> 提示信息
         self._plugin_prompts: Dict[str, List[str]] = {}  # 插件ID -> 提示名列表
+        self._plugin_hashes: Dict[str, str] = {}  # 插件ID -> 提示定义内容哈希
         self._lock = threading.RLock()
         self._max_prompts = 100  # 最大提示数量限制
+        self._version = 0  # 注册表版本号，每次变更递增
         
     def register_prompts(self, plugin_id: str, prompts: List[dict]) -> Dict[str, Any]:
         """
@@ -78,81 +90,162 @@ class PluginPromptRegistry:
             注册结果
         """
         with self._lock:
-            try:
-                # 验证提示数量限制
-                if len(self._registered_prompts) + len(prompts) > self._max_prompts:
-                    return {
-                        "success": False,
-                        "message": f"提示数量超过限制({self._max_prompts})",
-                        "registered_count": 0
-                    }
-                
-                registered_prompts = []
-                failed_prompts = []
-                
-                for prompt_data in prompts:
-                    try:
-                        # 验证提示定义
-                        validation_result = self._validate_prompt_definition(prompt_data)
-                        if not validation_result["valid"]:
-                            failed_prompts.append({
-                                "name": prompt_data.get("name", "unknown"),
-                                "error": validation_result["error"]
-                            })
-                            continue
-                        
-                        prompt_name = prompt_data["name"]
-                        
-                        # 检查提示名是否已存在
-                        if prompt_name in self._registered_prompts:
-                            failed_prompts.append({
-                                "name": prompt_name,
-                                "error": f"提示名'{prompt_name}'已存在"
-                            })
-                            continue
-                        
-                        # 创建提示信息
-                        prompt_info = PluginPromptInfo(plugin_id, prompt_data)
-                        
-                        # 注册提示
-                        self._registered_prompts[prompt_name] = prompt_info
-                        
-                        # 更新插件提示映射
-                        if plugin_id not in self._plugin_prompts:
-                            self._plugin_prompts[plugin_id] = []
-                        self._plugin_prompts[plugin_id].append(prompt_name)
-                        
-                        registered_prompts.append(prompt_name)
-                        logger.info(f"成功注册插件提示: {plugin_id}.{prompt_name}")
-                        
-                    except Exception as e:
-                        failed_prompts.append({
-                            "name": prompt_data.get("name", "unknown"),
-                            "error": f"注册失败: {str(e)}"
-                        })
-                        logger.error(f"注册提示失败: {str(e)}")
-                
-                result = {
-                    "success": len(registered_prompts) > 0,
-                    "message": f"成功注册{len(registered_prompts)}个提示",
-                    "registered_count": len(registered_prompts),
-                    "registered_prompts": registered_prompts
-                }
-                
-                if failed_prompts:
-                    result["failed_prompts"] = failed_prompts
-                    result["message"] += f", {len(failed_prompts)}个提示注册失败"
-                
-                return result
-                
-            except Exception as e:
-                logger.error(f"注册插件提示时发生异常: {str(e)}")
+            # 直接注册的提示不经过内容比对，下次同步时重新应用
+            self._plugin_hashes.pop(plugin_id, None)
+            self._version += 1
+            return self._register_into(
+                self._registered_prompts, self._plugin_prompts, plugin_id, prompts
+            )
+
+    def _register_into(self,
+                       registered: Dict[str, PluginPromptInfo],
+                       plugin_prompts: Dict[str, List[str]],
+                       plugin_id: str,
+                       prompts: List[dict]) -> Dict[str, Any]:
+        """把插件提示注册到给定的注册表字典中"""
+        try:
+            # 验证提示数量限制
+            if len(registered) + len(prompts) > self._max_prompts:
                 return {
                     "success": False,
-                    "message": f"注册失败: {str(e)}",
+                    "message": f"提示数量超过限制({self._max_prompts})",
                     "registered_count": 0
                 }
-    
+
+            registered_prompts = []
+            failed_prompts = []
+
+            for prompt_data in prompts:
+                try:
+                    # 验证提示定义
+                    validation_result = self._validate_prompt_definition(prompt_data)
+                    if not validation_result["valid"]:
+                        failed_prompts.append({
+                            "name": prompt_data.get("name", "unknown"),
+                            "error": validation_result["error"]
+                        })
+                        continue
+
+                    prompt_name = prompt_data["name"]
+
+                    # 检查提示名是否已存在
+                    if prompt_name in registered:
+                        failed_prompts.append({
+                            "name": prompt_name,
+                            "error": f"提示名'{prompt_name}'已存在"
+                        })
+                        continue
+
+                    # 创建提示信息
+                    prompt_info = PluginPromptInfo(plugin_id, prompt_data)
+
+                    # 注册提示
+                    registered[prompt_name] = prompt_info
+
+                    # 更新插件提示映射
+                    if plugin_id not in plugin_prompts:
+                        plugin_prompts[plugin_id] = []
+                    plugin_prompts[plugin_id].append(prompt_name)
+
+                    registered_prompts.append(prompt_name)
+                    logger.info(f"成功注册插件提示: {plugin_id}.{prompt_name}")
+
+                except Exception as e:
+                    failed_prompts.append({
+                        "name": prompt_data.get("name", "unknown"),
+                        "error": f"注册失败: {str(e)}"
+                    })
+                    logger.error(f"注册提示失败: {str(e)}")
+
+            result = {
+                "success": len(registered_prompts) > 0,
+                "message": f"成功注册{len(registered_prompts)}个提示",
+                "registered_count": len(registered_prompts),
+                "registered_prompts": registered_prompts
+            }
+
+            if failed_prompts:
+                result["failed_prompts"] = failed_prompts
+                result["message"] += f", {len(failed_prompts)}个提示注册失败"
+
+            return result
+
+        except Exception as e:
+            logger.error(f"注册插件提示时发生异常: {str(e)}")
+            return {
+                "success": False,
+                "message": f"注册失败: {str(e)}",
+                "registered_count": 0
+            }
+
+    def sync_plugins(self, plugins: Dict[str, List[dict]]) -> Dict[str, Any]:
+        """
+        按内容哈希将注册表同步为给定的插件提示集合
+
+        只有提示定义发生变化的插件会被重新注册，不在集合中的插件会被注销。
+        新的注册表在副本上构建，完成后一次性替换，读取方不会看到中间状态。
+
+        Args:
+            plugins: 插件ID -> 提示定义列表
+
+        Returns:
+            同步结果，包含新增、更新、注销和未变化的插件
+        """
+        new_hashes = {
+            plugin_id: _content_hash(prompts)
+            for plugin_id, prompts in plugins.items() if prompts
+        }
+
+        with self._lock:
+            removed = [pid for pid in self._plugin_prompts if pid not in new_hashes]
+            changed = [
+                pid for pid, digest in new_hashes.items()
+                if self._plugin_hashes.get(pid) != digest
+            ]
+            if not removed and not changed:
+                return {"success": True, "changed": False, "unchanged": len(new_hashes)}
+
+            registered = dict(self._registered_prompts)
+            plugin_prompts = {pid: list(names) for pid, names in self._plugin_prompts.items()}
+            hashes = dict(self._plugin_hashes)
+
+            dropped = False
+            for plugin_id in removed + changed:
+                for prompt_name in plugin_prompts.pop(plugin_id, []):
+                    registered.pop(prompt_name, None)
+                    dropped = True
+                hashes.pop(plugin_id, None)
+
+            results = {}
+            for plugin_id in changed:
+                results[plugin_id] = self._register_into(
+                    registered, plugin_prompts, plugin_id, plugins[plugin_id]
+                )
+                # 注册失败的插件不记录哈希，下次同步时重试
+                if results[plugin_id].get("success"):
+                    hashes[plugin_id] = new_hashes[plugin_id]
+
+            # 只有重试仍然失败的插件时注册表没有变化，不递增版本号
+            if not removed and not dropped and not any(r.get("success") for r in results.values()):
+                return {"success": True, "changed": False, "updated": results,
+                        "unchanged": len(new_hashes) - len(changed)}
+
+            # 原子替换
+            self._registered_prompts = registered
+            self._plugin_prompts = plugin_prompts
+            self._plugin_hashes = hashes
+            self._version += 1
+
+            logger.info(f"插件提示同步完成: 变更{len(changed)}个, 注销{len(removed)}个, "
+                        f"未变化{len(new_hashes) - len(changed)}个")
+            return {
+                "success": True,
+                "changed": True,
+                "updated": results,
+                "removed": removed,
+                "unchanged": len(new_hashes) - len(changed)
+            }
+
     def unregister_plugin_prompts(self, plugin_id: str) -> Dict[str, Any]:
         """
         注销插件的所有提示
@@ -183,6 +276,8 @@ class PluginPromptRegistry:
                 
                 # 清空插件提示映射
                 del self._plugin_prompts[plugin_id]
+                self._plugin_hashes.pop(plugin_id, None)
+                self._version += 1
                 
                 return {
                     "success": True,
@@ -204,10 +299,20 @@ class PluginPromptRegistry:
         with self._lock:
             return self._registered_prompts.get(prompt_name)
     
+    @property
+    def version(self) -> int:
+        """注册表版本号，提示增删时递增"""
+        return self._version
+
     def list_registered_prompts(self) -> List[types.Prompt]:
         """列出所有注册的提示"""
         with self._lock:
             return [prompt_info.to_mcp_prompt() for prompt_info in self._registered_prompts.values()]
+
+    def snapshot(self) -> Tuple[int, List[types.Prompt]]:
+        """原子地返回当前版本号与提示列表"""
+        with self._lock:
+            return self._version, self.list_registered_prompts()
     
     def get_plugin_prompts(self, plugin_id: str) -> List[str]:
         """获取插件注册的提示列表"""
@@ -306,3 +411,9 @@ class PluginPromptRegistry:
         with self._lock:
             self._max_prompts = max_prompts
             logger.info(f"设置最大提示数量限制: {max_prompts}")
+
+
+def _content_hash(definitions: List[dict]) -> str:
+    """计算定义列表的内容哈希"""
+    payload = json.dumps(definitions, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
@@ -3,10 +3,14 @@ import logging
 import os
 import socket
 import sys
+import time
 import traceback
 from collections.abc import AsyncIterator
 from typing import Optional, Dict, Any
 
+# 启动耗时统计的起点，放在第三方模块导入之前
+_PROCESS_START = time.perf_counter()
+
 import click
 import mcp.types as types
 from mcp.server.lowlevel import Server
@@ -15,6 +19,7 @@ from starlette.applications import Starlette
 from starlette.routing import Mount, Route
 from starlette.types import Receive, Scope, Send
 from starlette.middleware import Middleware
+from starlette.concurrency import run_in_threadpool
 from starlette.responses import JSONResponse
 
 
@@ -22,20 +27,28 @@ from starlette.responses import JSONResponse
 sys.excepthook = lambda exctype, value, tb: print(f"全局异常: {exctype.__name__}: {value}\n{''.join(traceback.format_tb(tb))}")
 
 try:
-    from event_store import SQLiteEventStore
+    from event_store import SQLiteEventStore, InMemoryEventStore
 except Exception as e:
     print(f"导入SQLiteEventStore失败: {str(e)}\n{traceback.format_exc()}")
     # 定义一个简单的内存事件存储作为备用
+    from collections import OrderedDict
+    from uuid import uuid4
     from mcp.server.streamable_http import EventCallback, EventId, EventMessage, EventStore, StreamId
+    SQLiteEventStore = None
+
     class SimpleMemoryEventStore(EventStore):
-        """简单的内存事件存储，作为SQLiteEventStore的备用"""
-        def __init__(self):
-            self.events = {}
+        """简单的内存事件存储，作为SQLiteEventStore的备用，最多保留max_events条事件"""
+        def __init__(self, max_events: int = 1000):
+            self.max_events = max_events
+            self.events: OrderedDict[EventId, tuple[StreamId, Any]] = OrderedDict()
             print("使用简单内存事件存储作为备用")
 
         async def store_event(self, stream_id: StreamId, message: Any) -> EventId:
-            event_id = f"event_{len(self.events) + 1}"
+            event_id = str(uuid4())
             self.events[event_id] = (stream_id, message)
+            # 超出上限时淘汰最旧的事件
+            while len(self.events) > self.max_events:
+                self.events.popitem(last=False)
             return event_id
 
         async def replay_events_after(self, last_event_id: EventId, send_callback: EventCallback) -> StreamId | None:
@@ -47,6 +60,11 @@ except Exception as e:
         async def stop_cleanup(self):
             pass
 
+        async def close(self):
+            pass
+
+    InMemoryEventStore = SimpleMemoryEventStore
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
@@ -57,172 +75,21 @@ from prompts import PromptManager
 # 导入共享的认证模块
 from auth import BearerAuthMiddleware, create_token_manager
 
-def _start_plugin_tool_monitor(tool_manager):
-    """启动插件工具监控线程"""
-    import threading
-    import time
-    import json
-    import os
-
-    def monitor_plugin_tools():
-        """监控插件工具文件变化"""
-        tools_file = os.path.join(os.path.dirname(__file__), "plugin_tools.json")
-        last_modified = 0
-
-        while True:
-            try:
-                if os.path.exists(tools_file):
-                    current_modified = os.path.getmtime(tools_file)
-
-                    if current_modified > last_modified:
-                        last_modified = current_modified
-
-                        # 读取工具文件
-                        try:
-                            # 导入安全文件操作工具
-                            import sys
-                            import os
-                            sys.path.append(os.path.dirname(__file__))
-                            from utils.file_operations import safe_read_json
-                            from pathlib import Path
-
-                            plugin_tools = safe_read_json(Path(tools_file), default_value={})
-
-                            # 更新工具管理器
-                            _update_plugin_tools(tool_manager, plugin_tools)
-
-                        except Exception as e:
-                            logger.error(f"读取插件工具文件失败: {str(e)}")
-
-                time.sleep(5)  # 每5秒检查一次
-
-            except Exception as e:
-                logger.error(f"监控插件工具文件时发生异常: {str(e)}")
-                time.sleep(10)  # 出错时等待更长时间
-
-    # 启动监控线程
-    monitor_thread = threading.Thread(target=monitor_plugin_tools, daemon=True)
-    monitor_thread.start()
-    logger.info("插件工具监控线程已启动")
-
-
-def _start_plugin_prompt_monitor(prompt_manager):
-    """启动插件提示监控线程"""
-    import threading
-    import time
-    import json
-    import os
-
-    def monitor_plugin_prompts():
-        """监控插件提示文件变化"""
-        prompts_file = os.path.join(os.path.dirname(__file__), "plugin_prompts.json")
-        last_modified = 0
-
-        while True:
-            try:
-                # 检查文件是否存在且有修改
-                if os.path.exists(prompts_file):
-                    current_modified = os.path.getmtime(prompts_file)
-                    if current_modified > last_modified:
-                        last_modified = current_modified
-                        logger.info("检测到插件提示文件变化，正在更新...")
-
-                        # 读取提示文件
-                        # 导入安全文件操作工具
-                        import sys
-                        import os
-                        sys.path.append(os.path.dirname(__file__))
-                        from utils.file_operations import safe_read_json
-                        from pathlib import Path
-
-                        plugin_prompts = safe_read_json(Path(prompts_file), default_value={})
-
-                        # 更新插件提示
-                        _update_plugin_prompts(prompt_manager, plugin_prompts)
-
-                # 每5秒检查一次
-                time.sleep(5)
-
-            except Exception as e:
-                logger.error(f"监控插件提示文件时发生异常: {str(e)}")
-                time.sleep(10)  # 出错时等待更长时间
-
-    # 启动监控线程
-    monitor_thread = threading.Thread(target=monitor_plugin_prompts, daemon=True)
-    monitor_thread.start()
-    logger.info("插件提示监控线程已启动")
-
-
-def _update_plugin_prompts(prompt_manager, plugin_prompts):
-    """更新插件提示"""
-    try:
-        # 获取当前已注册的插件提示统计
-        current_stats = prompt_manager.get_plugin_prompt_registry().get_registry_stats()
-        current_plugins = set(current_stats.get("prompts_by_plugin", {}).keys())
-
-        # 获取新的插件列表
-        new_plugins = set(plugin_prompts.keys())
-
-        # 找出需要注销的插件（在当前注册中但不在新列表中）
-        plugins_to_unregister = current_plugins - new_plugins
-        for plugin_id in plugins_to_unregister:
-            result = prompt_manager.unregister_plugin_prompts(plugin_id)
-            logger.info(f"注销插件提示: {plugin_id}, 结果: {result}")
-
-        # 注册或更新插件提示
-        for plugin_id, plugin_data in plugin_prompts.items():
-            prompts = plugin_data.get("prompts", [])
-            if prompts:
-                # 先注销现有提示（如果存在）
-                if plugin_id in current_plugins:
-                    prompt_manager.unregister_plugin_prompts(plugin_id)
-
-                # 注册新提示
-                result = prompt_manager.register_plugin_prompts(plugin_id, prompts)
-                logger.info(f"注册插件提示: {plugin_id}, 结果: {result}")
-
-        # 记录最新统计
-        updated_stats = prompt_manager.get_plugin_prompt_registry().get_registry_stats()
-        logger.info(f"插件提示更新完成: {updated_stats}")
+# 导入共享的插件注册监听模块
+from plugin_watcher import PluginRegistryWatcher
 
-    except Exception as e:
-        logger.error(f"更新插件提示时发生异常: {str(e)}")
+# 导入共享的SSE传输端点
+from sse_transport import create_sse_endpoint
 
-def _update_plugin_tools(tool_manager, plugin_tools):
-    """更新插件工具"""
-    try:
-        # 获取当前已注册的插件工具统计
-        current_stats = tool_manager.get_plugin_registry_stats()
-        current_plugins = set(current_stats.get("tools_by_plugin", {}).keys())
-
-        # 获取新的插件列表
-        new_plugins = set(plugin_tools.keys())
-
-        # 找出需要注销的插件（在当前注册中但不在新列表中）
-        plugins_to_unregister = current_plugins - new_plugins
-        for plugin_id in plugins_to_unregister:
-            result = tool_manager.unregister_plugin_tools(plugin_id)
-            logger.info(f"注销插件工具: {plugin_id}, 结果: {result}")
-
-        # 注册或更新插件工具
-        for plugin_id, plugin_data in plugin_tools.items():
-            tools = plugin_data.get("tools", [])
-            if tools:
-                # 先注销现有工具（如果存在）
-                if plugin_id in current_plugins:
-                    tool_manager.unregister_plugin_tools(plugin_id)
-
-                # 注册新工具
-                result = tool_manager.register_plugin_tools(plugin_id, tools)
-                logger.info(f"注册插件工具: {plugin_id}, 结果: {result}")
-
-        # 记录最新统计
-        updated_stats = tool_manager.get_plugin_registry_stats()
-        logger.info(f"插件工具更新完成: {updated_stats}")
+# 导入HTTP客户端管理
+from utils import close_http_client, close_plugin_channel, get_request_stats, get_response_cache_stats
+
+_IMPORTS_DONE = time.perf_counter()
+
+
+def _elapsed_ms(since: float = _PROCESS_START) -> float:
+    return round((time.perf_counter() - since) * 1000, 1)
 
-    except Exception as e:
-        logger.error(f"更新插件工具时发生异常: {str(e)}")
-        logger.error(traceback.format_exc())
 
 @click.command()
 @click.option("--host", default="127.0.0.1", help="Host address to listen on")
@@ -270,6 +137,33 @@ def _update_plugin_tools(tool_manager, plugin_tools):
     default=3001,
     help="MoviePilot main program port number",
 )
+@click.option(
+    "--tool-max-concurrency",
+    default=4,
+    help="Default maximum concurrent calls per tool",
+)
+@click.option(
+    "--tool-max-queue",
+    default=16,
+    help="Default maximum queued calls per tool",
+)
+@click.option(
+    "--enable-sse",
+    is_flag=True,
+    default=False,
+    help="Also serve the SSE transport at /sse/ from this process (unified mode)",
+)
+@click.option(
+    "--plugin-channel",
+    default="",
+    help="Unix socket path of the MoviePilot plugin call channel (falls back to HTTP when unavailable)",
+)
+@click.option(
+    "--worker-id",
+    default=None,
+    type=int,
+    help="Worker index when running behind worker_router.py (multi-worker mode)",
+)
 def main(
     host: str,
     port: int,
@@ -281,6 +175,11 @@ def main(
     moviepilot_port: int,
     require_auth: bool,
     no_auth: bool,
+    tool_max_concurrency: int,
+    tool_max_queue: int,
+    enable_sse: bool,
+    plugin_channel: str,
+    worker_id: Optional[int],
 ) -> int:
     # Configure logging
     log_handlers = []
@@ -315,11 +214,18 @@ def main(
         handlers=log_handlers
     )
 
-    logger.info(f"正在启动MCP服务器于 {host}:{port}")
+    logger.info(f"正在启动MCP服务器于 {host}:{port}" + ("（统一模式：Streamable HTTP + SSE）" if enable_sse else ""))
 
     # 设置MoviePilot端口号
-    from utils import set_moviepilot_port
+    from utils import set_moviepilot_port, configure_plugin_channel, response_cache
     set_moviepilot_port(moviepilot_port)
+    configure_plugin_channel(plugin_channel, auth_token)
+
+    # 多进程模式下写请求只能使本进程的响应缓存失效，缩短缓存时间以限制其它工作进程读到旧数据的时间
+    if worker_id is not None:
+        from utils.response_cache import MULTI_WORKER_MAX_TTL
+        response_cache.set_max_ttl(MULTI_WORKER_MAX_TTL)
+        logger.info(f"多进程模式：API响应缓存时间上限为 {MULTI_WORKER_MAX_TTL:g} 秒")
 
     # 确定认证配置
     auth_enabled = require_auth and not no_auth
@@ -336,17 +242,24 @@ def main(
     # 创建Server实例
     app = Server("moviepilot-mcp-server")
 
-    # 初始化工具管理器
-    tool_manager = ToolManager(token_manager)
+    # 启动耗时统计，第一次健康检查时输出并随健康检查返回
+    startup_report = {"imports_ms": round((_IMPORTS_DONE - _PROCESS_START) * 1000, 1)}
 
-    # 启动插件工具监控
-    _start_plugin_tool_monitor(tool_manager)
+    # 初始化工具管理器
+    tool_manager_start = time.perf_counter()
+    tool_manager = ToolManager(
+        token_manager, max_concurrency=tool_max_concurrency, max_queue=tool_max_queue
+    )
+    startup_report["tool_manager_ms"] = _elapsed_ms(tool_manager_start)
 
     # 初始化提示管理器
     prompt_manager = PromptManager(token_manager)
 
-    # 启动插件提示监控
-    _start_plugin_prompt_monitor(prompt_manager)
+    # 启动插件工具/提示注册监听
+    plugin_watcher = PluginRegistryWatcher(
+        tool_manager, prompt_manager, os.path.dirname(os.path.abspath(__file__))
+    )
+    plugin_watcher.start()
 
     @app.call_tool()
     async def call_tool(
@@ -357,21 +270,21 @@ def main(
     @app.list_tools()
     async def list_tools() -> list[types.Tool]:
         tools = tool_manager.list_tools()
-        logger.info(f"列出工具列表: {[tool.name for tool in tools]}")
+        logger.debug(f"列出工具列表: {len(tools)} 个工具")
         return tools
 
     # 注册prompts功能
     @app.list_prompts()
     async def list_prompts() -> list[types.Prompt]:
         prompts = prompt_manager.list_prompts()
-        logger.info(f"列出提示列表: {len(prompts)} 个提示")
+        logger.debug(f"列出提示列表: {len(prompts)} 个提示")
         return prompts
 
     @app.get_prompt()
     async def get_prompt(
         name: str, arguments: Optional[Dict[str, Any]] = None
     ) -> types.GetPromptResult:
-        logger.info(f"获取提示: {name} 参数: {arguments}")
+        logger.debug(f"获取提示: {name} 参数: {arguments}")
         return await prompt_manager.get_prompt(name, arguments)
 
     # Create event store for resumability
@@ -389,6 +302,9 @@ def main(
             logger.error(f"当前目录 {current_dir} 不可写: {str(e)}")
             raise RuntimeError(f"当前目录不可写，无法创建事件存储: {str(e)}")
 
+        if SQLiteEventStore is None:
+            raise RuntimeError("SQLiteEventStore不可用")
+
         # 尝试创建SQLite事件存储
         logger.info("创建SQLite事件存储")
         event_store = SQLiteEventStore(
@@ -403,7 +319,7 @@ def main(
         logger.error(f"创建SQLite事件存储失败，使用内存存储作为备用: {str(e)}")
         logger.error(traceback.format_exc())
         # 使用内存存储作为备用
-        event_store = SimpleMemoryEventStore()
+        event_store = InMemoryEventStore()
 
     # Create the session manager with our app and event store
     logger.info("创建会话管理器")
@@ -419,10 +335,39 @@ def main(
     ) -> None:
         await session_manager.handle_request(scope, receive, send)
 
+    # 插件注册变更通知端点
+    async def reload_plugins(request):
+        """插件注册变更通知端点，MoviePilot侧写入注册文件后调用"""
+        target = request.query_params.get("target")
+        if target == "all":
+            target = None
+        results = await run_in_threadpool(plugin_watcher.reload, target)
+        return JSONResponse({"success": True, "results": results})
+
+    # 工具执行统计端点
+    async def tool_stats(request):
+        """工具并发限制与执行统计"""
+        stats = tool_manager.get_tool_stats()
+        stats["http"] = get_request_stats()
+        stats["http_cache"] = get_response_cache_stats()
+        return JSONResponse(stats)
+
     # 健康检查端点
+    server_name = "mcp-unified" if enable_sse else "mcp-http"
+
     async def health_check(request):
         """健康检查端点"""
-        return JSONResponse({"status": "healthy", "server": "mcp-http"})
+        if "first_health_check_ms" not in startup_report:
+            startup_report["first_health_check_ms"] = _elapsed_ms()
+            logger.info(f"启动耗时: {startup_report}, 工具注册: {tool_manager.get_startup_info()}")
+        payload = {
+            "status": "healthy",
+            "server": server_name,
+            "startup": {**startup_report, "tools": tool_manager.get_startup_info()},
+        }
+        if worker_id is not None:
+            payload["worker_id"] = worker_id
+        return JSONResponse(payload)
 
     @contextlib.asynccontextmanager
     async def lifespan(_: Starlette) -> AsyncIterator[None]:
@@ -430,15 +375,19 @@ def main(
         logger.info("启动会话管理器")
         try:
             async with session_manager.run():
-                logger.info(f"MCP服务器就绪，监听地址: {host}:{port}")
-                # 启动事件存储的自动清理任务
-                try:
-                    logger.info("启动事件存储自动清理任务")
-                    await event_store.start_cleanup()
-                    logger.info("事件存储自动清理任务启动成功")
-                except Exception as e:
-                    logger.error(f"启动事件存储自动清理任务失败: {str(e)}")
-                    logger.error(traceback.format_exc())
+                startup_report["ready_ms"] = _elapsed_ms()
+                logger.info(f"MCP服务器就绪，监听地址: {host}:{port}，启动耗时 {startup_report['ready_ms']}ms")
+                # 启动事件存储的自动清理任务（多进程模式下事件库共享，只由0号工作进程清理）
+                if worker_id:
+                    logger.info(f"工作进程 {worker_id} 不执行事件存储清理")
+                else:
+                    try:
+                        logger.info("启动事件存储自动清理任务")
+                        await event_store.start_cleanup()
+                        logger.info("事件存储自动清理任务启动成功")
+                    except Exception as e:
+                        logger.error(f"启动事件存储自动清理任务失败: {str(e)}")
+                        logger.error(traceback.format_exc())
 
                 try:
                     yield
@@ -452,6 +401,15 @@ def main(
                         logger.error(f"停止事件存储清理任务失败: {str(e)}")
                         logger.error(traceback.format_exc())
 
+                    # 刷新尚未写入的事件并关闭写线程
+                    try:
+                        await event_store.close()
+                    except Exception as e:
+                        logger.error(f"关闭事件存储失败: {str(e)}")
+
+                    plugin_watcher.stop()
+                    await close_http_client()
+                    await close_plugin_channel()
                     logger.info("服务器正在关闭...")
         except Exception as e:
             logger.error(f"会话管理器启动失败: {str(e)}")
@@ -468,8 +426,15 @@ def main(
     routes = [
         Mount("/mcp", app=handle_streamable_http),
         Route("/health", endpoint=health_check),
+        Route("/control/plugins/reload", endpoint=reload_plugins, methods=["POST"]),
+        Route("/control/tools/stats", endpoint=tool_stats),
     ]
 
+    # 统一模式：SSE传输与Streamable HTTP共享同一个MCP Server、工具/提示注册表、HTTP连接池和事件循环
+    if enable_sse:
+        routes.insert(1, Mount("/sse", app=create_sse_endpoint(app)))
+        logger.info("已挂载SSE传输: /sse/")
+
     # Create an ASGI application using the transport
     logger.info("初始化Starlette应用")
     starlette_app = Starlette(
@@ -15,12 +15,12 @@ import traceback
 from pathlib import Path
 from typing import AsyncIterator
 
-from mcp.server.sse import SseServerTransport
 from mcp.server import Server
 from mcp import types
 from starlette.applications import Starlette
 from starlette.middleware import Middleware
 from starlette.routing import Route, Mount
+from starlette.concurrency import run_in_threadpool
 from starlette.responses import JSONResponse, Response
 
 # 添加当前目录到Python路径
@@ -34,186 +34,14 @@ from prompts import PromptManager
 # 导入共享的认证模块
 from auth import BearerAuthMiddleware, create_token_manager
 
-def _start_plugin_tool_monitor(tool_manager):
-    """启动插件工具监控线程"""
-    import threading
-    import time
-    import json
-    import os
-    import logging
+# 导入共享的插件注册监听模块
+from plugin_watcher import PluginRegistryWatcher
 
-    logger = logging.getLogger(__name__)
-
-    def monitor_plugin_tools():
-        """监控插件工具文件变化"""
-        tools_file = os.path.join(os.path.dirname(__file__), "plugin_tools.json")
-        last_modified = 0
-
-        while True:
-            try:
-                if os.path.exists(tools_file):
-                    current_modified = os.path.getmtime(tools_file)
-
-                    if current_modified > last_modified:
-                        last_modified = current_modified
-
-                        # 读取工具文件
-                        try:
-                            # 导入安全文件操作工具
-                            import sys
-                            import os
-                            sys.path.append(os.path.dirname(__file__))
-                            from utils.file_operations import safe_read_json
-                            from pathlib import Path
-
-                            plugin_tools = safe_read_json(Path(tools_file), default_value={})
-
-                            # 更新工具管理器
-                            _update_plugin_tools(tool_manager, plugin_tools)
-
-                        except Exception as e:
-                            logger.error(f"读取插件工具文件失败: {str(e)}")
-
-                time.sleep(5)  # 每5秒检查一次
-
-            except Exception as e:
-                logger.error(f"监控插件工具文件时发生异常: {str(e)}")
-                time.sleep(10)  # 出错时等待更长时间
-
-    # 启动监控线程
-    monitor_thread = threading.Thread(target=monitor_plugin_tools, daemon=True)
-    monitor_thread.start()
-    logger.info("插件工具监控线程已启动")
-
-
-def _start_plugin_prompt_monitor(prompt_manager):
-    """启动插件提示监控线程"""
-    import threading
-    import time
-    import json
-    import os
-    import logging
-
-    logger = logging.getLogger(__name__)
-
-    def monitor_plugin_prompts():
-        """监控插件提示文件变化"""
-        prompts_file = os.path.join(os.path.dirname(__file__), "plugin_prompts.json")
-        last_modified = 0
-
-        while True:
-            try:
-                # 检查文件是否存在且有修改
-                if os.path.exists(prompts_file):
-                    current_modified = os.path.getmtime(prompts_file)
-                    if current_modified > last_modified:
-                        last_modified = current_modified
-                        logger.info("检测到插件提示文件变化，正在更新...")
-
-                        # 读取提示文件
-                        # 导入安全文件操作工具
-                        import sys
-                        import os
-                        sys.path.append(os.path.dirname(__file__))
-                        from utils.file_operations import safe_read_json
-                        from pathlib import Path
-
-                        plugin_prompts = safe_read_json(Path(prompts_file), default_value={})
-
-                        # 更新插件提示
-                        _update_plugin_prompts(prompt_manager, plugin_prompts)
-
-                # 每5秒检查一次
-                time.sleep(5)
-
-            except Exception as e:
-                logger.error(f"监控插件提示文件时发生异常: {str(e)}")
-                time.sleep(10)  # 出错时等待更长时间
-
-    # 启动监控线程
-    monitor_thread = threading.Thread(target=monitor_plugin_prompts, daemon=True)
-    monitor_thread.start()
-    logger.info("插件提示监控线程已启动")
-
-
-def _update_plugin_prompts(prompt_manager, plugin_prompts):
-    """更新插件提示"""
-    import logging
-    logger = logging.getLogger(__name__)
-
-    try:
-        # 获取当前已注册的插件提示统计
-        current_stats = prompt_manager.get_plugin_prompt_registry().get_registry_stats()
-        current_plugins = set(current_stats.get("prompts_by_plugin", {}).keys())
-
-        # 获取新的插件列表
-        new_plugins = set(plugin_prompts.keys())
-
-        # 找出需要注销的插件（在当前注册中但不在新列表中）
-        plugins_to_unregister = current_plugins - new_plugins
-        for plugin_id in plugins_to_unregister:
-            result = prompt_manager.unregister_plugin_prompts(plugin_id)
-            logger.info(f"注销插件提示: {plugin_id}, 结果: {result}")
-
-        # 注册或更新插件提示
-        for plugin_id, plugin_data in plugin_prompts.items():
-            prompts = plugin_data.get("prompts", [])
-            if prompts:
-                # 先注销现有提示（如果存在）
-                if plugin_id in current_plugins:
-                    prompt_manager.unregister_plugin_prompts(plugin_id)
-
-                # 注册新提示
-                result = prompt_manager.register_plugin_prompts(plugin_id, prompts)
-                logger.info(f"注册插件提示: {plugin_id}, 结果: {result}")
-
-        # 记录最新统计
-        updated_stats = prompt_manager.get_plugin_prompt_registry().get_registry_stats()
-        logger.info(f"插件提示更新完成: {updated_stats}")
-
-    except Exception as e:
-        logger.error(f"更新插件提示时发生异常: {str(e)}")
-
-def _update_plugin_tools(tool_manager, plugin_tools):
-    """更新插件工具"""
-    import logging
-    import traceback
-
-    logger = logging.getLogger(__name__)
-
-    try:
-        # 获取当前已注册的插件工具统计
-        current_stats = tool_manager.get_plugin_registry_stats()
-        current_plugins = set(current_stats.get("tools_by_plugin", {}).keys())
-
-        # 获取新的插件列表
-        new_plugins = set(plugin_tools.keys())
-
-        # 找出需要注销的插件（在当前注册中但不在新列表中）
-        plugins_to_unregister = current_plugins - new_plugins
-        for plugin_id in plugins_to_unregister:
-            result = tool_manager.unregister_plugin_tools(plugin_id)
-            logger.info(f"注销插件工具: {plugin_id}, 结果: {result}")
-
-        # 注册或更新插件工具
-        for plugin_id, plugin_data in plugin_tools.items():
-            tools = plugin_data.get("tools", [])
-            if tools:
-                # 先注销现有工具（如果存在）
-                if plugin_id in current_plugins:
-                    tool_manager.unregister_plugin_tools(plugin_id)
-
-                # 注册新工具
-                result = tool_manager.register_plugin_tools(plugin_id, tools)
-                logger.info(f"注册插件工具: {plugin_id}, 结果: {result}")
-
-        # 记录最新统计
-        updated_stats = tool_manager.get_plugin_registry_stats()
-        logger.info(f"插件工具更新完成: {updated_stats}")
+# 导入共享的SSE传输端点
+from sse_transport import create_sse_endpoint
 
-    except Exception as e:
-        logger.error(f"更新插件工具时发生异常: {str(e)}")
-        logger.error(traceback.format_exc())
+# 导入HTTP客户端管理
+from utils import close_http_client, close_plugin_channel, get_request_stats, get_response_cache_stats
 
 # 配置日志
 def setup_logging(log_level: str = "INFO", log_file: str = None):
@@ -265,6 +93,9 @@ def main():
     parser.add_argument("--access-token", help="MoviePilot access token")
     parser.add_argument("--require-auth", action="store_true", help="Enable Bearer token authentication")
     parser.add_argument("--no-auth", action="store_true", help="Disable Bearer token authentication")
+    parser.add_argument("--tool-max-concurrency", type=int, default=4, help="Default maximum concurrent calls per tool")
+    parser.add_argument("--tool-max-queue", type=int, default=16, help="Default maximum queued calls per tool")
+    parser.add_argument("--plugin-channel", default="", help="Unix socket path of the MoviePilot plugin call channel")
 
     args = parser.parse_args()
 
@@ -281,7 +112,10 @@ def main():
             auth_token=args.auth_token,
             access_token=args.access_token,
             require_auth=args.require_auth,
-            no_auth=args.no_auth
+            no_auth=args.no_auth,
+            tool_max_concurrency=args.tool_max_concurrency,
+            tool_max_queue=args.tool_max_queue,
+            plugin_channel=args.plugin_channel
         ))
     except KeyboardInterrupt:
         logger.info("收到中断信号，正在关闭服务器...")
@@ -299,7 +133,10 @@ async def run_server(
     auth_token: str = None,
     access_token: str = None,
     require_auth: bool = False,
-    no_auth: bool = False
+    no_auth: bool = False,
+    tool_max_concurrency: int = 4,
+    tool_max_queue: int = 16,
+    plugin_channel: str = ""
 ):
     """运行SSE MCP服务器"""
     logger = logging.getLogger(__name__)
@@ -316,8 +153,9 @@ async def run_server(
         logger.info("认证已禁用 (默认)")
 
     # 设置MoviePilot端口号
-    from utils import set_moviepilot_port
+    from utils import set_moviepilot_port, configure_plugin_channel
     set_moviepilot_port(moviepilot_port)
+    configure_plugin_channel(plugin_channel, auth_token)
 
     # 创建Token管理器
     token_manager = create_token_manager(auth_token, access_token)
@@ -326,16 +164,18 @@ async def run_server(
     app = Server("moviepilot-mcp-server")
 
     # 初始化工具管理器
-    tool_manager = ToolManager(token_manager)
-
-    # 启动插件工具监控
-    _start_plugin_tool_monitor(tool_manager)
+    tool_manager = ToolManager(
+        token_manager, max_concurrency=tool_max_concurrency, max_queue=tool_max_queue
+    )
 
     # 初始化提示管理器
     prompt_manager = PromptManager(token_manager)
 
-    # 启动插件提示监控
-    _start_plugin_prompt_monitor(prompt_manager)
+    # 启动插件工具/提示注册监听
+    plugin_watcher = PluginRegistryWatcher(
+        tool_manager, prompt_manager, os.path.dirname(os.path.abspath(__file__))
+    )
+    plugin_watcher.start()
 
     @app.call_tool()
     async def call_tool(
@@ -357,25 +197,25 @@ async def run_server(
     ) -> types.GetPromptResult:
         return await prompt_manager.get_prompt(name, arguments)
 
-    # 创建SSE传输
-    sse_transport = SseServerTransport("/sse/messages/")
-
-    # SSE连接处理器 - 使用ASGI格式
-    async def handle_sse(scope, receive, send):
-        """处理SSE连接"""
-        try:
-            async with sse_transport.connect_sse(scope, receive, send) as streams:
-                await app.run(
-                    streams[0],
-                    streams[1],
-                    app.create_initialization_options()
-                )
-        except Exception as e:
-            logger.error(f"SSE连接处理失败: {str(e)}")
-            logger.error(traceback.format_exc())
-            raise
-
-
+    # 创建SSE传输端点
+    sse_endpoint = create_sse_endpoint(app)
+
+    # 插件注册变更通知端点
+    async def reload_plugins(request):
+        """插件注册变更通知端点，MoviePilot侧写入注册文件后调用"""
+        target = request.query_params.get("target")
+        if target == "all":
+            target = None
+        results = await run_in_threadpool(plugin_watcher.reload, target)
+        return JSONResponse({"success": True, "results": results})
+
+    # 工具执行统计端点
+    async def tool_stats(request):
+        """工具并发限制与执行统计"""
+        stats = tool_manager.get_tool_stats()
+        stats["http"] = get_request_stats()
+        stats["http_cache"] = get_response_cache_stats()
+        return JSONResponse(stats)
 
     # 健康检查端点
     async def health_check(request):
@@ -394,6 +234,9 @@ async def run_server(
             try:
                 yield
             finally:
+                plugin_watcher.stop()
+                await close_http_client()
+                await close_plugin_channel()
                 logger.info("SSE服务器正在关闭...")
         except Exception as e:
             logger.error(f"SSE服务器启动失败: {str(e)}")
@@ -405,36 +248,12 @@ async def run_server(
         Middleware(BearerAuthMiddleware, token_manager=token_manager, require_auth=auth_enabled)
     ]
 
-    # SSE端点处理器 - 使用ASGI格式，处理SSE连接和POST消息
-    async def sse_endpoint(scope, receive, send):
-        """SSE端点处理器 - 处理SSE连接和POST消息"""
-        try:
-            # 检查请求路径和方法
-            path = scope.get("path", "")
-            method = scope.get("method", "GET")
-
-            logger.info(f"SSE端点收到请求: {method} {path}")
-
-            # 如果是POST请求到messages端点，处理消息
-            if method == "POST" and path.endswith("/messages/"):
-                await sse_transport.handle_post_message(scope, receive, send)
-            else:
-                # 否则处理SSE连接
-                async with sse_transport.connect_sse(scope, receive, send) as streams:
-                    await app.run(
-                        streams[0],
-                        streams[1],
-                        app.create_initialization_options()
-                    )
-        except Exception as e:
-            logger.error(f"SSE端点处理失败: {str(e)}")
-            logger.error(traceback.format_exc())
-            raise
-
     # 创建路由
     routes = [
         Mount("/sse", app=sse_endpoint),  # SSE端点使用Mount，处理 /sse/ 和 /sse/messages/
         Route("/health", endpoint=health_check),
+        Route("/control/plugins/reload", endpoint=reload_plugins, methods=["POST"]),
+        Route("/control/tools/stats", endpoint=tool_stats),
     ]
 
     # 创建Starlette应用
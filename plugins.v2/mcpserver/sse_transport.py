@@ -0,0 +1,54 @@
+"""
+共享的SSE传输端点
+sse_server.py 与统一模式的 server.py 都通过这里把 SSE 传输挂载到 Starlette 应用上
+"""
+
+import logging
+import traceback
+
+from mcp.server import Server
+from mcp.server.sse import SseServerTransport
+from starlette.types import Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+
+def create_sse_endpoint(app: Server, messages_path: str = "/sse/messages/"):
+    """
+    创建处理SSE连接和POST消息的ASGI端点，挂载在 /sse 下
+
+    Args:
+        app: MCP Server实例，与其他传输共享同一组工具和提示
+        messages_path: 客户端POST消息的路径
+
+    Returns:
+        ASGI可调用对象
+    """
+    sse_transport = SseServerTransport(messages_path)
+
+    async def sse_endpoint(scope: Scope, receive: Receive, send: Send) -> None:
+        """SSE端点处理器 - 处理SSE连接和POST消息"""
+        try:
+            # 检查请求路径和方法
+            path = scope.get("path", "")
+            method = scope.get("method", "GET")
+
+            logger.debug(f"SSE端点收到请求: {method} {path}")
+
+            # 如果是POST请求到messages端点，处理消息
+            if method == "POST" and path.endswith("/messages/"):
+                await sse_transport.handle_post_message(scope, receive, send)
+            else:
+                # 否则处理SSE连接
+                async with sse_transport.connect_sse(scope, receive, send) as streams:
+                    await app.run(
+                        streams[0],
+                        streams[1],
+                        app.create_initialization_options()
+                    )
+        except Exception as e:
+            logger.error(f"SSE端点处理失败: {str(e)}")
+            logger.error(traceback.format_exc())
+            raise
+
+    return sse_endpoint
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 测试直接导入插件内的模块（tools、utils），与 benchmarks 相同
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,60 @@
+"""
+插件工具/提示注册表同步测试
+注册失败的插件不记录内容哈希，失败原因消除后下一次同步会重试
+"""
+from prompts.plugin_registry import PluginPromptRegistry
+from tools.plugin_registry import PluginToolRegistry
+
+
+def _tool(name: str) -> dict:
+    return {
+        "name": name,
+        "description": f"{name} 工具",
+        "parameters": {"type": "object", "properties": {}},
+        "api_endpoint": f"/api/v1/plugin/{name}",
+    }
+
+
+def _prompt(name: str) -> dict:
+    return {"name": name, "description": f"{name} 提示"}
+
+
+def test_tool_sync_retries_failed_registration():
+    registry = PluginToolRegistry()
+
+    # 与插件a的工具重名，插件b注册失败
+    result = registry.sync_plugins({"a": [_tool("shared")], "b": [_tool("shared")]})
+    assert result["updated"]["a"]["success"]
+    assert not result["updated"]["b"]["success"]
+    assert registry.get_plugin_tools("b") == []
+
+    # 内容未变且仍然失败时重试，但注册表没有变化，版本号不变
+    version = registry.version
+    result = registry.sync_plugins({"a": [_tool("shared")], "b": [_tool("shared")]})
+    assert result["changed"] is False
+    assert not result["updated"]["b"]["success"]
+    assert registry.version == version
+
+    # 插件a移除后，插件b内容未变也会重新注册
+    result = registry.sync_plugins({"b": [_tool("shared")]})
+    assert result["removed"] == ["a"]
+    assert result["updated"]["b"]["success"]
+    assert registry.get_plugin_tools("b") == ["shared"]
+
+    # 注册成功后记录哈希，不再重复注册
+    result = registry.sync_plugins({"b": [_tool("shared")]})
+    assert result == {"success": True, "changed": False, "unchanged": 1}
+
+
+def test_prompt_sync_retries_failed_registration():
+    registry = PluginPromptRegistry()
+
+    result = registry.sync_plugins({"a": [_prompt("shared")], "b": [_prompt("shared")]})
+    assert not result["updated"]["b"]["success"]
+
+    result = registry.sync_plugins({"b": [_prompt("shared")]})
+    assert result["updated"]["b"]["success"]
+    assert registry.get_plugin_prompts("b") == ["shared"]
+
+    result = registry.sync_plugins({"b": [_prompt("shared")]})
+    assert result["changed"] is False
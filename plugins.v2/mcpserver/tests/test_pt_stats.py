@@ -0,0 +1,163 @@
+"""
+PT站点数据查询与只读连接池测试
+使用临时SQLite数据库模拟MoviePilot的 site / siteuserdata 表
+"""
+import sqlite3
+
+import anyio
+import pytest
+
+from tools.database.connection_pool import ReadOnlyConnectionPool
+from tools.database.pt_stats import (
+    PTStatsTool, SITE_AGGREGATE_QUERY, SITE_STATS_BY_DOMAIN_QUERY, SITE_STATS_BY_NAME_QUERY
+)
+
+GB = 1024 ** 3
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "user.db")
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE site (id INTEGER PRIMARY KEY, name TEXT, domain TEXT);
+        CREATE TABLE siteuserdata (
+            id INTEGER PRIMARY KEY, domain TEXT, bonus REAL, seeding INTEGER, seeding_size INTEGER,
+            upload INTEGER, download INTEGER, ratio REAL, user_level TEXT,
+            message_unread INTEGER, message_unread_contents TEXT, updated_time TEXT
+        );
+    """)
+    conn.executemany("INSERT INTO site (name, domain) VALUES (?, ?)", [
+        ("站点A", "a.example"),
+        ("站点B", "b.example"),
+    ])
+    # a.example 有两条记录，查询应只使用最新一条；c.example 没有对应的站点，名称回退为域名
+    conn.executemany(
+        "INSERT INTO siteuserdata (domain, bonus, seeding, seeding_size, upload, download, ratio, "
+        "user_level, message_unread, message_unread_contents, updated_time) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", [
+            ("a.example", 100.0, 5, 10 * GB, 10 * GB, 10 * GB, 1.0, "User", 0, None, "2024-01-01"),
+            ("a.example", 123.456, 8, 20 * GB, 30 * GB, 10 * GB, 3.0, "Power User", 2, "[]", "2024-01-02"),
+            ("b.example", 50.0, 3, 5 * GB, 50 * GB, 20 * GB, 2.5, "Elite", 1, None, "2024-01-02"),
+            ("c.example", None, None, None, 5 * GB, 0, None, None, None, None, "2024-01-02"),
+        ])
+    conn.commit()
+    conn.close()
+    return path
+
+
+@pytest.fixture
+def pool(db_path):
+    pool = ReadOnlyConnectionPool(db_path, max_size=2)
+    yield pool
+    pool.close()
+
+
+def test_site_stats_by_domain_returns_latest_row(pool):
+    rows = pool.query(SITE_STATS_BY_DOMAIN_QUERY, ("a.example",))
+    assert len(rows) == 1
+    row = rows[0]
+    assert row["site_name"] == "站点A"
+    assert row["bonus"] == 123.46
+    assert row["seeding_count"] == 8
+    assert row["upload"] == 30 * GB
+    assert row["ratio"] == 3.0
+    assert row["user_level"] == "Power User"
+    assert row["message_unread"] == 2
+
+
+def test_site_stats_by_name(pool):
+    rows = pool.query(SITE_STATS_BY_NAME_QUERY, ("站点B",))
+    assert [row["domain"] for row in rows] == ["b.example"]
+    assert pool.query(SITE_STATS_BY_NAME_QUERY, ("不存在",)) == []
+
+
+def test_site_stats_by_domain_without_site_row(pool):
+    rows = pool.query(SITE_STATS_BY_DOMAIN_QUERY, ("c.example",))
+    assert rows[0]["site_name"] == "c.example"
+
+
+def test_aggregate_totals_use_latest_rows(pool):
+    rows = pool.query(SITE_AGGREGATE_QUERY, (10,))
+    assert len(rows) == 3
+    totals = rows[0]
+    assert totals["site_count"] == 3
+    assert totals["total_upload"] == 85 * GB
+    assert totals["total_download"] == 30 * GB
+    assert totals["total_seeding"] == 11
+    assert totals["total_seeding_size"] == 25 * GB
+    assert totals["total_bonus"] == pytest.approx(173.456)
+    assert totals["total_unread"] == 3
+    # 合计列在每一行中相同
+    assert all(row["total_upload"] == totals["total_upload"] for row in rows)
+
+
+def test_aggregate_orders_by_upload_and_limits_top_n(pool):
+    rows = pool.query(SITE_AGGREGATE_QUERY, (10,))
+    assert [row["domain"] for row in rows] == ["b.example", "a.example", "c.example"]
+    assert [row["ratio"] for row in rows] == [2.5, 3.0, None]
+
+    top = pool.query(SITE_AGGREGATE_QUERY, (2,))
+    assert [row["domain"] for row in top] == ["b.example", "a.example"]
+    # top_n 只限制排行，合计仍覆盖所有站点
+    assert top[0]["site_count"] == 3
+    assert top[0]["total_upload"] == 85 * GB
+
+
+def test_aggregate_tool_output(db_path):
+    tool = PTStatsTool.__new__(PTStatsTool)
+    tool.db_path = db_path
+    text = anyio.run(tool._get_aggregate_stats, 2)[0].text
+    assert "共3个站点" in text
+    # 总分享率 = 总上传 / 总下载 = 85 / 30
+    assert "📊 总分享率: 2.83" in text
+    assert "前2个站点" in text
+    assert text.index("站点B") < text.index("站点A")
+    assert "c.example" not in text
+
+
+@pytest.mark.parametrize("sql", [
+    "INSERT INTO site (name, domain) VALUES ('x', 'x.example')",
+    "UPDATE siteuserdata SET upload = 0",
+    "DELETE FROM site",
+    "CREATE TABLE extra (id INTEGER)",
+])
+def test_pool_rejects_writes(pool, db_path, sql):
+    with pytest.raises(sqlite3.OperationalError):
+        with pool.connection() as conn:
+            conn.execute(sql)
+
+    conn = sqlite3.connect(db_path)
+    try:
+        assert conn.execute("SELECT COUNT(*) FROM site").fetchone()[0] == 2
+        assert conn.execute("SELECT COUNT(*) FROM siteuserdata WHERE upload = 0").fetchone()[0] == 0
+    finally:
+        conn.close()
+
+
+def test_pool_connections_are_read_only_and_query_only(pool):
+    with pool.connection() as conn:
+        assert conn.execute("PRAGMA query_only").fetchone()[0] == 1
+        # 即使关闭 query_only，mode=ro 打开的连接仍然无法写入
+        conn.execute("PRAGMA query_only = OFF")
+        with pytest.raises(sqlite3.OperationalError, match="readonly"):
+            conn.execute("DELETE FROM site")
+
+
+def test_pool_reuses_connections_and_drops_failed_ones(pool):
+    for _ in range(3):
+        pool.query(SITE_STATS_BY_NAME_QUERY, ("站点A",))
+    assert pool.stats()["created"] == 1
+    assert pool.stats()["idle"] == 1
+
+    with pytest.raises(sqlite3.OperationalError):
+        pool.query("DELETE FROM site")
+    # 出错的连接不再归还到连接池
+    assert pool.stats()["idle"] == 0
+
+
+def test_pool_missing_database(tmp_path):
+    pool = ReadOnlyConnectionPool(str(tmp_path / "missing.db"))
+    with pytest.raises(FileNotFoundError):
+        pool.query("SELECT 1")
+    assert not (tmp_path / "missing.db").exists()
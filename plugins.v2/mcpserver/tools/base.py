@@ -3,6 +3,7 @@ import os
 import sys
 from typing import List, Dict, Any
 import mcp.types as types
+from mcp.server.lowlevel.server import request_ctx
 
 # 添加父目录到路径，以便导入utils
 parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -16,6 +17,9 @@ logger = logging.getLogger(__name__)
 
 
 class BaseTool:
+    # 按工具名覆盖默认并发限制，例如 {"tool-name": {"max_concurrency": 2, "max_queue": 8}}
+    tool_limits: Dict[str, Dict[str, int]] = {}
+
     def __init__(self, token_manager=None):
         self.token_manager = token_manager
         self._tool_info_cache = None  # 缓存工具信息
@@ -46,34 +50,54 @@ class BaseTool:
         """
         raise NotImplementedError("Tool must implement tool_info property")
 
+    async def _report_progress(self, progress: float, total: float = None, message: str = None) -> bool:
+        """向当前调用的客户端发送进度通知
+
+        只有客户端在请求中提供了progressToken时才会发送，发送失败不影响工具执行。
+
+        Returns:
+            bool: 是否已发送
+        """
+        try:
+            ctx = request_ctx.get()
+        except LookupError:
+            return False
+        progress_token = getattr(ctx.meta, "progressToken", None) if ctx.meta else None
+        if progress_token is None:
+            return False
+        try:
+            await ctx.session.send_progress_notification(
+                progress_token, progress, total=total, message=message,
+                related_request_id=ctx.request_id
+            )
+            return True
+        except Exception as e:
+            logger.debug(f"[BaseTool] 发送进度通知失败: {e}")
+            return False
+
     async def _make_request(self, method: str, endpoint: str, **kwargs):
         """发送API请求的辅助方法"""
-        logger.debug(f"[BaseTool] 开始发送API请求")
-        logger.debug(f"[BaseTool] 请求方法: {method}")
-        logger.debug(f"[BaseTool] 请求端点: {endpoint}")
-        logger.debug(f"[BaseTool] 请求参数: {kwargs}")
-
         # 确保json参数被正确传递为json_data
         if 'json' in kwargs and 'json_data' not in kwargs:
             kwargs['json_data'] = kwargs.pop('json')
-            logger.debug(f"[BaseTool] 转换json参数为json_data")
 
         # 获取访问令牌
         access_token = self.token_manager.get_access_token() if self.token_manager else None
-        logger.debug(f"[BaseTool] 访问令牌: {'已设置' if access_token else '未设置'}")
-        if access_token:
-            logger.debug(f"[BaseTool] 令牌长度: {len(access_token)}")
+
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug("[BaseTool] 发送API请求: %s %s, 参数: %s, 访问令牌: %s",
+                         method, endpoint, kwargs, "已设置" if access_token else "未设置")
 
         try:
-            logger.debug(f"[BaseTool] 调用make_request函数...")
             result = await make_request(
                 method=method,
                 endpoint=endpoint,
                 access_token=access_token,
                 **kwargs
             )
-            logger.debug(f"[BaseTool] make_request返回结果: {result}")
-            logger.debug(f"[BaseTool] 返回结果类型: {type(result)}")
+            if debug:
+                logger.debug("[BaseTool] make_request返回结果: %s", result)
             return result
         except Exception as e:
             logger.error(f"[BaseTool] make_request调用异常: {str(e)}")
@@ -0,0 +1,89 @@
+"""
+工具并发限制
+为每个工具维护一个并发信号量和排队深度上限，避免单个慢工具（如站点搜索）占满服务器
+"""
+import asyncio
+import contextlib
+import time
+from typing import Any, AsyncIterator, Dict
+
+# 默认每个工具的最大并发数与最大排队数
+DEFAULT_MAX_CONCURRENCY = 4
+DEFAULT_MAX_QUEUE = 16
+
+
+class ToolBusyError(Exception):
+    """工具排队已满"""
+
+
+class ToolLimiter:
+    """单个工具的并发限制器"""
+
+    def __init__(self, name: str, max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 max_queue: int = DEFAULT_MAX_QUEUE):
+        """
+        Args:
+            name: 工具名称
+            max_concurrency: 最大同时执行数
+            max_queue: 最大排队数，排队已满时直接拒绝
+        """
+        self.name = name
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.max_queue = max(0, int(max_queue))
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.in_flight = 0
+        self.waiting = 0
+        self.completed = 0
+        self.rejected = 0
+        self.failed = 0
+        self._queued = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    @contextlib.asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """获取一个执行槽位，排队已满时抛出 ToolBusyError"""
+        if self._semaphore.locked():
+            if self.waiting >= self.max_queue:
+                self.rejected += 1
+                raise ToolBusyError(
+                    f"工具 {self.name} 繁忙：{self.in_flight} 个调用执行中，{self.waiting} 个排队中"
+                )
+            self.waiting += 1
+            start = time.monotonic()
+            try:
+                await self._semaphore.acquire()
+            finally:
+                self.waiting -= 1
+            waited = time.monotonic() - start
+            self._queued += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+        else:
+            await self._semaphore.acquire()
+
+        self.in_flight += 1
+        try:
+            yield
+        except BaseException:
+            self.failed += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+            self._semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        """返回限制配置与运行统计"""
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "queued": self._queued,
+            "avg_wait_ms": round(self._wait_total / self._queued * 1000, 2) if self._queued else 0.0,
+            "max_wait_ms": round(self._wait_max * 1000, 2),
+        }
@@ -0,0 +1,83 @@
+from typing import Any, Dict, List, Optional
+import logging
+
+from .ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+class CreditsCache:
+    """人物参演作品分页缓存，按人物保存已获取的分页和已知的最后一页
+
+    同一人物的分页共享一个过期时间，翻页或按年份筛选时不会重复请求已获取的页面。
+    按人物做LRU淘汰，命中统计按分页计算。
+    """
+
+    def __init__(self, max_persons: int = 128, ttl: float = 3600):
+        # person_id -> {'pages': {页码: 作品列表}, 'last_page': 最后一页或None}
+        self._cache = TTLCache(max_size=max_persons, ttl=ttl)
+
+    def _entry(self, person_id: int, create: bool = False) -> Optional[Dict[str, Any]]:
+        """返回人物的缓存条目，需持有 self._cache.lock"""
+        entry = self._cache.get(person_id, default=None, record=False)
+        if entry is None and create:
+            entry = {'pages': {}, 'last_page': None}
+            self._cache.put(person_id, entry)
+        return entry
+
+    def get_page(self, person_id: int, page: int) -> Optional[List[dict]]:
+        """返回缓存的分页，未缓存时返回None；超出已知最后一页时返回空列表"""
+        with self._cache.lock:
+            entry = self._entry(person_id)
+            if entry is not None:
+                if page in entry['pages']:
+                    self._cache.record('hits')
+                    return entry['pages'][page]
+                if entry['last_page'] is not None and page > entry['last_page']:
+                    self._cache.record('hits')
+                    return []
+            self._cache.record('misses')
+            return None
+
+    def store_page(self, person_id: int, page: int, credits_list: List[dict]):
+        """缓存一页作品，空页表示上一页就是最后一页"""
+        with self._cache.lock:
+            entry = self._entry(person_id, create=True)
+            if credits_list:
+                entry['pages'][page] = credits_list
+            else:
+                self._set_last_page(entry, page - 1)
+
+    def mark_last_page(self, person_id: int, page: int):
+        """记录人物作品的最后一页"""
+        with self._cache.lock:
+            self._set_last_page(self._entry(person_id, create=True), page)
+
+    @staticmethod
+    def _set_last_page(entry: Dict[str, Any], page: int):
+        if entry['last_page'] is None or page < entry['last_page']:
+            entry['last_page'] = max(page, 0)
+
+    def get_last_page(self, person_id: int) -> Optional[int]:
+        """返回已知的最后一页，未知时返回None"""
+        with self._cache.lock:
+            entry = self._entry(person_id)
+            return entry['last_page'] if entry is not None else None
+
+    def clear(self):
+        """清空缓存"""
+        self._cache.clear()
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """获取缓存统计信息"""
+        stats = self._cache.get_stats()
+        return {
+            'person_count': stats.pop('total_count'),
+            'page_count': sum(len(entry['pages']) for entry in self._cache.values()),
+            'max_persons': stats.pop('max_size'),
+            **stats
+        }
+
+
+# 全局缓存实例
+credits_cache = CreditsCache()
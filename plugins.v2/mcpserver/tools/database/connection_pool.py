@@ -0,0 +1,119 @@
+"""
+只读SQLite连接池
+以 mode=ro 的URI打开MoviePilot数据库，并开启 query_only，保证工具不会写入正在使用的数据库。
+连接复用后，sqlite3模块按SQL文本缓存的预编译语句也随之复用。
+"""
+import contextlib
+import logging
+import os
+import queue
+import sqlite3
+import threading
+from typing import Any, Dict, Iterator, List
+from urllib.parse import quote
+
+logger = logging.getLogger(__name__)
+
+# 每个数据库文件的最大连接数
+DEFAULT_POOL_SIZE = 4
+# 每个连接缓存的预编译语句数
+STATEMENT_CACHE_SIZE = 64
+
+
+class ReadOnlyConnectionPool:
+    """只读SQLite连接池，连接按需创建，归还后复用"""
+
+    def __init__(self, db_path: str, max_size: int = DEFAULT_POOL_SIZE):
+        """
+        Args:
+            db_path: 数据库文件路径
+            max_size: 最大连接数，连接都在使用时阻塞等待
+        """
+        self.db_path = db_path
+        self.max_size = max(1, int(max_size))
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.max_size)
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if not os.path.exists(self.db_path):
+            raise FileNotFoundError(f"数据库文件不存在: {self.db_path}")
+        uri = f"file:{quote(os.path.abspath(self.db_path))}?mode=ro"
+        conn = sqlite3.connect(
+            uri,
+            uri=True,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA query_only = ON")
+        with self._lock:
+            self._created += 1
+        logger.debug("创建只读数据库连接: %s", self.db_path)
+        return conn
+
+    @contextlib.contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """借出一个连接，使用完毕后归还；出错的连接直接关闭不再复用"""
+        self._slots.acquire()
+        conn = None
+        try:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._connect()
+            yield conn
+        except sqlite3.Error:
+            if conn is not None:
+                conn.close()
+                conn = None
+            raise
+        finally:
+            if conn is not None:
+                self._idle.put(conn)
+            self._slots.release()
+
+    def query(self, sql: str, params: tuple = ()) -> List[Dict[str, Any]]:
+        """执行查询并返回字典列表"""
+        with self.connection() as conn:
+            return [dict(row) for row in conn.execute(sql, params).fetchall()]
+
+    def close(self):
+        """关闭所有空闲连接"""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+    def stats(self) -> Dict[str, Any]:
+        """返回连接池统计"""
+        return {
+            "db_path": self.db_path,
+            "max_size": self.max_size,
+            "created": self._created,
+            "idle": self._idle.qsize(),
+        }
+
+
+_pools: Dict[str, ReadOnlyConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path: str, max_size: int = DEFAULT_POOL_SIZE) -> ReadOnlyConnectionPool:
+    """获取数据库文件对应的连接池，同一文件共享一个连接池"""
+    with _pools_lock:
+        pool = _pools.get(db_path)
+        if pool is None:
+            pool = ReadOnlyConnectionPool(db_path, max_size)
+            _pools[db_path] = pool
+        return pool
+
+
+def close_pools():
+    """关闭所有连接池的空闲连接"""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
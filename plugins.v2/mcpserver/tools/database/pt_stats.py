@@ -1,10 +1,11 @@
 import logging
-import sqlite3
 import os
 import sys
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+import anyio
 import mcp.types as types
 from ..base import BaseTool
+from .connection_pool import get_pool
 
 # 添加父目录到路径，以便导入utils
 parent_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -13,6 +14,77 @@ sys.path.append(parent_dir)
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# 生产环境数据库路径
+PRODUCTION_DB_PATH = "/config/user.db"
+
+# 站点最新数据查询，SQL文本固定以便复用连接上的预编译语句
+_SITE_STATS_COLUMNS = """
+        SELECT
+            COALESCE(s.name, sud.domain) as site_name,
+            sud.domain,
+            ROUND(sud.bonus, 2) as bonus,
+            sud.seeding as seeding_count,
+            sud.seeding_size,
+            sud.upload,
+            sud.download,
+            ROUND(sud.ratio, 2) as ratio,
+            sud.user_level,
+            sud.message_unread,
+            sud.message_unread_contents,
+            sud.updated_time
+        FROM siteuserdata sud
+        LEFT JOIN site s ON sud.domain = s.domain
+"""
+SITE_STATS_BY_DOMAIN_QUERY = _SITE_STATS_COLUMNS + """
+        WHERE sud.domain = ?
+        ORDER BY sud.rowid DESC
+        LIMIT 1
+"""
+SITE_STATS_BY_NAME_QUERY = _SITE_STATS_COLUMNS + """
+        WHERE s.name = ?
+        ORDER BY sud.rowid DESC
+        LIMIT 1
+"""
+
+# 多站点汇总：取每个站点的最新记录，用窗口函数在同一次查询中计算合计并按上传量排序
+SITE_AGGREGATE_QUERY = """
+        WITH latest AS (
+            SELECT
+                COALESCE(s.name, sud.domain) as site_name,
+                sud.domain,
+                COALESCE(sud.bonus, 0) as bonus,
+                COALESCE(sud.seeding, 0) as seeding_count,
+                COALESCE(sud.seeding_size, 0) as seeding_size,
+                COALESCE(sud.upload, 0) as upload,
+                COALESCE(sud.download, 0) as download,
+                ROUND(sud.ratio, 2) as ratio,
+                sud.user_level,
+                COALESCE(sud.message_unread, 0) as message_unread
+            FROM siteuserdata sud
+            LEFT JOIN site s ON sud.domain = s.domain
+            WHERE sud.rowid IN (SELECT MAX(rowid) FROM siteuserdata GROUP BY domain)
+        )
+        SELECT
+            latest.*,
+            COUNT(*) OVER () as site_count,
+            SUM(upload) OVER () as total_upload,
+            SUM(download) OVER () as total_download,
+            SUM(seeding_count) OVER () as total_seeding,
+            SUM(seeding_size) OVER () as total_seeding_size,
+            SUM(bonus) OVER () as total_bonus,
+            SUM(message_unread) OVER () as total_unread
+        FROM latest
+        ORDER BY upload DESC
+        LIMIT ?
+"""
+
+# 汇总模式默认与最大显示站点数
+DEFAULT_TOP_N = 10
+MAX_TOP_N = 100
+
+# 已解析的数据库路径，只在首次使用时检测并记录日志
+_resolved_db_path: Optional[str] = None
+
 
 class PTStatsTool(BaseTool):
     """PT站点数据统计分析工具"""
@@ -23,9 +95,10 @@ class PTStatsTool(BaseTool):
         self.db_path = self._get_database_path()
 
     def _get_database_path(self) -> str:
-        """自动检测数据库路径"""
-        # 生产环境路径
-        production_path = "/config/user.db"
+        """自动检测数据库路径，找到后在进程内复用检测结果"""
+        global _resolved_db_path
+        if _resolved_db_path:
+            return _resolved_db_path
 
         # 开发环境路径
         dev_path = os.path.join(
@@ -34,22 +107,18 @@ class PTStatsTool(BaseTool):
         )
 
         # 优先使用生产环境路径
-        if os.path.exists(production_path):
-            logger.info(f"使用生产环境数据库: {production_path}")
-            return production_path
+        if os.path.exists(PRODUCTION_DB_PATH):
+            logger.info(f"使用生产环境数据库: {PRODUCTION_DB_PATH}")
+            _resolved_db_path = PRODUCTION_DB_PATH
+            return PRODUCTION_DB_PATH
         elif os.path.exists(dev_path):
             logger.info(f"使用开发环境数据库: {dev_path}")
+            _resolved_db_path = dev_path
             return dev_path
         else:
-            # 如果都不存在，返回生产环境路径（让后续错误处理来处理）
-            logger.warning(f"数据库文件不存在，将尝试使用: {production_path}")
-            return production_path
-
-    def _get_db_connection(self):
-        """获取数据库连接"""
-        if not os.path.exists(self.db_path):
-            raise FileNotFoundError(f"数据库文件不存在: {self.db_path}")
-        return sqlite3.connect(self.db_path)
+            # 如果都不存在，返回生产环境路径（让后续错误处理来处理），下次调用时重新检测
+            logger.debug(f"数据库文件不存在，将尝试使用: {PRODUCTION_DB_PATH}")
+            return PRODUCTION_DB_PATH
 
     def _format_size(self, size_bytes: float) -> str:
         """格式化文件大小，大于1000GB时使用TB单位"""
@@ -99,18 +168,19 @@ class PTStatsTool(BaseTool):
         return message_text
     
     def _execute_query(self, query: str, params: tuple = ()) -> List[Dict[str, Any]]:
-        """执行SQL查询并返回结果"""
+        """通过只读连接池执行SQL查询并返回结果"""
+        if not os.path.exists(self.db_path):
+            # 数据库可能在启动后才创建，重新检测路径
+            self.db_path = self._get_database_path()
         try:
-            with self._get_db_connection() as conn:
-                conn.row_factory = sqlite3.Row  # 使结果可以按列名访问
-                cursor = conn.cursor()
-                cursor.execute(query, params)
-                rows = cursor.fetchall()
-                # 转换为字典列表
-                return [dict(row) for row in rows]
+            return get_pool(self.db_path).query(query, params)
         except Exception as e:
             logger.error(f"数据库查询失败: {e}")
             raise
+
+    async def _run_query(self, query: str, params: tuple = ()) -> List[Dict[str, Any]]:
+        """在工作线程中执行查询，避免阻塞事件循环"""
+        return await anyio.to_thread.run_sync(self._execute_query, query, params)
     
     async def execute(
         self, tool_name: str, arguments: dict
@@ -118,6 +188,8 @@ class PTStatsTool(BaseTool):
         """执行工具"""
         try:
             if tool_name == "query-pt-stats":
+                if arguments.get("aggregate"):
+                    return await self._get_aggregate_stats(arguments.get("top_n", DEFAULT_TOP_N))
                 site_domain = arguments.get("site_domain")
                 site_name = arguments.get("site_name")
                 return await self._get_single_site_stats(site_domain, site_name)
@@ -143,40 +215,19 @@ class PTStatsTool(BaseTool):
             return [
                 types.TextContent(
                     type="text",
-                    text="错误：请提供 site_domain 或 site_name 参数"
+                    text="错误：请提供 site_domain 或 site_name 参数，或使用 aggregate=true 查询所有站点汇总"
                 )
             ]
 
-        # 构建查询条件
+        # 选择查询语句
         if site_domain:
-            where_condition = "sud.domain = ?"
+            query = SITE_STATS_BY_DOMAIN_QUERY
             param = site_domain
         else:
-            where_condition = "s.name = ?"
+            query = SITE_STATS_BY_NAME_QUERY
             param = site_name
 
-        query = f"""
-        SELECT
-            COALESCE(s.name, sud.domain) as site_name,
-            sud.domain,
-            ROUND(sud.bonus, 2) as bonus,
-            sud.seeding as seeding_count,
-            sud.seeding_size,
-            sud.upload,
-            sud.download,
-            ROUND(sud.ratio, 2) as ratio,
-            sud.user_level,
-            sud.message_unread,
-            sud.message_unread_contents,
-            sud.updated_time
-        FROM siteuserdata sud
-        LEFT JOIN site s ON sud.domain = s.domain
-        WHERE {where_condition}
-        ORDER BY sud.rowid DESC
-        LIMIT 1
-        """
-
-        results = self._execute_query(query, (param,))
+        results = await self._run_query(query, (param,))
         if not results:
             search_term = site_domain or site_name
             return [
@@ -216,12 +267,58 @@ class PTStatsTool(BaseTool):
 
         return [types.TextContent(type="text", text=text)]
     
+    async def _get_aggregate_stats(self, top_n: Any = DEFAULT_TOP_N) -> List[types.TextContent]:
+        """获取所有站点的汇总数据及上传量排行"""
+        try:
+            top_n = int(top_n)
+        except (TypeError, ValueError):
+            top_n = DEFAULT_TOP_N
+        top_n = max(1, min(top_n, MAX_TOP_N))
+
+        results = await self._run_query(SITE_AGGREGATE_QUERY, (top_n,))
+        if not results:
+            return [
+                types.TextContent(
+                    type="text",
+                    text="未找到任何站点数据"
+                )
+            ]
+
+        # 合计列在每一行中相同，取第一行即可
+        totals = results[0]
+        total_upload = totals['total_upload'] or 0
+        total_download = totals['total_download'] or 0
+        overall_ratio = f"{total_upload / total_download:.2f}" if total_download else "∞"
+
+        text = f"""📈 PT站点汇总数据（共{totals['site_count']}个站点）
+
+⬆️ 总上传量: {self._format_size(total_upload)}
+⬇️ 总下载量: {self._format_size(total_download)}
+📊 总分享率: {overall_ratio}
+🌱 总做种数: {totals['total_seeding']}个
+💾 总做种体积: {self._format_size(totals['total_seeding_size'])}
+✨ 总魔力值: {totals['total_bonus'] or 0:,.2f}
+"""
+        if totals['total_unread']:
+            text += f"📬 未读消息: {totals['total_unread']}条\n"
+
+        text += f"\n🏆 上传量排行（前{len(results)}个站点）\n\n"
+        for i, site_data in enumerate(results, 1):
+            ratio = site_data['ratio']
+            ratio_str = f"{ratio:.2f}" if ratio is not None else "未知"
+            text += (f"{i}. {site_data['site_name']} ({site_data['domain']})\n"
+                     f"   ⬆️ {self._format_size(site_data['upload'])}  "
+                     f"⬇️ {self._format_size(site_data['download'])}  "
+                     f"📊 {ratio_str}  🌱 {site_data['seeding_count']}个\n")
+
+        return [types.TextContent(type="text", text=text)]
+
     @property
     def tool_info(self) -> types.Tool:
         """返回工具信息"""
         return types.Tool(
             name="query-pt-stats",
-            description="查询PT站点详细数据统计，获取指定站点的魔力值、做种数、上传下载量、分享率等信息",
+            description="查询PT站点详细数据统计，获取指定站点的魔力值、做种数、上传下载量、分享率等信息；aggregate=true时返回所有站点的合计与上传量排行",
             inputSchema={
                 "type": "object",
                 "properties": {
@@ -232,11 +329,22 @@ class PTStatsTool(BaseTool):
                     "site_name": {
                         "type": "string",
                         "description": "站点名称（与site_domain二选一）"
+                    },
+                    "aggregate": {
+                        "type": "boolean",
+                        "description": "是否查询所有站点的汇总数据（合计、总分享率、上传量排行）",
+                        "default": False
+                    },
+                    "top_n": {
+                        "type": "integer",
+                        "description": f"汇总模式下按上传量显示的站点数，最多{MAX_TOP_N}",
+                        "default": DEFAULT_TOP_N
                     }
                 },
                 "anyOf": [
                     {"required": ["site_domain"]},
-                    {"required": ["site_name"]}
+                    {"required": ["site_name"]},
+                    {"required": ["aggregate"]}
                 ]
             }
         )
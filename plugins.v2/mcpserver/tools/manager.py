@@ -1,19 +1,21 @@
-from typing import Dict, Type, List
+from typing import Any, Dict, List, Optional, Tuple
+import hashlib
+import importlib
 import logging
 import mcp.types as types
 import os
 import sys
+import tempfile
+import time
 from pathlib import Path
 
 from .base import BaseTool
-from .user.info import UserInfoTool
-from .site.sites import GetSitesTool
-from .media.subscribe import SubscribeTool
-from .media.download import MovieDownloadTool
-from .media.recognize import MediaRecognizeTool
-from .database.pt_stats import PTStatsTool
 from .plugin_registry import PluginToolRegistry
 from .plugin_proxy import PluginToolProxy
+from .resource_cache import resource_cache
+from .recognition_cache import recognition_cache
+from .credits_cache import credits_cache
+from .concurrency import ToolLimiter, ToolBusyError, DEFAULT_MAX_CONCURRENCY, DEFAULT_MAX_QUEUE
 
 # 添加父目录到路径以导入utils
 parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -22,63 +24,227 @@ sys.path.append(parent_dir)
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# 内置工具：(模块, 类名)，模块在工具第一次被调用时才导入
+BUILTIN_TOOLS = [
+    (".user.info", "UserInfoTool"),
+    (".site.sites", "GetSitesTool"),
+    (".media.subscribe", "SubscribeTool"),
+    (".media.download", "MovieDownloadTool"),
+    (".media.recognize", "MediaRecognizeTool"),
+    (".database.pt_stats", "PTStatsTool"),
+]
+
+# 内置工具定义缓存文件名，工具源码变化后自动失效
+TOOL_CATALOG_FILE_NAME = ".mcpserver-tool-catalog.json"
+PLUGIN_ROOT = Path(parent_dir)
+
+
+def tool_catalog_file() -> Path:
+    """工具定义缓存文件路径
+
+    运行在插件虚拟环境中时与依赖安装记录一样放在虚拟环境目录，否则放在系统临时目录，不写入插件源码目录。
+    """
+    if sys.prefix != sys.base_prefix:
+        return Path(sys.prefix) / TOOL_CATALOG_FILE_NAME
+    source_id = hashlib.sha256(str(PLUGIN_ROOT).encode()).hexdigest()[:12]
+    return Path(tempfile.gettempdir()) / f"mcpserver-tool-catalog-{source_id}.json"
+
 
 class ToolManager:
     """工具管理器，负责注册和管理所有可用的工具"""
 
-    def __init__(self, token_manager=None):
+    def __init__(self, token_manager=None, max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 max_queue: int = DEFAULT_MAX_QUEUE):
+        """
+        Args:
+            token_manager: Token管理器
+            max_concurrency: 每个工具默认的最大并发数
+            max_queue: 每个工具默认的最大排队数
+        """
         self.token_manager = token_manager
-        self._tools: Dict[str, Type[BaseTool]] = {}
+        # 内置工具名 -> (模块, 类名)
+        self._tool_specs: Dict[str, Tuple[str, str]] = {}
+        # 工具实例在第一次调用时创建并复用，工具名 -> 实例
+        self._instances: Dict[str, BaseTool] = {}
+        self._class_instances: Dict[Tuple[str, str], BaseTool] = {}
+        # 启动耗时统计：工具定义来源、各工具模块的导入耗时（毫秒）
+        self._catalog_source = None
+        self._catalog_ms = 0.0
+        self._import_timings: Dict[str, float] = {}
+        # 插件工具代理按工具名复用，工具定义更新后重建
+        self._plugin_proxies: Dict[str, PluginToolProxy] = {}
+        self._max_concurrency = max_concurrency
+        self._max_queue = max_queue
+        self._limit_overrides: Dict[str, Dict[str, int]] = {}
+        self._limiters: Dict[str, ToolLimiter] = {}
+        self._builtin_tool_infos: List[types.Tool] = []
         self._plugin_registry = PluginToolRegistry()
+        # (插件注册表版本号, 完整工具列表)，注册表版本变化时重建
+        self._catalog: Optional[Tuple[int, List[types.Tool]]] = None
         self._state_sync_enabled = False
         self._register_tools()
         self._setup_state_sync()
 
     def _register_tools(self):
-        """注册所有可用的工具"""
-        tools = [
-            UserInfoTool,
-            GetSitesTool,
-            SubscribeTool,
-            MovieDownloadTool,
-            MediaRecognizeTool,
-            PTStatsTool
-        ]
-
-        for tool_class in tools:
-            tool = tool_class(self.token_manager)
-            tool_infos = tool.tool_info
-            if isinstance(tool_infos, list):
-                # 如果是工具列表，注册所有工具
-                for tool_info in tool_infos:
-                    self._tools[tool_info.name] = tool_class
-                    logger.info(f"注册工具: {tool_info.name}")
-            else:
-                # 单个工具直接注册
-                self._tools[tool_infos.name] = tool_class
-                logger.info(f"注册工具: {tool_infos.name}")
+        """注册所有可用的工具
+
+        只注册工具定义，工具定义优先读取缓存文件；缓存缺失或失效时导入全部工具模块生成并写回缓存。
+        """
+        start = time.perf_counter()
+        catalog = self._load_tool_catalog()
+        self._catalog_source = "cache"
+        if catalog is None:
+            catalog = self._build_tool_catalog()
+            self._catalog_source = "import"
+
+        for entry in catalog:
+            spec = (entry["module"], entry["class"])
+            for tool_info in entry["tools"]:
+                self._tool_specs[tool_info.name] = spec
+                self._builtin_tool_infos.append(tool_info)
+                if tool_info.name in entry["limits"]:
+                    self._limit_overrides[tool_info.name] = dict(entry["limits"][tool_info.name])
+                logger.info(f"注册工具: {tool_info.name}")
+        self._catalog_ms = (time.perf_counter() - start) * 1000
+
+    def _import_tool_class(self, module: str, class_name: str):
+        """导入工具类并记录导入耗时"""
+        start = time.perf_counter()
+        tool_class = getattr(importlib.import_module(module, __package__), class_name)
+        self._import_timings.setdefault(module.lstrip("."), round((time.perf_counter() - start) * 1000, 2))
+        return tool_class
+
+    def _get_instance(self, name: str) -> BaseTool:
+        """获取内置工具实例，第一次调用时导入模块并创建，同一工具类的多个工具共享实例"""
+        tool = self._instances.get(name)
+        if tool is None:
+            spec = self._tool_specs[name]
+            tool = self._class_instances.get(spec)
+            if tool is None:
+                tool = self._import_tool_class(*spec)(self.token_manager)
+                self._class_instances[spec] = tool
+                logger.debug(f"加载工具模块: {spec[0]}")
+            self._instances[name] = tool
+        return tool
+
+    @staticmethod
+    def _tool_sources() -> List[str]:
+        """tools目录下的全部模块"""
+        return [str(path.relative_to(PLUGIN_ROOT)) for path in (PLUGIN_ROOT / "tools").rglob("*.py")]
+
+    @staticmethod
+    def _catalog_sources() -> List[str]:
+        """生成工具定义时依赖的插件源文件：tools下的全部模块，以及导入工具模块时加载的插件内其它模块（如utils）"""
+        sources = set(ToolManager._tool_sources())
+        for module in list(sys.modules.values()):
+            module_file = getattr(module, "__file__", None)
+            if not module_file or not module_file.endswith(".py"):
+                continue
+            path = Path(module_file).resolve()
+            if path.is_relative_to(PLUGIN_ROOT.resolve()):
+                sources.add(str(path.relative_to(PLUGIN_ROOT.resolve())))
+        return sorted(sources)
+
+    @staticmethod
+    def _catalog_fingerprint(sources: List[str]) -> str:
+        """源文件与运行环境的指纹，任一源文件变化或删除都会使缓存失效"""
+        digest = hashlib.sha256(sys.version.encode())
+        digest.update(getattr(types, "LATEST_PROTOCOL_VERSION", "").encode())
+        for source in sources:
+            try:
+                stat = (PLUGIN_ROOT / source).stat()
+                digest.update(f"{source}:{stat.st_mtime_ns}:{stat.st_size};".encode())
+            except OSError:
+                digest.update(f"{source}:missing;".encode())
+        return digest.hexdigest()
+
+    def _load_tool_catalog(self) -> Optional[List[Dict[str, Any]]]:
+        """从缓存文件读取内置工具定义，缓存不存在或已失效时返回None"""
+        from utils import safe_read_json
+
+        data = safe_read_json(tool_catalog_file())
+        sources = data.get("sources") if data else None
+        if not sources or data.get("fingerprint") != self._catalog_fingerprint(sources):
+            return None
+        # 新增的工具模块不在记录的源文件中
+        if not set(self._tool_sources()).issubset(sources):
+            return None
+        try:
+            return [
+                {
+                    "module": entry["module"],
+                    "class": entry["class"],
+                    "tools": [types.Tool.model_validate(tool) for tool in entry["tools"]],
+                    "limits": entry.get("limits", {}),
+                }
+                for entry in data["tools"]
+            ]
+        except Exception as e:
+            logger.warning(f"工具定义缓存无效，将重新生成: {e}")
+            return None
 
-    def list_tools(self) -> List[types.Tool]:
-        """列出所有可用的工具"""
-        tools = []
+    def _build_tool_catalog(self) -> List[Dict[str, Any]]:
+        """导入全部内置工具生成工具定义，并写入缓存文件"""
+        from utils import safe_write_json
 
-        # 添加内置工具
-        for tool_class in set(self._tools.values()):  # 使用set去重
+        catalog = []
+        for module, class_name in BUILTIN_TOOLS:
+            tool_class = self._import_tool_class(module, class_name)
             tool = tool_class(self.token_manager)
+            # 已经创建的实例直接复用
+            self._class_instances[(module, class_name)] = tool
             tool_infos = tool.tool_info
+            if not isinstance(tool_infos, list):
+                tool_infos = [tool_infos]
+            catalog.append({
+                "module": module,
+                "class": class_name,
+                "tools": tool_infos,
+                "limits": dict(tool_class.tool_limits),
+            })
+
+        sources = self._catalog_sources()
+        safe_write_json(tool_catalog_file(), {
+            "sources": sources,
+            "fingerprint": self._catalog_fingerprint(sources),
+            "tools": [
+                {**entry, "tools": [tool.model_dump(mode="json", by_alias=True, exclude_none=True)
+                                    for tool in entry["tools"]]}
+                for entry in catalog
+            ],
+        }, create_backup=False)
+        return catalog
+
+    def get_startup_info(self) -> dict:
+        """工具注册耗时与已加载的工具模块"""
+        return {
+            "catalog_source": self._catalog_source,
+            "catalog_ms": round(self._catalog_ms, 2),
+            "module_import_ms": dict(self._import_timings),
+            "loaded_modules": len(self._class_instances),
+            "total_modules": len(BUILTIN_TOOLS),
+        }
 
-            # 处理单个工具或工具列表
-            if isinstance(tool_infos, list):
-                tools.extend(tool_infos)
-            else:
-                tools.append(tool_infos)
-
-        # 添加动态注册的插件工具
-        plugin_tools = self._plugin_registry.list_registered_tools()
-        tools.extend(plugin_tools)
-
-        logger.debug(f"可用工具列表: {[tool.name for tool in tools]}")
-        return tools
+    def list_tools(self) -> List[types.Tool]:
+        """列出所有可用的工具
+
+        内置工具的定义在注册时生成一次，插件工具按注册表版本号缓存，
+        只有插件工具变更后的第一次调用才会重建列表。
+        """
+        catalog = self._catalog
+        if catalog is None or catalog[0] != self._plugin_registry.version:
+            version, plugin_tools = self._plugin_registry.snapshot()
+            catalog = (version, self._builtin_tool_infos + plugin_tools)
+            self._catalog = catalog
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"重建工具列表(版本{version}): {[tool.name for tool in catalog[1]]}")
+
+        return list(catalog[1])
+
+    @property
+    def catalog_version(self) -> int:
+        """工具列表版本号，插件工具变更时递增"""
+        return self._plugin_registry.version
 
     async def call_tool(
         self, name: str, arguments: dict
@@ -86,34 +252,30 @@ class ToolManager:
         types.TextContent | types.ImageContent | types.EmbeddedResource
     ]:
         """调用指定的工具"""
-        logger.debug(f"[ToolManager] 开始调用工具")
-        logger.debug(f"[ToolManager] 工具名称: {name}")
-        logger.debug(f"[ToolManager] 工具参数: {arguments}")
-        logger.debug(f"[ToolManager] 内置工具列表: {list(self._tools.keys())}")
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug("[ToolManager] 调用工具: %s, 参数: %s", name, arguments)
 
         # 首先检查是否是内置工具
-        if name in self._tools:
-            logger.debug(f"[ToolManager] 找到内置工具: {name}")
-            tool = self._tools[name](self.token_manager)
-            logger.debug(f"[ToolManager] 创建内置工具实例: {tool}")
-            return await tool.execute(name, arguments)
+        if name in self._tool_specs:
+            return await self._execute_limited(name, self._get_instance(name), arguments)
 
         # 检查是否是动态注册的插件工具
-        logger.debug(f"[ToolManager] 检查插件工具注册表...")
         plugin_tool_info = self._plugin_registry.get_tool_info(name)
-        logger.debug(f"[ToolManager] 插件工具信息: {plugin_tool_info}")
-
         if plugin_tool_info:
-            logger.debug(f"[ToolManager] 找到插件工具: {name}")
-            logger.debug(f"[ToolManager] 插件ID: {plugin_tool_info.plugin_id}")
-            logger.debug(f"[ToolManager] API端点: {plugin_tool_info.api_endpoint}")
-            tool_proxy = PluginToolProxy(plugin_tool_info, self.token_manager)
-            logger.debug(f"[ToolManager] 创建插件工具代理: {tool_proxy}")
-            return await tool_proxy.execute(name, arguments)
+            if debug:
+                logger.debug("[ToolManager] 插件工具: %s, 插件ID: %s, API端点: %s",
+                             name, plugin_tool_info.plugin_id, plugin_tool_info.api_endpoint)
+            tool_proxy = self._plugin_proxies.get(name)
+            if tool_proxy is None or tool_proxy.tool_info_data is not plugin_tool_info:
+                tool_proxy = PluginToolProxy(plugin_tool_info, self.token_manager)
+                self._plugin_proxies[name] = tool_proxy
+            return await self._execute_limited(name, tool_proxy, arguments)
 
         # 工具不存在
         logger.error(f"[ToolManager] 未找到工具: {name}")
-        logger.debug(f"[ToolManager] 可用的插件工具: {self._plugin_registry.get_all_tool_names()}")
+        if debug:
+            logger.debug("[ToolManager] 可用的插件工具: %s", self._plugin_registry.get_all_tool_names())
         return [
             types.TextContent(
                 type="text",
@@ -121,6 +283,69 @@ class ToolManager:
             )
         ]
 
+    async def _execute_limited(self, name: str, tool: BaseTool, arguments: dict):
+        """在工具的并发限制内执行"""
+        try:
+            async with self._get_limiter(name).slot():
+                return await tool.execute(name, arguments)
+        except ToolBusyError as e:
+            logger.warning(str(e))
+            return [
+                types.TextContent(
+                    type="text",
+                    text=f"错误：{e}，请稍后重试"
+                )
+            ]
+
+    def _get_limiter(self, name: str) -> ToolLimiter:
+        limiter = self._limiters.get(name)
+        if limiter is None:
+            limits = self._limit_overrides.get(name, {})
+            limiter = ToolLimiter(
+                name,
+                max_concurrency=limits.get("max_concurrency", self._max_concurrency),
+                max_queue=limits.get("max_queue", self._max_queue),
+            )
+            self._limiters[name] = limiter
+        return limiter
+
+    def set_tool_limits(self, name: str, max_concurrency: Optional[int] = None,
+                        max_queue: Optional[int] = None):
+        """设置指定工具的并发限制，对之后的调用生效"""
+        limits = self._limit_overrides.setdefault(name, {})
+        if max_concurrency is not None:
+            limits["max_concurrency"] = max_concurrency
+        if max_queue is not None:
+            limits["max_queue"] = max_queue
+        # 正在执行的调用继续持有旧限制器的槽位
+        self._limiters.pop(name, None)
+
+    def get_tool_stats(self) -> dict:
+        """获取工具并发限制与执行统计"""
+        return {
+            "defaults": {
+                "max_concurrency": self._max_concurrency,
+                "max_queue": self._max_queue,
+            },
+            "tools": {name: limiter.stats() for name, limiter in self._limiters.items()},
+            "caches": {
+                "resource": resource_cache.get_cache_stats(),
+                "recognition": recognition_cache.get_cache_stats(),
+                "credits": credits_cache.get_cache_stats(),
+            },
+        }
+
+    def _prune_plugin_state(self):
+        """清理已注销插件工具的代理和空闲限制器"""
+        registered = set(self._plugin_registry.get_all_tool_names())
+        for name in list(self._plugin_proxies):
+            if name not in registered:
+                self._plugin_proxies.pop(name, None)
+        for name, limiter in list(self._limiters.items()):
+            if (name not in registered and name not in self._tool_specs
+                    and not limiter.in_flight and not limiter.waiting):
+                self._limiters.pop(name, None)
+
     def register_plugin_tools(self, plugin_id: str, tools: List[dict]) -> dict:
         """注册插件工具"""
         logger.info(f"注册插件工具: {plugin_id}, 工具数量: {len(tools)}")
@@ -129,11 +354,28 @@ class ToolManager:
     def unregister_plugin_tools(self, plugin_id: str) -> dict:
         """注销插件工具"""
         logger.info(f"注销插件工具: {plugin_id}")
-        return self._plugin_registry.unregister_plugin_tools(plugin_id)
+        result = self._plugin_registry.unregister_plugin_tools(plugin_id)
+        self._prune_plugin_state()
+        return result
+
+    def sync_plugin_tools(self, plugin_tools: Dict[str, dict]) -> dict:
+        """按插件工具文件内容同步注册表，只重新注册内容有变化的插件
+
+        Args:
+            plugin_tools: 插件工具文件内容，插件ID -> {"tools": [...], ...}
+        """
+        result = self._plugin_registry.sync_plugins({
+            plugin_id: plugin_data.get("tools", [])
+            for plugin_id, plugin_data in plugin_tools.items()
+            if isinstance(plugin_data, dict)
+        })
+        if result.get("changed"):
+            self._prune_plugin_state()
+        return result
 
     def get_plugin_registry_stats(self) -> dict:
         """获取插件工具注册统计"""
-        return self._plugin_registry.get_registry_stats()
+        return {**self._plugin_registry.get_registry_stats(), "state_generation": self.state_generation}
 
     def get_plugin_tools(self, plugin_id: str) -> List[str]:
         """获取插件注册的工具列表"""
@@ -199,35 +441,21 @@ class ToolManager:
         try:
             logger.info("开始从文件同步插件工具状态到内存")
 
-            # 获取当前内存中的插件列表
-            current_plugins = set(self._plugin_registry._plugin_tools.keys())
-            file_plugins = set(file_state.keys())
-
-            # 移除不在文件中的插件工具
-            plugins_to_remove = current_plugins - file_plugins
-            for plugin_id in plugins_to_remove:
-                logger.info(f"移除不在文件中的插件工具: {plugin_id}")
-                self._plugin_registry.unregister_plugin_tools(plugin_id)
-
-            # 添加或更新文件中的插件工具
-            for plugin_id, plugin_data in file_state.items():
-                tools = plugin_data.get("tools", [])
-                if tools:
-                    # 先移除现有工具
-                    if plugin_id in current_plugins:
-                        self._plugin_registry.unregister_plugin_tools(plugin_id)
-
-                    # 注册新工具
-                    result = self._plugin_registry.register_tools(plugin_id, tools)
-                    if result.get("success"):
-                        logger.debug(f"同步插件工具成功: {plugin_id}")
-                    else:
-                        logger.warning(f"同步插件工具失败: {plugin_id}, {result.get('message')}")
+            result = self.sync_plugin_tools(file_state)
+            logger.debug(f"插件工具同步结果: {result}")
 
             logger.info("插件工具状态同步完成")
+            return result
 
         except Exception as e:
             logger.error(f"设置内存状态失败: {e}")
+            return {"success": False, "message": str(e)}
+
+    @property
+    def state_generation(self) -> int:
+        """插件工具文件同步代数，文件内容变化并应用到内存后加一；只读取内存计数器，可随时轮询"""
+        from utils.state_sync import get_generation
+        return get_generation("plugin_tools")
 
     def enable_state_sync(self):
         """启用状态同步"""
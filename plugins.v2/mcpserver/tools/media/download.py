@@ -1,18 +1,45 @@
+import asyncio
 import json
 import logging
+import re
 import mcp.types as types
 from ..base import BaseTool
 from .recognize import MediaRecognizeTool
 from ..resource_cache import resource_cache
+from .result_formatter import (
+    DEFAULT_MAX_CHARS, collect_keywords, extract_resolution, first_keyword,
+    format_size, merge_search_results, render_results, resolution_matches, sort_rows
+)
 
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+SUBTITLE_KEYWORDS = ("中字", "中文字幕", "简体", "繁体", "双语", "特效字幕", "SUP", "SRT", "ASS")
+AUDIO_TRACK_KEYWORDS = ("国语", "粤语", "英语", "双语", "多语", "国英双语", "中英双语")
+VIDEO_ENCODE_KEYWORDS = ("H264", "H.264", "x264", "H265", "H.265", "x265", "HEVC", "AVC", "VP9", "AV1")
+AUDIO_ENCODE_KEYWORDS = ("DTS", "DTS-HD", "DTS-X", "Dolby", "AC3", "AAC", "FLAC", "TrueHD", "Atmos", "DTS-HD MA")
+SOURCE_TYPE_KEYWORDS = ("BluRay", "Blu-ray", "WEB-DL", "WEBRip", "HDTV", "DVDRip", "BDRip", "Remux", "UHD")
+TEAM_PATTERN = re.compile(r'@([^@\s]+)')
+
+# 多站点搜索时同时搜索的站点数和单个站点的超时时间（秒）
+SITE_SEARCH_CONCURRENCY = 4
+SITE_SEARCH_TIMEOUT = 60
+# 站点完成时进度通知中附带的资源预览：做种数最多的几条，及预览文本的字符预算
+PROGRESS_PREVIEW_ROWS = 3
+PROGRESS_PREVIEW_MAX_CHARS = 300
+
 
 class MovieDownloadTool(BaseTool):
     """媒体搜索和下载工具"""
 
+    # 资源搜索需要逐个站点检索，耗时较长，限制并发避免拖慢其他工具
+    tool_limits = {
+        "search-media-resources": {"max_concurrency": 2, "max_queue": 8},
+        "fuzzy-search-media-resources": {"max_concurrency": 2, "max_queue": 8},
+        "search-site-resources": {"max_concurrency": 2, "max_queue": 8},
+    }
+
     def __init__(self, token_manager=None):
         super().__init__(token_manager)
         # 创建媒体识别工具实例
@@ -38,7 +65,17 @@ class MovieDownloadTool(BaseTool):
                 )
             ]
 
-    def _format_search_results(self, torrents: list, keyword: str, year: str = None, detailed: bool = True, limit: int = 50) -> str:
+    @staticmethod
+    def _max_chars(arguments: dict) -> int:
+        """输出预算（字符数），未指定或无效时使用默认值"""
+        try:
+            return max(1000, int(arguments.get("max_chars") or DEFAULT_MAX_CHARS))
+        except (TypeError, ValueError):
+            return DEFAULT_MAX_CHARS
+
+    def _format_search_results(self, torrents: list, keyword: str, year: str = None, detailed: bool = True,
+                               limit: int = 50, compact: bool = False, resolution: str = None,
+                               max_chars: int = DEFAULT_MAX_CHARS) -> str:
         """
         格式化搜索结果
 
@@ -48,148 +85,101 @@ class MovieDownloadTool(BaseTool):
             year: 年份(可选)
             detailed: 是否显示详细信息(默认为True)
             limit: 最大返回结果数量(默认为50)
+            compact: 是否使用紧凑表格格式，每个资源一行
+            resolution: 只保留该清晰度的资源(可选)
+            max_chars: 输出预算（字符数）
 
         返回:
             格式化后的文本
         """
-        if not torrents:
-            return f"未找到符合条件的资源：{keyword} {year or ''}"
-
-        # 限制结果数量
-        if limit > 0 and len(torrents) > limit:
-            torrents = torrents[:limit]
-            result_text = f"找到 {len(torrents)} 个资源（已限制显示前 {limit} 个）：\n\n"
-        else:
-            result_text = f"找到 {len(torrents)} 个资源：\n\n"
-        for i, torrent in enumerate(torrents):
-            # 检查torrent是否是字典类型
+        rows = []
+        for torrent in torrents or []:
             if not isinstance(torrent, dict):
                 logger.warning(f"种子数据不是字典类型: {type(torrent)}")
                 continue
+            row = self._search_result_row(torrent)
+            if resolution_matches(row["resolution"], resolution):
+                rows.append(row)
 
-            # 提取需要的信息
-            # 检查torrent_info字段
-            torrent_info = torrent.get("torrent_info", {})
-            meta_info = torrent.get("meta_info", {})
-            if not torrent_info:
-                # 可能是Context对象的直接序列化
-                torrent_info = torrent
-
-            # 从torrent_info中提取数据
-            title = torrent_info.get("description", "未知标题")
-            if not title or title == "未知标题":
-                # 尝试从meta_info中获取标题
-                if meta_info:
-                    title = meta_info.get("subtitle", "未知标题")
-
-            site_name = torrent_info.get("site_name", "未知站点")
-
-            # 处理大小显示
-            size_bytes = torrent_info.get("size", 0)
-            if isinstance(size_bytes, (int, float)) and size_bytes > 0:
-                # 转换为人类可读的大小
-                if size_bytes < 1024:
-                    size = f"{size_bytes} B"
-                elif size_bytes < 1024 * 1024:
-                    size = f"{size_bytes/1024:.2f} KB"
-                elif size_bytes < 1024 * 1024 * 1024:
-                    size = f"{size_bytes/(1024*1024):.2f} MB"
-                else:
-                    size = f"{size_bytes/(1024*1024*1024):.2f} GB"
-            else:
-                size = torrent_info.get("size", "未知大小")
-
-            # 提取分辨率
-            resolution = "未知分辨率"
-            if meta_info:
-                # 尝试直接从标题中提取分辨率
-                title_str = meta_info.get("org_string", "")
-                if title_str:
-                    import re
-                    res_pattern = (
-                        r'(4K|1080[pi]|720[pi]|2160[pi]|UHD|'
-                        r'MINIBD1080P|BD1080P|HD1080P|BD720P|HD720P)'
-                    )
-                    res_match = re.search(
-                        res_pattern, title_str, re.IGNORECASE)
-                    if res_match:
-                        resolution = res_match.group(1)
-
-            seeders = torrent_info.get("seeders", 0)
-            peers = torrent_info.get("peers", 0)
-
-            # 格式化资源信息
-            result_text += f"{i+1}. {title}\n"
-            result_text += f"   站点: {site_name} | 大小: {size}\n"
-            result_text += f"   分辨率: {resolution}\n"
-            result_text += f"   做种: {seeders} | 下载: {peers}\n"
-
-            # 如果需要详细信息，添加更多字段
-            if detailed:
-                # 是否H&R
-                is_hr = torrent_info.get("hit_and_run", False)
-                # 打折
-                discount = torrent_info.get("volume_factor", 0)
-
-                # 提取视频编码
-                video_encode = meta_info.get("video_encode", "未知编码")
-                # 提取音频编码
-                audio_encode = meta_info.get("audio_encode", "未知音频")
-                # 提取资源类型
-                resource_type = meta_info.get("resource_type", "未知来源")
-                # 提取制作组/字幕组
-                resource_team = meta_info.get("resource_team", "")
-
-                # 提取字幕信息
-                subtitle_info = "无字幕信息"
-                description = torrent_info.get("description", "")
-                if description:
-                    # 检查是否包含字幕信息
-                    subtitle_keywords = [
-                        "中字", "中文字幕", "简体", "繁体",
-                        "双语", "特效字幕", "SUP", "SRT", "ASS"
-                    ]
-                    subtitle_matches = []
-                    for keyword in subtitle_keywords:
-                        if keyword in description:
-                            subtitle_matches.append(keyword)
-
-                    if subtitle_matches:
-                        subtitle_info = "、".join(subtitle_matches)
-
-                # 提取音轨信息
-                audio_info = "未知音轨"
-                audio_keywords = ["国语", "粤语", "英语", "双语", "多语", "国英双语", "中英双语"]
-                audio_matches = []
-                for keyword in audio_keywords:
-                    if keyword in description:
-                        audio_matches.append(keyword)
-
-                if audio_matches:
-                    audio_info = "、".join(audio_matches)
-
-                # 添加详细信息
-                result_text += (
-                    f"   视频编码: {video_encode} | "
-                    f"音频编码: {audio_encode}\n"
-                )
-                result_text += f"   资源类型: {resource_type}"
-                if resource_team:
-                    result_text += f" | 制作组: {resource_team}"
-                result_text += "\n"
-                result_text += f"   字幕: {subtitle_info} | 音轨: {audio_info}\n"
-                if is_hr:
-                    result_text += "   H&R: 是\n"
-                result_text += f"   折扣: {discount}\n"
+        if not rows:
+            return f"未找到符合条件的资源：{keyword} {year or ''}"
 
-            # 生成资源标识符并缓存真实下载链接
-            resource_id = resource_cache.generate_resource_id(torrent_info)
-            resource_cache.store_resource(resource_id, torrent_info)
+        rows = sort_rows(rows)
 
-            # 添加资源标识符（隐藏真实下载链接）
-            result_text += f"   资源标识符: {resource_id}\n\n"
+        def header(total: int, emitted: int) -> str:
+            if emitted < total:
+                return f"找到 {total} 个资源（显示前 {emitted} 个）：\n\n"
+            return f"找到 {total} 个资源：\n\n"
 
-        return result_text
+        if compact:
+            return render_results(
+                rows, self._render_search_row_compact, header, limit, max_chars,
+                legend="序号. 标题 | 站点 | 大小 | 分辨率 | 做种/下载 | 资源标识符\n"
+            )
+        render = self._render_search_row_detailed if detailed else self._render_search_row
+        return render_results(rows, render, header, limit, max_chars)
+
+    @staticmethod
+    def _search_result_row(torrent: dict) -> dict:
+        """从搜索API返回的上下文中提取格式化所需字段"""
+        # 检查torrent_info字段，没有时可能是Context对象的直接序列化
+        torrent_info = torrent.get("torrent_info") or torrent
+        meta_info = torrent.get("meta_info") or {}
+
+        title = torrent_info.get("description", "未知标题")
+        if not title or title == "未知标题":
+            title = meta_info.get("subtitle", "未知标题")
+
+        return {
+            "title": title,
+            "site_name": torrent_info.get("site_name", "未知站点"),
+            "size": format_size(torrent_info.get("size", 0)),
+            "resolution": extract_resolution(meta_info.get("org_string", "")),
+            "seeders": torrent_info.get("seeders", 0),
+            "peers": torrent_info.get("peers", 0),
+            "torrent_info": torrent_info,
+            "meta_info": meta_info,
+            "resource_id": resource_cache.generate_resource_id(torrent_info),
+            "cache_info": torrent_info,
+        }
+
+    @staticmethod
+    def _render_search_row(index: int, row: dict, details: str = "") -> str:
+        return (
+            f"{index}. {row['title']}\n"
+            f"   站点: {row['site_name']} | 大小: {row['size']}\n"
+            f"   分辨率: {row['resolution'] or '未知分辨率'}\n"
+            f"   做种: {row['seeders']} | 下载: {row['peers']}\n"
+            f"{details}"
+            f"   资源标识符: {row['resource_id']}\n\n"
+        )
+
+    def _render_search_row_detailed(self, index: int, row: dict) -> str:
+        torrent_info = row["torrent_info"]
+        meta_info = row["meta_info"]
+        description = torrent_info.get("description", "")
+        subtitles = collect_keywords(description, SUBTITLE_KEYWORDS)
+        audios = collect_keywords(description, AUDIO_TRACK_KEYWORDS)
+        resource_team = meta_info.get("resource_team", "")
+
+        details = [
+            f"   视频编码: {meta_info.get('video_encode', '未知编码')} | "
+            f"音频编码: {meta_info.get('audio_encode', '未知音频')}\n",
+            f"   资源类型: {meta_info.get('resource_type', '未知来源')}",
+            f" | 制作组: {resource_team}\n" if resource_team else "\n",
+            f"   字幕: {'、'.join(subtitles) or '无字幕信息'} | 音轨: {'、'.join(audios) or '未知音轨'}\n",
+        ]
+        if torrent_info.get("hit_and_run", False):
+            details.append("   H&R: 是\n")
+        details.append(f"   折扣: {torrent_info.get('volume_factor', 0)}\n")
+        return self._render_search_row(index, row, "".join(details))
+
+    @staticmethod
+    def _render_search_row_compact(index: int, row: dict) -> str:
+        return (
+            f"{index}. {row['title']} | {row['site_name']} | {row['size']} | "
+            f"{row['resolution'] or '-'} | {row['seeders']}/{row['peers']} | {row['resource_id']}\n"
+        )
 
     async def _search_media_resources(self, arguments: dict) -> list[types.TextContent]:
         """
@@ -200,8 +190,9 @@ class MovieDownloadTool(BaseTool):
             - year: 年份(可选)
             - resolution: 清晰度(可选)，如 1080p, 2160p, 4K 等
             - media_type: 媒体类型(可选)，默认为 "电影"
-            - sites: 站点ID列表(可选)，多个站点ID用逗号分隔
+            - sites: 站点ID列表(可选)，多个站点ID用逗号分隔，不提供时搜索MoviePilot设置的索引站点
             - limit: 最大返回结果数量(可选)，默认为50
+            - site_timeout: 单个站点的搜索超时时间(可选)，默认为60秒
         """
         # 检查是否直接提供了媒体ID
         mediaid = arguments.get("mediaid")
@@ -219,18 +210,7 @@ class MovieDownloadTool(BaseTool):
         # 获取其他可选参数
         year = arguments.get("year")
         media_type = arguments.get("media_type", "电影")
-        sites = arguments.get("sites")
-
-        # 强制要求提供sites参数
-        if not sites:
-            return [
-                types.TextContent(
-                    type="text",
-                    text="错误：请提供sites参数，指定1-3个站点ID进行搜索，避免token超限。可通过get-sites工具获取站点列表。"
-                )
-            ]
-
-        limit = int(arguments.get("limit", 50))  # 默认限制为10个结果
+        limit = int(arguments.get("limit", 50))
 
         try:
             # 如果直接提供了媒体ID，则直接使用
@@ -268,54 +248,31 @@ class MovieDownloadTool(BaseTool):
                         )
                     ]
 
-            # 搜索资源
-            params = {
-                "mediaid": media_id,
-                "mtype": "电影" if media_type == "电影" else "电视剧",
-                "sites": sites,
-                "sort": "seeders"
-            }
+            site_ids = await self._resolve_site_ids(arguments.get("sites"))
 
-            # 调用搜索API
-            try:
-                response = await self._make_request(
-                    method="GET",
-                    endpoint=f"/api/v1/search/media/{media_id}",
-                    params=params
-                )
-            except Exception as e:
-                logger.error(f"调用搜索API时出错: {str(e)}")
-                return [
-                    types.TextContent(
-                        type="text",
-                        text=f"搜索资源时出错: {str(e)}"
-                    )
-                ]
-
-            # 检查是否有错误
-            is_error_response = (
-                isinstance(response, dict) and
-                not response.get("success", False)
+            # 按站点并发搜索资源
+            torrents, summary = await self._fan_out_search(
+                endpoint=f"/api/v1/search/media/{media_id}",
+                params={
+                    "mediaid": media_id,
+                    "mtype": "电影" if media_type == "电影" else "电视剧",
+                    "sort": "seeders"
+                },
+                site_ids=site_ids,
+                site_timeout=self._site_timeout(arguments),
             )
-            if is_error_response:
-                return [
-                    types.TextContent(
-                        type="text",
-                        text=f"搜索资源失败: {response.get('message', '未知错误')}"
-                    )
-                ]
-
-            # 获取搜索结果
-            torrents = response.get("data", [])
 
             # 使用公共方法格式化结果
             result_text = self._format_search_results(
-                torrents, keyword, year, detailed=True, limit=limit)
+                torrents, keyword or media_id, year, detailed=True, limit=limit,
+                compact=arguments.get("compact", False),
+                resolution=arguments.get("resolution"),
+                max_chars=self._max_chars(arguments))
 
             return [
                 types.TextContent(
                     type="text",
-                    text=result_text
+                    text=summary + result_text
                 )
             ]
 
@@ -328,6 +285,136 @@ class MovieDownloadTool(BaseTool):
                 )
             ]
 
+    @staticmethod
+    def _site_timeout(arguments: dict) -> float:
+        """单个站点的搜索超时时间（秒）"""
+        try:
+            return max(5.0, float(arguments.get("site_timeout") or SITE_SEARCH_TIMEOUT))
+        except (TypeError, ValueError):
+            return SITE_SEARCH_TIMEOUT
+
+    async def _resolve_site_ids(self, sites) -> list:
+        """解析sites参数，未提供时使用MoviePilot设置中的索引站点，未设置时返回空列表"""
+        if not sites:
+            sites = await self._get_indexer_sites()
+        if not sites:
+            return []
+        if isinstance(sites, (list, tuple)):
+            candidates = sites
+        else:
+            candidates = str(sites).replace("，", ",").split(",")
+        return list(dict.fromkeys(str(site).strip() for site in candidates if str(site).strip()))
+
+    async def _get_indexer_sites(self) -> list:
+        """获取用户在MoviePilot中设置的索引站点（系统设置 IndexerSites）"""
+        try:
+            response = await self._make_request(
+                method="GET",
+                endpoint="/api/v1/system/setting/IndexerSites"
+            )
+        except Exception as e:
+            logger.warning(f"获取索引站点设置失败: {str(e)}")
+            return []
+        if not isinstance(response, dict) or not response.get("success", False):
+            return []
+        value = (response.get("data") or {}).get("value")
+        return value if isinstance(value, list) else []
+
+    async def _fan_out_search(self, endpoint: str, params: dict, site_ids: list,
+                              site_timeout: float = SITE_SEARCH_TIMEOUT) -> tuple:
+        """
+        按站点并发调用搜索API，合并去重各站点的结果
+
+        每个站点单独请求并受信号量和超时限制，慢站点只影响自身结果；
+        每个站点完成时通过MCP进度通知告知客户端，通知中附带该站点做种数最多的几条资源预览。
+
+        返回:
+            (合并去重后的种子列表, 各站点搜索情况摘要)
+        """
+        semaphore = asyncio.Semaphore(SITE_SEARCH_CONCURRENCY)
+
+        async def search_site(site_id: str):
+            async with semaphore:
+                try:
+                    response = await asyncio.wait_for(
+                        self._make_request(method="GET", endpoint=endpoint, params={**params, "sites": site_id}),
+                        timeout=site_timeout
+                    )
+                except asyncio.TimeoutError:
+                    return site_id, None, f"超时（{site_timeout:.0f}秒）"
+                except Exception as e:
+                    return site_id, None, str(e)
+
+            if isinstance(response, dict) and not response.get("success", False):
+                return site_id, None, response.get("message") or response.get("error") or "未知错误"
+            data = response.get("data", []) if isinstance(response, dict) else response
+            return site_id, data if isinstance(data, list) else [], None
+
+        if not site_ids:
+            # 没有指定站点，也没有设置索引站点时，不传sites，由MoviePilot按默认站点搜索
+            try:
+                response = await self._make_request(method="GET", endpoint=endpoint, params=params)
+            except Exception as e:
+                return [], f"搜索资源时出错: {str(e)}\n"
+            if isinstance(response, dict) and not response.get("success", False):
+                return [], f"搜索资源失败: {response.get('message', '未知错误')}\n"
+            data = response.get("data", []) if isinstance(response, dict) else response
+            return merge_search_results(data if isinstance(data, list) else []), ""
+
+        await self._ensure_site_mapping()
+        tasks = [asyncio.ensure_future(search_site(site_id)) for site_id in site_ids]
+        results = []
+        failures = []
+        try:
+            for done, future in enumerate(asyncio.as_completed(tasks), start=1):
+                site_id, data, error = await future
+                site_name = resource_cache.get_site_name(site_id)
+                if error is None:
+                    results.extend(data)
+                    message = f"{site_name}: {len(data)} 个资源" + self._progress_preview(data)
+                else:
+                    failures.append(f"{site_name}: {error}")
+                    message = f"{site_name}: 搜索失败 - {error}"
+                await self._report_progress(done, len(site_ids), message)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        merged = merge_search_results(results)
+        summary = f"已搜索 {len(site_ids)} 个站点"
+        if failures:
+            summary += f"，{len(failures)} 个站点未返回结果（{'；'.join(failures)}）"
+        if len(merged) < len(results):
+            summary += f"，合并了 {len(results) - len(merged)} 个重复资源"
+        return merged, summary + "\n"
+
+    @staticmethod
+    def _progress_preview(torrents: list) -> str:
+        """单个站点结果的紧凑预览（做种数最多的几条：标题 | 大小 | 做种数），受字符预算限制
+
+        预览只用于进度通知，不注册资源标识符，完整结果仍在全部站点完成后返回。
+        """
+        rows = []
+        for torrent in torrents:
+            if not isinstance(torrent, dict):
+                continue
+            torrent_info = torrent.get("torrent_info") or torrent
+            title = (torrent_info.get("description") or torrent_info.get("title")
+                     or (torrent.get("meta_info") or {}).get("subtitle") or "未知标题")
+            rows.append({"title": str(title).strip(), "size": torrent_info.get("size"),
+                         "seeders": torrent_info.get("seeders", 0)})
+
+        lines = []
+        used = 0
+        for row in sort_rows(rows)[:PROGRESS_PREVIEW_ROWS]:
+            title = row["title"] if len(row["title"]) <= 40 else row["title"][:39] + "…"
+            line = f"\n- {title} | {format_size(row['size'])} | 做种 {row['seeders']}"
+            if used + len(line) > PROGRESS_PREVIEW_MAX_CHARS:
+                break
+            lines.append(line)
+            used += len(line)
+        return "".join(lines)
+
     async def _download_torrent(
         self, arguments: dict
     ) -> list[types.TextContent]:
@@ -578,7 +665,10 @@ class MovieDownloadTool(BaseTool):
                 ]
 
             # 格式化结果
-            result_text = self._format_site_search_results(resources, keyword, site_id, limit)
+            result_text = self._format_site_search_results(
+                resources, keyword, site_id, limit,
+                compact=arguments.get("compact", False),
+                max_chars=self._max_chars(arguments))
 
             return [
                 types.TextContent(
@@ -596,7 +686,8 @@ class MovieDownloadTool(BaseTool):
                 )
             ]
 
-    def _format_site_search_results(self, resources: list, keyword: str, site_id: str, limit: int = 50) -> str:
+    def _format_site_search_results(self, resources: list, keyword: str, site_id: str, limit: int = 50,
+                                    compact: bool = False, max_chars: int = DEFAULT_MAX_CHARS) -> str:
         """
         格式化站点搜索结果，注意隐私保护
 
@@ -605,225 +696,138 @@ class MovieDownloadTool(BaseTool):
             keyword: 搜索关键词
             site_id: 站点ID
             limit: 最大返回结果数量
+            compact: 是否使用紧凑表格格式，每个资源一行
+            max_chars: 输出预算（字符数）
 
         返回:
             格式化后的文本
         """
-        # 从第一个资源中获取站点名称（如果有的话）
-        site_name = None
-        if resources and len(resources) > 0:
-            first_resource = resources[0]
-            if isinstance(first_resource, dict):
-                site_name = first_resource.get("site_name")
-
-        # 如果没有从API响应获取到站点名称，则尝试从缓存获取
+        rows = []
+        for resource in resources or []:
+            if not isinstance(resource, dict):
+                logger.warning(f"资源数据不是字典类型: {type(resource)}")
+                continue
+            rows.append(self._site_result_row(resource))
+
+        # 优先使用API响应中的站点名称，没有时从缓存获取
+        site_name = rows[0]["resource"].get("site_name") if rows else None
         if not site_name:
             site_name = resource_cache.get_site_name(site_id)
+        site_display = f"{site_name}({site_id})" if site_name and site_name != site_id else site_id
 
-        # 构建站点显示名称
-        if site_name and site_name != site_id:
-            site_display = f"{site_name}({site_id})"
-        else:
-            site_display = site_id
-
-        if not resources:
+        if not rows:
             return f"在站点 {site_display} 未找到符合条件的资源：{keyword}"
 
-        # 限制结果数量
-        if limit > 0 and len(resources) > limit:
-            resources = resources[:limit]
-            result_text = f"在站点 {site_display} 找到 {len(resources)} 个资源（已限制显示前 {limit} 个）：\n\n"
-        else:
-            result_text = f"在站点 {site_display} 找到 {len(resources)} 个资源：\n\n"
+        rows = sort_rows(rows)
 
-        for i, resource in enumerate(resources):
-            if not isinstance(resource, dict):
-                logger.warning(f"资源数据不是字典类型: {type(resource)}")
-                continue
+        def header(total: int, emitted: int) -> str:
+            if emitted < total:
+                return f"在站点 {site_display} 找到 {total} 个资源（显示前 {emitted} 个）：\n\n"
+            return f"在站点 {site_display} 找到 {total} 个资源：\n\n"
 
-            # 提取基本信息
-            title = resource.get("title", "未知标题")
-            description = resource.get("description", "")
-
-            # 处理大小显示
-            size_bytes = resource.get("size", 0)
-            if isinstance(size_bytes, (int, float)) and size_bytes > 0:
-                if size_bytes < 1024:
-                    size = f"{size_bytes} B"
-                elif size_bytes < 1024 * 1024:
-                    size = f"{size_bytes/1024:.2f} KB"
-                elif size_bytes < 1024 * 1024 * 1024:
-                    size = f"{size_bytes/(1024*1024):.2f} MB"
-                else:
-                    size = f"{size_bytes/(1024*1024*1024):.2f} GB"
-            else:
-                size = "未知大小"
-
-            # 提取分辨率（从标题中解析）
-            resolution = "未知分辨率"
-            if title:
-                import re
-                res_pattern = (
-                    r'(4K|1080[pi]|720[pi]|2160[pi]|UHD|'
-                    r'MINIBD1080P|BD1080P|HD1080P|BD720P|HD720P)'
-                )
-                res_match = re.search(res_pattern, title, re.IGNORECASE)
-                if res_match:
-                    resolution = res_match.group(1)
-
-            # 种子统计信息
-            seeders = resource.get("seeders", 0)
-            peers = resource.get("peers", 0)
-            grabs = resource.get("grabs", 0)
-
-            # 免费信息
-            freedate = resource.get("freedate", "")
-            freedate_diff = resource.get("freedate_diff", "")
-            volume_factor = resource.get("volume_factor", "")
-            upload_factor = resource.get("uploadvolumefactor", 1.0)
-            download_factor = resource.get("downloadvolumefactor", 1.0)
-
-            # 质量标签
-            labels = resource.get("labels", [])
-            labels_str = "、".join(labels) if labels else "无标签"
-
-            # H&R状态
-            hit_and_run = resource.get("hit_and_run", False)
-
-            # IMDB ID
-            imdbid = resource.get("imdbid", "")
-
-            # 页面链接
-            page_url = resource.get("page_url", "")
-
-            # 提取视频编码（从标题和描述中解析）
-            video_encode = "未知编码"
-            video_keywords = ["H264", "H.264", "x264", "H265", "H.265", "x265", "HEVC", "AVC", "VP9", "AV1"]
-            for keyword in video_keywords:
-                if keyword.lower() in title.lower() or (description and keyword.lower() in description.lower()):
-                    video_encode = keyword
-                    break
-
-            # 提取音频编码（从标题和描述中解析）
-            audio_encode = "未知音频"
-            audio_keywords = ["DTS", "DTS-HD", "DTS-X", "Dolby", "AC3", "AAC", "FLAC", "TrueHD", "Atmos", "DTS-HD MA"]
-            for keyword in audio_keywords:
-                if keyword.lower() in title.lower() or (description and keyword.lower() in description.lower()):
-                    audio_encode = keyword
-                    break
-
-            # 提取资源类型（从标题和描述中解析）
-            resource_type = "未知来源"
-            type_keywords = ["BluRay", "Blu-ray", "WEB-DL", "WEBRip", "HDTV", "DVDRip", "BDRip", "Remux", "UHD"]
-            for keyword in type_keywords:
-                if keyword.lower() in title.lower() or (description and keyword.lower() in description.lower()):
-                    resource_type = keyword
-                    break
-
-            # 提取制作组/字幕组（从标题中解析@后面的内容）
-            resource_team = ""
-            if "@" in title:
-                import re
-                team_match = re.search(r'@([^@\s]+)', title)
-                if team_match:
-                    resource_team = team_match.group(1)
-
-            # 提取字幕信息
-            subtitle_info = "无字幕信息"
-            if description:
-                subtitle_keywords = [
-                    "中字", "中文字幕", "简体", "繁体",
-                    "双语", "特效字幕", "SUP", "SRT", "ASS"
-                ]
-                subtitle_matches = []
-                for keyword in subtitle_keywords:
-                    if keyword in description:
-                        subtitle_matches.append(keyword)
-
-                if subtitle_matches:
-                    subtitle_info = "、".join(subtitle_matches)
-
-            # 提取音轨信息
-            audio_info = "未知音轨"
-            if description:
-                audio_keywords = ["国语", "粤语", "英语", "双语", "多语", "国英双语", "中英双语"]
-                audio_matches = []
-                for keyword in audio_keywords:
-                    if keyword in description:
-                        audio_matches.append(keyword)
-
-                if audio_matches:
-                    audio_info = "、".join(audio_matches)
-
-            # 格式化资源信息
-            result_text += f"{i+1}. {title}\n"
-            result_text += f"   大小: {size} | 分辨率: {resolution}\n"
-            result_text += f"   做种: {seeders} | 下载: {peers} | 完成: {grabs}\n"
-
-            # 添加描述信息
-            if description:
-                # 截取描述的前100个字符
-                desc_preview = description[:100] + "..." if len(description) > 100 else description
-                result_text += f"   描述: {desc_preview}\n"
-
-            # 添加详细的编码和格式信息
-            result_text += f"   视频编码: {video_encode} | 音频编码: {audio_encode}\n"
-            result_text += f"   资源类型: {resource_type}"
-            if resource_team:
-                result_text += f" | 制作组: {resource_team}"
-            result_text += "\n"
-            result_text += f"   字幕: {subtitle_info} | 音轨: {audio_info}\n"
-
-            if labels_str != "无标签":
-                result_text += f"   质量标签: {labels_str}\n"
-
-            # 免费信息和流量优惠
-            free_info = []
-            if freedate:
-                free_info.append(f"免费至: {freedate}")
-            if freedate_diff:
-                free_info.append(f"剩余: {freedate_diff}")
-            if volume_factor:
-                free_info.append(f"流量: {volume_factor}")
-            elif download_factor != 1.0 or upload_factor != 1.0:
-                # 如果没有volume_factor但有具体的上传下载系数，显示详细信息
-                factor_info = []
-                if download_factor != 1.0:
-                    factor_info.append(f"下载: {download_factor}x")
-                if upload_factor != 1.0:
-                    factor_info.append(f"上传: {upload_factor}x")
-                if factor_info:
-                    free_info.append(f"系数: {' '.join(factor_info)}")
-
-            if free_info:
-                result_text += f"   优惠: {' | '.join(free_info)}\n"
-
-            if hit_and_run:
-                result_text += "   H&R: 是\n"
-
-            if imdbid:
-                result_text += f"   IMDB: {imdbid}\n"
-
-            if page_url:
-                result_text += f"   详情页: {page_url}\n"
-
-            # 生成资源标识符并缓存（注意：不暴露enclosure中的敏感信息）
-            # 创建一个安全的资源信息副本，移除敏感字段
-            safe_resource = resource.copy()
-            # 移除包含passkey的下载链接
-            safe_resource.pop("enclosure", None)
-            # 移除其他可能包含敏感信息的字段
-            safe_resource.pop("site_cookie", None)
-            safe_resource.pop("site_ua", None)
-            safe_resource.pop("site_proxy", None)
-
-            resource_id = resource_cache.generate_resource_id(safe_resource)
-            # 存储完整的资源信息（包含敏感信息）用于后续下载
-            resource_cache.store_resource(resource_id, resource)
-
-            result_text += f"   资源标识符: {resource_id}\n\n"
-
-        return result_text
+        if compact:
+            return render_results(
+                rows, self._render_site_row_compact, header, limit, max_chars,
+                legend="序号. 标题 | 大小 | 分辨率 | 做种/下载/完成 | 优惠 | 资源标识符\n"
+            )
+        return render_results(rows, self._render_site_row, header, limit, max_chars)
+
+    @staticmethod
+    def _site_result_row(resource: dict) -> dict:
+        """从站点资源中提取格式化所需字段"""
+        # 生成资源标识符时不使用包含passkey等敏感信息的字段，缓存中保存完整信息用于后续下载
+        safe_resource = {
+            key: value for key, value in resource.items()
+            if key not in ("enclosure", "site_cookie", "site_ua", "site_proxy")
+        }
+        title = resource.get("title", "未知标题")
+        return {
+            "title": title,
+            "size": format_size(resource.get("size", 0)) if resource.get("size") else "未知大小",
+            "resolution": extract_resolution(title),
+            "seeders": resource.get("seeders", 0),
+            "peers": resource.get("peers", 0),
+            "grabs": resource.get("grabs", 0),
+            "resource": resource,
+            "resource_id": resource_cache.generate_resource_id(safe_resource),
+            "cache_info": resource,
+        }
+
+    @staticmethod
+    def _site_free_info(resource: dict) -> list:
+        """免费信息和流量优惠"""
+        free_info = []
+        if resource.get("freedate"):
+            free_info.append(f"免费至: {resource['freedate']}")
+        if resource.get("freedate_diff"):
+            free_info.append(f"剩余: {resource['freedate_diff']}")
+        volume_factor = resource.get("volume_factor", "")
+        upload_factor = resource.get("uploadvolumefactor", 1.0)
+        download_factor = resource.get("downloadvolumefactor", 1.0)
+        if volume_factor:
+            free_info.append(f"流量: {volume_factor}")
+        elif download_factor != 1.0 or upload_factor != 1.0:
+            # 如果没有volume_factor但有具体的上传下载系数，显示详细信息
+            factor_info = []
+            if download_factor != 1.0:
+                factor_info.append(f"下载: {download_factor}x")
+            if upload_factor != 1.0:
+                factor_info.append(f"上传: {upload_factor}x")
+            free_info.append(f"系数: {' '.join(factor_info)}")
+        return free_info
+
+    def _render_site_row(self, index: int, row: dict) -> str:
+        resource = row["resource"]
+        title = row["title"]
+        description = resource.get("description", "")
+
+        # 提取制作组/字幕组（从标题中解析@后面的内容）
+        team_match = TEAM_PATTERN.search(title) if "@" in title else None
+        subtitles = collect_keywords(description, SUBTITLE_KEYWORDS)
+        audios = collect_keywords(description, AUDIO_TRACK_KEYWORDS)
+
+        parts = [
+            f"{index}. {title}\n",
+            f"   大小: {row['size']} | 分辨率: {row['resolution'] or '未知分辨率'}\n",
+            f"   做种: {row['seeders']} | 下载: {row['peers']} | 完成: {row['grabs']}\n",
+        ]
+        if description:
+            # 截取描述的前100个字符
+            desc_preview = description[:100] + "..." if len(description) > 100 else description
+            parts.append(f"   描述: {desc_preview}\n")
+
+        parts.append(
+            f"   视频编码: {first_keyword(title, description, VIDEO_ENCODE_KEYWORDS, '未知编码')} | "
+            f"音频编码: {first_keyword(title, description, AUDIO_ENCODE_KEYWORDS, '未知音频')}\n"
+        )
+        parts.append(f"   资源类型: {first_keyword(title, description, SOURCE_TYPE_KEYWORDS, '未知来源')}")
+        parts.append(f" | 制作组: {team_match.group(1)}\n" if team_match else "\n")
+        parts.append(f"   字幕: {'、'.join(subtitles) or '无字幕信息'} | 音轨: {'、'.join(audios) or '未知音轨'}\n")
+
+        labels = resource.get("labels", [])
+        if labels:
+            parts.append(f"   质量标签: {'、'.join(labels)}\n")
+        free_info = self._site_free_info(resource)
+        if free_info:
+            parts.append(f"   优惠: {' | '.join(free_info)}\n")
+        if resource.get("hit_and_run", False):
+            parts.append("   H&R: 是\n")
+        if resource.get("imdbid"):
+            parts.append(f"   IMDB: {resource['imdbid']}\n")
+        if resource.get("page_url"):
+            parts.append(f"   详情页: {resource['page_url']}\n")
+        parts.append(f"   资源标识符: {row['resource_id']}\n\n")
+        return "".join(parts)
+
+    def _render_site_row_compact(self, index: int, row: dict) -> str:
+        resource = row["resource"]
+        promotion = str(resource.get("volume_factor") or "-")
+        if resource.get("hit_and_run", False):
+            promotion += " H&R"
+        return (
+            f"{index}. {row['title']} | {row['size']} | {row['resolution'] or '-'} | "
+            f"{row['seeders']}/{row['peers']}/{row['grabs']} | {promotion} | {row['resource_id']}\n"
+        )
 
     async def _fuzzy_search_media_resources(self, arguments: dict) -> list[types.TextContent]:
         """
@@ -831,9 +835,10 @@ class MovieDownloadTool(BaseTool):
         参数:
             - keyword: 电影名称关键词
             - page: 页码(可选)，默认为0
-            - sites: 站点ID列表(可选)，多个站点ID用逗号分隔
+            - sites: 站点ID列表(可选)，多个站点ID用逗号分隔，不提供时搜索MoviePilot设置的索引站点
             - detailed: 是否显示详细信息(可选)，默认为False
             - limit: 最大返回结果数量(可选)，默认为50
+            - site_timeout: 单个站点的搜索超时时间(可选)，默认为60秒
         """
         keyword = arguments.get("keyword")
         if not keyword:
@@ -846,65 +851,35 @@ class MovieDownloadTool(BaseTool):
 
         # 获取其他可选参数
         page = arguments.get("page", 0)
-        sites = arguments.get("sites")
         detailed = arguments.get("detailed", False)
-
-        # 强制要求提供sites参数
-        if not sites:
-            return [
-                types.TextContent(
-                    type="text",
-                    text="错误：请提供sites参数，指定1-3个站点ID进行搜索，避免token超限。可通过get-sites工具获取站点列表。"
-                )
-            ]
-
-        limit = int(arguments.get("limit", 50))  # 默认限制为10个结果
+        limit = int(arguments.get("limit", 50))
 
         try:
             logger.info(f"开始模糊搜索资源，关键词：{keyword}")
 
-            # 构建请求参数
-            params = {
-                "keyword": keyword,
-                "page": page
-            }
-
-            if sites:
-                params["sites"] = sites
+            site_ids = await self._resolve_site_ids(arguments.get("sites"))
 
-            # 调用模糊搜索API
-            response = await self._make_request(
-                method="GET",
+            # 按站点并发调用模糊搜索API
+            torrents, summary = await self._fan_out_search(
                 endpoint="/api/v1/search/title",
-                params=params
-            )
-
-            # 检查是否有错误
-            is_error_response = (
-                isinstance(response, dict) and
-                not response.get("success", False)
+                params={
+                    "keyword": keyword,
+                    "page": page
+                },
+                site_ids=site_ids,
+                site_timeout=self._site_timeout(arguments),
             )
 
-            if is_error_response:
-                error_msg = response.get("message", "未知错误")
-                return [
-                    types.TextContent(
-                        type="text",
-                        text=f"模糊搜索资源失败: {error_msg}"
-                    )
-                ]
-
-            # 获取搜索结果
-            torrents = response.get("data", [])
-
             # 使用公共方法格式化结果
             result_text = self._format_search_results(
-                torrents, keyword, detailed=detailed, limit=limit)
+                torrents, keyword, detailed=detailed, limit=limit,
+                compact=arguments.get("compact", False),
+                max_chars=self._max_chars(arguments))
 
             return [
                 types.TextContent(
                     type="text",
-                    text=result_text
+                    text=summary + result_text
                 )
             ]
 
@@ -966,10 +941,9 @@ class MovieDownloadTool(BaseTool):
         return [
             types.Tool(
                 name="search-media-resources",
-                description="通过keyword参数或mediaid参数搜索媒体资源，支持按名称、年份、清晰度等条件搜索，返回资源标识符。",
+                description="通过keyword参数或mediaid参数搜索媒体资源，支持按名称、年份、清晰度等条件搜索，多个站点并发搜索并合并去重，返回资源标识符。",
                 inputSchema={
                     "type": "object",
-                    "required": ["sites"],
                     "properties": {
                         "keyword": {
                             "type": "string",
@@ -992,21 +966,33 @@ class MovieDownloadTool(BaseTool):
                         },
                         "sites": {
                             "type": "string",
-                            "description": "站点ID列表，多个站点ID用逗号分隔，是数字ID不是站点名称，若没有站点ID可以通过工具get-sites获取"
+                            "description": "站点ID列表，多个站点ID用逗号分隔，是数字ID不是站点名称，若没有站点ID可以通过工具get-sites获取；不提供时搜索MoviePilot设置的索引站点"
+                        },
+                        "site_timeout": {
+                            "type": "integer",
+                            "description": "单个站点的搜索超时时间（秒），默认为60，超时的站点不影响其他站点的结果"
                         },
                         "limit": {
                             "type": "integer",
                             "description": "最大返回结果数量，默认为50，设置为较小的值可以减少返回的资源数量"
+                        },
+                        "compact": {
+                            "type": "boolean",
+                            "description": "紧凑表格格式，每个资源一行，输出更短，默认为false"
+                        },
+                        "max_chars": {
+                            "type": "integer",
+                            "description": "输出长度上限（字符数），默认为12000，超出部分的资源不显示"
                         }
                     },
                 },
             ),
             types.Tool(
                 name="fuzzy-search-media-resources",
-                description="模糊搜索媒体资源，当精确搜索无法识别媒体信息时使用此工具，返回资源标识符。",
+                description="模糊搜索媒体资源，当精确搜索无法识别媒体信息时使用此工具，多个站点并发搜索并合并去重，返回资源标识符。",
                 inputSchema={
                     "type": "object",
-                    "required": ["keyword", "sites"],
+                    "required": ["keyword"],
                     "properties": {
                         "keyword": {
                             "type": "string",
@@ -1016,7 +1002,11 @@ class MovieDownloadTool(BaseTool):
                         },
                         "sites": {
                             "type": "string",
-                            "description": "站点数字ID列表，多个站点ID用逗号分隔，可通过工具get-sites获取"
+                            "description": "站点数字ID列表，多个站点ID用逗号分隔，可通过工具get-sites获取；不提供时搜索MoviePilot设置的索引站点"
+                        },
+                        "site_timeout": {
+                            "type": "integer",
+                            "description": "单个站点的搜索超时时间（秒），默认为60"
                         },
                         "detailed": {
                             "type": "boolean",
@@ -1024,6 +1014,14 @@ class MovieDownloadTool(BaseTool):
                         },
                         "limit": {
                             "type": "integer",
+                        },
+                        "compact": {
+                            "type": "boolean",
+                            "description": "紧凑表格格式，每个资源一行，输出更短，默认为false"
+                        },
+                        "max_chars": {
+                            "type": "integer",
+                            "description": "输出长度上限（字符数），默认为12000，超出部分的资源不显示"
                         }
                     },
                 },
@@ -1050,6 +1048,14 @@ class MovieDownloadTool(BaseTool):
                         "limit": {
                             "type": "integer",
                             "description": "最大返回结果数量，默认为50"
+                        },
+                        "compact": {
+                            "type": "boolean",
+                            "description": "紧凑表格格式，每个资源一行，输出更短，默认为false"
+                        },
+                        "max_chars": {
+                            "type": "integer",
+                            "description": "输出长度上限（字符数），默认为12000，超出部分的资源不显示"
                         }
                     },
                 },
@@ -1,13 +1,19 @@
+import asyncio
 import logging
 import anyio
 import datetime
 import mcp.types as types
 from ..base import BaseTool
+from ..credits_cache import credits_cache
+from ..recognition_cache import recognition_cache, MISSING
 
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# 按年份筛选人物作品时同时请求的分页数
+CREDITS_PAGE_CONCURRENCY = 4
+
 
 class MediaRecognizeTool(BaseTool):
     """媒体识别工具，用于识别电影、电视剧等媒体信息"""
@@ -134,7 +140,7 @@ class MediaRecognizeTool(BaseTool):
 
     async def recognize_media(self, title, year=None, media_type=None):
         """
-        识别媒体信息
+        识别媒体信息，结果按规范化的标题、年份、类型缓存
 
         参数:
             title: 媒体标题
@@ -144,6 +150,25 @@ class MediaRecognizeTool(BaseTool):
         返回:
             媒体信息字典，如果识别失败则返回None
         """
+        key = recognition_cache.make_key(title, year, media_type)
+        cached = recognition_cache.get(key)
+        if cached is not MISSING:
+            logger.debug(f"识别结果缓存命中: {title} {year or ''}")
+            return cached
+
+        media_info, definitive = await self._recognize_media_uncached(title, year, media_type)
+        # 请求出错导致的失败不缓存，只缓存服务端明确无法识别的结果
+        if media_info is not None or definitive:
+            recognition_cache.put(key, media_info)
+        return media_info
+
+    async def _recognize_media_uncached(self, title, year=None, media_type=None):
+        """
+        调用识别API
+
+        返回:
+            (媒体信息或None, 结果是否确定)，请求出错时结果不确定
+        """
         params = {"title": title}
         if year:
             params["year"] = year
@@ -179,16 +204,16 @@ class MediaRecognizeTool(BaseTool):
                                 await anyio.sleep(retry_delay)
                                 retry_delay *= 2  # 指数退避
                                 continue
-                            return None
+                            return None, False
 
                         # 成功获取媒体信息
                         if "media_info" in response:
                             logger.info(f"成功识别媒体: {title}")
-                            return response["media_info"]
+                            return response["media_info"] or None, True
 
-                    # 响应格式不正确
+                    # 响应格式不正确（无法识别时MoviePilot不返回media_info）
                     logger.warning(f"媒体识别响应格式不正确: {response}")
-                    return None
+                    return None, True
 
                 except Exception as e:
                     logger.error(f"识别媒体时发生异常: {str(e)}")
@@ -202,13 +227,13 @@ class MediaRecognizeTool(BaseTool):
                         retry_delay *= 2  # 指数退避
                     else:
                         logger.error(f"识别媒体失败，已达到最大重试次数: {title}")
-                        return None
+                        return None, False
 
-            return None
+            return None, False
 
         except Exception as e:
             logger.error(f"识别媒体过程中发生错误: {str(e)}")
-            return None
+            return None, False
 
     async def _search_media_tool(self, arguments: dict) -> list[types.TextContent]:
         """
@@ -516,32 +541,7 @@ class MediaRecognizeTool(BaseTool):
             if year:
                 logger.info(f"查询人物参演作品(所有页): person_id={person_id}, year={year}")
 
-                # 存储所有页面的结果
-                all_results = []
-                current_page = 1
-
-                # 循环获取所有页面的结果，直到返回空列表
-                while True:
-                    # 构建请求参数
-                    params = {"page": current_page}
-
-                    # 调用API获取人物参演作品
-                    response = await self._make_request(
-                        method="GET",
-                        endpoint=f"/api/v1/tmdb/person/credits/{person_id}",
-                        params=params
-                    )
-
-                    # 检查响应
-                    if not response or not isinstance(response, list) or len(response) == 0:
-                        # 没有更多结果，退出循环
-                        break
-
-                    # 将当前页面的结果添加到总结果中
-                    all_results.extend(response)
-
-                    # 增加页码，继续获取下一页
-                    current_page += 1
+                all_results = await self._fetch_person_credits_for_year(person_id, year)
 
                 # 如果没有找到任何结果
                 if not all_results:
@@ -565,15 +565,8 @@ class MediaRecognizeTool(BaseTool):
                 # 如果没有指定年份，使用常规分页方式
                 logger.info(f"查询人物参演作品: person_id={person_id}, page={page}")
 
-                # 构建请求参数
-                params = {"page": page}
-
-                # 调用API获取人物参演作品
-                response = await self._make_request(
-                    method="GET",
-                    endpoint=f"/api/v1/tmdb/person/credits/{person_id}",
-                    params=params
-                )
+                # 调用API获取人物参演作品（优先使用分页缓存）
+                response = await self._get_credits_page(person_id, page)
 
                 # 检查响应
                 if not response:
@@ -621,6 +614,110 @@ class MediaRecognizeTool(BaseTool):
                 )
             ]
 
+    async def _get_credits_page(self, person_id: int, page: int, semaphore: asyncio.Semaphore = None):
+        """
+        获取人物参演作品的一页，优先使用分页缓存
+
+        返回:
+            作品列表；请求失败时返回原始响应（None或错误信息）
+        """
+        cached = credits_cache.get_page(person_id, page)
+        if cached is not None:
+            return cached
+
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(1)
+        async with semaphore:
+            # 分页由credits_cache缓存，不再经过响应缓存
+            response = await self._make_request(
+                method="GET",
+                endpoint=f"/api/v1/tmdb/person/credits/{person_id}",
+                params={"page": page},
+                use_cache=False
+            )
+        if isinstance(response, list):
+            credits_cache.store_page(person_id, page, response)
+        return response
+
+    @staticmethod
+    def _credit_year(item: dict):
+        """返回作品年份（整数），没有日期时返回None"""
+        value = item.get("year") or item.get("release_date") or item.get("first_air_date") or ""
+        try:
+            return int(str(value)[:4])
+        except ValueError:
+            return None
+
+    async def _fetch_person_credits_for_year(self, person_id: int, year: int) -> list:
+        """
+        获取筛选年份所需的全部作品分页
+
+        接口不返回总页数：先取第一页确定每页数量，再按窗口并发请求后续分页，
+        遇到空页或不满一页时结束。MoviePilot按上映日期倒序返回作品，
+        只要已获取的作品保持倒序，某页末尾的作品早于筛选年份后就不再请求后续分页。
+
+        参数:
+            person_id: 人物ID
+            year: 筛选的年份
+
+        返回:
+            已获取的全部作品列表
+        """
+        first_page = await self._get_credits_page(person_id, 1)
+        if not first_page or not isinstance(first_page, list):
+            return []
+
+        all_results = []
+        page_size = len(first_page)
+        date_ordered = True
+        previous_year = None
+        semaphore = asyncio.Semaphore(CREDITS_PAGE_CONCURRENCY)
+
+        def consume(page: int, credits_list) -> bool:
+            """合并一页作品，返回是否需要继续请求后续分页"""
+            nonlocal date_ordered, previous_year
+            if not credits_list or not isinstance(credits_list, list):
+                return False
+            all_results.extend(credits_list)
+            for item in credits_list:
+                item_year = self._credit_year(item)
+                if item_year is None:
+                    continue
+                if previous_year is not None and item_year > previous_year:
+                    date_ordered = False
+                previous_year = item_year
+            if len(credits_list) < page_size:
+                credits_cache.mark_last_page(person_id, page)
+                return False
+            if date_ordered and previous_year is not None and previous_year < year:
+                logger.debug("人物 %s 第%s页已早于%s年，停止获取后续分页", person_id, page, year)
+                return False
+            return True
+
+        next_page = 2
+        keep_going = consume(1, first_page)
+        while keep_going:
+            last_page = credits_cache.get_last_page(person_id)
+            window_end = next_page + CREDITS_PAGE_CONCURRENCY - 1
+            if last_page is not None:
+                window_end = min(window_end, last_page)
+            if window_end < next_page:
+                break
+
+            pages = list(range(next_page, window_end + 1))
+            responses = await asyncio.gather(
+                *(self._get_credits_page(person_id, page, semaphore) for page in pages)
+            )
+            # 按页码顺序合并，遇到结束条件时丢弃窗口内后续分页
+            for page, response in zip(pages, responses):
+                keep_going = consume(page, response)
+                if not keep_going:
+                    break
+            next_page = window_end + 1
+
+        logger.info(f"人物 {person_id} 共获取 {len(all_results)} 个参演作品")
+        return all_results
+
     def _format_person_credits(self, credits_list: list, person_id: int, page: int = 1, year: int = None) -> str:
         """
         格式化人物参演作品信息
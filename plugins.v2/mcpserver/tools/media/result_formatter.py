@@ -0,0 +1,161 @@
+"""
+搜索结果格式化
+合并多站点结果，先排序过滤，再在输出预算内逐条生成文本，只为实际输出的资源注册资源标识符
+"""
+import re
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ..resource_cache import resource_cache
+
+# 默认输出预算（字符数），避免一次返回的文本超出模型上下文
+DEFAULT_MAX_CHARS = 12000
+
+RESOLUTION_PATTERN = re.compile(
+    r'(4K|1080[pi]|720[pi]|2160[pi]|UHD|MINIBD1080P|BD1080P|HD1080P|BD720P|HD720P)',
+    re.IGNORECASE
+)
+
+# 同一清晰度的不同写法
+_RESOLUTION_ALIASES = {
+    "4k": "2160", "uhd": "2160", "2160p": "2160", "2160i": "2160",
+    "1080p": "1080", "1080i": "1080", "720p": "720", "720i": "720",
+}
+
+
+def format_size(size: Any) -> str:
+    """把字节数转换为可读大小，无法识别时原样返回"""
+    if isinstance(size, (int, float)) and size > 0:
+        if size < 1024:
+            return f"{size} B"
+        if size < 1024 * 1024:
+            return f"{size / 1024:.2f} KB"
+        if size < 1024 * 1024 * 1024:
+            return f"{size / (1024 * 1024):.2f} MB"
+        return f"{size / (1024 * 1024 * 1024):.2f} GB"
+    return str(size) if size else "未知大小"
+
+
+def extract_resolution(text: str) -> Optional[str]:
+    """从标题中提取分辨率"""
+    if not text:
+        return None
+    match = RESOLUTION_PATTERN.search(text)
+    return match.group(1) if match else None
+
+
+def _normalize_resolution(value: str) -> str:
+    value = value.lower()
+    for alias, normalized in _RESOLUTION_ALIASES.items():
+        if alias in value:
+            return normalized
+    return value
+
+
+def resolution_matches(resolution: Optional[str], wanted: Optional[str]) -> bool:
+    """判断资源分辨率是否符合期望，未指定期望时总是符合"""
+    if not wanted:
+        return True
+    if not resolution:
+        return False
+    return _normalize_resolution(resolution) == _normalize_resolution(wanted)
+
+
+def render_results(
+    rows: List[Dict[str, Any]],
+    render_row: Callable[[int, Dict[str, Any]], str],
+    header: Callable[[int, int], str],
+    limit: int = 50,
+    max_chars: int = DEFAULT_MAX_CHARS,
+    legend: str = "",
+) -> str:
+    """
+    在输出预算内生成结果文本
+
+    Args:
+        rows: 已排序过滤的行，每行需包含 resource_id 和 cache_info（写入资源缓存的数据）
+        render_row: (序号, 行) -> 该行文本
+        header: (总数, 输出数) -> 标题行
+        limit: 最多输出的行数，0表示不限制
+        max_chars: 输出预算（字符数），至少输出一行
+        legend: 标题后的说明（如紧凑格式的列说明）
+
+    Returns:
+        格式化后的文本
+    """
+    total = len(rows)
+    candidates = rows[:limit] if limit > 0 else rows
+
+    parts: List[str] = []
+    used = len(legend)
+    for index, row in enumerate(candidates, start=1):
+        block = render_row(index, row)
+        if parts and used + len(block) > max_chars:
+            break
+        parts.append(block)
+        used += len(block)
+        # 只为实际输出的资源注册标识符
+        resource_cache.store_resource(row["resource_id"], row["cache_info"])
+
+    emitted = len(parts)
+    footer = ""
+    if emitted < len(candidates):
+        footer = (f"\n还有 {len(candidates) - emitted} 个资源因输出长度限制未显示，"
+                  f"可使用compact=true紧凑格式或减小limit。\n")
+    return "".join([header(total, emitted), legend, *parts, footer])
+
+
+def sort_rows(rows: List[Dict[str, Any]], key: str = "seeders") -> List[Dict[str, Any]]:
+    """按指定数值字段降序排序（稳定排序，保持同值时的原顺序）"""
+    def sort_key(row: Dict[str, Any]) -> float:
+        value = row.get(key)
+        return value if isinstance(value, (int, float)) else 0
+    return sorted(rows, key=sort_key, reverse=True)
+
+
+def collect_keywords(text: str, keywords: Tuple[str, ...]) -> List[str]:
+    """返回文本中出现的关键字"""
+    return [keyword for keyword in keywords if keyword in text] if text else []
+
+
+def first_keyword(title: str, description: str, keywords: Tuple[str, ...], default: str) -> str:
+    """返回标题或描述中首个出现的关键字（忽略大小写）"""
+    haystack = f"{title}\n{description or ''}".lower()
+    for keyword in keywords:
+        if keyword.lower() in haystack:
+            return keyword
+    return default
+
+
+_TITLE_NOISE = re.compile(r'[\W_]+', re.UNICODE)
+
+
+def _seeders(torrent_info: Dict[str, Any]) -> float:
+    value = torrent_info.get("seeders")
+    return value if isinstance(value, (int, float)) else 0
+
+
+def merge_search_results(torrents: List[Any]) -> List[Dict[str, Any]]:
+    """
+    合并多个站点的搜索结果
+
+    同一种子在不同站点通常有相同的info hash，或相同的标题和大小；
+    重复的资源只保留做种数最多的一条。
+    """
+    merged: Dict[Any, Dict[str, Any]] = {}
+    for torrent in torrents:
+        if not isinstance(torrent, dict):
+            continue
+        torrent_info = torrent.get("torrent_info") or torrent
+        info_hash = torrent_info.get("info_hash") or torrent_info.get("hash")
+        title = _TITLE_NOISE.sub("", str(torrent_info.get("title") or "")).lower()
+        if info_hash:
+            key = ("hash", str(info_hash).lower())
+        elif title:
+            key = ("title", title, torrent_info.get("size"))
+        else:
+            key = ("url", torrent_info.get("enclosure") or torrent_info.get("page_url") or id(torrent))
+
+        existing = merged.get(key)
+        if existing is None or _seeders(torrent_info) > _seeders(existing.get("torrent_info") or existing):
+            merged[key] = torrent
+    return list(merged.values())
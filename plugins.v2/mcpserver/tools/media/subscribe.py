@@ -1,5 +1,10 @@
+import hashlib
 import json
 import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
 import mcp.types as types
 from ..base import BaseTool
 
@@ -7,6 +12,66 @@ from ..base import BaseTool
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# 订阅列表默认与最大每页数量
+DEFAULT_LIST_LIMIT = 20
+MAX_LIST_LIMIT = 200
+
+# 订阅状态说明
+SUBSCRIBE_STATES = {"N": "新建", "R": "订阅中", "P": "待定", "S": "暂停"}
+
+
+class SubscribeSnapshots:
+    """订阅列表快照，按etag保存最近几次列表内容，用于返回两次调用之间的变化"""
+
+    def __init__(self, max_snapshots: int = 16, ttl: float = 600):
+        """
+        Args:
+            max_snapshots: 最多保存的快照数
+            ttl: 快照保存时间（秒），过期后调用方会重新获得完整列表
+        """
+        self._max_snapshots = max_snapshots
+        self._ttl = ttl
+        # etag -> (过期时间, 过滤条件, {订阅ID: 订阅信息})
+        self._snapshots: "OrderedDict[str, Tuple[float, str, Dict[str, dict]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _filters_key(filters: dict) -> str:
+        return json.dumps(filters, sort_keys=True, ensure_ascii=False)
+
+    def store(self, filters: dict, subscribes: List[dict]) -> Tuple[str, Dict[str, dict]]:
+        """保存快照，返回 (etag, {订阅ID: 订阅信息})；内容相同时etag相同"""
+        filters_key = self._filters_key(filters)
+        current = {str(info.get("id")): info for info in subscribes}
+        digest = hashlib.md5(filters_key.encode("utf-8"))
+        digest.update(json.dumps(subscribes, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8"))
+        etag = digest.hexdigest()[:12]
+        with self._lock:
+            self._snapshots[etag] = (time.monotonic() + self._ttl, filters_key, current)
+            self._snapshots.move_to_end(etag)
+            while len(self._snapshots) > self._max_snapshots:
+                self._snapshots.popitem(last=False)
+        return etag, current
+
+    def get(self, etag: str, filters: dict) -> Optional[Dict[str, dict]]:
+        """返回etag对应的快照；已过期或过滤条件不同时返回None"""
+        with self._lock:
+            entry = self._snapshots.get(etag)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._snapshots[etag]
+                return None
+            if entry[1] != self._filters_key(filters):
+                return None
+            # 分页获取变化期间保留被比较的快照
+            self._snapshots.move_to_end(etag)
+            return entry[2]
+
+
+# 全局快照实例
+subscribe_snapshots = SubscribeSnapshots()
+
 
 class SubscribeTool(BaseTool):
     async def execute(
@@ -14,7 +79,7 @@ class SubscribeTool(BaseTool):
     ) -> list[types.TextContent]:
         """执行工具逻辑"""
         if tool_name == "list-subscribes":
-            return await self._list_subscribes()
+            return await self._list_subscribes(arguments)
         elif tool_name == "add-subscribe":
             return await self._add_subscribe(arguments)
         elif tool_name == "delete-subscribe":
@@ -33,8 +98,8 @@ class SubscribeTool(BaseTool):
                 )
             ]
 
-    async def _list_subscribes(self) -> list[types.TextContent]:
-        """获取所有订阅资源列表"""
+    async def _list_subscribes(self, arguments: dict) -> list[types.TextContent]:
+        """获取订阅资源列表，支持过滤、游标分页、紧凑格式和增量变化"""
         response = await self._make_request(
             method="GET",
             endpoint="/api/v1/subscribe/"
@@ -58,34 +123,180 @@ class SubscribeTool(BaseTool):
                 )
             ]
 
-        # 提取关键信息，使结果更易读
-        formatted_subscribes = []
-        for item in response:
-            sub_info = {
-                "id": item.get("id"),
-                "name": item.get("name"),
-                "year": item.get("year"),
-                "type": item.get("type"),
-                "tmdbid": item.get("tmdbid"),
-                "doubanid": item.get("doubanid"),
-                "season": item.get("season"),
-                "state": item.get("state"),
-                "vote": item.get("vote"),
-                "total_episode": item.get("total_episode"),
-                "lack_episode": item.get("lack_episode"),
-                "username": item.get("username"),
-                "date": item.get("date")
-            }
-            formatted_subscribes.append(json.dumps(
-                sub_info, ensure_ascii=False, indent=2))
+        compact = bool(arguments.get("compact", False))
+        try:
+            limit = max(1, min(int(arguments.get("limit", DEFAULT_LIST_LIMIT)), MAX_LIST_LIMIT))
+        except (TypeError, ValueError):
+            limit = DEFAULT_LIST_LIMIT
+
+        # 过滤并按ID排序，游标为上一页最后一个订阅的ID
+        filters = self._list_filters(arguments)
+        subscribes = sorted(
+            (self._subscribe_summary(item) for item in response
+             if isinstance(item, dict) and self._match_filters(item, filters)),
+            key=lambda info: self._id_key(info.get("id"))
+        )
+        # 与上次调用的快照比较，只返回变化
+        etag, current = subscribe_snapshots.store(filters, subscribes)
+        previous_etag = arguments.get("etag")
+        cursor = arguments.get("cursor")
+        if previous_etag:
+            if previous_etag == etag:
+                return [
+                    types.TextContent(
+                        type="text",
+                        text=f"订阅资源列表自上次调用以来没有变化（共{len(subscribes)}个）\netag: {etag}"
+                    )
+                ]
+            previous = subscribe_snapshots.get(previous_etag, filters)
+            if previous is not None:
+                return [
+                    types.TextContent(
+                        type="text",
+                        text=self._format_subscribe_diff(previous, current, etag, compact,
+                                                         previous_etag, cursor, limit)
+                    )
+                ]
+
+        if cursor:
+            cursor_key = self._id_key(cursor)
+            subscribes = [info for info in subscribes if self._id_key(info.get("id")) > cursor_key]
+        page = subscribes[:limit]
+        if not page:
+            text = f"游标 {cursor} 之后没有更多订阅资源" if cursor else "没有符合条件的订阅资源"
+            return [
+                types.TextContent(
+                    type="text",
+                    text=f"{text}\netag: {etag}"
+                )
+            ]
+
+        if compact:
+            lines = [self._format_subscribe_line(info) for info in page]
+            body = "ID | 名称(年份) | 类型/季 | 状态 | 缺失/总集数 | 用户\n" + "\n".join(lines)
+        else:
+            body = "\n".join(json.dumps(info, ensure_ascii=False, indent=2) for info in page)
+
+        footer = f"\n\n共 {len(current)} 个订阅，本页 {len(page)} 个"
+        if len(subscribes) > len(page):
+            footer += f"，下一页请使用 cursor={page[-1].get('id')}"
+        footer += f"\netag: {etag}（再次调用时传入etag可只获取变化）"
 
         return [
             types.TextContent(
                 type="text",
-                text="订阅资源列表:\n" + "\n".join(formatted_subscribes)
+                text="订阅资源列表:\n" + body + footer
             )
         ]
 
+    @staticmethod
+    def _id_key(value) -> tuple:
+        """订阅ID排序键，数字ID按数值排序"""
+        try:
+            return 0, int(value), ""
+        except (TypeError, ValueError):
+            return 1, 0, str(value)
+
+    @staticmethod
+    def _list_filters(arguments: dict) -> dict:
+        """提取列表过滤条件"""
+        filters = {}
+        for key in ("state", "type", "username"):
+            value = arguments.get(key)
+            if value:
+                filters[key] = str(value)
+        if arguments.get("lacking") is not None:
+            filters["lacking"] = bool(arguments.get("lacking"))
+        return filters
+
+    @staticmethod
+    def _match_filters(item: dict, filters: dict) -> bool:
+        """判断订阅是否符合过滤条件"""
+        for key in ("state", "type", "username"):
+            if key in filters and str(item.get(key) or "") != filters[key]:
+                return False
+        if "lacking" in filters:
+            try:
+                lacking = int(item.get("lack_episode") or 0) > 0
+            except (TypeError, ValueError):
+                lacking = False
+            if lacking != filters["lacking"]:
+                return False
+        return True
+
+    @staticmethod
+    def _subscribe_summary(item: dict) -> dict:
+        """提取订阅的关键信息，使结果更易读"""
+        return {
+            "id": item.get("id"),
+            "name": item.get("name"),
+            "year": item.get("year"),
+            "type": item.get("type"),
+            "tmdbid": item.get("tmdbid"),
+            "doubanid": item.get("doubanid"),
+            "season": item.get("season"),
+            "state": item.get("state"),
+            "vote": item.get("vote"),
+            "total_episode": item.get("total_episode"),
+            "lack_episode": item.get("lack_episode"),
+            "username": item.get("username"),
+            "date": item.get("date")
+        }
+
+    @staticmethod
+    def _format_subscribe_line(info: dict) -> str:
+        """紧凑格式：每个订阅一行"""
+        title = f"{info.get('name') or '未知'}({info.get('year') or '?'})"
+        media_type = info.get("type") or "?"
+        if info.get("season"):
+            media_type += f"/S{info.get('season')}"
+        state = SUBSCRIBE_STATES.get(info.get("state"), info.get("state") or "?")
+        episodes = f"{info.get('lack_episode') or 0}/{info.get('total_episode') or '?'}"
+        return f"{info.get('id')} | {title} | {media_type} | {state} | {episodes} | {info.get('username') or '-'}"
+
+    def _format_subscribe_diff(self, previous: dict, current: dict, etag: str, compact: bool,
+                               previous_etag: str, cursor=None, limit: int = DEFAULT_LIST_LIMIT) -> str:
+        """格式化两次调用之间的订阅变化，变化按订阅ID排序，同样按cursor和limit分页"""
+        changes = [("added", current[key]) for key in current if key not in previous]
+        changes += [("removed", previous[key]) for key in previous if key not in current]
+        changes += [("changed", current[key]) for key in current
+                    if key in previous and previous[key] != current[key]]
+        counts = {kind: sum(1 for change in changes if change[0] == kind)
+                  for kind in ("added", "removed", "changed")}
+        changes.sort(key=lambda change: self._id_key(change[1].get("id")))
+
+        if cursor:
+            cursor_key = self._id_key(cursor)
+            changes = [change for change in changes if self._id_key(change[1].get("id")) > cursor_key]
+        page = changes[:limit]
+
+        def render(info: dict) -> str:
+            if compact:
+                return self._format_subscribe_line(info)
+            return json.dumps(info, ensure_ascii=False)
+
+        text = (f"自上次调用以来有 {sum(counts.values())} 个订阅变化"
+                f"（新增{counts['added']}，移除{counts['removed']}，更新{counts['changed']}），"
+                f"当前共{len(current)}个订阅\n")
+        sections = (
+            ("added", "新增", render),
+            ("changed", "更新", render),
+            ("removed", "移除（已删除或不再符合过滤条件）",
+             lambda info: f"{info.get('id')} | {info.get('name') or '未知'}"),
+        )
+        for kind, title, render_change in sections:
+            infos = [info for change_kind, info in page if change_kind == kind]
+            if infos:
+                text += f"\n{title}:\n" + "\n".join(render_change(info) for info in infos) + "\n"
+
+        if len(changes) > len(page):
+            text += (f"\n本页 {len(page)} 个变化，还有 {len(changes) - len(page)} 个，"
+                     f"下一页请使用 etag={previous_etag} cursor={page[-1][1].get('id')}；"
+                     f"全部获取后使用新的etag")
+        elif cursor and not page:
+            text += f"\n游标 {cursor} 之后没有更多变化"
+        return text + f"\netag: {etag}"
+
     async def _add_subscribe(self, arguments: dict) -> list[types.TextContent]:
         """添加新的订阅"""
         # 提取必要参数
@@ -506,10 +717,49 @@ class SubscribeTool(BaseTool):
         return [
             types.Tool(
                 name="list-subscribes",
-                description="获取当前所有已订阅的资源列表",
+                description="获取已订阅的资源列表，支持按状态、类型、用户、是否缺集过滤和游标分页；"
+                            "传入上次返回的etag时只返回变化的订阅",
                 inputSchema={
                     "type": "object",
-                    "properties": {},
+                    "properties": {
+                        "state": {
+                            "type": "string",
+                            "description": "订阅状态：N-新建，R-订阅中，P-待定，S-暂停",
+                            "enum": list(SUBSCRIBE_STATES.keys())
+                        },
+                        "type": {
+                            "type": "string",
+                            "description": "媒体类型",
+                            "enum": ["电影", "电视剧"]
+                        },
+                        "username": {
+                            "type": "string",
+                            "description": "订阅用户"
+                        },
+                        "lacking": {
+                            "type": "boolean",
+                            "description": "true只返回仍有缺失集数的订阅，false只返回没有缺失的订阅"
+                        },
+                        "cursor": {
+                            "type": "string",
+                            "description": "分页游标，使用上一页返回的cursor值"
+                        },
+                        "limit": {
+                            "type": "integer",
+                            "description": f"每页数量，最多{MAX_LIST_LIMIT}",
+                            "default": DEFAULT_LIST_LIMIT
+                        },
+                        "compact": {
+                            "type": "boolean",
+                            "description": "是否使用紧凑格式（每个订阅一行）",
+                            "default": False
+                        },
+                        "etag": {
+                            "type": "string",
+                            "description": "上次调用返回的etag，列表未变化或可比较时只返回变化；"
+                                           "变化同样按cursor和limit分页"
+                        }
+                    },
                 },
             ),
             types.Tool(
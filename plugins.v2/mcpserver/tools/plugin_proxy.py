@@ -9,6 +9,7 @@ from typing import Dict, List, Any
 import mcp.types as types
 from .base import BaseTool
 from .plugin_registry import PluginToolInfo
+from utils import ArgumentValidationError, get_plugin_channel, PluginChannelUnavailable
 
 logger = logging.getLogger(__name__)
 
@@ -38,12 +39,13 @@ class PluginToolProxy(BaseTool):
             执行结果
         """
         try:
-            logger.debug(f"[PluginToolProxy] 开始执行插件工具")
-            logger.debug(f"[PluginToolProxy] 插件ID: {self.tool_info_data.plugin_id}")
-            logger.debug(f"[PluginToolProxy] 工具名称: {tool_name}")
-            logger.debug(f"[PluginToolProxy] 工具参数: {arguments}")
-            logger.debug(f"[PluginToolProxy] API端点: {self.tool_info_data.api_endpoint}")
-            logger.debug(f"[PluginToolProxy] 工具参数定义: {self.tool_info_data.parameters}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"[PluginToolProxy] 开始执行插件工具")
+                logger.debug(f"[PluginToolProxy] 插件ID: {self.tool_info_data.plugin_id}")
+                logger.debug(f"[PluginToolProxy] 工具名称: {tool_name}")
+                logger.debug(f"[PluginToolProxy] 工具参数: {arguments}")
+                logger.debug(f"[PluginToolProxy] API端点: {self.tool_info_data.api_endpoint}")
+                logger.debug(f"[PluginToolProxy] 工具参数定义: {self.tool_info_data.parameters}")
 
             logger.info(f"执行插件工具: {self.tool_info_data.plugin_id}.{tool_name}")
 
@@ -60,6 +62,7 @@ class PluginToolProxy(BaseTool):
                         text=f"参数验证失败: {validation_result['error']}"
                     )
                 ]
+            arguments = validation_result["arguments"]
 
             # 执行工具
             if self.tool_info_data.api_endpoint:
@@ -100,7 +103,14 @@ class PluginToolProxy(BaseTool):
             ]
     
     async def _execute_via_api(self, tool_name: str, arguments: dict) -> dict:
-        """通过API端点执行工具"""
+        """执行工具：优先使用插件调用通道，通道不可用时通过API端点调用"""
+        channel = get_plugin_channel()
+        if channel is not None:
+            try:
+                return await self._execute_via_channel(channel, tool_name, arguments)
+            except PluginChannelUnavailable as e:
+                logger.debug(f"[PluginToolProxy] {e}，改用API端点")
+
         try:
             logger.debug(f"[PluginToolProxy] 开始API调用")
 
@@ -162,59 +172,56 @@ class PluginToolProxy(BaseTool):
     
 
     
+    async def _execute_via_channel(self, channel, tool_name: str, arguments: dict) -> dict:
+        """通过插件调用通道执行工具，插件以迭代器返回时每个数据块同时作为进度通知推送给客户端"""
+
+        async def on_chunk(index: int, chunk: Any):
+            await self._report_progress(index, message=self._chunk_text(chunk))
+
+        try:
+            return await channel.call(
+                "tool",
+                self.tool_info_data.plugin_id,
+                {"tool_name": tool_name, "arguments": arguments},
+                timeout=self._timeout,
+                on_chunk=on_chunk,
+            )
+        except asyncio.TimeoutError:
+            logger.error(f"[PluginToolProxy] 插件调用通道超时: {tool_name}")
+            return {
+                "success": False,
+                "message": f"API调用超时({self._timeout}秒无响应)",
+                "data": None
+            }
+        except ConnectionError as e:
+            logger.error(f"[PluginToolProxy] 插件调用通道异常: {str(e)}")
+            return {
+                "success": False,
+                "message": f"API调用异常: {str(e)}",
+                "data": None
+            }
+
+    @staticmethod
+    def _chunk_text(chunk: Any) -> str:
+        """流式数据块转换为文本"""
+        if isinstance(chunk, str):
+            return chunk
+        return json.dumps(chunk, ensure_ascii=False, indent=2)
+
     def _validate_arguments(self, arguments: dict) -> Dict[str, Any]:
         """
-        验证工具参数
+        验证工具参数，使用注册时编译好的校验器
         
         Args:
             arguments: 工具参数
             
         Returns:
-            验证结果
+            验证结果，通过时 arguments 为补全默认值后的参数
         """
         try:
-            parameters = self.tool_info_data.parameters
-            
-            # 检查必需参数
-            required_params = parameters.get("required", [])
-            for param in required_params:
-                if param not in arguments:
-                    return {
-                        "valid": False,
-                        "error": f"缺少必需参数: {param}"
-                    }
-            
-            # 检查参数类型（简单验证）
-            properties = parameters.get("properties", {})
-            for param_name, param_value in arguments.items():
-                if param_name in properties:
-                    param_def = properties[param_name]
-                    expected_type = param_def.get("type")
-                    
-                    # 简单的类型检查
-                    if expected_type == "string" and not isinstance(param_value, str):
-                        return {
-                            "valid": False,
-                            "error": f"参数 {param_name} 应该是字符串类型"
-                        }
-                    elif expected_type == "integer" and not isinstance(param_value, int):
-                        return {
-                            "valid": False,
-                            "error": f"参数 {param_name} 应该是整数类型"
-                        }
-                    elif expected_type == "number" and not isinstance(param_value, (int, float)):
-                        return {
-                            "valid": False,
-                            "error": f"参数 {param_name} 应该是数字类型"
-                        }
-                    elif expected_type == "boolean" and not isinstance(param_value, bool):
-                        return {
-                            "valid": False,
-                            "error": f"参数 {param_name} 应该是布尔类型"
-                        }
-            
-            return {"valid": True}
-            
+            return {"valid": True, "arguments": self.tool_info_data.validate_arguments(arguments)}
+        except ArgumentValidationError as e:
+            return {"valid": False, "error": str(e)}
         except Exception as e:
             return {
                 "valid": False,
@@ -232,7 +239,13 @@ class PluginToolProxy(BaseTool):
             格式化后的结果
         """
         try:
-            if result.get("success"):
+            if result.get("success") and result.get("chunks") is not None:
+                # 流式输出的结果，每个数据块一条文本
+                return [
+                    types.TextContent(type="text", text=self._chunk_text(chunk))
+                    for chunk in result["chunks"]
+                ] or [types.TextContent(type="text", text=result.get("message", "执行成功"))]
+            elif result.get("success"):
                 # 成功结果
                 data = result.get("data")
                 message = result.get("message", "执行成功")
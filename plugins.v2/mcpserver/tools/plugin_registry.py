@@ -2,12 +2,20 @@
 插件工具注册管理器
 负责管理动态注册的MCP工具
 """
+import hashlib
+import json
 import logging
+import os
+import sys
 import threading
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 import mcp.types as types
 from datetime import datetime
 
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(parent_dir)
+from utils import compile_validator
+
 logger = logging.getLogger(__name__)
 
 
@@ -24,14 +32,19 @@ class PluginToolInfo:
         self.auth_level = tool_data.get("auth_level", 1)
         self.group = tool_data.get("group")
         self.registered_at = datetime.now()
+        self._mcp_tool = None
+        # 参数校验器在注册时编译，调用时直接使用
+        self.validate_arguments = compile_validator(self.parameters)
         
     def to_mcp_tool(self) -> types.Tool:
-        """转换为MCP工具定义"""
-        return types.Tool(
-            name=self.name,
-            description=self.description,
-            inputSchema=self.parameters
-        )
+        """转换为MCP工具定义（结果会被缓存）"""
+        if self._mcp_tool is None:
+            self._mcp_tool = types.Tool(
+                name=self.name,
+                description=self.description,
+                inputSchema=self.parameters
+            )
+        return self._mcp_tool
     
     def to_dict(self) -> dict:
         """转换为字典"""
@@ -54,8 +67,10 @@ class PluginToolRegistry:
     def __init__(self):
         self._registered_tools: Dict[str, PluginToolInfo] = {}  # 工具名 -> 工具信息
         self._plugin_tools: Dict[str, List[str]] = {}  # 插件ID -> 工具名列表
+        self._plugin_hashes: Dict[str, str] = {}  # 插件ID -> 工具定义内容哈希
         self._lock = threading.RLock()
         self._max_tools = 100  # 最大工具数量限制
+        self._version = 0  # 注册表版本号，每次变更递增
         
     def register_tools(self, plugin_id: str, tools: List[dict]) -> Dict[str, Any]:
         """
@@ -69,81 +84,162 @@ class PluginToolRegistry:
             注册结果
         """
         with self._lock:
-            try:
-                # 验证工具数量限制
-                if len(self._registered_tools) + len(tools) > self._max_tools:
-                    return {
-                        "success": False,
-                        "message": f"工具数量超过限制({self._max_tools})",
-                        "registered_count": 0
-                    }
-                
-                registered_tools = []
-                failed_tools = []
-                
-                for tool_data in tools:
-                    try:
-                        # 验证工具定义
-                        validation_result = self._validate_tool_definition(tool_data)
-                        if not validation_result["valid"]:
-                            failed_tools.append({
-                                "name": tool_data.get("name", "unknown"),
-                                "error": validation_result["error"]
-                            })
-                            continue
-                        
-                        tool_name = tool_data["name"]
-                        
-                        # 检查工具名是否已存在
-                        if tool_name in self._registered_tools:
-                            failed_tools.append({
-                                "name": tool_name,
-                                "error": f"工具名'{tool_name}'已存在"
-                            })
-                            continue
-                        
-                        # 创建工具信息
-                        tool_info = PluginToolInfo(plugin_id, tool_data)
-                        
-                        # 注册工具
-                        self._registered_tools[tool_name] = tool_info
-                        
-                        # 更新插件工具映射
-                        if plugin_id not in self._plugin_tools:
-                            self._plugin_tools[plugin_id] = []
-                        self._plugin_tools[plugin_id].append(tool_name)
-                        
-                        registered_tools.append(tool_name)
-                        logger.info(f"成功注册插件工具: {plugin_id}.{tool_name}")
-                        
-                    except Exception as e:
-                        failed_tools.append({
-                            "name": tool_data.get("name", "unknown"),
-                            "error": f"注册失败: {str(e)}"
-                        })
-                        logger.error(f"注册工具失败: {str(e)}")
-                
-                result = {
-                    "success": len(registered_tools) > 0,
-                    "message": f"成功注册{len(registered_tools)}个工具",
-                    "registered_count": len(registered_tools),
-                    "registered_tools": registered_tools
-                }
-                
-                if failed_tools:
-                    result["failed_tools"] = failed_tools
-                    result["message"] += f", {len(failed_tools)}个工具注册失败"
-                
-                return result
-                
-            except Exception as e:
-                logger.error(f"注册插件工具时发生异常: {str(e)}")
+            # 直接注册的工具不经过内容比对，下次同步时重新应用
+            self._plugin_hashes.pop(plugin_id, None)
+            self._version += 1
+            return self._register_into(
+                self._registered_tools, self._plugin_tools, plugin_id, tools
+            )
+
+    def _register_into(self,
+                       registered: Dict[str, PluginToolInfo],
+                       plugin_tools: Dict[str, List[str]],
+                       plugin_id: str,
+                       tools: List[dict]) -> Dict[str, Any]:
+        """把插件工具注册到给定的注册表字典中"""
+        try:
+            # 验证工具数量限制
+            if len(registered) + len(tools) > self._max_tools:
                 return {
                     "success": False,
-                    "message": f"注册失败: {str(e)}",
+                    "message": f"工具数量超过限制({self._max_tools})",
                     "registered_count": 0
                 }
-    
+
+            registered_tools = []
+            failed_tools = []
+
+            for tool_data in tools:
+                try:
+                    # 验证工具定义
+                    validation_result = self._validate_tool_definition(tool_data)
+                    if not validation_result["valid"]:
+                        failed_tools.append({
+                            "name": tool_data.get("name", "unknown"),
+                            "error": validation_result["error"]
+                        })
+                        continue
+
+                    tool_name = tool_data["name"]
+
+                    # 检查工具名是否已存在
+                    if tool_name in registered:
+                        failed_tools.append({
+                            "name": tool_name,
+                            "error": f"工具名'{tool_name}'已存在"
+                        })
+                        continue
+
+                    # 创建工具信息
+                    tool_info = PluginToolInfo(plugin_id, tool_data)
+
+                    # 注册工具
+                    registered[tool_name] = tool_info
+
+                    # 更新插件工具映射
+                    if plugin_id not in plugin_tools:
+                        plugin_tools[plugin_id] = []
+                    plugin_tools[plugin_id].append(tool_name)
+
+                    registered_tools.append(tool_name)
+                    logger.info(f"成功注册插件工具: {plugin_id}.{tool_name}")
+
+                except Exception as e:
+                    failed_tools.append({
+                        "name": tool_data.get("name", "unknown"),
+                        "error": f"注册失败: {str(e)}"
+                    })
+                    logger.error(f"注册工具失败: {str(e)}")
+
+            result = {
+                "success": len(registered_tools) > 0,
+                "message": f"成功注册{len(registered_tools)}个工具",
+                "registered_count": len(registered_tools),
+                "registered_tools": registered_tools
+            }
+
+            if failed_tools:
+                result["failed_tools"] = failed_tools
+                result["message"] += f", {len(failed_tools)}个工具注册失败"
+
+            return result
+
+        except Exception as e:
+            logger.error(f"注册插件工具时发生异常: {str(e)}")
+            return {
+                "success": False,
+                "message": f"注册失败: {str(e)}",
+                "registered_count": 0
+            }
+
+    def sync_plugins(self, plugins: Dict[str, List[dict]]) -> Dict[str, Any]:
+        """
+        按内容哈希将注册表同步为给定的插件工具集合
+
+        只有工具定义发生变化的插件会被重新注册，不在集合中的插件会被注销。
+        新的注册表在副本上构建，完成后一次性替换，读取方不会看到中间状态。
+
+        Args:
+            plugins: 插件ID -> 工具定义列表
+
+        Returns:
+            同步结果，包含新增、更新、注销和未变化的插件
+        """
+        new_hashes = {
+            plugin_id: _content_hash(tools)
+            for plugin_id, tools in plugins.items() if tools
+        }
+
+        with self._lock:
+            removed = [pid for pid in self._plugin_tools if pid not in new_hashes]
+            changed = [
+                pid for pid, digest in new_hashes.items()
+                if self._plugin_hashes.get(pid) != digest
+            ]
+            if not removed and not changed:
+                return {"success": True, "changed": False, "unchanged": len(new_hashes)}
+
+            registered = dict(self._registered_tools)
+            plugin_tools = {pid: list(names) for pid, names in self._plugin_tools.items()}
+            hashes = dict(self._plugin_hashes)
+
+            dropped = False
+            for plugin_id in removed + changed:
+                for tool_name in plugin_tools.pop(plugin_id, []):
+                    registered.pop(tool_name, None)
+                    dropped = True
+                hashes.pop(plugin_id, None)
+
+            results = {}
+            for plugin_id in changed:
+                results[plugin_id] = self._register_into(
+                    registered, plugin_tools, plugin_id, plugins[plugin_id]
+                )
+                # 注册失败的插件不记录哈希，下次同步时重试
+                if results[plugin_id].get("success"):
+                    hashes[plugin_id] = new_hashes[plugin_id]
+
+            # 只有重试仍然失败的插件时注册表没有变化，不递增版本号
+            if not removed and not dropped and not any(r.get("success") for r in results.values()):
+                return {"success": True, "changed": False, "updated": results,
+                        "unchanged": len(new_hashes) - len(changed)}
+
+            # 原子替换
+            self._registered_tools = registered
+            self._plugin_tools = plugin_tools
+            self._plugin_hashes = hashes
+            self._version += 1
+
+            logger.info(f"插件工具同步完成: 变更{len(changed)}个, 注销{len(removed)}个, "
+                        f"未变化{len(new_hashes) - len(changed)}个")
+            return {
+                "success": True,
+                "changed": True,
+                "updated": results,
+                "removed": removed,
+                "unchanged": len(new_hashes) - len(changed)
+            }
+
     def unregister_plugin_tools(self, plugin_id: str) -> Dict[str, Any]:
         """
         注销插件的所有工具
@@ -174,6 +270,8 @@ class PluginToolRegistry:
                 
                 # 清空插件工具映射
                 del self._plugin_tools[plugin_id]
+                self._plugin_hashes.pop(plugin_id, None)
+                self._version += 1
                 
                 return {
                     "success": True,
@@ -195,10 +293,20 @@ class PluginToolRegistry:
         with self._lock:
             return self._registered_tools.get(tool_name)
     
+    @property
+    def version(self) -> int:
+        """注册表版本号，工具增删时递增"""
+        return self._version
+
     def list_registered_tools(self) -> List[types.Tool]:
         """列出所有注册的工具"""
         with self._lock:
             return [tool_info.to_mcp_tool() for tool_info in self._registered_tools.values()]
+
+    def snapshot(self) -> Tuple[int, List[types.Tool]]:
+        """原子地返回当前版本号与工具列表"""
+        with self._lock:
+            return self._version, self.list_registered_tools()
     
     def get_plugin_tools(self, plugin_id: str) -> List[str]:
         """获取插件注册的工具列表"""
@@ -304,3 +412,9 @@ class PluginToolRegistry:
         with self._lock:
             self._max_tools = max_tools
             logger.info(f"设置最大工具数量限制: {max_tools}")
+
+
+def _content_hash(definitions: List[dict]) -> str:
+    """计算定义列表的内容哈希"""
+    payload = json.dumps(definitions, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
@@ -0,0 +1,54 @@
+import unicodedata
+from typing import Any, Dict, Optional, Tuple
+import logging
+
+from .ttl_cache import MISSING, TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+class RecognitionCache:
+    """媒体识别结果缓存，进程内所有工具实例和传输方式共享
+
+    按规范化后的标题、年份、类型缓存识别结果；识别失败的结果也会缓存（较短的过期时间），
+    避免反复识别同一个无法识别的标题。
+    """
+
+    def __init__(self, max_size: int = 512, ttl: float = 6 * 3600, negative_ttl: float = 600):
+        # key -> 媒体信息，识别失败为None
+        self._cache = TTLCache(max_size=max_size, ttl=ttl)
+        self._cache.record('negative_hits', 0)
+        self._negative_ttl = negative_ttl  # 识别失败结果的缓存时间（秒）
+
+    @staticmethod
+    def make_key(title: str, year: Any = None, media_type: Any = None) -> Tuple[str, str, str]:
+        """规范化标题、年份和类型：统一全角半角、大小写和空白"""
+        def normalize(value: Any) -> str:
+            if value is None:
+                return ""
+            text = unicodedata.normalize("NFKC", str(value)).strip().lower()
+            return " ".join(text.split())
+        return normalize(title), normalize(year), normalize(media_type)
+
+    def get(self, key: Tuple[str, str, str]) -> Any:
+        """返回缓存的识别结果（识别失败为None），未缓存或已过期时返回MISSING"""
+        media_info = self._cache.get(key)
+        if media_info is None:
+            self._cache.record('negative_hits')
+        return media_info
+
+    def put(self, key: Tuple[str, str, str], media_info: Optional[dict]):
+        """缓存识别结果，media_info为None表示识别失败"""
+        self._cache.put(key, media_info, ttl=None if media_info is not None else self._negative_ttl)
+
+    def clear(self):
+        """清空缓存"""
+        self._cache.clear()
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """获取缓存统计信息，hits包含negative_hits"""
+        return {**self._cache.get_stats(), 'negative_ttl_seconds': self._negative_ttl}
+
+
+# 全局缓存实例
+recognition_cache = RecognitionCache()
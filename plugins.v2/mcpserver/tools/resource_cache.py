@@ -1,14 +1,23 @@
 import hashlib
+import json
 import time
 import threading
 from typing import Dict, Optional, Any
 import logging
 
+from .ttl_cache import TTLCache
+
 logger = logging.getLogger(__name__)
 
+# 用于生成资源ID的字段，同一种子多次搜索得到相同的ID
+_IDENTITY_FIELDS = ('site', 'site_name', 'title', 'size')
+
 
 class ResourceCache:
-    """资源缓存管理器，用于存储资源标识符与真实下载链接的映射"""
+    """资源缓存管理器，用于存储资源标识符与真实下载链接的映射
+
+    资源映射保存在LRU + TTL缓存中，同时受条目数和字节预算（按序列化大小估算）限制。
+    """
 
     _instance = None
     _lock = threading.Lock()
@@ -24,11 +33,10 @@ class ResourceCache:
 
     def __init__(self):
         if not getattr(self, '_initialized', False):
-            self._cache: Dict[str, Dict[str, Any]] = {}
-            self._cache_lock = threading.RLock()
-            self._max_cache_size = 1000  # 最大缓存条目数
-            self._cache_ttl = 3600  # 缓存过期时间（秒），1小时
+            # resource_id -> 资源数据：最多1000条、16MB，1小时过期
+            self._cache = TTLCache(max_size=1000, ttl=3600, max_bytes=16 * 1024 * 1024)
             # 站点映射缓存：site_id -> site_name
+            self._cache_lock = threading.RLock()
             self._site_mapping: Dict[str, str] = {}
             self._site_mapping_ttl = 86400  # 站点映射缓存24小时
             self._site_mapping_updated_at = 0
@@ -36,7 +44,7 @@ class ResourceCache:
             logger.info("资源缓存管理器已初始化")
 
     def generate_resource_id(self, torrent_info: dict) -> str:
-        """为资源生成唯一标识符
+        """根据资源内容生成标识符，同一资源总是得到相同的标识符
 
         Args:
             torrent_info: 种子信息字典
@@ -44,29 +52,24 @@ class ResourceCache:
         Returns:
             str: 资源标识符
         """
+        # 优先使用详情页地址定位资源，没有时才使用下载链接
+        locator = torrent_info.get('page_url') or torrent_info.get('enclosure') or ''
+        content = "|".join(
+            [str(locator)] + [str(torrent_info.get(field) or '') for field in _IDENTITY_FIELDS]
+        )
+        resource_id = f"res_{hashlib.md5(content.encode('utf-8')).hexdigest()[:16]}"
+        logger.debug(f"生成资源ID: {resource_id} for {torrent_info.get('title', '')}")
+        return resource_id
+
+    @staticmethod
+    def _estimate_size(torrent_info: dict) -> int:
         try:
-            # 使用种子URL、标题和时间戳生成唯一ID
-            torrent_url = torrent_info.get('enclosure', '')
-            title = torrent_info.get('title', '')
-            timestamp = str(int(time.time()))
-
-            # 创建唯一标识符
-            content = f"{torrent_url}|{title}|{timestamp}"
-            resource_id = hashlib.md5(content.encode('utf-8')).hexdigest()[:16]
-
-            # 添加前缀以便识别
-            resource_id = f"res_{resource_id}"
-
-            logger.debug(f"生成资源ID: {resource_id} for {title}")
-            return resource_id
-
-        except Exception as e:
-            logger.error(f"生成资源ID失败: {str(e)}")
-            # 生成一个基于时间的备用ID
-            return f"res_{int(time.time())}{hash(str(torrent_info)) % 10000:04d}"
+            return len(json.dumps(torrent_info, ensure_ascii=False, default=str).encode('utf-8'))
+        except Exception:
+            return len(str(torrent_info))
 
     def store_resource(self, resource_id: str, torrent_info: dict) -> bool:
-        """存储资源信息
+        """存储资源信息，已存在的资源会刷新内容和过期时间
 
         Args:
             resource_id: 资源标识符
@@ -76,22 +79,18 @@ class ResourceCache:
             bool: 是否存储成功
         """
         try:
-            with self._cache_lock:
-                # 检查缓存大小，如果超过限制则清理过期条目
-                if len(self._cache) >= self._max_cache_size:
-                    self._cleanup_expired()
-
-                # 存储资源信息
-                self._cache[resource_id] = {
-                    'torrent_info': torrent_info,
-                    'torrent_url': torrent_info.get('enclosure', ''),
-                    'title': torrent_info.get('title', ''),
-                    'site': torrent_info.get('site', ''),
-                    'created_at': time.time()
-                }
-
-                logger.debug(f"已存储资源: {resource_id}")
-                return True
+            size = self._estimate_size(torrent_info)
+            self._cache.put(resource_id, {
+                'torrent_info': torrent_info,
+                'torrent_url': torrent_info.get('enclosure', ''),
+                'title': torrent_info.get('title', ''),
+                'site': torrent_info.get('site', ''),
+                'created_at': time.time(),
+                'size': size
+            }, size=size)
+
+            logger.debug(f"已存储资源: {resource_id}")
+            return True
 
         except Exception as e:
             logger.error(f"存储资源失败: {str(e)}")
@@ -107,22 +106,14 @@ class ResourceCache:
             Optional[str]: 下载链接，如果不存在或过期则返回None
         """
         try:
-            with self._cache_lock:
-                if resource_id not in self._cache:
-                    logger.warning(f"资源ID不存在: {resource_id}")
-                    return None
-
-                resource_data = self._cache[resource_id]
-
-                # 检查是否过期
-                if time.time() - resource_data['created_at'] > self._cache_ttl:
-                    logger.warning(f"资源已过期: {resource_id}")
-                    del self._cache[resource_id]
-                    return None
+            resource_data = self._cache.get(resource_id, default=None)
+            if resource_data is None:
+                logger.warning(f"资源ID不存在或已过期: {resource_id}")
+                return None
 
-                torrent_url = resource_data['torrent_url']
-                logger.debug(f"获取资源URL: {resource_id} -> {torrent_url[:50]}...")
-                return torrent_url
+            torrent_url = resource_data['torrent_url']
+            logger.debug(f"获取资源URL: {resource_id} -> {torrent_url[:50]}...")
+            return torrent_url
 
         except Exception as e:
             logger.error(f"获取资源URL失败: {str(e)}")
@@ -138,70 +129,25 @@ class ResourceCache:
             Optional[Dict[str, Any]]: 资源信息，如果不存在或过期则返回None
         """
         try:
-            with self._cache_lock:
-                if resource_id not in self._cache:
-                    return None
-
-                resource_data = self._cache[resource_id]
-
-                # 检查是否过期
-                if time.time() - resource_data['created_at'] > self._cache_ttl:
-                    del self._cache[resource_id]
-                    return None
-
-                return resource_data.copy()
+            resource_data = self._cache.get(resource_id, default=None)
+            return resource_data.copy() if resource_data is not None else None
 
         except Exception as e:
             logger.error(f"获取资源信息失败: {str(e)}")
             return None
 
-    def _cleanup_expired(self):
-        """清理过期的缓存条目"""
-        try:
-            current_time = time.time()
-            expired_keys = []
-
-            for resource_id, resource_data in self._cache.items():
-                if current_time - resource_data['created_at'] > self._cache_ttl:
-                    expired_keys.append(resource_id)
-
-            for key in expired_keys:
-                del self._cache[key]
-
-            if expired_keys:
-                logger.info(f"清理了 {len(expired_keys)} 个过期缓存条目")
-
-        except Exception as e:
-            logger.error(f"清理过期缓存失败: {str(e)}")
-
     def clear_cache(self):
         """清空所有缓存"""
         try:
-            with self._cache_lock:
-                self._cache.clear()
-                logger.info("已清空资源缓存")
+            self._cache.clear()
+            logger.info("已清空资源缓存")
         except Exception as e:
             logger.error(f"清空缓存失败: {str(e)}")
 
     def get_cache_stats(self) -> Dict[str, Any]:
         """获取缓存统计信息"""
         try:
-            with self._cache_lock:
-                current_time = time.time()
-                total_count = len(self._cache)
-                expired_count = 0
-
-                for resource_data in self._cache.values():
-                    if current_time - resource_data['created_at'] > self._cache_ttl:
-                        expired_count += 1
-
-                return {
-                    'total_count': total_count,
-                    'expired_count': expired_count,
-                    'active_count': total_count - expired_count,
-                    'max_size': self._max_cache_size,
-                    'ttl_seconds': self._cache_ttl
-                }
+            return self._cache.get_stats()
         except Exception as e:
             logger.error(f"获取缓存统计失败: {str(e)}")
             return {}
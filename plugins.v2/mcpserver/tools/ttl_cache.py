@@ -0,0 +1,124 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 缓存未命中的标记，用于区分"未缓存"与"缓存了None"
+MISSING = object()
+
+
+class TTLCache:
+    """LRU + TTL 缓存，资源、识别、人物作品等缓存共用的存储和统计
+
+    使用OrderedDict按访问顺序排列，淘汰时从头部O(1)弹出；过期在访问和写入时惰性检查，
+    不做全量扫描。可选按字节预算限制总大小（条目大小由调用方估算）。
+    复合操作（先查再写）可以持有 lock 后调用，锁可重入。
+    """
+
+    def __init__(self, max_size: int, ttl: float, max_bytes: Optional[int] = None):
+        # key -> [过期时间, 大小, 值]，按最近访问排序
+        self._data: "OrderedDict[Hashable, list]" = OrderedDict()
+        self.lock = threading.RLock()
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._bytes = 0
+        self._stats = {'hits': 0, 'misses': 0, 'expired': 0, 'evictions': 0, 'refreshed': 0}
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _remove(self, key: Hashable) -> list:
+        entry = self._data.pop(key)
+        self._bytes -= entry[1]
+        return entry
+
+    def get(self, key: Hashable, default: Any = MISSING, record: bool = True) -> Any:
+        """返回未过期的值并标记为最近使用，不存在或已过期时返回default
+
+        Args:
+            key: 缓存键
+            default: 未命中时的返回值
+            record: 是否计入命中/未命中统计，调用方自行统计时传False
+        """
+        with self.lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                self._remove(key)
+                self._stats['expired'] += 1
+                entry = None
+            if entry is None:
+                if record:
+                    self._stats['misses'] += 1
+                return default
+            self._data.move_to_end(key)
+            if record:
+                self._stats['hits'] += 1
+            return entry[2]
+
+    def put(self, key: Hashable, value: Any, ttl: Optional[float] = None, size: int = 0):
+        """写入值，已存在的键会刷新内容和过期时间
+
+        Args:
+            key: 缓存键
+            value: 缓存值
+            ttl: 本条目的过期时间（秒），默认使用缓存的ttl
+            size: 条目大小，仅在设置了字节预算时参与淘汰
+        """
+        with self.lock:
+            if key in self._data:
+                self._remove(key)
+                self._stats['refreshed'] += 1
+            now = time.monotonic()
+            self._data[key] = [now + (self.ttl if ttl is None else ttl), size, value]
+            self._bytes += size
+            self._evict(now)
+
+    def _evict(self, now: float):
+        """先淘汰头部已过期的条目，再按LRU淘汰直到满足条目数和字节预算"""
+        while self._data:
+            key, entry = next(iter(self._data.items()))
+            if entry[0] <= now:
+                self._remove(key)
+                self._stats['expired'] += 1
+            elif (len(self._data) > self.max_size
+                  or (self.max_bytes is not None and self._bytes > self.max_bytes and len(self._data) > 1)):
+                self._remove(key)
+                self._stats['evictions'] += 1
+            else:
+                break
+
+    def values(self) -> list:
+        """当前所有条目的值（包含尚未惰性清理的过期条目）"""
+        with self.lock:
+            return [entry[2] for entry in self._data.values()]
+
+    def record(self, stat: str, count: int = 1):
+        """累加调用方自定义的统计项"""
+        with self.lock:
+            self._stats[stat] = self._stats.get(stat, 0) + count
+
+    def clear(self):
+        """清空缓存"""
+        with self.lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取缓存统计信息"""
+        with self.lock:
+            lookups = self._stats['hits'] + self._stats['misses']
+            stats = {
+                'total_count': len(self._data),
+                'max_size': self.max_size,
+                'ttl_seconds': self.ttl,
+            }
+            if self.max_bytes is not None:
+                stats['total_bytes'] = self._bytes
+                stats['max_bytes'] = self.max_bytes
+            stats.update(self._stats)
+            stats['hit_ratio'] = round(self._stats['hits'] / lookups, 4) if lookups else 0.0
+            return stats
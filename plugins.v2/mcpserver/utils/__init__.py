@@ -10,24 +10,48 @@ from .http_utils import (
     make_request,
     get_http_client,
     close_http_client,
+    get_request_stats,
+    reset_request_stats,
+    get_response_cache_stats,
+    response_cache,
     set_moviepilot_port,
     config,
     Config
 )
 
 # 导入文件操作功能
-from .file_operations import safe_read_json, safe_write_json, atomic_update_json
+from .file_operations import safe_read_json, safe_write_json, atomic_update_json, flush_pending_writes
+
+# 导入参数校验器编译
+from .schema_validator import compile_validator, prompt_arguments_schema, ArgumentValidationError
+
+# 导入插件调用通道
+from .plugin_channel import configure_plugin_channel, get_plugin_channel, close_plugin_channel, PluginChannelUnavailable
 
 __all__ = [
     # HTTP相关功能（原utils.py）
     'make_request',
     'get_http_client',
     'close_http_client',
+    'get_request_stats',
+    'reset_request_stats',
+    'get_response_cache_stats',
+    'response_cache',
     'set_moviepilot_port',
     'config',
     'Config',
     # 文件操作功能
     'safe_read_json',
     'safe_write_json',
-    'atomic_update_json'
+    'atomic_update_json',
+    'flush_pending_writes',
+    # 参数校验
+    'compile_validator',
+    'prompt_arguments_schema',
+    'ArgumentValidationError',
+    # 插件调用通道
+    'configure_plugin_channel',
+    'get_plugin_channel',
+    'close_plugin_channel',
+    'PluginChannelUnavailable'
 ]
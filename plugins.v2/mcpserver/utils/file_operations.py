@@ -1,6 +1,12 @@
 """
 安全的文件操作工具
 提供线程安全的JSON文件读写操作，防止并发写入导致的数据损坏
+
+- 文件锁按路径哈希分配到固定数量的锁条带上，锁的数量不随文件数增长
+- 写入先在内存中序列化，再写入同目录临时文件、fsync一次后原子重命名，不再回读校验
+- 备份通过硬链接保留被替换的旧文件，同一文件按固定间隔最多备份一次
+- atomic_update_json 指定 debounce 时，窗口内对同一文件的多次更新在内存中合并，只写入一次
+- 合并的更新写入失败时保留在内存中并定时重试；写入完成回调在文件锁外执行
 """
 import json
 import os
@@ -9,55 +15,74 @@ import threading
 import tempfile
 import shutil
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Callable, Dict, Any, List, Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
+# 文件锁条带数量
+LOCK_STRIPES = 64
+
+# 同一文件两次备份之间的最小间隔（秒）
+BACKUP_INTERVAL = 300
+
+# 合并写入失败后的重试间隔（秒），每次失败加倍，不超过最大值
+WRITE_RETRY_INTERVAL = 1.0
+WRITE_RETRY_MAX_INTERVAL = 60.0
+
 
 class SafeFileOperations:
     """安全的文件操作类，提供原子性的JSON文件读写"""
-    
-    def __init__(self):
-        self._file_locks: Dict[str, threading.RLock] = {}
-        self._locks_lock = threading.Lock()
-    
-    def _get_file_lock(self, file_path: str) -> threading.RLock:
-        """获取文件对应的锁"""
-        with self._locks_lock:
-            if file_path not in self._file_locks:
-                self._file_locks[file_path] = threading.RLock()
-            return self._file_locks[file_path]
-    
+
+    def __init__(self, lock_stripes: int = LOCK_STRIPES, backup_interval: float = BACKUP_INTERVAL):
+        self._file_locks: List[threading.RLock] = [threading.RLock() for _ in range(lock_stripes)]
+        self._backup_interval = backup_interval
+        self._last_backup: Dict[str, float] = {}
+        # 等待合并写入的更新：路径 -> {"path", "data", "callbacks", "timer", "failures"}
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._stats = {"updates": 0, "writes": 0, "coalesced": 0, "backups": 0, "retries": 0}
+
+    @staticmethod
+    def _file_key(file_path) -> str:
+        return os.path.abspath(str(file_path))
+
+    def _get_file_lock(self, file_key: str) -> threading.RLock:
+        """获取文件对应的锁条带"""
+        return self._file_locks[hash(file_key) % len(self._file_locks)]
+
     def safe_read_json(self, file_path: Path, default_value: Optional[Dict] = None) -> Dict[str, Any]:
         """
-        安全读取JSON文件
-        
+        安全读取JSON文件，有尚未写入的合并更新时返回合并后的数据
+
         Args:
             file_path: 文件路径
             default_value: 文件不存在时的默认值
-            
+
         Returns:
             JSON数据字典
         """
-        file_lock = self._get_file_lock(str(file_path))
-        
-        with file_lock:
+        file_path = Path(file_path)
+        file_key = self._file_key(file_path)
+
+        with self._get_file_lock(file_key):
+            pending = self._pending.get(file_key)
+            if pending is not None:
+                return dict(pending["data"])
+
             try:
-                if not file_path.exists():
-                    logger.debug(f"文件不存在，返回默认值: {file_path}")
-                    return default_value or {}
-                
-                # 检查文件是否为空
-                if file_path.stat().st_size == 0:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    content = f.read()
+                if not content.strip():
                     logger.warning(f"文件为空: {file_path}")
                     return default_value or {}
-                
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    logger.debug(f"成功读取文件: {file_path}")
-                    return data
-                    
+                data = json.loads(content)
+                logger.debug(f"成功读取文件: {file_path}")
+                return data
+
+            except FileNotFoundError:
+                logger.debug(f"文件不存在，返回默认值: {file_path}")
+                return default_value or {}
+
             except json.JSONDecodeError as e:
                 logger.error(f"JSON格式错误: {file_path}, 错误: {str(e)}")
                 # 尝试从备份恢复
@@ -71,133 +96,242 @@ class SafeFileOperations:
                             return data
                     except Exception as backup_e:
                         logger.error(f"备份文件也损坏: {backup_e}")
-                
+
                 return default_value or {}
-                
+
             except Exception as e:
                 logger.error(f"读取文件失败: {file_path}, 错误: {str(e)}")
                 return default_value or {}
-    
+
     def safe_write_json(self, file_path: Path, data: Dict[str, Any], create_backup: bool = True) -> bool:
         """
         安全写入JSON文件，使用原子操作防止数据损坏
-        
+
         Args:
             file_path: 文件路径
             data: 要写入的数据
-            create_backup: 是否创建备份
-            
+            create_backup: 是否按备份间隔保留被替换的旧文件
+
         Returns:
             是否写入成功
         """
-        file_lock = self._get_file_lock(str(file_path))
-        
-        with file_lock:
-            try:
-                # 确保目录存在
-                file_path.parent.mkdir(parents=True, exist_ok=True)
-                
-                # 创建备份
-                if create_backup and file_path.exists():
-                    self._create_backup(file_path)
-                
-                # 使用临时文件进行原子写入
-                temp_file = None
+        file_path = Path(file_path)
+        file_key = self._file_key(file_path)
+
+        with self._get_file_lock(file_key):
+            # 整体写入会覆盖尚未落盘的合并更新，由这次写入完成它们
+            pending = self._pending.pop(file_key, None)
+            if pending is not None and pending["timer"] is not None:
+                pending["timer"].cancel()
+            success = self._write_json(file_path, file_key, data, create_backup)
+            if pending is not None and not success:
+                # 保留等待中的回调，稍后重试写入这次的数据
+                pending["data"] = data
+                self._retry_later(file_key, pending)
+                pending = None
+
+        if pending is not None:
+            self._run_callbacks(pending, success)
+        return success
+
+    def _write_json(self, file_path: Path, file_key: str, data: Dict[str, Any], create_backup: bool) -> bool:
+        """写入临时文件、fsync一次后原子重命名，调用方持有文件锁"""
+        temp_path = None
+        try:
+            # 序列化失败时不触碰磁盘；能序列化即是合法JSON，无需回读校验
+            content = json.dumps(data, ensure_ascii=False, indent=2)
+
+            # 确保目录存在
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+
+            if create_backup:
+                self._rotate_backup(file_path, file_key)
+
+            # 在同一目录下创建临时文件
+            temp_fd, temp_path = tempfile.mkstemp(
+                suffix='.tmp',
+                prefix=f'{file_path.name}.',
+                dir=file_path.parent
+            )
+            with os.fdopen(temp_fd, 'w', encoding='utf-8') as f:
+                f.write(content)
+                f.flush()
+                os.fsync(f.fileno())  # 强制写入磁盘
+
+            # 原子替换，Windows上同样可以覆盖已存在的目标文件
+            os.replace(temp_path, file_path)
+            temp_path = None
+            self._stats["writes"] += 1
+            logger.debug(f"成功写入文件: {file_path}")
+            return True
+
+        except Exception as e:
+            logger.error(f"写入文件失败: {file_path}, 错误: {str(e)}")
+            return False
+
+        finally:
+            # 清理临时文件
+            if temp_path:
                 try:
-                    # 在同一目录下创建临时文件
-                    temp_fd, temp_path = tempfile.mkstemp(
-                        suffix='.tmp',
-                        prefix=f'{file_path.name}.',
-                        dir=file_path.parent
-                    )
-                    temp_file = Path(temp_path)
-                    
-                    # 写入数据到临时文件
-                    with os.fdopen(temp_fd, 'w', encoding='utf-8') as f:
-                        json.dump(data, f, ensure_ascii=False, indent=2)
-                        f.flush()
-                        os.fsync(f.fileno())  # 强制写入磁盘
-                    
-                    # 验证写入的数据
-                    if not self._verify_json_file(temp_file):
-                        raise ValueError("写入的JSON文件格式验证失败")
-                    
-                    # 原子移动（重命名）
-                    if os.name == 'nt':  # Windows
-                        # Windows上需要先删除目标文件
-                        if file_path.exists():
-                            file_path.unlink()
-                    
-                    shutil.move(str(temp_file), str(file_path))
-                    logger.debug(f"成功写入文件: {file_path}")
-                    return True
-                    
-                except Exception as e:
-                    # 清理临时文件
-                    if temp_file and temp_file.exists():
-                        try:
-                            temp_file.unlink()
-                        except:
-                            pass
-                    raise e
-                    
-            except Exception as e:
-                logger.error(f"写入文件失败: {file_path}, 错误: {str(e)}")
-                return False
-    
+                    os.unlink(temp_path)
+                except OSError:
+                    pass
+
+    def _rotate_backup(self, file_path: Path, file_key: str):
+        """距上次备份超过备份间隔时，把即将被替换的文件保留为备份"""
+        now = time.monotonic()
+        last_backup = self._last_backup.get(file_key)
+        if last_backup is not None and now - last_backup < self._backup_interval:
+            return
+        if self._create_backup(file_path):
+            self._last_backup[file_key] = now
+
     def _create_backup(self, file_path: Path) -> bool:
-        """创建文件备份"""
+        """创建文件备份：优先硬链接到旧文件（随后的原子替换不会改动它），不支持时复制"""
+        if not file_path.exists():
+            return False
+        backup_path = self._get_backup_path(file_path)
+        link_path = backup_path.with_name(f"{backup_path.name}.{os.getpid()}.tmp")
         try:
-            backup_path = self._get_backup_path(file_path)
-            shutil.copy2(str(file_path), str(backup_path))
+            try:
+                os.link(file_path, link_path)
+                os.replace(link_path, backup_path)
+            except OSError:
+                if link_path.exists():
+                    link_path.unlink()
+                shutil.copy2(str(file_path), str(backup_path))
+            self._stats["backups"] += 1
             logger.debug(f"创建备份: {backup_path}")
             return True
         except Exception as e:
             logger.warning(f"创建备份失败: {e}")
             return False
-    
+
     def _get_backup_path(self, file_path: Path) -> Path:
         """获取备份文件路径"""
         return file_path.with_suffix(f'{file_path.suffix}.backup')
-    
-    def _verify_json_file(self, file_path: Path) -> bool:
-        """验证JSON文件格式是否正确"""
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                json.load(f)
-            return True
-        except:
-            return False
-    
-    def atomic_update_json(self, file_path: Path, update_func, default_value: Optional[Dict] = None) -> bool:
+
+    def atomic_update_json(self, file_path: Path, update_func, default_value: Optional[Dict] = None,
+                           debounce: Optional[float] = None,
+                           on_written: Optional[Callable[[bool], Any]] = None) -> bool:
         """
         原子性更新JSON文件
-        
+
         Args:
             file_path: 文件路径
             update_func: 更新函数，接收当前数据，返回新数据
             default_value: 文件不存在时的默认值
-            
+            debounce: 合并写入窗口（秒）。指定时更新先应用到内存，窗口内对同一文件的后续更新合并后只写入一次
+            on_written: 写入完成后的回调，参数为是否写入成功；同一次写入中相同的回调只调用一次，
+                写入失败重试期间不调用，回调在文件锁外执行
+
         Returns:
-            是否更新成功
+            立即写入时返回是否写入成功（失败的更新保留在内存中稍后重试）；
+            合并写入时返回更新是否已应用，写入结果通过 on_written 通知
         """
-        file_lock = self._get_file_lock(str(file_path))
-        
-        with file_lock:
+        file_path = Path(file_path)
+        file_key = self._file_key(file_path)
+
+        with self._get_file_lock(file_key):
             try:
-                # 读取当前数据
-                current_data = self.safe_read_json(file_path, default_value)
-                
+                pending = self._pending.get(file_key)
+                # 读取当前数据（有未落盘的更新时直接使用内存中的数据）
+                current_data = pending["data"] if pending else self.safe_read_json(file_path, default_value)
+
                 # 应用更新函数
-                updated_data = update_func(current_data.copy())
-                
-                # 写入更新后的数据
-                return self.safe_write_json(file_path, updated_data)
-                
+                updated_data = update_func(dict(current_data))
+                self._stats["updates"] += 1
+
             except Exception as e:
                 logger.error(f"原子更新失败: {file_path}, 错误: {str(e)}")
                 return False
 
+            if pending is None:
+                pending = {"path": file_path, "data": updated_data, "callbacks": [], "timer": None, "failures": 0}
+                self._pending[file_key] = pending
+                if debounce:
+                    timer = threading.Timer(debounce, self.flush, args=(file_path,))
+                    timer.daemon = True
+                    pending["timer"] = timer
+                    timer.start()
+            else:
+                pending["data"] = updated_data
+                self._stats["coalesced"] += 1
+            if on_written is not None:
+                pending["callbacks"].append(on_written)
+
+            if debounce:
+                return True
+            # 立即写入，同时带上窗口内尚未写入的更新
+            success, written = self._flush_locked(file_key)
+
+        if written is not None:
+            self._run_callbacks(written, success)
+        return success
+
+    def flush(self, file_path: Optional[Path] = None) -> bool:
+        """
+        立即写入等待合并的更新，写入失败的更新保留在内存中并定时重试
+
+        Args:
+            file_path: 文件路径，None表示所有文件
+
+        Returns:
+            是否全部写入成功
+        """
+        if file_path is None:
+            return all([self.flush(pending["path"]) for pending in list(self._pending.values())])
+
+        file_key = self._file_key(file_path)
+        with self._get_file_lock(file_key):
+            success, written = self._flush_locked(file_key)
+
+        if written is not None:
+            self._run_callbacks(written, success)
+        return success
+
+    def _flush_locked(self, file_key: str):
+        """
+        写入文件等待合并的更新，调用方持有文件锁
+
+        Returns:
+            (是否写入成功, 已写入需要执行回调的更新或None)；写入失败时更新重新排队，不返回回调
+        """
+        pending = self._pending.pop(file_key, None)
+        if pending is None:
+            return True, None
+        if pending["timer"] is not None:
+            pending["timer"].cancel()
+        if self._write_json(pending["path"], file_key, pending["data"], create_backup=True):
+            return True, pending
+        self._retry_later(file_key, pending)
+        return False, None
+
+    def _retry_later(self, file_key: str, pending: Dict[str, Any]):
+        """写入失败的更新重新排队，按退避间隔重试，期间的新更新继续合并进来，调用方持有文件锁"""
+        pending["failures"] = pending.get("failures", 0) + 1
+        delay = min(WRITE_RETRY_INTERVAL * 2 ** (pending["failures"] - 1), WRITE_RETRY_MAX_INTERVAL)
+        timer = threading.Timer(delay, self.flush, args=(pending["path"],))
+        timer.daemon = True
+        pending["timer"] = timer
+        self._pending[file_key] = pending
+        self._stats["retries"] += 1
+        logger.error(f"合并写入失败，保留 {len(pending['callbacks'])} 个更新，{delay:g}秒后重试: {pending['path']}")
+        timer.start()
+
+    @staticmethod
+    def _run_callbacks(pending: Dict[str, Any], success: bool):
+        """执行写入完成回调。回调可能发起网络请求，必须在文件锁外调用"""
+        for callback in dict.fromkeys(pending["callbacks"]):
+            try:
+                callback(success)
+            except Exception as e:
+                logger.error(f"文件写入回调失败: {pending['path']}, 错误: {str(e)}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """写入统计"""
+        return {**self._stats, "pending": len(self._pending)}
+
 
 # 全局实例
 _safe_file_ops = SafeFileOperations()
@@ -213,6 +347,13 @@ def safe_write_json(file_path: Path, data: Dict[str, Any], create_backup: bool =
     return _safe_file_ops.safe_write_json(file_path, data, create_backup)
 
 
-def atomic_update_json(file_path: Path, update_func, default_value: Optional[Dict] = None) -> bool:
+def atomic_update_json(file_path: Path, update_func, default_value: Optional[Dict] = None,
+                       debounce: Optional[float] = None,
+                       on_written: Optional[Callable[[bool], Any]] = None) -> bool:
     """原子性更新JSON文件的便捷函数"""
-    return _safe_file_ops.atomic_update_json(file_path, update_func, default_value)
+    return _safe_file_ops.atomic_update_json(file_path, update_func, default_value, debounce, on_written)
+
+
+def flush_pending_writes(file_path: Optional[Path] = None) -> bool:
+    """立即写入等待合并的更新的便捷函数"""
+    return _safe_file_ops.flush(file_path)
@@ -1,10 +1,17 @@
 import logging
 import json
+import re
+import threading
+import time
+from bisect import bisect_left
 from typing import Optional, Dict, Any
 
+from .response_cache import ResponseCache
+
 # 尝试导入依赖，如果失败则使用模拟对象
 HTTPX_AVAILABLE = False
 ANYIO_AVAILABLE = False
+HTTP2_AVAILABLE = False
 
 try:
     import httpx
@@ -25,8 +32,21 @@ except ImportError:
                 self.response = response
         class RequestError(Exception):
             pass
+        class Limits:
+            def __init__(self, **kwargs):
+                pass
+        class Timeout:
+            def __init__(self, *args, **kwargs):
+                pass
     httpx = MockHttpx()
 
+try:
+    # httpx的HTTP/2支持需要额外安装h2
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = HTTPX_AVAILABLE
+except ImportError:
+    pass
+
 try:
     import anyio
     ANYIO_AVAILABLE = True
@@ -52,6 +72,15 @@ class Config:
     MAX_RETRIES = 3
     RETRY_DELAY = 1  # 基础重试延迟（秒）
     REQUEST_TIMEOUT = 600  # 请求超时时间（秒）
+    CONNECT_TIMEOUT = 10  # 建立连接超时时间（秒）
+    # 每个工具最多4个并发调用，站点搜索、人物作品分页每次调用还会再并发4个请求，
+    # 单个搜索工具就可能同时占用16个连接，且站点搜索单次可达数十秒。
+    # 上限过低时其它工具的请求会排队等待空闲连接，这里与httpx默认值保持一致，只用于防止失控
+    MAX_CONNECTIONS = 100  # 连接池最大连接数
+    MAX_KEEPALIVE_CONNECTIONS = 32  # 连接池最大空闲keep-alive连接数，覆盖两个扇出工具满载时的并发
+    KEEPALIVE_EXPIRY = 60  # 空闲连接保留时间（秒）
+    HTTP2 = True  # 安装了h2时启用HTTP/2（仅对https生效，明文HTTP仍使用HTTP/1.1 keep-alive）
+    RESPONSE_CACHE_MAX_ENTRIES = 512  # GET响应缓存最大条目数
 
     def set_moviepilot_port(self, port: int):
         """设置MoviePilot端口号"""
@@ -61,19 +90,110 @@ class Config:
 
 config = Config()
 
+# 只读GET请求的响应缓存
+response_cache = ResponseCache(max_entries=config.RESPONSE_CACHE_MAX_ENTRIES)
+
 
 def set_moviepilot_port(port: int):
     """设置MoviePilot端口号的全局函数"""
     config.set_moviepilot_port(port)
 
 
+class _LatencyHistogram:
+    """单个端点的请求耗时直方图（毫秒）"""
+
+    BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+    __slots__ = ("counts", "count", "errors", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BUCKETS) + 1)
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, elapsed_ms: float, error: bool):
+        self.counts[bisect_left(self.BUCKETS, elapsed_ms)] += 1
+        self.count += 1
+        self.total += elapsed_ms
+        if elapsed_ms > self.max:
+            self.max = elapsed_ms
+        if error:
+            self.errors += 1
+
+    def percentile(self, q: float) -> Optional[float]:
+        """按桶上界估算分位数"""
+        if not self.count:
+            return None
+        threshold = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= threshold:
+                return float(self.BUCKETS[index]) if index < len(self.BUCKETS) else round(self.max, 2)
+        return round(self.max, 2)
+
+    def to_dict(self) -> Dict[str, Any]:
+        buckets = {f"le_{bound}": n for bound, n in zip(self.BUCKETS, self.counts)}
+        buckets["le_inf"] = self.counts[-1]
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "avg_ms": round(self.total / self.count, 2) if self.count else 0.0,
+            "max_ms": round(self.max, 2),
+            "p50_ms": self.percentile(0.5),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "buckets": buckets,
+        }
+
+
+# 按端点统计的请求耗时，路径中的数字ID归一化，避免端点数量无限增长
+_MAX_TRACKED_ENDPOINTS = 200
+_ID_SEGMENT = re.compile(r"/\d+(?=/|$)")
+_latency_stats: Dict[str, _LatencyHistogram] = {}
+_latency_lock = threading.Lock()
+
+
+def _record_latency(method: str, endpoint: str, elapsed_ms: float, error: bool):
+    key = f"{method.upper()} {_ID_SEGMENT.sub('/{id}', endpoint.split('?', 1)[0])}"
+    with _latency_lock:
+        histogram = _latency_stats.get(key)
+        if histogram is None:
+            if len(_latency_stats) >= _MAX_TRACKED_ENDPOINTS:
+                key = "OTHER"
+                histogram = _latency_stats.get(key)
+            if histogram is None:
+                histogram = _latency_stats[key] = _LatencyHistogram()
+        histogram.observe(elapsed_ms, error)
+
+
+def get_request_stats() -> Dict[str, Any]:
+    """获取各端点请求耗时直方图"""
+    with _latency_lock:
+        return {key: histogram.to_dict() for key, histogram in _latency_stats.items()}
+
+
+def reset_request_stats():
+    """清空请求耗时统计"""
+    with _latency_lock:
+        _latency_stats.clear()
+
+
 async def get_http_client():
-    """获取或创建HTTP客户端"""
+    """获取或创建HTTP客户端（共享连接池）"""
     global _http_client
     if _http_client is None:
-        # 增加超时时间，避免长时间请求导致连接断开
+        # 长请求超时避免搜索等慢接口被中断，连接超时单独设置以便快速发现服务不可用
         _http_client = httpx.AsyncClient(
-            timeout=config.REQUEST_TIMEOUT
+            timeout=httpx.Timeout(config.REQUEST_TIMEOUT, connect=config.CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=config.MAX_CONNECTIONS,
+                max_keepalive_connections=config.MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=config.KEEPALIVE_EXPIRY,
+            ),
+            http2=config.HTTP2 and HTTP2_AVAILABLE,
         )
     return _http_client
 
@@ -86,7 +206,56 @@ async def close_http_client():
         _http_client = None
 
 
+def get_response_cache_stats() -> Dict[str, Any]:
+    """获取响应缓存统计"""
+    return response_cache.stats()
+
+
 async def make_request(
+    method: str,
+    endpoint: str,
+    access_token: Optional[str] = None,
+    params: Optional[Dict[str, Any]] = None,
+    data: Optional[Dict[str, Any]] = None,
+    json_data: Optional[Dict[str, Any]] = None,
+    use_cache: bool = True,
+) -> Dict[str, Any]:
+    """发送请求到MoviePilot API，支持响应缓存和重试机制
+
+    可缓存端点的GET请求先查响应缓存，并发的相同请求合并为一次上游调用；
+    写请求成功后使同一资源的缓存失效。
+
+    Args:
+        method: HTTP请求方法 (GET, POST, etc.)
+        endpoint: API端点路径
+        access_token: MoviePilot access token
+        params: URL查询参数
+        data: 表单数据
+        json_data: JSON请求体
+        use_cache: 是否使用响应缓存
+
+    Returns:
+        Dict[str, Any]: API响应数据或错误信息
+    """
+    if method.upper() == "GET":
+        ttl = response_cache.ttl_for(endpoint) if use_cache and response_cache.enabled else None
+        if ttl is None:
+            return await _send_request(method, endpoint, access_token, params, data, json_data)
+        return await response_cache.get_or_fetch(
+            response_cache.make_key(method, endpoint, params, access_token),
+            endpoint,
+            ttl,
+            lambda: _send_request(method, endpoint, access_token, params, data, json_data),
+        )
+
+    try:
+        return await _send_request(method, endpoint, access_token, params, data, json_data)
+    finally:
+        # 写请求失败时也可能已部分生效，无论结果如何都使缓存失效
+        response_cache.invalidate(endpoint)
+
+
+async def _send_request(
     method: str,
     endpoint: str,
     access_token: Optional[str] = None,
@@ -109,78 +278,78 @@ async def make_request(
     Returns:
         Dict[str, Any]: API响应数据或错误信息
     """
-    logger.debug(f"[make_request] 开始处理请求")
-    logger.debug(f"[make_request] 方法: {method}")
-    logger.debug(f"[make_request] 端点: {endpoint}")
-    logger.debug(f"[make_request] 访问令牌: {'已提供' if access_token else '未提供'}")
-    logger.debug(f"[make_request] 查询参数: {params}")
-    logger.debug(f"[make_request] 表单数据: {data}")
-    logger.debug(f"[make_request] JSON数据: {json_data}")
-    logger.debug(f"[make_request] 重试次数: {retry_count}")
-    logger.debug(f"[make_request] BASE_URL: {config.BASE_URL}")
+    debug = logger.isEnabledFor(logging.DEBUG)
+    if debug:
+        logger.debug(
+            "[make_request] %s %s, 访问令牌: %s, 查询参数: %s, 表单数据: %s, JSON数据: %s, 重试次数: %s",
+            method, endpoint, "已提供" if access_token else "未提供",
+            params, data, json_data, retry_count
+        )
 
     # 处理认证
     headers = {}
     if access_token:
         headers["Authorization"] = f"Bearer {access_token}"
-        logger.debug(f"[make_request] 设置Authorization头")
     else:
         logger.warning("[make_request] 未提供access_token，请求可能会失败")
 
     try:
         # 获取HTTP客户端
-        logger.debug(f"[make_request] 获取HTTP客户端...")
         client = await get_http_client()
         url = f"{config.BASE_URL.rstrip('/')}{endpoint}"
-        logger.debug(f"[make_request] 完整URL: {url}")
 
-        # 记录请求信息
-        logger.info(f"发送请求: {method} {url}")
-        logger.debug(f"[make_request] 请求头: {headers}")
-        if params:
-            logger.info(f"查询参数: {params}")
-        if json_data:
-            logger.info(f"请求体: {json_data}")
+        # 请求参数和请求体可能包含用户数据，只在调试级别记录
+        if debug:
+            logger.debug("发送请求: %s %s", method, url)
+            if params:
+                logger.debug("查询参数: %s", params)
+            if json_data:
+                logger.debug("请求体: %s", json_data)
 
         # 发送请求
-        logger.debug(f"[make_request] 发送HTTP请求...")
-        response = await client.request(
-            method,
-            url,
-            params=params,
-            data=data,
-            json=json_data,
-            headers=headers,
+        start = time.perf_counter()
+        try:
+            response = await client.request(
+                method,
+                url,
+                params=params,
+                data=data,
+                json=json_data,
+                headers=headers,
+            )
+        except Exception:
+            _record_latency(method, endpoint, (time.perf_counter() - start) * 1000, True)
+            raise
+        _record_latency(
+            method, endpoint, (time.perf_counter() - start) * 1000, response.status_code >= 400
         )
 
-        logger.debug(f"[make_request] 收到响应")
-        logger.debug(f"[make_request] 响应状态码: {response.status_code}")
-        logger.debug(f"[make_request] 响应头: {dict(response.headers)}")
-        logger.debug(f"[make_request] 响应内容长度: {len(response.content) if response.content else 0}")
+        if debug:
+            logger.debug(
+                "[make_request] 响应状态码: %s, 响应头: %s, 响应内容长度: %s",
+                response.status_code, dict(response.headers), len(response.content)
+            )
 
         response.raise_for_status()
-        logger.debug(f"[make_request] 状态码检查通过")
 
         # 处理响应
         if not response.content:
-            logger.debug(f"[make_request] 响应内容为空，返回空字典")
             return {}
 
         content_type = response.headers.get("content-type", "")
-        logger.debug(f"[make_request] 响应内容类型: {content_type}")
 
         if "application/json" in content_type:
             try:
-                logger.debug(f"[make_request] 解析JSON响应...")
                 json_result = response.json()
-                logger.debug(f"[make_request] JSON解析成功: {json_result}")
+                if debug:
+                    logger.debug("[make_request] JSON解析成功: %s", json_result)
                 return json_result
             except Exception as e:
                 logger.error(f"[make_request] 解析JSON响应失败: {str(e)}")
-                logger.debug(f"[make_request] 原始响应文本: {response.text}")
+                if debug:
+                    logger.debug("[make_request] 原始响应文本: %s", response.text)
                 return {"error": f"解析响应失败: {str(e)}", "content": response.text}
 
-        logger.debug(f"[make_request] 返回文本响应")
         return {"content": response.text}
 
     except httpx.HTTPStatusError as e:
@@ -197,7 +366,7 @@ async def make_request(
                 f"Token可能已过期 (重试 {retry_count + 1}/{config.MAX_RETRIES})"
             )
             await anyio.sleep(config.RETRY_DELAY * (retry_count + 1))
-            return await make_request(
+            return await _send_request(
                 method=method,
                 endpoint=endpoint,
                 access_token=access_token,
@@ -223,7 +392,7 @@ async def make_request(
                 f"请求失败 (重试 {retry_count + 1}/{config.MAX_RETRIES}): {str(e)}"
             )
             await anyio.sleep(config.RETRY_DELAY * (retry_count + 1))
-            return await make_request(
+            return await _send_request(
                 method=method,
                 endpoint=endpoint,
                 access_token=access_token,
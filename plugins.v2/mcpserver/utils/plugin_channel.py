@@ -0,0 +1,549 @@
+"""
+插件调用通道
+MCP服务器进程与MoviePilot进程之间的常驻本地通道（Unix域套接字），用于调用插件注册的工具和提示，
+替代每次调用都走一遍 HTTP POST /api/v1/plugin/... 的方式。
+
+帧格式：4字节大端长度 + UTF-8 JSON。
+客户端 -> 服务端：
+    {"type": "hello", "token": ..., "version": 1}
+    {"type": "call", "id": 1, "kind": "tool"|"prompt", "plugin_id": ..., "request": {...}}
+    {"type": "cancel", "id": 1}
+    {"type": "batch", "frames": [...]}            同一轮事件循环内发出的多个帧合并为一帧
+服务端 -> 客户端：
+    {"type": "hello", "ok": true}
+    {"type": "chunk", "id": 1, "data": ...}       插件工具返回迭代器时逐块推送
+    {"type": "result", "id": 1, "result": {...}}  调用结果，"unrouted": true 表示插件未接入通道
+
+同一连接上的调用按id多路复用，服务端在线程池中并发执行。插件未接入通道或通道不可用时，
+调用方回退到HTTP接口。本模块只依赖标准库：服务端运行在MoviePilot进程中（线程），
+客户端运行在MCP服务器进程中（asyncio）。
+"""
+
+import asyncio
+import hmac
+import itertools
+import json
+import logging
+import os
+import socket
+import struct
+import threading
+import time
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PROTOCOL_VERSION = 1
+_HEADER = struct.Struct(">I")
+MAX_FRAME_SIZE = 16 * 1024 * 1024
+
+# Unix域套接字路径长度上限（Linux为108字节，含结尾的\0）
+_MAX_SOCKET_PATH = 100
+
+
+class PluginChannelUnavailable(Exception):
+    """通道不可用或插件未接入通道，调用尚未执行，可以安全回退到HTTP"""
+
+
+def is_supported() -> bool:
+    """当前平台是否支持Unix域套接字"""
+    return hasattr(socket, "AF_UNIX")
+
+
+def socket_path_for(directory: str, name: str = "plugin_channel.sock") -> str:
+    """返回通道套接字路径，目录路径过长时改用系统临时目录"""
+    path = os.path.join(directory, name)
+    if len(path.encode()) <= _MAX_SOCKET_PATH:
+        return path
+    import tempfile
+    return os.path.join(tempfile.gettempdir(), f"mcpserver-{os.getuid() if hasattr(os, 'getuid') else 0}-{name}")
+
+
+def encode_frame(message: dict) -> bytes:
+    payload = json.dumps(message, ensure_ascii=False, default=str).encode("utf-8")
+    return _HEADER.pack(len(payload)) + payload
+
+
+def materialize_result(result: Any) -> Any:
+    """把结果中的迭代器数据展开为列表，用于不支持流式返回的HTTP接口"""
+    if isinstance(result, dict) and isinstance(result.get("data"), Iterator):
+        result = dict(result)
+        result["data"] = list(result["data"])
+    return result
+
+
+# ---------------------------------------------------------------------------
+# 服务端（MoviePilot进程）
+# ---------------------------------------------------------------------------
+
+# 插件ID -> 处理函数 handler(kind, request) -> 结果字典
+_handlers: Dict[str, Callable[[str, dict], Any]] = {}
+_handlers_lock = threading.Lock()
+
+
+def register_channel_handler(plugin_id: str, handler: Callable[[str, dict], Any]):
+    """登记插件的通道处理函数，kind为"tool"或"prompt"，request与HTTP接口的请求体相同"""
+    with _handlers_lock:
+        _handlers[plugin_id] = handler
+
+
+def unregister_channel_handler(plugin_id: str):
+    """注销插件的通道处理函数"""
+    with _handlers_lock:
+        _handlers.pop(plugin_id, None)
+
+
+def _read_frame_sync(sock: socket.socket) -> Optional[dict]:
+    header = _recv_exactly(sock, _HEADER.size)
+    if header is None:
+        return None
+    (length,) = _HEADER.unpack(header)
+    if length > MAX_FRAME_SIZE:
+        raise ValueError(f"帧过大: {length}")
+    payload = _recv_exactly(sock, length)
+    if payload is None:
+        return None
+    return json.loads(payload)
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> Optional[bytes]:
+    buffer = bytearray()
+    while len(buffer) < size:
+        chunk = sock.recv(size - len(buffer))
+        if not chunk:
+            return None
+        buffer += chunk
+    return bytes(buffer)
+
+
+class _Connection:
+    """服务端的单个客户端连接"""
+
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self.write_lock = threading.Lock()
+        # 正在执行的调用id，只记录对这些调用的取消，避免已结束调用的取消帧残留
+        self.running = set()
+        self.cancelled = set()
+        self.calls_lock = threading.Lock()
+        self.closed = False
+
+    def send(self, message: dict) -> bool:
+        if self.closed:
+            return False
+        data = encode_frame(message)
+        try:
+            with self.write_lock:
+                self.sock.sendall(data)
+            return True
+        except OSError:
+            self.closed = True
+            return False
+
+    def close(self):
+        self.closed = True
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+
+class PluginChannelServer:
+    """插件调用通道服务端，在MoviePilot进程中监听Unix域套接字"""
+
+    def __init__(self, path: str, token_provider: Callable[[], str], max_workers: int = 16):
+        """
+        Args:
+            path: 套接字文件路径
+            token_provider: 返回当前认证token（与MCP服务器的API密钥相同）
+            max_workers: 并发执行插件调用的线程数
+        """
+        self.path = path
+        self._token_provider = token_provider
+        self._max_workers = max_workers
+        self._sock: Optional[socket.socket] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._accept_thread: Optional[threading.Thread] = None
+        self._connections: List[_Connection] = []
+        self._lock = threading.Lock()
+        self.stats = {"connections": 0, "calls": 0, "batches": 0, "chunks": 0, "unrouted": 0}
+
+    @property
+    def running(self) -> bool:
+        return self._sock is not None
+
+    def start(self) -> bool:
+        """开始监听，平台不支持或监听失败时返回False"""
+        if self.running:
+            return True
+        if not is_supported():
+            logger.info("当前平台不支持Unix域套接字，插件调用使用HTTP接口")
+            return False
+        try:
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.bind(self.path)
+            os.chmod(self.path, 0o600)
+            sock.listen(16)
+        except OSError as e:
+            logger.warning(f"插件调用通道监听失败，插件调用使用HTTP接口: {e}")
+            return False
+        self._sock = sock
+        self._executor = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="mcp-plugin-channel")
+        self._accept_thread = threading.Thread(target=self._accept_loop, name="mcp-plugin-channel-accept", daemon=True)
+        self._accept_thread.start()
+        logger.info(f"插件调用通道已启动: {self.path}")
+        return True
+
+    def stop(self):
+        """停止监听并断开所有连接"""
+        sock, self._sock = self._sock, None
+        if sock is None:
+            return
+        try:
+            # 唤醒阻塞在accept上的线程
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        try:
+            sock.close()
+        except OSError:
+            pass
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for connection in connections:
+            connection.close()
+        if self._executor:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+        logger.info("插件调用通道已停止")
+
+    def _accept_loop(self):
+        sock = self._sock
+        while self._sock is sock:
+            try:
+                client, _ = sock.accept()
+            except OSError:
+                break
+            threading.Thread(target=self._serve, args=(client,), name="mcp-plugin-channel-conn", daemon=True).start()
+
+    def _serve(self, client: socket.socket):
+        connection = _Connection(client)
+        try:
+            hello = _read_frame_sync(client)
+            token = self._token_provider() or ""
+            if (not hello or hello.get("type") != "hello"
+                    or not hmac.compare_digest(str(hello.get("token", "")).encode(), token.encode())):
+                connection.send({"type": "hello", "ok": False, "message": "认证失败"})
+                return
+            connection.send({"type": "hello", "ok": True, "version": PROTOCOL_VERSION})
+            with self._lock:
+                self._connections.append(connection)
+                self.stats["connections"] += 1
+
+            while not connection.closed:
+                message = _read_frame_sync(client)
+                if message is None:
+                    break
+                if message.get("type") == "batch":
+                    self.stats["batches"] += 1
+                    for frame in message.get("frames") or []:
+                        self._handle(connection, frame)
+                else:
+                    self._handle(connection, message)
+        except (OSError, ValueError) as e:
+            if not connection.closed:
+                logger.debug(f"插件调用通道连接异常: {e}")
+        finally:
+            connection.close()
+            with self._lock:
+                if connection in self._connections:
+                    self._connections.remove(connection)
+
+    def _handle(self, connection: _Connection, frame: dict):
+        frame_type = frame.get("type")
+        if frame_type == "call":
+            executor = self._executor
+            if executor is None:
+                return
+            self.stats["calls"] += 1
+            with connection.calls_lock:
+                connection.running.add(frame.get("id"))
+            try:
+                executor.submit(self._run_call, connection, frame)
+            except RuntimeError:
+                # 通道正在停止
+                with connection.calls_lock:
+                    connection.running.discard(frame.get("id"))
+        elif frame_type == "cancel":
+            with connection.calls_lock:
+                if frame.get("id") in connection.running:
+                    connection.cancelled.add(frame.get("id"))
+
+    def _run_call(self, connection: _Connection, frame: dict):
+        try:
+            self._execute_call(connection, frame)
+        finally:
+            with connection.calls_lock:
+                connection.running.discard(frame.get("id"))
+                connection.cancelled.discard(frame.get("id"))
+
+    def _execute_call(self, connection: _Connection, frame: dict):
+        call_id = frame.get("id")
+        kind = frame.get("kind")
+        with _handlers_lock:
+            handler = _handlers.get(frame.get("plugin_id"))
+        if handler is None:
+            self.stats["unrouted"] += 1
+            connection.send({"type": "result", "id": call_id, "unrouted": True})
+            return
+
+        try:
+            result = handler(kind, frame.get("request") or {})
+        except Exception as e:
+            logger.error(f"插件调用通道执行失败: {frame.get('plugin_id')} {e}")
+            result = {"success": False, "message": f"执行失败: {str(e)}", "data": None}
+
+        data = result.get("data") if isinstance(result, dict) else None
+        if isinstance(data, Iterator):
+            if kind != "tool":
+                result = materialize_result(result)
+            else:
+                # 插件工具返回迭代器时逐块推送，最终结果不再携带数据
+                count = 0
+                try:
+                    for chunk in data:
+                        if call_id in connection.cancelled or not connection.send(
+                                {"type": "chunk", "id": call_id, "data": chunk}):
+                            break
+                        count += 1
+                except Exception as e:
+                    logger.error(f"插件工具流式输出失败: {frame.get('plugin_id')} {e}")
+                    result = {"success": False, "message": f"执行失败: {str(e)}", "data": None}
+                else:
+                    result = {**result, "data": None, "chunks": count}
+                finally:
+                    close = getattr(data, "close", None)
+                    if close:
+                        close()
+                self.stats["chunks"] += count
+
+        connection.send({"type": "result", "id": call_id, "result": result})
+
+
+# ---------------------------------------------------------------------------
+# 客户端（MCP服务器进程）
+# ---------------------------------------------------------------------------
+
+_CLOSED = object()
+
+
+class PluginChannelClient:
+    """插件调用通道客户端
+
+    所有调用共用一条连接，按id多路复用；同一轮事件循环内发出的多个帧合并为一个batch帧发送。
+    连接失败后在retry_interval秒内直接报告不可用，由调用方走HTTP接口。
+    """
+
+    def __init__(self, path: str, token: str, retry_interval: float = 5.0, connect_timeout: float = 3.0):
+        self.path = path
+        self._token = token or ""
+        self.retry_interval = retry_interval
+        self.connect_timeout = connect_timeout
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._read_task: Optional[asyncio.Task] = None
+        self._connect_lock: Optional[asyncio.Lock] = None
+        self._retry_at = 0.0
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, asyncio.Queue] = {}
+        self._outbox: List[dict] = []
+        self._flush_scheduled = False
+        self.stats = {"calls": 0, "frames": 0, "batched_frames": 0, "chunks": 0, "fallbacks": 0}
+
+    @property
+    def connected(self) -> bool:
+        return self._writer is not None and not self._writer.is_closing()
+
+    async def call(self, kind: str, plugin_id: str, request: dict, timeout: float,
+                   on_chunk: Optional[Callable[[int, Any], Awaitable[None]]] = None,
+                   keep_chunks: bool = True) -> dict:
+        """
+        调用插件工具或提示
+
+        Args:
+            kind: "tool" 或 "prompt"
+            plugin_id: 插件ID
+            request: 请求体，与HTTP接口相同（tool_name/prompt_name + arguments）
+            timeout: 空闲超时（秒），流式输出时每收到一块重新计时
+            on_chunk: 收到流式数据块时的回调 (序号, 数据)
+            keep_chunks: 是否保留数据块。保留时全部数据块在调用结束前都留在内存中，
+                数据块只需经 on_chunk 转发时传False，结果中 "chunks" 为收到的数据块数
+
+        Returns:
+            插件返回的结果字典；流式输出时数据块列表（或 keep_chunks=False 时的数据块数）放在 "chunks" 中
+
+        Raises:
+            PluginChannelUnavailable: 通道不可用或插件未接入通道（调用未执行）
+            asyncio.TimeoutError: 超时
+            ConnectionError: 调用发出后连接中断
+        """
+        await self._ensure_connected()
+        call_id = next(self._ids)
+        queue: asyncio.Queue = asyncio.Queue()
+        self._pending[call_id] = queue
+        self.stats["calls"] += 1
+        self._send({"type": "call", "id": call_id, "kind": kind, "plugin_id": plugin_id, "request": request})
+
+        chunks = []
+        chunk_count = 0
+        try:
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    self._send({"type": "cancel", "id": call_id})
+                    raise
+                if message is _CLOSED:
+                    raise ConnectionError("插件调用通道连接中断")
+                if message.get("type") == "chunk":
+                    chunk_count += 1
+                    self.stats["chunks"] += 1
+                    if keep_chunks:
+                        chunks.append(message.get("data"))
+                    if on_chunk is not None:
+                        await on_chunk(chunk_count, message.get("data"))
+                    continue
+                if message.get("unrouted"):
+                    self.stats["fallbacks"] += 1
+                    raise PluginChannelUnavailable(f"插件 {plugin_id} 未接入调用通道")
+                result = message.get("result")
+                if not isinstance(result, dict):
+                    result = {"success": False, "message": "插件返回格式错误", "data": None}
+                if chunk_count:
+                    result["chunks"] = chunks if keep_chunks else chunk_count
+                return result
+        finally:
+            self._pending.pop(call_id, None)
+
+    async def close(self):
+        writer, self._writer = self._writer, None
+        if self._read_task:
+            self._read_task.cancel()
+            self._read_task = None
+        if writer is not None:
+            writer.close()
+        self._fail_pending()
+
+    async def _ensure_connected(self):
+        if self.connected:
+            return
+        if time.monotonic() < self._retry_at:
+            raise PluginChannelUnavailable("插件调用通道不可用")
+        if self._connect_lock is None:
+            self._connect_lock = asyncio.Lock()
+        async with self._connect_lock:
+            if self.connected:
+                return
+            try:
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_unix_connection(self.path), self.connect_timeout
+                )
+                writer.write(encode_frame({"type": "hello", "token": self._token, "version": PROTOCOL_VERSION}))
+                hello = await asyncio.wait_for(self._read_frame(reader), self.connect_timeout)
+                if not hello or not hello.get("ok"):
+                    writer.close()
+                    raise ConnectionError((hello or {}).get("message", "握手失败"))
+            except (OSError, ConnectionError, asyncio.TimeoutError, ValueError) as e:
+                self._retry_at = time.monotonic() + self.retry_interval
+                logger.debug(f"连接插件调用通道失败，{self.retry_interval}秒内使用HTTP接口: {e}")
+                raise PluginChannelUnavailable(f"插件调用通道不可用: {e}")
+            self._reader, self._writer = reader, writer
+            self._read_task = asyncio.create_task(self._read_loop(reader))
+            logger.info(f"已连接插件调用通道: {self.path}")
+
+    @staticmethod
+    async def _read_frame(reader: asyncio.StreamReader) -> Optional[dict]:
+        try:
+            header = await reader.readexactly(_HEADER.size)
+            (length,) = _HEADER.unpack(header)
+            if length > MAX_FRAME_SIZE:
+                raise ValueError(f"帧过大: {length}")
+            return json.loads(await reader.readexactly(length))
+        except asyncio.IncompleteReadError:
+            return None
+
+    async def _read_loop(self, reader: asyncio.StreamReader):
+        try:
+            while True:
+                message = await self._read_frame(reader)
+                if message is None:
+                    break
+                queue = self._pending.get(message.get("id"))
+                if queue is not None:
+                    queue.put_nowait(message)
+        except (OSError, ValueError) as e:
+            logger.warning(f"插件调用通道读取失败: {e}")
+        except asyncio.CancelledError:
+            return
+        if self._reader is reader:
+            logger.info("插件调用通道连接已断开")
+            writer, self._writer, self._reader = self._writer, None, None
+            if writer is not None:
+                writer.close()
+            self._fail_pending()
+
+    def _fail_pending(self):
+        for queue in self._pending.values():
+            queue.put_nowait(_CLOSED)
+
+    def _send(self, message: dict):
+        self._outbox.append(message)
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            asyncio.get_running_loop().call_soon(self._flush)
+
+    def _flush(self):
+        self._flush_scheduled = False
+        frames, self._outbox = self._outbox, []
+        if not frames or not self.connected:
+            return
+        self.stats["frames"] += 1
+        if len(frames) == 1:
+            self._writer.write(encode_frame(frames[0]))
+        else:
+            self.stats["batched_frames"] += len(frames)
+            self._writer.write(encode_frame({"type": "batch", "frames": frames}))
+
+
+_client: Optional[PluginChannelClient] = None
+
+
+def configure_plugin_channel(path: Optional[str], token: str):
+    """MCP服务器启动时配置插件调用通道，path为空时只使用HTTP接口"""
+    global _client
+    _client = PluginChannelClient(path, token) if path and is_supported() else None
+    if _client:
+        logger.info(f"插件调用通道: {path}")
+
+
+def get_plugin_channel() -> Optional[PluginChannelClient]:
+    """返回插件调用通道客户端，未配置时返回None"""
+    return _client
+
+
+async def close_plugin_channel():
+    """关闭插件调用通道连接"""
+    if _client is not None:
+        await _client.close()
@@ -0,0 +1,185 @@
+"""
+MoviePilot API响应缓存
+缓存只读GET请求的响应，按端点设置过期时间，并合并并发的相同请求（single-flight）
+"""
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 可缓存的端点前缀及其缓存时间（秒），按顺序匹配，未匹配的端点不缓存
+# 插件工具的API端点可能有副作用，不在此列表中
+DEFAULT_TTL_RULES: Tuple[Tuple[str, float], ...] = (
+    ("/api/v1/site/resource/", 60),
+    ("/api/v1/site/", 300),
+    ("/api/v1/subscribe/", 30),
+    ("/api/v1/media/recognize", 600),
+    ("/api/v1/media/search", 300),
+    ("/api/v1/search/", 120),
+    ("/api/v1/download/clients", 300),
+    ("/api/v1/user/", 60),
+)
+
+# 多进程模式下的最长缓存时间（秒）：写请求只能使所在工作进程的缓存失效，
+# 其它工作进程上的缓存最多在这段时间内过期
+MULTI_WORKER_MAX_TTL = 5.0
+
+
+def _resource_prefix(endpoint: str) -> str:
+    """取端点的资源前缀，例如 /api/v1/subscribe/12 -> /api/v1/subscribe"""
+    parts = endpoint.split("?", 1)[0].split("/")
+    return "/".join(parts[:4])
+
+
+class ResponseCache:
+    """TTL + LRU 响应缓存，带请求合并"""
+
+    def __init__(self, max_entries: int = 512, ttl_rules: Tuple[Tuple[str, float], ...] = DEFAULT_TTL_RULES):
+        """
+        Args:
+            max_entries: 最大缓存条目数，超出时淘汰最久未使用的条目
+            ttl_rules: (端点前缀, 缓存秒数) 列表
+        """
+        self.max_entries = max_entries
+        self.enabled = True
+        self._ttl_rules = tuple(ttl_rules)
+        self._max_ttl: Optional[float] = None
+        # key -> (过期时间, 资源前缀, 响应)
+        self._entries: "OrderedDict[Hashable, Tuple[float, str, Any]]" = OrderedDict()
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        # 每次失效递增，请求期间发生失效时结果不写入缓存
+        self._generation = 0
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "evictions": 0,
+            "expired": 0,
+            "invalidations": 0,
+        }
+
+    def ttl_for(self, endpoint: str) -> Optional[float]:
+        """返回端点的缓存时间，不可缓存时返回None"""
+        for prefix, ttl in self._ttl_rules:
+            if endpoint.startswith(prefix):
+                return ttl if self._max_ttl is None else min(ttl, self._max_ttl)
+        return None
+
+    def set_max_ttl(self, max_ttl: Optional[float]):
+        """限制所有端点的缓存时间上限，None表示不限制；已缓存的条目被清空"""
+        self._max_ttl = max_ttl
+        self.clear()
+
+    @staticmethod
+    def make_key(method: str, endpoint: str, params: Optional[Dict[str, Any]],
+                 access_token: Optional[str]) -> Hashable:
+        """按请求方法、端点、查询参数和令牌身份生成缓存键"""
+        params_key = json.dumps(params, sort_keys=True, ensure_ascii=False, default=str) if params else ""
+        token_key = hashlib.sha1(access_token.encode()).hexdigest()[:16] if access_token else ""
+        return method.upper(), endpoint, params_key, token_key
+
+    async def get_or_fetch(self, key: Hashable, endpoint: str, ttl: float,
+                           fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        返回缓存的响应；未命中时调用fetch，并让并发的相同请求共享同一次调用
+
+        Args:
+            key: 缓存键
+            endpoint: 请求端点，用于按资源失效
+            ttl: 缓存秒数
+            fetch: 实际发送请求的协程函数
+
+        Returns:
+            响应数据的副本
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return copy.deepcopy(entry[2])
+            del self._entries[key]
+            self._stats["expired"] += 1
+
+        future = self._in_flight.get(key)
+        if future is not None:
+            self._stats["coalesced"] += 1
+            try:
+                return copy.deepcopy(await asyncio.shield(future))
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # 发起请求的调用被取消，由当前调用重新请求
+                return await self.get_or_fetch(key, endpoint, ttl, fetch)
+
+        self._stats["misses"] += 1
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        generation = self._generation
+        try:
+            result = await fetch()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # 没有等待者时避免"exception was never retrieved"警告
+            future.exception()
+            raise
+        finally:
+            self._in_flight.pop(key, None)
+
+        # 等待者与缓存共享同一份快照，调用方可以自由修改返回的结果
+        snapshot = copy.deepcopy(result)
+        future.set_result(snapshot)
+        if generation == self._generation and self._cacheable(result):
+            self._store(key, _resource_prefix(endpoint), ttl, snapshot)
+        return result
+
+    @staticmethod
+    def _cacheable(result: Any) -> bool:
+        # 错误响应不缓存
+        return not (isinstance(result, dict) and "error" in result)
+
+    def _store(self, key: Hashable, prefix: str, ttl: float, result: Any):
+        self._entries[key] = (time.monotonic() + ttl, prefix, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def invalidate(self, endpoint: str) -> int:
+        """使与端点同一资源的缓存失效，例如写 /api/v1/subscribe/12 会清除所有订阅相关缓存"""
+        prefix = _resource_prefix(endpoint)
+        stale = [key for key, entry in self._entries.items() if entry[1] == prefix]
+        for key in stale:
+            del self._entries[key]
+        self._generation += 1
+        self._stats["invalidations"] += 1
+        if stale:
+            logger.debug("写请求 %s 使 %s 条缓存失效", endpoint, len(stale))
+        return len(stale)
+
+    def clear(self):
+        """清空缓存"""
+        self._entries.clear()
+        self._generation += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """返回缓存统计"""
+        lookups = self._stats["hits"] + self._stats["misses"] + self._stats["coalesced"]
+        return {
+            "enabled": self.enabled,
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "max_ttl": self._max_ttl,
+            "in_flight": len(self._in_flight),
+            **self._stats,
+            "hit_ratio": round((self._stats["hits"] + self._stats["coalesced"]) / lookups, 4) if lookups else 0.0,
+        }
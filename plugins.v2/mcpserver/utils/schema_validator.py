@@ -0,0 +1,360 @@
+"""
+参数校验器编译
+把工具/提示的JSON Schema参数定义在注册时编译成闭包，调用时直接执行，不再逐次遍历Schema。
+支持的关键字：type、enum、const、default、required、properties、additionalProperties、items、
+minimum、maximum、exclusiveMinimum、exclusiveMaximum、minLength、maxLength、pattern、minItems、maxItems。
+未支持的关键字会被忽略。本模块只依赖标准库，MCP服务器与插件侧（dev/mcp_dev.py）共用。
+"""
+
+import copy
+import operator
+import re
+from typing import Any, Callable, List, Optional, Tuple
+
+_PY_TYPES = {
+    "string": (str,),
+    "integer": (int,),
+    "number": (int, float),
+    "boolean": (bool,),
+    "array": (list,),
+    "object": (dict,),
+    "null": (type(None),),
+}
+
+_TYPE_NAMES = {
+    "string": "字符串",
+    "integer": "整数",
+    "number": "数字",
+    "boolean": "布尔",
+    "array": "数组",
+    "object": "对象",
+    "null": "null",
+}
+
+_NUMBER_CLASSES = (int, float)
+
+# MCP的提示参数都是字符串，只保留适用于字符串的校验关键字
+_PROMPT_ARGUMENT_KEYWORDS = ("enum", "default", "pattern", "minLength", "maxLength")
+
+
+class ArgumentValidationError(ValueError):
+    """参数校验失败"""
+
+
+class _Invalid(ArgumentValidationError):
+    """校验闭包内部抛出的异常，向上传递时逐级补全参数路径，转为字符串时才拼接错误信息"""
+
+    def __init__(self, template: str, path: Optional[list] = None):
+        super().__init__(template)
+        self.template = template
+        self.path = path if path is not None else []
+
+    def __str__(self) -> str:
+        path = ""
+        for part in self.path:
+            path += f"[{part}]" if isinstance(part, int) else (f".{part}" if path else part)
+        return self.template.format(path=path, label=f"参数 {path} " if path else "参数")
+
+
+def _escape(text: str) -> str:
+    """转义 str.format 的花括号"""
+    return text.replace("{", "{{").replace("}", "}}")
+
+
+def compile_validator(schema: Optional[dict]) -> Callable[[Optional[dict]], dict]:
+    """
+    编译参数定义（type为object的JSON Schema）
+
+    Args:
+        schema: 参数定义
+
+    Returns:
+        校验函数：接收参数字典，返回补全默认值后的参数字典（无需补全时返回原字典）；
+        校验失败时抛出 ArgumentValidationError
+    """
+    schema = schema or {}
+    if "properties" in schema or "required" in schema or schema.get("additionalProperties") is False:
+        if schema.get("type") in (None, "object") and not _compile_checks(schema):
+            return _compile_object(schema, _type_spec(schema)[2] if schema.get("type") else None, accept_none=True)
+    validator = _compile(schema)
+
+    def validate(arguments: Optional[dict]) -> dict:
+        return validator({} if arguments is None else arguments)
+
+    return validate
+
+
+def prompt_arguments_schema(arguments: List[dict]) -> dict:
+    """把提示的参数列表 [{"name", "description", "required", ...}] 转换为JSON Schema"""
+    properties = {}
+    required = []
+    for argument in arguments or []:
+        name = argument.get("name")
+        if not name:
+            continue
+        properties[name] = {
+            key: argument[key] for key in _PROMPT_ARGUMENT_KEYWORDS if key in argument
+        }
+        if argument.get("required", False):
+            required.append(name)
+    return {"type": "object", "properties": properties, "required": required}
+
+
+def _identity(value):
+    return value
+
+
+def _type_spec(schema: dict) -> Tuple[tuple, bool, str]:
+    """返回 (Python类型元组, 是否拒绝布尔值, 错误信息模板)"""
+    schema_type = schema.get("type")
+    names = schema_type if isinstance(schema_type, list) else [schema_type]
+    py_types = tuple(py_type for name in names for py_type in _PY_TYPES.get(name, ()))
+    # bool是int的子类，只有允许boolean时才接受布尔值
+    reject_bool = "boolean" not in names and int in py_types
+    type_message = "{label}应该是" + "或".join(_TYPE_NAMES.get(name, str(name)) for name in names) + "类型"
+    return py_types, reject_bool, type_message
+
+
+def _is_type_only(schema: Any) -> bool:
+    """是否只需要检查类型（不含范围、枚举、嵌套结构等）"""
+    return (isinstance(schema, dict) and bool(_type_spec(schema)[0]) and not _compile_checks(schema)
+            and not any(key in schema for key in ("properties", "required", "additionalProperties", "items")))
+
+
+def _compile(schema: Any) -> Callable[[Any], Any]:
+    """把单个Schema节点编译为校验闭包，闭包只在需要补全默认值时才返回新对象"""
+    if not isinstance(schema, dict):
+        return _identity
+
+    schema_type = schema.get("type")
+    py_types, reject_bool, type_message = _type_spec(schema)
+
+    checks = _compile_checks(schema)
+
+    tail = None
+    if "properties" in schema or "required" in schema or schema.get("additionalProperties") is False:
+        if not checks and schema_type in (None, "object"):
+            # 对象节点的类型检查合并进对象校验闭包
+            return _compile_object(schema, type_message if schema_type else None)
+        tail = _compile_object(schema)
+    elif isinstance(schema.get("items"), dict):
+        tail = _compile_array(schema["items"])
+        if tail is _identity:
+            tail = None
+
+    if not py_types and not checks and tail is None:
+        return _identity
+
+    if not checks and tail is None:
+        def validate_type(value):
+            if not isinstance(value, py_types) or (reject_bool and value.__class__ is bool):
+                raise _Invalid(type_message)
+            return value
+
+        return validate_type
+
+    if tail is None and len(checks) == 1 and "enum" in schema and (not py_types or all(
+            isinstance(item, py_types) and not (reject_bool and item.__class__ is bool)
+            for item in schema["enum"])):
+        # 枚举值都符合声明的类型时，枚举检查已经隐含了类型检查
+        return checks[0]
+
+    if len(checks) == 1 and tail is None:
+        check = checks[0]
+
+        def validate_one(value):
+            if py_types and (not isinstance(value, py_types) or (reject_bool and value.__class__ is bool)):
+                raise _Invalid(type_message)
+            check(value)
+            return value
+
+        return validate_one
+
+    def validate(value):
+        if py_types and (not isinstance(value, py_types) or (reject_bool and value.__class__ is bool)):
+            raise _Invalid(type_message)
+        for check in checks:
+            check(value)
+        return tail(value) if tail is not None else value
+
+    return validate
+
+
+def _compile_checks(schema: dict) -> List[Callable[[Any], Any]]:
+    """枚举、常量、数值范围、字符串长度与格式、数组长度；每个检查通过时原样返回值"""
+    checks = []
+
+    if "enum" in schema:
+        allowed = list(schema["enum"])
+        enum_message = "{label}的值不在允许范围内: " + _escape(str(allowed))
+
+        def check_enum(value):
+            # 1 == True，需要排除布尔值与数字混用
+            if value not in allowed or (value.__class__ is bool and not any(item is value for item in allowed)):
+                raise _Invalid(enum_message)
+            return value
+
+        checks.append(check_enum)
+
+    if "const" in schema:
+        expected = schema["const"]
+        const_message = "{label}的值必须是 " + _escape(repr(expected))
+
+        def check_const(value):
+            if value != expected:
+                raise _Invalid(const_message)
+            return value
+
+        checks.append(check_const)
+
+    for keyword, fails, relation in (
+        ("minimum", operator.lt, "不能小于"),
+        ("maximum", operator.gt, "不能大于"),
+        ("exclusiveMinimum", operator.le, "必须大于"),
+        ("exclusiveMaximum", operator.ge, "必须小于"),
+    ):
+        bound = schema.get(keyword)
+        if isinstance(bound, (int, float)) and not isinstance(bound, bool):
+            def check_number(value, bound=bound, fails=fails, message=f"{{label}}{relation} {bound}"):
+                # 布尔值的类型为bool，不在数值类型之列
+                if value.__class__ in _NUMBER_CLASSES and fails(value, bound):
+                    raise _Invalid(message)
+                return value
+
+            checks.append(check_number)
+
+    for keyword, kind, fails, unit in (
+        ("minLength", str, operator.lt, "个字符"), ("maxLength", str, operator.gt, "个字符"),
+        ("minItems", list, operator.lt, "项"), ("maxItems", list, operator.gt, "项"),
+    ):
+        limit = schema.get(keyword)
+        if isinstance(limit, int) and not isinstance(limit, bool):
+            relation = "不能少于" if fails is operator.lt else "不能超过"
+
+            def check_length(value, limit=limit, kind=kind, fails=fails, message=f"{{label}}长度{relation} {limit} {unit}"):
+                if isinstance(value, kind) and fails(len(value), limit):
+                    raise _Invalid(message)
+                return value
+
+            checks.append(check_length)
+
+    pattern = schema.get("pattern")
+    if isinstance(pattern, str):
+        search = re.compile(pattern).search
+        pattern_message = "{label}格式不正确，应匹配 " + _escape(pattern)
+
+        def check_pattern(value):
+            if isinstance(value, str) and not search(value):
+                raise _Invalid(pattern_message)
+            return value
+
+        checks.append(check_pattern)
+
+    return checks
+
+
+def _compile_object(schema: dict, type_message: Optional[str] = None,
+                    accept_none: bool = False) -> Callable[[Any], Any]:
+    """
+    编译对象节点
+
+    Args:
+        schema: 对象Schema
+        type_message: 给出时非字典的值校验失败，否则原样返回
+        accept_none: 是否把None当作空字典（顶层参数）
+    """
+    properties = schema.get("properties") or {}
+    required = tuple(schema.get("required") or ())
+    # 只检查类型的属性在循环内直接判断，省去一次函数调用
+    simple_types = {
+        name: _type_spec(definition) for name, definition in properties.items() if _is_type_only(definition)
+    }
+    validators = {}
+    for name, definition in properties.items():
+        if name not in simple_types:
+            validator = _compile(definition)
+            if validator is not _identity:
+                validators[name] = validator
+    defaults = {
+        name: definition["default"]
+        for name, definition in properties.items()
+        if isinstance(definition, dict) and "default" in definition
+    }
+    additional = schema.get("additionalProperties", True)
+    reject_additional = additional is False
+    additional_validator = None
+    if isinstance(additional, dict):
+        additional_validator = _compile(additional)
+        if additional_validator is _identity:
+            additional_validator = None
+    check_unknown = reject_additional or additional_validator is not None
+
+    def validate_object(value):
+        if not isinstance(value, dict):
+            if value is None and accept_none:
+                value = {}
+            elif type_message is not None:
+                raise _Invalid(type_message)
+            else:
+                return value
+        for name in required:
+            if name not in value:
+                raise _Invalid("缺少必需参数: {path}", [name])
+
+        result = value
+        for name, item in value.items():
+            spec = simple_types.get(name)
+            if spec is not None:
+                if not isinstance(item, spec[0]) or (spec[1] and item.__class__ is bool):
+                    raise _Invalid(spec[2], [name])
+                continue
+            validator = validators.get(name)
+            if validator is None:
+                if not check_unknown or name in properties:
+                    continue
+                if reject_additional:
+                    raise _Invalid("不支持的参数: {path}", [name])
+                validator = additional_validator
+            try:
+                checked = validator(item)
+            except _Invalid as e:
+                e.path.insert(0, name)
+                raise
+            if checked is not item:
+                if result is value:
+                    result = dict(value)
+                result[name] = checked
+
+        for name, default in defaults.items():
+            if name not in result:
+                if result is value:
+                    result = dict(value)
+                # 默认值可能是可变对象，避免多次调用共享同一实例
+                result[name] = copy.deepcopy(default) if isinstance(default, (dict, list)) else default
+        return result
+
+    return validate_object
+
+
+def _compile_array(items_schema: dict) -> Callable[[Any], Any]:
+    item_validator = _compile(items_schema)
+    if item_validator is _identity:
+        return _identity
+
+    def validate_array(value):
+        if not isinstance(value, list):
+            return value
+        result = value
+        for index, item in enumerate(value):
+            try:
+                checked = item_validator(item)
+            except _Invalid as e:
+                e.path.insert(0, index)
+                raise
+            if checked is not item:
+                if result is value:
+                    result = list(value)
+                result[index] = checked
+        return result
+
+    return validate_array
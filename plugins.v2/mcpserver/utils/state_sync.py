@@ -1,8 +1,17 @@
 """
 状态同步管理器
 确保内存状态与文件状态的一致性
+
+每个同步目标记录文件签名（mtime、大小）、已应用到内存的内容哈希和代数（generation）：
+- 签名未变化时不读取文件；签名变化时读取内容并计算哈希，哈希未变化时不解析、不更新内存
+- 只有内容真正变化并应用到内存后代数才加一，调用方可以随时读取代数判断状态是否变化，没有任何I/O
+- 由文件监听器（watchdog/通知端点）负责的目标不再定时轮询，空闲时不产生文件I/O
+- 每个目标使用独立的锁，同步一个目标时不阻塞其他目标
 """
+import hashlib
+import json
 import logging
+import os
 import threading
 import time
 from pathlib import Path
@@ -12,208 +21,275 @@ from .file_operations import safe_read_json
 logger = logging.getLogger(__name__)
 
 
+def _content_hash(data: bytes) -> str:
+    """计算文件内容哈希"""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
 class StateSyncManager:
     """状态同步管理器，确保内存与文件状态一致"""
-    
+
     def __init__(self):
         self._sync_configs: Dict[str, Dict[str, Any]] = {}
+        # 只保护同步目标字典本身，同步过程使用每个目标自己的锁
         self._sync_lock = threading.RLock()
         self._monitor_thread = None
         self._stop_event = threading.Event()
+        self._wakeup = threading.Event()
         self._monitor_interval = 10  # 默认10秒检查一次
-    
-    def register_sync_target(self, 
+        self._generation = 0
+        self._generation_lock = threading.Lock()
+
+    def register_sync_target(self,
                            name: str,
                            file_path: Path,
                            memory_getter: Callable[[], Dict[str, Any]],
-                           memory_setter: Callable[[Dict[str, Any]], None],
+                           memory_setter: Callable[[Dict[str, Any]], Any],
                            sync_interval: int = 10):
         """
         注册需要同步的目标
-        
+
         Args:
             name: 同步目标名称
             file_path: 文件路径
-            memory_getter: 获取内存状态的函数
-            memory_setter: 设置内存状态的函数
+            memory_getter: 获取内存状态的函数（仅用于诊断，同步时比较内容哈希，不再比较内存状态）
+            memory_setter: 设置内存状态的函数，返回值作为同步结果
             sync_interval: 同步间隔（秒）
         """
         with self._sync_lock:
+            previous = self._sync_configs.get(name)
             self._sync_configs[name] = {
-                "file_path": file_path,
+                "file_path": Path(os.path.abspath(file_path)),
                 "memory_getter": memory_getter,
                 "memory_setter": memory_setter,
                 "sync_interval": sync_interval,
                 "last_sync": 0,
-                "last_file_mtime": 0
+                "signature": None,
+                "content_hash": None,
+                # 重新注册时保留代数，保证代数单调递增
+                "generation": previous["generation"] if previous else 0,
+                "watched": previous["watched"] if previous else False,
+                "lock": threading.RLock(),
             }
             logger.info(f"注册状态同步目标: {name}")
-    
+        self._wakeup.set()
+
+    def has_target(self, name: str) -> bool:
+        """是否已注册指定的同步目标"""
+        return name in self._sync_configs
+
+    def get_target_file(self, name: str) -> Optional[Path]:
+        """获取同步目标的文件路径，未注册时返回None"""
+        config = self._sync_configs.get(name)
+        return config["file_path"] if config else None
+
+    def set_watched(self, name: str, watched: bool = True):
+        """
+        标记目标是否由文件监听器负责变化通知
+
+        被监听的目标不再定时轮询，由监听器调用 sync_target 同步
+        """
+        config = self._sync_configs.get(name)
+        if config is None:
+            logger.warning(f"同步目标不存在: {name}")
+            return
+        config["watched"] = watched
+        self._wakeup.set()
+
+    @property
+    def generation(self) -> int:
+        """所有目标的总代数，任一目标内容变化并应用到内存后加一"""
+        return self._generation
+
+    def get_generation(self, name: Optional[str] = None) -> int:
+        """
+        获取同步目标的代数，只读取内存中的计数器
+
+        Args:
+            name: 同步目标名称，None表示所有目标的总代数
+        """
+        if name is None:
+            return self._generation
+        config = self._sync_configs.get(name)
+        return config["generation"] if config else 0
+
     def start_monitoring(self):
         """启动状态监控"""
         if self._monitor_thread and self._monitor_thread.is_alive():
             logger.warning("状态监控已在运行")
             return
-        
+
         self._stop_event.clear()
         self._monitor_thread = threading.Thread(target=self._monitor_loop, daemon=True)
         self._monitor_thread.start()
         logger.info("状态同步监控已启动")
-    
+
     def stop_monitoring(self):
         """停止状态监控"""
         if self._monitor_thread:
             self._stop_event.set()
+            self._wakeup.set()
             self._monitor_thread.join(timeout=5)
             if self._monitor_thread.is_alive():
                 logger.warning("状态监控线程未能正常停止")
             else:
                 logger.info("状态同步监控已停止")
-    
+
     def _monitor_loop(self):
-        """监控循环"""
+        """监控循环：只轮询未被文件监听器接管的目标，没有需要轮询的目标时一直等待"""
         try:
             while not self._stop_event.is_set():
                 current_time = time.time()
-                
+                wait_time = None
+
                 with self._sync_lock:
-                    for name, config in self._sync_configs.items():
-                        try:
-                            # 检查是否需要同步
-                            if current_time - config["last_sync"] >= config["sync_interval"]:
-                                self._check_and_sync(name, config)
-                                config["last_sync"] = current_time
-                        except Exception as e:
-                            logger.error(f"同步目标 {name} 时发生异常: {e}")
-                
-                # 等待下一次检查
-                self._stop_event.wait(self._monitor_interval)
-                
+                    targets = list(self._sync_configs.items())
+
+                for name, config in targets:
+                    if config["watched"]:
+                        continue
+                    try:
+                        # 检查是否需要同步
+                        due = config["last_sync"] + config["sync_interval"]
+                        if current_time >= due:
+                            self.sync_target(name)
+                            config["last_sync"] = current_time
+                            due = current_time + config["sync_interval"]
+                        remaining = max(due - current_time, 0.0)
+                        wait_time = remaining if wait_time is None else min(wait_time, remaining)
+                    except Exception as e:
+                        logger.error(f"同步目标 {name} 时发生异常: {e}")
+
+                # 等待下一次检查，注册新目标或监听状态变化时提前唤醒
+                if wait_time is not None:
+                    wait_time = max(wait_time, self._monitor_interval)
+                self._wakeup.wait(wait_time)
+                self._wakeup.clear()
+
         except Exception as e:
             logger.error(f"状态监控循环异常: {e}")
-    
-    def _check_and_sync(self, name: str, config: Dict[str, Any]):
-        """检查并同步状态"""
+
+    def sync_target(self, name: str, force: bool = False, ignore_signature: bool = False) -> Dict[str, Any]:
+        """
+        检查并同步指定目标
+
+        Args:
+            name: 同步目标名称
+            force: 为True时忽略文件签名和内容哈希，总是重新应用文件内容
+            ignore_signature: 为True时即使文件签名未变化也读取文件比较内容哈希（已知文件被写入时使用）
+
+        Returns:
+            同步结果，包含 changed（是否应用到内存）和 generation
+        """
+        config = self._sync_configs.get(name)
+        if config is None:
+            logger.warning(f"同步目标不存在: {name}")
+            return {"success": False, "message": f"同步目标不存在: {name}"}
+
+        with config["lock"]:
+            try:
+                return self._check_and_sync(name, config, force, ignore_signature)
+            except Exception as e:
+                logger.error(f"检查同步状态失败 {name}: {e}")
+                return {"success": False, "message": str(e), "generation": config["generation"]}
+
+    def _check_and_sync(self, name: str, config: Dict[str, Any], force: bool = False,
+                        ignore_signature: bool = False) -> Dict[str, Any]:
+        """检查并同步状态，调用方持有目标锁"""
         file_path = config["file_path"]
-        
+
         try:
-            # 检查文件是否存在和修改时间
-            if not file_path.exists():
+            stat = file_path.stat()
+            signature = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            signature = None
+
+        # 文件签名未变化，内存已经是该文件的内容
+        if not (force or ignore_signature) and signature == config["signature"]:
+            return {"success": True, "changed": False, "generation": config["generation"]}
+
+        if signature is None:
+            # 文件被删除时清空内存状态；从未同步过时无需处理
+            if not force and config["content_hash"] is None:
                 logger.debug(f"同步目标文件不存在: {name}")
-                return
-            
-            current_mtime = file_path.stat().st_mtime
-            
-            # 如果文件没有变化，检查内存与文件的一致性
-            if current_mtime == config["last_file_mtime"]:
-                self._verify_consistency(name, config)
-            else:
-                # 文件有变化，从文件同步到内存
-                self._sync_from_file(name, config)
-                config["last_file_mtime"] = current_mtime
-                
-        except Exception as e:
-            logger.error(f"检查同步状态失败 {name}: {e}")
-    
-    def _verify_consistency(self, name: str, config: Dict[str, Any]):
-        """验证内存与文件的一致性"""
-        try:
-            file_path = config["file_path"]
-            memory_getter = config["memory_getter"]
-            
-            # 读取文件状态
-            file_data = safe_read_json(file_path, default_value={})
-            
-            # 获取内存状态
-            memory_data = memory_getter()
-            
-            # 比较状态
-            if not self._compare_states(file_data, memory_data):
-                logger.warning(f"检测到状态不一致: {name}，从文件重新同步")
-                self._sync_from_file(name, config)
-                
-        except Exception as e:
-            logger.error(f"验证一致性失败 {name}: {e}")
-    
-    def _sync_from_file(self, name: str, config: Dict[str, Any]):
-        """从文件同步到内存"""
+                return {"success": True, "changed": False, "generation": config["generation"]}
+            raw = b""
+        else:
+            raw = file_path.read_bytes()
+        content_hash = _content_hash(raw) if raw else None
+        if not force and content_hash is not None and content_hash == config["content_hash"]:
+            # 文件被重写但内容相同（如只更新了mtime）
+            config["signature"] = signature
+            return {"success": True, "changed": False, "generation": config["generation"]}
+
         try:
-            file_path = config["file_path"]
-            memory_setter = config["memory_setter"]
-            
-            # 读取文件数据
+            file_data = json.loads(raw) if raw.strip() else {}
+        except ValueError:
+            # 文件损坏时交给 safe_read_json 从备份恢复，下次检查重新计算哈希
+            logger.warning(f"同步目标文件解析失败，尝试从备份读取: {name}")
             file_data = safe_read_json(file_path, default_value={})
-            
-            # 更新内存状态
-            memory_setter(file_data)
-            
-            logger.debug(f"已从文件同步状态: {name}")
-            
-        except Exception as e:
-            logger.error(f"从文件同步失败 {name}: {e}")
-    
-    def _compare_states(self, state1: Dict[str, Any], state2: Dict[str, Any]) -> bool:
-        """比较两个状态是否一致"""
-        try:
-            # 简单的键集合比较
-            keys1 = set(state1.keys())
-            keys2 = set(state2.keys())
-            
-            if keys1 != keys2:
-                return False
-            
-            # 比较每个键的值（简化版本，只比较插件ID）
-            for key in keys1:
-                if key not in state2:
-                    return False
-                
-                # 对于工具注册，比较工具数量
-                if isinstance(state1[key], dict) and "tools" in state1[key]:
-                    tools1 = state1[key].get("tools", [])
-                    tools2 = state2[key].get("tools", []) if isinstance(state2[key], dict) else []
-                    if len(tools1) != len(tools2):
-                        return False
-            
-            return True
-            
-        except Exception as e:
-            logger.error(f"比较状态时发生异常: {e}")
-            return False
-    
+            content_hash = None
+
+        result = self._sync_from_file(name, config, file_data)
+        config["signature"] = signature if content_hash or not raw else None
+        config["content_hash"] = content_hash
+        config["generation"] += 1
+        with self._generation_lock:
+            self._generation += 1
+
+        if not isinstance(result, dict):
+            result = {"success": True}
+        return {**result, "changed": True, "generation": config["generation"]}
+
+    def _sync_from_file(self, name: str, config: Dict[str, Any], file_data: Dict[str, Any]) -> Any:
+        """把文件内容应用到内存"""
+        result = config["memory_setter"](file_data)
+        logger.debug(f"已从文件同步状态: {name}")
+        return result
+
     def force_sync(self, name: Optional[str] = None):
         """强制同步指定目标或所有目标"""
-        with self._sync_lock:
-            if name:
-                if name in self._sync_configs:
-                    config = self._sync_configs[name]
-                    self._sync_from_file(name, config)
-                    logger.info(f"强制同步完成: {name}")
-                else:
-                    logger.warning(f"同步目标不存在: {name}")
+        if name:
+            if name in self._sync_configs:
+                self.sync_target(name, force=True)
+                logger.info(f"强制同步完成: {name}")
             else:
-                # 同步所有目标
-                for target_name, config in self._sync_configs.items():
-                    self._sync_from_file(target_name, config)
-                logger.info("强制同步所有目标完成")
-    
+                logger.warning(f"同步目标不存在: {name}")
+        else:
+            # 同步所有目标
+            with self._sync_lock:
+                names = list(self._sync_configs.keys())
+            for target_name in names:
+                self.sync_target(target_name, force=True)
+            logger.info("强制同步所有目标完成")
+
     def get_sync_status(self) -> Dict[str, Dict[str, Any]]:
         """获取同步状态"""
         with self._sync_lock:
-            status = {}
-            for name, config in self._sync_configs.items():
-                file_path = config["file_path"]
-                status[name] = {
-                    "file_exists": file_path.exists(),
-                    "last_sync": config["last_sync"],
-                    "sync_interval": config["sync_interval"],
-                    "file_mtime": config["last_file_mtime"]
-                }
-                
-                if file_path.exists():
-                    status[name]["current_file_mtime"] = file_path.stat().st_mtime
-                    status[name]["file_size"] = file_path.stat().st_size
-            
-            return status
+            targets = list(self._sync_configs.items())
+
+        status = {}
+        for name, config in targets:
+            file_path = config["file_path"]
+            signature = config["signature"]
+            status[name] = {
+                "file_exists": file_path.exists(),
+                "last_sync": config["last_sync"],
+                "sync_interval": config["sync_interval"],
+                "watched": config["watched"],
+                "generation": config["generation"],
+                "content_hash": config["content_hash"],
+                "file_mtime": signature[0] / 1e9 if signature else 0
+            }
+
+            try:
+                stat = file_path.stat()
+                status[name]["current_file_mtime"] = stat.st_mtime
+                status[name]["file_size"] = stat.st_size
+            except FileNotFoundError:
+                pass
+
+        return status
 
 
 # 全局实例
@@ -228,7 +304,7 @@ def get_state_sync_manager() -> StateSyncManager:
 def register_sync_target(name: str,
                         file_path: Path,
                         memory_getter: Callable[[], Dict[str, Any]],
-                        memory_setter: Callable[[Dict[str, Any]], None],
+                        memory_setter: Callable[[Dict[str, Any]], Any],
                         sync_interval: int = 10):
     """注册同步目标的便捷函数"""
     return _state_sync_manager.register_sync_target(
@@ -236,6 +312,11 @@ def register_sync_target(name: str,
     )
 
 
+def get_generation(name: Optional[str] = None) -> int:
+    """获取同步目标代数的便捷函数"""
+    return _state_sync_manager.get_generation(name)
+
+
 def start_state_monitoring():
     """启动状态监控的便捷函数"""
     return _state_sync_manager.start_monitoring()
@@ -0,0 +1,417 @@
+#!/usr/bin/env python3
+"""
+多进程模式的前置路由
+监听对外端口，把请求转发给多个MCP服务器工作进程，并保证同一会话的请求始终落在同一个工作进程上。
+
+会话粘滞：
+- Streamable HTTP：记录响应头 mcp-session-id 对应的工作进程，后续按请求头路由，DELETE 后移除
+- SSE：从 /sse/ 事件流的 endpoint 事件中读出 session_id，后续 /sse/messages/?session_id= 按此路由，
+  事件流结束后移除
+未知会话返回404，客户端按MCP规范重新初始化会话。
+
+控制端点：
+- /health：任一工作进程健康即返回200，并列出各工作进程状态
+- /control/plugins/reload：转发给所有工作进程（每个进程各自维护注册表）
+- /control/tools/stats：汇总各工作进程的统计
+控制端点需要Bearer Token（与工作进程相同）；未设置Token时只接受本机请求。
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import sys
+import traceback
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Optional, Tuple
+from urllib.parse import parse_qs
+
+import anyio
+import httpx
+from starlette.types import Message, Receive, Scope, Send
+
+from auth import CONTROL_PATH_PREFIX, bearer_header, authorize_request
+
+logger = logging.getLogger(__name__)
+
+# 不转发的逐跳请求/响应头
+HOP_BY_HOP_HEADERS = frozenset({
+    b"connection", b"keep-alive", b"proxy-authenticate", b"proxy-authorization",
+    b"te", b"trailer", b"transfer-encoding", b"upgrade", b"host",
+})
+
+# 最多记录的会话数，超出时淘汰最久未使用的会话
+MAX_SESSIONS = 10000
+
+SESSION_HEADER = b"mcp-session-id"
+
+
+class WorkerRouter:
+    """按会话粘滞转发请求的ASGI应用"""
+
+    def __init__(self, upstreams: List[str], health_interval: float = 5, auth_token: Optional[str] = None):
+        """
+        Args:
+            upstreams: 工作进程地址列表，如 http://127.0.0.1:3112
+            health_interval: 工作进程健康检查间隔（秒）
+            auth_token: 控制端点的认证Token
+        """
+        self.upstreams = [upstream.rstrip("/") for upstream in upstreams]
+        self._expected_auth = bearer_header(auth_token)
+        self.health_interval = health_interval
+        self._healthy = [True] * len(self.upstreams)
+        self._active = [0] * len(self.upstreams)
+        self._next = 0
+        # 会话ID -> 工作进程序号
+        self._sessions: "OrderedDict[str, int]" = OrderedDict()
+        self._client: Optional[httpx.AsyncClient] = None
+        self._health_task: Optional[asyncio.Task] = None
+
+    # ---- 生命周期 ----
+
+    async def _startup(self):
+        self._client = httpx.AsyncClient(
+            timeout=httpx.Timeout(None, connect=5.0),
+            limits=httpx.Limits(max_connections=None, max_keepalive_connections=32),
+        )
+        self._health_task = asyncio.create_task(self._health_loop())
+        logger.info(f"前置路由已就绪，工作进程: {', '.join(self.upstreams)}")
+
+    async def _shutdown(self):
+        if self._health_task:
+            self._health_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._health_task
+        if self._client:
+            await self._client.aclose()
+
+    async def _health_loop(self):
+        while True:
+            await self._check_workers()
+            await asyncio.sleep(self.health_interval)
+
+    async def _check_workers(self) -> List[dict]:
+        """检查所有工作进程，工作进程不健康时丢弃其会话（重启后会话已不存在）"""
+        async def check(index: int) -> dict:
+            startup = None
+            try:
+                response = await self._client.get(f"{self.upstreams[index]}/health", timeout=3)
+                healthy = response.status_code == 200
+                if healthy:
+                    startup = response.json().get("startup")
+            except (httpx.HTTPError, ValueError):
+                healthy = False
+            if self._healthy[index] and not healthy:
+                dropped = self._drop_worker_sessions(index)
+                logger.warning(f"工作进程 {index} 健康检查失败，已移除 {dropped} 个会话")
+            elif not self._healthy[index] and healthy:
+                logger.info(f"工作进程 {index} 已恢复")
+            self._healthy[index] = healthy
+            return {"worker": index, "upstream": self.upstreams[index], "healthy": healthy,
+                    "active_requests": self._active[index], "startup": startup}
+
+        return list(await asyncio.gather(*(check(i) for i in range(len(self.upstreams)))))
+
+    # ---- 会话粘滞 ----
+
+    def _pick_worker(self) -> Optional[int]:
+        """为新会话选择工作进程：健康进程中进行中请求最少的，相同时轮询"""
+        candidates = [i for i, healthy in enumerate(self._healthy) if healthy]
+        if not candidates:
+            return None
+        start = self._next
+        self._next = (self._next + 1) % len(self.upstreams)
+        return min(candidates, key=lambda i: (self._active[i], (i - start) % len(self.upstreams)))
+
+    def _bind_session(self, session_id: str, index: int):
+        self._sessions[session_id] = index
+        self._sessions.move_to_end(session_id)
+        while len(self._sessions) > MAX_SESSIONS:
+            self._sessions.popitem(last=False)
+
+    def _lookup_session(self, session_id: str) -> Optional[int]:
+        index = self._sessions.get(session_id)
+        if index is not None:
+            self._sessions.move_to_end(session_id)
+        return index
+
+    def _drop_worker_sessions(self, index: int) -> int:
+        stale = [session_id for session_id, worker in self._sessions.items() if worker == index]
+        for session_id in stale:
+            del self._sessions[session_id]
+        return len(stale)
+
+    @staticmethod
+    def _request_session(scope: Scope) -> Optional[str]:
+        """从请求头或查询参数中取会话ID"""
+        for name, value in scope["headers"]:
+            if name == SESSION_HEADER:
+                return value.decode("latin-1")
+        if scope["path"].endswith("/messages/"):
+            query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+            values = query.get("session_id")
+            if values:
+                return values[0]
+        return None
+
+    # ---- ASGI入口 ----
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+
+        path = scope["path"]
+        if path == "/health":
+            await self._health(send)
+            return
+        if path.startswith(CONTROL_PATH_PREFIX):
+            error = authorize_request(scope, self._expected_auth, allow_loopback=True)
+            if error:
+                await self._send_json(send, 401, {"message": error, "error": "unauthorized"})
+                return
+        if path == "/control/plugins/reload":
+            await self._broadcast(scope, receive, send)
+            return
+        if path == "/control/tools/stats":
+            await self._aggregate_stats(scope, send)
+            return
+
+        session_id = self._request_session(scope)
+        if session_id:
+            index = self._lookup_session(session_id)
+            if index is None:
+                await self._send_json(send, 404, {"error": "session_not_found",
+                                                  "message": "会话不存在或所在工作进程已重启，请重新初始化"})
+                return
+        else:
+            index = self._pick_worker()
+            if index is None:
+                await self._send_json(send, 503, {"error": "unavailable", "message": "没有可用的工作进程"})
+                return
+
+        await self._proxy(index, scope, receive, send, session_id)
+
+    async def _lifespan(self, receive: Receive, send: Send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    await self._startup()
+                except Exception as e:
+                    await send({"type": "lifespan.startup.failed", "message": str(e)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self._shutdown()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    # ---- 转发 ----
+
+    @staticmethod
+    async def _read_body(receive: Receive) -> Tuple[bytes, bool]:
+        """读取完整请求体，返回 (请求体, 客户端是否已断开)"""
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return b"".join(chunks), True
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                return b"".join(chunks), False
+
+    def _build_request(self, index: int, scope: Scope, body: bytes) -> httpx.Request:
+        raw_path = scope.get("raw_path") or scope["path"].encode("utf-8")
+        url = self.upstreams[index] + raw_path.decode("latin-1")
+        if scope.get("query_string"):
+            url += "?" + scope["query_string"].decode("latin-1")
+        headers = [(name, value) for name, value in scope["headers"] if name not in HOP_BY_HOP_HEADERS]
+        return self._client.build_request(scope["method"], url, headers=headers, content=body)
+
+    async def _proxy(self, index: int, scope: Scope, receive: Receive, send: Send,
+                     session_id: Optional[str]):
+        body, disconnected = await self._read_body(receive)
+        if disconnected:
+            return
+
+        method = scope["method"]
+        is_sse_stream = method == "GET" and scope["path"].rstrip("/") == "/sse"
+        self._active[index] += 1
+        try:
+            try:
+                response = await self._client.send(self._build_request(index, scope, body), stream=True)
+            except httpx.HTTPError as e:
+                logger.warning(f"转发到工作进程 {index} 失败: {e}")
+                await self._send_json(send, 502, {"error": "bad_gateway", "message": f"工作进程 {index} 不可用"})
+                return
+
+            try:
+                # 新建的Streamable HTTP会话
+                new_session = response.headers.get("mcp-session-id")
+                if new_session and new_session != session_id:
+                    self._bind_session(new_session, index)
+                if method == "DELETE" and session_id and response.status_code < 300:
+                    self._sessions.pop(session_id, None)
+
+                await send({
+                    "type": "http.response.start",
+                    "status": response.status_code,
+                    "headers": [(name, value) for name, value in response.headers.raw
+                                if name.lower() not in HOP_BY_HOP_HEADERS],
+                })
+                sse_session = await self._stream_body(response, receive, send, index, is_sse_stream)
+            finally:
+                await response.aclose()
+                if is_sse_stream and sse_session:
+                    self._sessions.pop(sse_session, None)
+        finally:
+            self._active[index] -= 1
+
+    async def _stream_body(self, response: httpx.Response, receive: Receive, send: Send,
+                           index: int, is_sse_stream: bool) -> Optional[str]:
+        """把上游响应体原样转发给客户端，客户端断开时停止；返回从SSE流中识别到的会话ID"""
+        sse_session: Optional[str] = None
+        pending = b""
+
+        async with anyio.create_task_group() as task_group:
+            async def watch_disconnect():
+                while True:
+                    message: Message = await receive()
+                    if message["type"] == "http.disconnect":
+                        task_group.cancel_scope.cancel()
+                        return
+
+            task_group.start_soon(watch_disconnect)
+            async for chunk in response.aiter_raw():
+                if is_sse_stream and sse_session is None:
+                    pending += chunk
+                    sse_session = self._find_sse_session(pending)
+                    if sse_session:
+                        self._bind_session(sse_session, index)
+                        pending = b""
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            task_group.cancel_scope.cancel()
+        return sse_session
+
+    @staticmethod
+    def _find_sse_session(data: bytes) -> Optional[str]:
+        marker = data.find(b"session_id=")
+        if marker < 0:
+            return None
+        end = marker + len(b"session_id=")
+        stop = end
+        while stop < len(data) and data[stop:stop + 1] not in (b"\r", b"\n", b"&"):
+            stop += 1
+        if stop == len(data):
+            # 会话ID可能还没有接收完整
+            return None
+        return data[end:stop].decode("latin-1")
+
+    # ---- 控制端点 ----
+
+    async def _broadcast(self, scope: Scope, receive: Receive, send: Send):
+        """把注册变更通知转发给所有工作进程"""
+        body, disconnected = await self._read_body(receive)
+        if disconnected:
+            return
+
+        async def forward(index: int):
+            try:
+                response = await self._client.send(self._build_request(index, scope, body))
+                return {"worker": index, "status": response.status_code, "result": response.json()}
+            except (httpx.HTTPError, ValueError) as e:
+                return {"worker": index, "status": None, "error": str(e)}
+
+        results = await asyncio.gather(*(forward(i) for i in range(len(self.upstreams))))
+        success = any(result["status"] == 200 for result in results)
+        await self._send_json(send, 200 if success else 502, {"success": success, "workers": results})
+
+    async def _aggregate_stats(self, scope: Scope, send: Send):
+        """汇总各工作进程的工具统计"""
+        async def fetch(index: int):
+            try:
+                response = await self._client.send(self._build_request(index, scope, b""))
+                return str(index), response.json()
+            except (httpx.HTTPError, ValueError) as e:
+                return str(index), {"error": str(e)}
+
+        workers = dict(await asyncio.gather(*(fetch(i) for i in range(len(self.upstreams)))))
+        await self._send_json(send, 200, {"workers": workers, "router": self.stats()})
+
+    async def _health(self, send: Send):
+        workers = await self._check_workers()
+        healthy = any(worker["healthy"] for worker in workers)
+        await self._send_json(send, 200 if healthy else 503, {
+            "status": "healthy" if healthy else "unhealthy",
+            "server": "mcp-router",
+            "workers": workers,
+            "sessions": len(self._sessions),
+        })
+
+    def stats(self) -> dict:
+        """路由统计"""
+        return {
+            "sessions": len(self._sessions),
+            "healthy": list(self._healthy),
+            "active_requests": list(self._active),
+        }
+
+    @staticmethod
+    async def _send_json(send: Send, status: int, payload: dict):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="MCP multi-worker router")
+    parser.add_argument("--host", default="0.0.0.0", help="Host to bind to")
+    parser.add_argument("--port", type=int, default=3111, help="Port to bind to")
+    parser.add_argument("--upstream", action="append", required=True,
+                        help="Worker base URL, repeat for each worker")
+    parser.add_argument("--health-interval", type=float, default=5, help="Worker health check interval")
+    parser.add_argument("--auth-token", help="Bearer token required on /control/ endpoints")
+    parser.add_argument("--log-level", default="INFO", help="Log level")
+    parser.add_argument("--log-file", help="Log file path")
+    args = parser.parse_args()
+
+    handlers = [logging.StreamHandler()]
+    if args.log_file:
+        try:
+            Path(args.log_file).parent.mkdir(parents=True, exist_ok=True)
+            handlers.append(logging.FileHandler(args.log_file, encoding="utf-8"))
+        except Exception as e:
+            print(f"设置日志文件失败: {str(e)}")
+    logging.basicConfig(
+        level=getattr(logging, args.log_level.upper(), logging.INFO),
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+        handlers=handlers,
+    )
+
+    import uvicorn
+
+    router = WorkerRouter(args.upstream, health_interval=args.health_interval, auth_token=args.auth_token)
+    logger.info(f"启动前置路由 - 监听于 {args.host}:{args.port}")
+    try:
+        uvicorn.run(router, host=args.host, port=args.port, log_level=args.log_level.lower(),
+                    timeout_keep_alive=120, lifespan="on")
+    except Exception as e:
+        logger.error(f"前置路由运行出错: {str(e)}")
+        logger.error(traceback.format_exc())
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())